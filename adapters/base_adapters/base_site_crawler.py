@@ -17,6 +17,7 @@ from requests.url_requester import AdvancedCrawler
 from stealth_crawler import StealthCrawler
 from local_crawler import AsyncWebCrawler, BrowserConfig
 from security.ssl_manager import get_ssl_manager
+from utils.debug_artifacts import DebugArtifactRecorder, get_debug_artifact_config
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +53,8 @@ class BaseSiteCrawler(StealthCrawler, ABC):
         self.crawler = AsyncWebCrawler(config=self.browser_config)
         self.ssl_manager = get_ssl_manager()
         self.web_crawler = AdvancedCrawler(use_selenium=True) if self.should_use_real else None
+        # Recent pages in memory; screenshots and HTML hit the disk only for failed or sampled searches
+        self.debug_artifacts = DebugArtifactRecorder(site_name, get_debug_artifact_config())
 
         # Request statistics
         self.request_count = 0
@@ -103,12 +106,22 @@ class BaseSiteCrawler(StealthCrawler, ABC):
             logger.error(f"Wait for element error: {e}")
             return False
 
-    async def _take_screenshot(self, name: str) -> None:
-        """Take screenshot for debugging"""
+    async def _page_content(self, url: str) -> str:
+        """Current page HTML, kept in the debug ring buffer"""
+        html = await self.crawler.content()
+        self.debug_artifacts.record_response(url, html)
+        return html
+
+    async def _capture_debug_artifacts(
+        self, search_params: Dict[str, Any], error: Optional[Exception] = None
+    ) -> None:
+        """Persist debug artifacts for a failed search, or a sampled successful one"""
         try:
-            await self.crawler.screenshot(path=f"debug_{self.site_name}_{name}.png")
+            await self.debug_artifacts.maybe_capture(
+                self.crawler, error=error, context={"search_params": search_params}
+            )
         except Exception as e:
-            logger.error(f"Screenshot error: {e}")
+            logger.warning(f"Debug artifact capture failed: {e}")
 
     async def check_rate_limit(self) -> bool:
         """Check rate limit for the site"""
@@ -8,7 +8,7 @@ import time
 import asyncio
 import json
 import hashlib
-from typing import Dict, List, Optional, Any, Callable, Union, Tuple
+from typing import Dict, List, Optional, Any, Callable, Union, Tuple, Set, Deque
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field, asdict
 from enum import Enum
@@ -35,6 +35,11 @@ try:
 except ImportError:
     CIRCUIT_BREAKER_INTEGRATION_AVAILABLE = False
 
+from utils.error_correlation import ErrorCorrelationIndex, message_fingerprint
+
+# Most recent severities kept per pattern
+SEVERITY_TREND_LENGTH = 100
+
 
 class ErrorSeverity(Enum):
     """Standardized error severity levels"""
@@ -200,8 +205,10 @@ class ErrorPattern:
     occurrences: int = 1
     first_seen: datetime = field(default_factory=datetime.now)
     last_seen: datetime = field(default_factory=datetime.now)
-    affected_adapters: List[str] = field(default_factory=list)
-    severity_trend: List[ErrorSeverity] = field(default_factory=list)
+    affected_adapters: Set[str] = field(default_factory=set)
+    severity_trend: Deque[ErrorSeverity] = field(
+        default_factory=lambda: deque(maxlen=SEVERITY_TREND_LENGTH)
+    )
     resolution_suggestions: List[str] = field(default_factory=list)
 
 
@@ -238,6 +245,19 @@ class EnhancedErrorHandler:
         self.circuit_config = self._load_circuit_config()
         self.max_records = self.config.get('max_records', 10000)
         self.correlation_threshold = self.config.get('correlation_threshold', 0.8)
+        self.pattern_detection_window = timedelta(
+            seconds=self.config.get('correlation_window_seconds', 600)
+        )
+        self.max_related_errors = self.config.get('max_related_errors', 20)
+        self.error_timeline: Deque[ErrorRecord] = deque(maxlen=self.max_records)
+        
+        # Correlation index keyed by (category, adapter, operation, fingerprint)
+        self.correlation_index = ErrorCorrelationIndex(
+            window_seconds=self.pattern_detection_window.total_seconds(),
+            bucket_seconds=self.config.get('correlation_bucket_seconds', 60),
+            per_key_capacity=self.config.get('correlation_per_key_capacity', 32),
+            max_links=self.max_related_errors,
+        )
         
         # Recovery strategies
         self.recovery_strategies: Dict[str, RecoveryStrategy] = {}
@@ -454,6 +474,9 @@ class EnhancedErrorHandler:
         """Store error and perform correlation analysis"""
         # Store error record
         self.error_records[error_record.error_id] = error_record
+        if len(self.error_records) > self.max_records:
+            # Dicts keep insertion order, so the first key is the oldest record
+            del self.error_records[next(iter(self.error_records))]
         self.error_timeline.append(error_record)
         
         # Update or create pattern
@@ -462,16 +485,16 @@ class EnhancedErrorHandler:
             pattern = self.error_patterns[pattern_hash]
             pattern.occurrences += 1
             pattern.last_seen = datetime.now()
-            pattern.affected_adapters.append(error_record.adapter_name)
+            pattern.affected_adapters.add(error_record.adapter_name)
             pattern.severity_trend.append(error_record.severity)
         else:
             pattern = ErrorPattern(
                 pattern_id=str(uuid.uuid4()),
                 pattern_hash=pattern_hash,
                 error_signature=f"{error_record.error_type}:{error_record.adapter_name}:{error_record.operation}",
-                affected_adapters=[error_record.adapter_name],
-                severity_trend=[error_record.severity]
+                affected_adapters={error_record.adapter_name},
             )
+            pattern.severity_trend.append(error_record.severity)
             self.error_patterns[pattern_hash] = pattern
             self.metrics['patterns_detected'] += 1
         
@@ -479,27 +502,28 @@ class EnhancedErrorHandler:
         await self._correlate_with_recent_errors(error_record)
 
     async def _correlate_with_recent_errors(self, error_record: ErrorRecord):
-        """Correlate error with recent errors to find patterns"""
-        recent_window = datetime.now() - self.pattern_detection_window
-        recent_errors = [
-            err for err in self.error_timeline 
-            if err.timestamp >= recent_window and err.error_id != error_record.error_id
-        ]
+        """Correlate error with recent errors through the correlation index"""
+        key = (
+            error_record.category.value,
+            error_record.adapter_name,
+            error_record.operation,
+            message_fingerprint(error_record.error_type, error_record.error_message),
+        )
+        # Without an adapter match the score tops out at 0.7
+        related = self.correlation_index.correlate(
+            key,
+            error_record,
+            self._calculate_correlation_score,
+            self.correlation_threshold,
+            timestamp=error_record.timestamp.timestamp(),
+            same_adapter_only=self.correlation_threshold > 0.7,
+        )
         
-        for recent_error in recent_errors:
-            correlation_score = self._calculate_correlation_score(
-                error_record, recent_error
-            )
-            
-            if correlation_score >= self.correlation_threshold:
-                # Add to correlation map
-                correlation_id = f"{error_record.error_id}:{recent_error.error_id}"
-                self.correlation_map[correlation_id].extend([
-                    error_record.error_id, recent_error.error_id
-                ])
-                
-                # Update related errors
+        for recent_error in related:
+            self.metrics['correlations_found'] += 1
+            if len(error_record.related_errors) < self.max_related_errors:
                 error_record.related_errors.append(recent_error.error_id)
+            if len(recent_error.related_errors) < self.max_related_errors:
                 recent_error.related_errors.append(error_record.error_id)
 
     def _calculate_correlation_score(
@@ -810,6 +834,7 @@ class EnhancedErrorHandler:
         return {
             'metrics': dict(self.metrics),
             'total_patterns': len(self.error_patterns),
+            'correlation': self.correlation_index.get_stats(),
             'circuit_breakers': {
                 key: {
                     'state': breaker['state'],
@@ -834,7 +859,7 @@ class EnhancedErrorHandler:
                 'pattern_id': pattern.pattern_id,
                 'error_signature': pattern.error_signature,
                 'occurrences': pattern.occurrences,
-                'affected_adapters': pattern.affected_adapters,
+                'affected_adapters': sorted(pattern.affected_adapters),
                 'first_seen': pattern.first_seen.isoformat(),
                 'last_seen': pattern.last_seen.isoformat(),
                 'resolution_suggestions': pattern.resolution_suggestions
@@ -916,7 +941,11 @@ class EnhancedErrorHandler:
 
     def clear_errors(self, adapter_name: str) -> None:
         """Remove stored errors for an adapter."""
-        self.error_timeline = [r for r in self.error_timeline if r.adapter_name != adapter_name]
+        self.error_timeline = deque(
+            (r for r in self.error_timeline if r.adapter_name != adapter_name),
+            maxlen=self.max_records,
+        )
+        self.correlation_index.remove_adapter(adapter_name)
         for key in list(self.error_records.keys()):
             if self.error_records[key].adapter_name == adapter_name:
                 del self.error_records[key]
@@ -925,6 +954,7 @@ class EnhancedErrorHandler:
         """Remove all stored errors."""
         self.error_records.clear()
         self.error_timeline.clear()
+        self.correlation_index.clear()
 
     async def reset_circuit_breaker(self, adapter_name: str, category: str = None):
         """Reset circuit breaker for adapter"""
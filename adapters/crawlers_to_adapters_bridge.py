@@ -199,6 +199,50 @@ class CrawlersToAdaptersBridge(UnifiedCrawlerInterface):
                 metadata=error_response
             )
     
+    def _pooled_crawler(self):
+        """The wrapped crawler when it runs concurrent searches on its own page pool."""
+        try:
+            from .base_adapters.enhanced_base_crawler import EnhancedBaseCrawler
+        except ImportError:
+            return None
+        if isinstance(self.crawler_instance, EnhancedBaseCrawler):
+            return self.crawler_instance
+        return None
+    
+    async def crawl_many(
+        self, params_list: List[SearchParameters], max_concurrency: Optional[int] = None
+    ) -> List[CrawlerResult]:
+        """
+        Crawl several searches, concurrently only on a page-pooled crawler.
+        
+        An ``EnhancedBaseCrawler`` gets the whole batch through its own
+        ``crawl_many``, which bounds it by its page pool; any other crawler
+        searches one at a time.
+        """
+        crawler = self._pooled_crawler()
+        if crawler is None:
+            return await super().crawl_many(params_list, max_concurrency)
+        
+        start_time = datetime.now()
+        self._notify_progress(f"Starting {len(params_list)} pooled searches...")
+        outcomes = await crawler.crawl_many(
+            [self._convert_params_to_crawlers_format(params) for params in params_list]
+        )
+        execution_time = (datetime.now() - start_time).total_seconds()
+        
+        results = []
+        for params, outcome in zip(params_list, outcomes):
+            if isinstance(outcome, Exception):
+                result = CrawlerResult(
+                    success=False, error=str(outcome), system_used=CrawlerSystemType.CRAWLERS
+                )
+            else:
+                result = self._convert_result_to_unified_format(outcome, params)
+            result.execution_time = execution_time
+            results.append(result)
+        self._notify_progress(f"{sum(1 for result in results if result.success)}/{len(results)} searches succeeded")
+        return results
+    
     def _convert_params_to_crawlers_format(self, params: SearchParameters) -> Dict[str, Any]:
         """Convert unified parameters to crawlers format."""
         crawlers_params = {
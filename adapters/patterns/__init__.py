@@ -101,11 +101,14 @@ from .command_pattern import (
     # Core command classes
     Command,
     CommandInvoker,
+    AsyncCommandInvoker,
+    AdapterPool,
     CommandResult,
     CommandContext,
     MacroCommand,
     # Specific command implementations
     CrawlSiteCommand,
+    BatchCrawlCommand,
     ValidateDataCommand,
     SaveDataCommand,
     # Enums
@@ -116,6 +119,7 @@ from .command_pattern import (
     create_validation_workflow,
     # Context managers and utilities
     command_invoker_context,
+    async_command_invoker_context,
     get_command_invoker,
 )
 
@@ -178,10 +182,13 @@ __all__ = [
     # Command Pattern
     "Command",
     "CommandInvoker",
+    "AsyncCommandInvoker",
+    "AdapterPool",
     "CommandResult",
     "CommandContext",
     "MacroCommand",
     "CrawlSiteCommand",
+    "BatchCrawlCommand",
     "ValidateDataCommand",
     "SaveDataCommand",
     "CommandStatus",
@@ -189,6 +196,7 @@ __all__ = [
     "create_crawl_and_save_workflow",
     "create_validation_workflow",
     "command_invoker_context",
+    "async_command_invoker_context",
     "get_command_invoker",
 ]
 
@@ -226,7 +234,12 @@ def get_pattern_info():
         },
         "command_pattern": {
             "description": "Operation encapsulation with queuing and undo capabilities",
-            "main_classes": ["CrawlSiteCommand", "CommandInvoker", "MacroCommand"],
+            "main_classes": [
+                "CrawlSiteCommand",
+                "CommandInvoker",
+                "AsyncCommandInvoker",
+                "MacroCommand",
+            ],
             "use_cases": [
                 "Crawling operations",
                 "Workflow management",
@@ -15,11 +15,16 @@ Allows flexible crawling workflow management with support for:
 - Progress tracking
 """
 
+import asyncio
+import heapq
+import inspect
+import itertools
 import threading
 import logging
 import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
 from typing import Dict, List, Any, Optional, Callable, Union, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
@@ -27,7 +32,7 @@ from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, Future
 from queue import PriorityQueue, Queue, Empty
 import json
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 
 logger = logging.getLogger(__name__)
@@ -119,6 +124,15 @@ class Command(ABC):
         """Execute the command."""
         pass
 
+    async def execute_async(self, **kwargs) -> CommandResult:
+        """
+        Execute the command from an event loop.
+
+        Commands without a native coroutine implementation fall back to
+        running ``execute`` in a worker thread so the loop is never blocked.
+        """
+        return await asyncio.to_thread(lambda: self.execute(**kwargs))
+
     def can_undo(self) -> bool:
         """Check if command can be undone."""
         return False
@@ -200,40 +214,164 @@ class CrawlSiteCommand(Command):
             logger.info(f"Starting crawl: {self.site_url} with {self.adapter_name}")
             results = adapter.search_flights(**self.search_params)
 
-            execution_time = time.time() - start_time
+            return self._build_result(results, time.time() - start_time)
 
-            return CommandResult(
-                success=True,
-                data=results,
-                execution_time=execution_time,
-                metadata={
-                    "site_url": self.site_url,
-                    "adapter_name": self.adapter_name,
-                    "search_params": self.search_params,
-                    "results_count": len(results) if results else 0,
-                },
-            )
+        except Exception as e:
+            logger.error(f"Crawl failed for {self.site_url}: {e}")
+            return self._build_error(e, time.time() - start_time)
+
+    async def execute_async(self, adapter: Any = None, **kwargs) -> CommandResult:
+        """
+        Execute crawling operation on the event loop.
+
+        Args:
+            adapter: Warm adapter instance leased from an ``AdapterPool``.
+                When omitted a new adapter is created through the factory
+                and closed after the crawl.
+        """
+        start_time = time.time()
+        owns_adapter = adapter is None
+
+        try:
+            if owns_adapter:
+                from adapters.factories.unified_adapter_factory import (
+                    get_unified_factory,
+                )
+
+                adapter = get_unified_factory().create_adapter(
+                    self.adapter_name, force_new=True
+                )
+                if not adapter:
+                    raise Exception(f"Failed to create adapter: {self.adapter_name}")
+                if hasattr(adapter, "__aenter__"):
+                    await adapter.__aenter__()
+
+            logger.info(f"Starting crawl: {self.site_url} with {self.adapter_name}")
+            results = await adapter.crawl(self.search_params)
+
+            return self._build_result(results, time.time() - start_time)
 
         except Exception as e:
-            execution_time = time.time() - start_time
             logger.error(f"Crawl failed for {self.site_url}: {e}")
+            return self._build_error(e, time.time() - start_time)
 
-            return CommandResult(
-                success=False,
-                error=e,
-                execution_time=execution_time,
-                metadata={
-                    "site_url": self.site_url,
-                    "adapter_name": self.adapter_name,
-                    "search_params": self.search_params,
-                },
-            )
+        finally:
+            if owns_adapter and adapter is not None and hasattr(adapter, "close"):
+                try:
+                    await adapter.close()
+                except Exception as e:
+                    logger.warning(f"Error closing adapter {self.adapter_name}: {e}")
+
+    def _build_result(self, results: Any, execution_time: float) -> CommandResult:
+        """Build a successful crawl result."""
+        return CommandResult(
+            success=True,
+            data=results,
+            execution_time=execution_time,
+            metadata={
+                "site_url": self.site_url,
+                "adapter_name": self.adapter_name,
+                "search_params": self.search_params,
+                "results_count": len(results) if results else 0,
+            },
+        )
+
+    def _build_error(self, error: Exception, execution_time: float) -> CommandResult:
+        """Build a failed crawl result."""
+        return CommandResult(
+            success=False,
+            error=error,
+            execution_time=execution_time,
+            metadata={
+                "site_url": self.site_url,
+                "adapter_name": self.adapter_name,
+                "search_params": self.search_params,
+            },
+        )
 
     def can_undo(self) -> bool:
         """Crawl operations generally cannot be undone."""
         return False
 
 
+class BatchCrawlCommand(Command):
+    """Command for crawling many departure dates on one site.
+
+    All dates run on the same adapter instance so browser startup, cookie
+    consent and landing-page loads are paid once per batch instead of once
+    per date.
+    """
+
+    def __init__(
+        self,
+        site_url: str,
+        adapter_name: str,
+        search_params: Dict[str, Any],
+        dates: List[str],
+        stop_on_failure: bool = False,
+        priority: CommandPriority = CommandPriority.NORMAL,
+    ):
+        super().__init__(
+            name=f"batch_crawl_{adapter_name}",
+            description=f"Crawl {len(dates)} dates on {site_url} with {adapter_name}",
+            priority=priority,
+        )
+        self.site_url = site_url
+        self.adapter_name = adapter_name
+        self.search_params = search_params
+        self.dates = list(dates)
+        self.stop_on_failure = stop_on_failure
+
+    def execute(self, **kwargs) -> CommandResult:
+        """Execute the batch on a private event loop."""
+        return asyncio.run(self.execute_async(**kwargs))
+
+    async def execute_async(self, adapter: Any = None, **kwargs) -> CommandResult:
+        """Crawl every date in sequence on a single adapter."""
+        start_time = time.time()
+        per_date: Dict[str, Dict[str, Any]] = {}
+
+        for departure_date in self.dates:
+            command = CrawlSiteCommand(
+                site_url=self.site_url,
+                adapter_name=self.adapter_name,
+                search_params={**self.search_params, "departure_date": departure_date},
+                priority=self.context.priority,
+            )
+            result = await command.execute_async(adapter=adapter, **kwargs)
+            per_date[departure_date] = {
+                "success": result.success,
+                "data": result.data,
+                "error": str(result.error) if result.error else None,
+                "execution_time": result.execution_time,
+            }
+            if not result.success and self.stop_on_failure:
+                logger.error(
+                    f"Batch crawl stopped at {departure_date} for {self.adapter_name}"
+                )
+                break
+
+        succeeded = sum(1 for r in per_date.values() if r["success"])
+        return CommandResult(
+            success=succeeded == len(self.dates),
+            data=per_date,
+            execution_time=time.time() - start_time,
+            metadata={
+                "site_url": self.site_url,
+                "adapter_name": self.adapter_name,
+                "total_dates": len(self.dates),
+                "successful_dates": succeeded,
+                "results_count": sum(
+                    len(r["data"]) for r in per_date.values() if r["data"]
+                ),
+            },
+        )
+
+    def can_retry(self) -> bool:
+        """Per-date failures are reported in the result; the batch is not rerun."""
+        return False
+
+
 class ValidateDataCommand(Command):
     """Command for validating crawled data."""
 
@@ -762,6 +900,474 @@ class CommandInvoker:
         logger.info("CommandInvoker shutdown completed")
 
 
+class AdapterPool:
+    """Per-site pool of warm adapter instances for asynchronous commands.
+
+    Adapters are created lazily through the unified factory, entered once
+    (browser, HTTP session and request batcher setup) and handed back to the
+    pool after each command instead of being torn down.
+    """
+
+    def __init__(
+        self,
+        adapter_factory: Optional[Callable[[str], Any]] = None,
+        max_per_site: int = 2,
+        max_idle_seconds: float = 300.0,
+    ):
+        self._adapter_factory = adapter_factory or self._create_from_factory
+        self.max_per_site = max_per_site
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: Dict[str, List[Tuple[float, Any]]] = defaultdict(list)
+        self._created: Dict[str, int] = defaultdict(int)
+        self._conditions: Dict[str, asyncio.Condition] = {}
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "expired": 0}
+        self._closed = False
+
+    @staticmethod
+    def _create_from_factory(site: str) -> Any:
+        from adapters.factories.unified_adapter_factory import get_unified_factory
+
+        return get_unified_factory().create_adapter(site, force_new=True)
+
+    def _condition(self, site: str) -> asyncio.Condition:
+        if site not in self._conditions:
+            self._conditions[site] = asyncio.Condition()
+        return self._conditions[site]
+
+    async def acquire(self, site: str) -> Any:
+        """Lease an adapter for ``site``, waiting if the site is at capacity."""
+        if self._closed:
+            raise RuntimeError("AdapterPool is closed")
+
+        condition = self._condition(site)
+        async with condition:
+            while True:
+                idle = self._idle[site]
+                while idle:
+                    released_at, adapter = idle.pop()
+                    if time.monotonic() - released_at <= self.max_idle_seconds:
+                        self._stats["reused"] += 1
+                        return adapter
+                    self._created[site] -= 1
+                    self._stats["expired"] += 1
+                    await self._close_adapter(site, adapter)
+
+                if self._created[site] < self.max_per_site:
+                    self._created[site] += 1
+                    break
+
+                await condition.wait()
+
+        try:
+            adapter = self._adapter_factory(site)
+            if inspect.isawaitable(adapter):
+                adapter = await adapter
+            if hasattr(adapter, "__aenter__"):
+                await adapter.__aenter__()
+        except Exception:
+            async with condition:
+                self._created[site] -= 1
+                condition.notify()
+            raise
+
+        self._stats["created"] += 1
+        logger.info(f"Created pooled adapter for {site}")
+        return adapter
+
+    async def release(self, site: str, adapter: Any, discard: bool = False) -> None:
+        """Return a leased adapter, closing it instead when ``discard`` is set."""
+        condition = self._condition(site)
+        if discard or self._closed:
+            await self._close_adapter(site, adapter)
+            self._stats["discarded"] += 1
+            async with condition:
+                self._created[site] -= 1
+                condition.notify()
+            return
+
+        async with condition:
+            self._idle[site].append((time.monotonic(), adapter))
+            condition.notify()
+
+    @asynccontextmanager
+    async def lease(self, site: str):
+        """Context manager that discards the adapter if the block raises."""
+        adapter = await self.acquire(site)
+        try:
+            yield adapter
+        except BaseException:
+            await self.release(site, adapter, discard=True)
+            raise
+        else:
+            await self.release(site, adapter)
+
+    async def _close_adapter(self, site: str, adapter: Any) -> None:
+        try:
+            if hasattr(adapter, "close"):
+                await adapter.close()
+            elif hasattr(adapter, "__aexit__"):
+                await adapter.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error closing pooled adapter for {site}: {e}")
+
+    async def close(self) -> None:
+        """Close every idle adapter and refuse further leases."""
+        self._closed = True
+        for site, idle in list(self._idle.items()):
+            while idle:
+                _, adapter = idle.pop()
+                self._created[site] -= 1
+                await self._close_adapter(site, adapter)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            **self._stats,
+            "sites": {
+                site: {"created": count, "idle": len(self._idle[site])}
+                for site, count in self._created.items()
+            },
+        }
+
+
+@dataclass(order=True)
+class _QueuedCommand:
+    """Priority queue entry for ``AsyncCommandInvoker``."""
+
+    priority: int
+    sequence: int
+    command: Command = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False, default_factory=dict)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+
+    @property
+    def site(self) -> Optional[str]:
+        return getattr(self.command, "adapter_name", None)
+
+
+class AsyncCommandInvoker:
+    """asyncio-native invoker with priorities, per-site caps and adapter reuse.
+
+    Commands are dispatched from a priority queue into tasks on the running
+    event loop. A global concurrency limit bounds total in-flight commands
+    and per-site limits keep any one site from monopolising the slots.
+    Commands that carry an ``adapter_name`` run on warm adapters leased from
+    an ``AdapterPool``; an adapter whose command failed is discarded rather
+    than returned. Failed commands are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        per_site_limits: Optional[Dict[str, int]] = None,
+        default_site_limit: int = 2,
+        adapter_pool: Optional[AdapterPool] = None,
+        history_size: int = 1000,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.per_site_limits = dict(per_site_limits or {})
+        self.default_site_limit = default_site_limit
+        self.adapter_pool = adapter_pool or AdapterPool(
+            max_per_site=max(
+                [default_site_limit, *self.per_site_limits.values()]
+            )
+        )
+        self.history_size = history_size
+        self.command_history: "OrderedDict[str, Command]" = OrderedDict()
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+        self._site_active: Dict[Optional[str], int] = defaultdict(int)
+        self._site_pending: Dict[Optional[str], List[_QueuedCommand]] = defaultdict(
+            list
+        )
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queued_ids: set = set()
+        self._cancelled: set = set()
+        self._outstanding: set = set()
+        self._retry_tasks: set = set()
+        self._shutdown = False
+
+    def _site_limit(self, site: Optional[str]) -> int:
+        if site is None:
+            return self.max_concurrency
+        return self.per_site_limits.get(site, self.default_site_limit)
+
+    async def start(self) -> None:
+        """Start the dispatcher on the running event loop."""
+        if self._dispatcher is not None:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        logger.info(
+            f"AsyncCommandInvoker started with concurrency {self.max_concurrency}"
+        )
+
+    async def submit(self, command: Command, **kwargs) -> "asyncio.Future[CommandResult]":
+        """Queue a command and return a future resolving to its result."""
+        if self._shutdown:
+            raise RuntimeError("AsyncCommandInvoker is shutdown")
+        await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._outstanding.add(future)
+        future.add_done_callback(self._outstanding.discard)
+        self._enqueue(
+            _QueuedCommand(
+                priority=command.context.priority.value,
+                sequence=next(self._sequence),
+                command=command,
+                kwargs=kwargs,
+                future=future,
+            )
+        )
+        return future
+
+    async def execute_command(self, command: Command, **kwargs) -> CommandResult:
+        """Queue a command and wait for its result."""
+        return await (await self.submit(command, **kwargs))
+
+    async def execute_many(self, commands: List[Command]) -> List[CommandResult]:
+        """Queue several commands and wait for all results in order."""
+        futures = [await self.submit(command) for command in commands]
+        return list(await asyncio.gather(*futures))
+
+    def _enqueue(self, item: _QueuedCommand) -> None:
+        self._queued_ids.add(item.command.context.command_id)
+        self._queue.put_nowait(item)
+
+    async def _dispatch_loop(self) -> None:
+        """Move commands from the priority queue into running tasks."""
+        while True:
+            await self._slots.acquire()
+            item = await self._queue.get()
+            if item.command is None:
+                self._slots.release()
+                break
+
+            command_id = item.command.context.command_id
+            self._queued_ids.discard(command_id)
+            if command_id in self._cancelled:
+                self._cancelled.discard(command_id)
+                self._finish_cancelled(item)
+                self._slots.release()
+                continue
+
+            if self._site_active[item.site] >= self._site_limit(item.site):
+                # Park until a command for the same site finishes; the slot
+                # goes back to commands for other sites meanwhile.
+                heapq.heappush(self._site_pending[item.site], item)
+                self._slots.release()
+                continue
+
+            self._launch(item)
+
+    def _launch(self, item: _QueuedCommand) -> None:
+        self._site_active[item.site] += 1
+        task = asyncio.create_task(self._run(item))
+        self._running[item.command.context.command_id] = task
+
+    async def _run(self, item: _QueuedCommand) -> None:
+        try:
+            await self._execute_item(item)
+        finally:
+            self._running.pop(item.command.context.command_id, None)
+            self._site_active[item.site] -= 1
+            pending = self._site_pending.get(item.site)
+            if pending:
+                # Hand the global slot straight to the next parked command.
+                self._launch(heapq.heappop(pending))
+            else:
+                self._slots.release()
+
+    async def _execute_item(self, item: _QueuedCommand) -> None:
+        command = item.command
+        command.context.status = CommandStatus.RUNNING
+        command.context.executed_at = datetime.now()
+
+        try:
+            if item.site is not None and self.adapter_pool is not None:
+                adapter = await self.adapter_pool.acquire(item.site)
+                failed = True
+                try:
+                    result = await self._call(command, adapter=adapter, **item.kwargs)
+                    failed = not result.success
+                finally:
+                    # Commands report errors as results; a failed one may have left the browser broken
+                    await self.adapter_pool.release(item.site, adapter, discard=failed)
+            else:
+                result = await self._call(command, **item.kwargs)
+        except asyncio.CancelledError:
+            command.context.status = CommandStatus.CANCELLED
+            command.context.completed_at = datetime.now()
+            result = CommandResult(success=False, error=Exception("Command cancelled"))
+            command.set_result(result)
+            self._record_history(command)
+            if not item.future.done():
+                item.future.set_result(result)
+            return
+        except Exception as e:
+            result = CommandResult(success=False, error=e)
+
+        command.context.completed_at = datetime.now()
+        if result.success:
+            command.context.status = CommandStatus.COMPLETED
+        else:
+            command.context.status = CommandStatus.FAILED
+            if command.can_retry() and not self._shutdown:
+                command.context.retry_count += 1
+                command.context.status = CommandStatus.RETRYING
+                logger.info(
+                    f"Retrying command: {command} (attempt {command.context.retry_count})"
+                )
+                self._schedule_retry(item)
+                return
+
+        command.set_result(result)
+        self._record_history(command)
+        if not item.future.done():
+            item.future.set_result(result)
+
+    def _retry_delay(self, retry_count: int) -> float:
+        return min(self.retry_max_delay, self.retry_base_delay * 2 ** (retry_count - 1))
+
+    def _schedule_retry(self, item: _QueuedCommand) -> None:
+        """Re-queue a failed command once its backoff delay has passed."""
+        delay = self._retry_delay(item.command.context.retry_count)
+        # Still counts as queued so it can be cancelled while backing off
+        self._queued_ids.add(item.command.context.command_id)
+        task = asyncio.create_task(self._enqueue_later(item, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _enqueue_later(self, item: _QueuedCommand, delay: float) -> None:
+        await asyncio.sleep(delay)
+        item.sequence = next(self._sequence)
+        self._enqueue(item)
+
+    async def _call(self, command: Command, **kwargs) -> CommandResult:
+        if command.context.timeout:
+            return await asyncio.wait_for(
+                command.execute_async(**kwargs), command.context.timeout
+            )
+        return await command.execute_async(**kwargs)
+
+    def _finish_cancelled(self, item: _QueuedCommand) -> None:
+        item.command.context.status = CommandStatus.CANCELLED
+        result = CommandResult(success=False, error=Exception("Command cancelled"))
+        item.command.set_result(result)
+        self._record_history(item.command)
+        if not item.future.done():
+            item.future.set_result(result)
+
+    def _record_history(self, command: Command) -> None:
+        if self.history_size <= 0:
+            return
+        self.command_history[command.context.command_id] = command
+        self.command_history.move_to_end(command.context.command_id)
+        while len(self.command_history) > self.history_size:
+            self.command_history.popitem(last=False)
+
+    def cancel_command(self, command_id: str) -> bool:
+        """Cancel a queued or running command."""
+        task = self._running.get(command_id)
+        if task is not None:
+            return task.cancel()
+        if command_id in self._queued_ids:
+            self._cancelled.add(command_id)
+            return True
+        for pending in self._site_pending.values():
+            for index, item in enumerate(pending):
+                if item.command.context.command_id == command_id:
+                    pending.pop(index)
+                    heapq.heapify(pending)
+                    self._finish_cancelled(item)
+                    return True
+        return False
+
+    def get_command_status(self, command_id: str) -> Optional[CommandStatus]:
+        """Get status of a command by ID."""
+        if command_id in self._running:
+            return CommandStatus.RUNNING
+        command = self.command_history.get(command_id)
+        if command is not None:
+            return command.context.status
+        if command_id in self._queued_ids:
+            return CommandStatus.PENDING
+        return None
+
+    def get_command_history(self, limit: int = 100) -> List[Command]:
+        """Get the most recent commands, oldest first."""
+        history = list(self.command_history.values())
+        return history[-limit:]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get execution statistics."""
+        history = list(self.command_history.values())
+        completed = sum(
+            1 for cmd in history if cmd.context.status == CommandStatus.COMPLETED
+        )
+        failed = sum(1 for cmd in history if cmd.context.status == CommandStatus.FAILED)
+        execution_times = [
+            cmd.context.elapsed_time()
+            for cmd in history
+            if cmd.context.elapsed_time() is not None
+        ]
+
+        return {
+            "total_commands": len(history),
+            "completed_commands": completed,
+            "failed_commands": failed,
+            "running_commands": len(self._running),
+            "queued_commands": self._queue.qsize() if self._queue else 0,
+            "parked_commands": sum(len(p) for p in self._site_pending.values()),
+            "active_by_site": {
+                site: count for site, count in self._site_active.items() if count
+            },
+            "success_rate": (completed / len(history) * 100) if history else 0,
+            "average_execution_time": (
+                sum(execution_times) / len(execution_times) if execution_times else 0
+            ),
+            "history_size": self.history_size,
+            "adapter_pool": self.adapter_pool.get_stats() if self.adapter_pool else {},
+        }
+
+    async def shutdown(self, wait: bool = True) -> None:
+        """Stop the dispatcher and close pooled adapters."""
+        logger.info("Shutting down AsyncCommandInvoker...")
+        if wait and self._outstanding:
+            await asyncio.gather(*list(self._outstanding), return_exceptions=True)
+        self._shutdown = True
+
+        if not wait:
+            for task in list(self._running.values()):
+                task.cancel()
+        for task in list(self._retry_tasks):
+            task.cancel()
+
+        if self._dispatcher is not None:
+            self._queue.put_nowait(
+                _QueuedCommand(priority=-1, sequence=-1, command=None)
+            )
+            await self._dispatcher
+            self._dispatcher = None
+
+        for future in list(self._outstanding):
+            if not future.done():
+                future.cancel()
+
+        if self.adapter_pool is not None:
+            await self.adapter_pool.close()
+        logger.info("AsyncCommandInvoker shutdown completed")
+
+
 # Utility functions for creating common command workflows
 
 
@@ -823,6 +1429,25 @@ def command_invoker_context(max_workers: int = 4, enable_history: bool = True):
         invoker.shutdown(wait=True)
 
 
+@asynccontextmanager
+async def async_command_invoker_context(
+    max_concurrency: int = 8,
+    per_site_limits: Optional[Dict[str, int]] = None,
+    history_size: int = 1000,
+):
+    """Async context manager for AsyncCommandInvoker lifecycle."""
+    invoker = AsyncCommandInvoker(
+        max_concurrency=max_concurrency,
+        per_site_limits=per_site_limits,
+        history_size=history_size,
+    )
+    await invoker.start()
+    try:
+        yield invoker
+    finally:
+        await invoker.shutdown(wait=True)
+
+
 # Singleton instance (optional)
 _command_invoker_instance = None
 _invoker_lock = threading.Lock()
@@ -30,6 +30,8 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 from config import config
+from utils.circuit_state import CircuitStateStore, get_circuit_state_store
+from utils.system_sampler import current_snapshot
 
 
 class RateLimitStrategy(Enum):
@@ -101,7 +103,13 @@ class AdaptiveRateLimiter:
     This class is kept for backward compatibility only.
     """
     
-    def __init__(self, site_id: str, config: AdaptiveConfig = None, redis_client=None):
+    def __init__(
+        self,
+        site_id: str,
+        config: AdaptiveConfig = None,
+        redis_client=None,
+        shared_state: Optional[CircuitStateStore] = None,
+    ):
         warnings.warn(
             "AdaptiveRateLimiter is deprecated. Use UnifiedRateLimiter from rate_limiter.py instead.",
             DeprecationWarning,
@@ -111,6 +119,7 @@ class AdaptiveRateLimiter:
         self.site_id = site_id
         self.config = config or AdaptiveConfig()
         self.redis_client = redis_client
+        self.shared_state = shared_state
         self.logger = logging.getLogger(__name__)
         
         # Current rate limits
@@ -146,6 +155,16 @@ class AdaptiveRateLimiter:
         """
         current_time = time.time()
         
+        # Circuit opened or backoff started by another worker
+        if self.shared_state is not None:
+            for name, reason in (
+                (self._shared_name("circuit"), "circuit_breaker_open"),
+                (self._shared_name("backoff"), "backoff_period"),
+            ):
+                shared = await self.shared_state.get(name)
+                if shared.blocks(self.shared_state.worker_id, current_time):
+                    return False, reason, shared.remaining(current_time)
+        
         # Check circuit breaker
         if self.circuit_open:
             if self._should_attempt_recovery(current_time):
@@ -230,7 +249,10 @@ class AdaptiveRateLimiter:
             
             # Check circuit breaker
             if self.metrics.consecutive_errors >= self.config.circuit_breaker_threshold:
+                was_open = self.circuit_open
                 self._open_circuit_breaker()
+                if not was_open:
+                    await self._share_hold("circuit", self.config.circuit_breaker_timeout, "circuit_breaker_open")
         
         # Update calculated metrics
         self._update_calculated_metrics()
@@ -288,6 +310,11 @@ class AdaptiveRateLimiter:
                 self._apply_rate_adjustment(new_rate)
                 self.last_adjustment = current_time
                 
+                if self.current_limits.backoff_seconds > 0:
+                    await self._share_hold(
+                        "backoff", self.current_limits.backoff_seconds, self.system_state.value
+                    )
+                
                 # Record adjustment
                 self.adjustment_history.append({
                     "timestamp": current_time.isoformat(),
@@ -329,6 +356,10 @@ class AdaptiveRateLimiter:
             # Gradual increase
             new_rate = current_rate * 1.05
         
+        if new_rate > current_rate and current_snapshot().overloaded:
+            # Never speed up while this host is overloaded
+            new_rate = current_rate
+        
         # Apply bounds
         new_rate = max(self.config.min_rate_per_second, 
                       min(self.config.max_rate_per_second, new_rate))
@@ -385,6 +416,14 @@ class AdaptiveRateLimiter:
             self.half_open_attempts = 0
             self.logger.warning(f"Circuit breaker opened for {self.site_id}")
     
+    def _shared_name(self, kind: str) -> str:
+        return f"adaptive_rate_limiter:{self.site_id}:{kind}"
+    
+    async def _share_hold(self, kind: str, seconds: float, reason: str):
+        """Make every worker honour this circuit or backoff period"""
+        if self.shared_state is not None:
+            await self.shared_state.trip(self._shared_name(kind), seconds, reason)
+    
     def _should_attempt_recovery(self, current_time: float) -> bool:
         """Check if we should attempt recovery from circuit breaker"""
         if not self.circuit_open or not self.circuit_open_time:
@@ -482,7 +521,8 @@ class AdaptiveRateLimitManager:
         """Get or create rate limiter for site"""
         if site_id not in self.limiters:
             self.limiters[site_id] = AdaptiveRateLimiter(
-                site_id, config or self.global_config, self.redis_client
+                site_id, config or self.global_config, self.redis_client,
+                shared_state=get_circuit_state_store()
             )
         return self.limiters[site_id]
     
@@ -19,6 +19,7 @@ from .enhanced_circuit_breaker import (
     RecoveryStrategy,
     get_circuit_breaker
 )
+from utils.circuit_state import CircuitStateStore, get_circuit_state_store
 
 # Define error categories locally to avoid import chain issues
 class ErrorCategory(Enum):
@@ -97,10 +98,12 @@ class IntegratedCircuitBreaker:
                  name: str, 
                  config: IntegratedCircuitBreakerConfig = None,
                  rate_limiter_callback: Optional[Callable] = None,
-                 error_handler_callback: Optional[Callable] = None):
+                 error_handler_callback: Optional[Callable] = None,
+                 shared_state: Optional[CircuitStateStore] = None):
         self.name = name
         self.config = config or IntegratedCircuitBreakerConfig()
         self.logger = logging.getLogger(f"{__name__}.{name}")
+        self.shared_state = shared_state
         
         # Create enhanced circuit breaker instances for different contexts
         self.rate_limiter_circuit = self._create_rate_limiter_circuit()
@@ -133,7 +136,9 @@ class IntegratedCircuitBreaker:
             enabled_failure_types=[FailureType.RATE_LIMIT, FailureType.TIMEOUT]
         )
         
-        circuit = EnhancedCircuitBreaker(f"{self.name}_rate_limiter", circuit_config)
+        circuit = EnhancedCircuitBreaker(
+            f"{self.name}_rate_limiter", circuit_config, shared_state=self.shared_state
+        )
         circuit.set_health_check_callback(self._rate_limiter_health_check)
         return circuit
     
@@ -146,7 +151,9 @@ class IntegratedCircuitBreaker:
             enabled_failure_types=[FailureType.UNKNOWN, FailureType.TIMEOUT, FailureType.NETWORK_ERROR]
         )
         
-        circuit = EnhancedCircuitBreaker(f"{self.name}_error_handler", circuit_config)
+        circuit = EnhancedCircuitBreaker(
+            f"{self.name}_error_handler", circuit_config, shared_state=self.shared_state
+        )
         circuit.set_health_check_callback(self._error_handler_health_check)
         return circuit
     
@@ -159,7 +166,9 @@ class IntegratedCircuitBreaker:
             enabled_failure_types=[FailureType.UNKNOWN, FailureType.NETWORK_ERROR, FailureType.TIMEOUT]
         )
         
-        circuit = EnhancedCircuitBreaker(f"{self.name}_adapter", circuit_config)
+        circuit = EnhancedCircuitBreaker(
+            f"{self.name}_adapter", circuit_config, shared_state=self.shared_state
+        )
         return circuit
     
     def _create_global_circuit(self) -> EnhancedCircuitBreaker:
@@ -171,7 +180,9 @@ class IntegratedCircuitBreaker:
             enabled_failure_types=list(FailureType)
         )
         
-        circuit = EnhancedCircuitBreaker(f"{self.name}_global", circuit_config)
+        circuit = EnhancedCircuitBreaker(
+            f"{self.name}_global", circuit_config, shared_state=self.shared_state
+        )
         return circuit
     
     async def _rate_limiter_health_check(self) -> bool:
@@ -383,7 +394,8 @@ class IntegratedCircuitBreakerManager:
         """Get or create integrated circuit breaker"""
         if name not in self.integrated_breakers:
             self.integrated_breakers[name] = IntegratedCircuitBreaker(
-                name, config, rate_limiter_callback, error_handler_callback
+                name, config, rate_limiter_callback, error_handler_callback,
+                shared_state=get_circuit_state_store()
             )
         return self.integrated_breakers[name]
     
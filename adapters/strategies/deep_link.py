@@ -0,0 +1,153 @@
+"""
+Deep-link search URLs.
+
+Many sites serve their results page straight from a query-string URL, so the
+navigate / page setup / form filling steps (and the selector probing in
+``AutomatedSearchFormStrategy``) cost several page loads for nothing.
+``DeepLinkBuilder`` turns search parameters into that URL from a
+``deep_link`` section in ``config/site_configs/<site>.json``::
+
+    "deep_link": {
+        "url": "https://www.alibaba.ir/flights/{origin}-{destination}",
+        "query": {"adult": "{adults}", "departing": "{departure_date}"},
+        "calendar": "jalali",
+        "date_format": "%Y-%m-%d"
+    }
+
+Path placeholders are required; query entries whose placeholder has no
+value are dropped. ``seat_classes`` and ``trip_types`` map the standard
+values to the site's codes, and ``trip_types`` also limits which trips the
+link supports. ``build`` returns None whenever the link cannot express the
+search, and the crawler falls back to the form flow. A site whose deep link
+keeps failing is switched back to the form flow for ``cooldown`` seconds.
+"""
+
+import logging
+import re
+import string
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Union
+from urllib.parse import quote, urlencode, urlsplit
+
+import jdatetime
+
+logger = logging.getLogger(__name__)
+
+_FORMATTER = string.Formatter()
+
+
+def format_search_date(value: Union[str, date, datetime], calendar: str = "gregorian", date_format: str = "%Y-%m-%d") -> str:
+    """Format a Gregorian search date in the site's calendar"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], "%Y-%m-%d").date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    if calendar == "jalali":
+        return jdatetime.date.fromgregorian(date=value).strftime(date_format)
+    return value.strftime(date_format)
+
+
+@dataclass
+class DeepLinkBuilder:
+    """Builds a site's results URL from search parameters"""
+    url: str
+    query: Dict[str, str] = field(default_factory=dict)
+    calendar: str = "gregorian"
+    date_format: str = "%Y-%m-%d"
+    seat_classes: Dict[str, str] = field(default_factory=dict)
+    trip_types: Dict[str, str] = field(default_factory=dict)
+    uppercase_airports: bool = True
+    max_failures: int = 3
+    cooldown: float = 3600.0
+
+    def __post_init__(self):
+        self._path_fields = {name for _, name, _, _ in _FORMATTER.parse(self.url) if name}
+        self._expected_path = urlsplit(self.url.split("{", 1)[0]).path
+        self.consecutive_failures = 0
+        self.disabled_until = 0.0
+        self.stats = {"built": 0, "unsupported": 0, "succeeded": 0, "failed": 0}
+
+    @classmethod
+    def from_site_config(cls, deep_link: Optional[Dict[str, Any]]) -> Optional["DeepLinkBuilder"]:
+        """Builder for a ``deep_link`` config section, or None when the site has none"""
+        if not deep_link or not deep_link.get("url"):
+            return None
+        known = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in deep_link.items() if key in known})
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.disabled_until
+
+    def _values(self, search_params: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        trip_type = search_params.get("trip_type") or ("round_trip" if search_params.get("return_date") else "one_way")
+        if self.trip_types and trip_type not in self.trip_types:
+            return None
+        seat_class = search_params.get("seat_class") or "economy"
+        if self.seat_classes and seat_class not in self.seat_classes:
+            return None
+
+        values: Dict[str, Any] = {
+            "origin": search_params.get("origin"),
+            "destination": search_params.get("destination"),
+            "adults": search_params.get("adults", search_params.get("passengers", 1)),
+            "children": search_params.get("children", 0),
+            "infants": search_params.get("infants", 0),
+            "passengers": search_params.get("passengers", 1),
+            "seat_class": self.seat_classes.get(seat_class, seat_class),
+            "trip_type": self.trip_types.get(trip_type, trip_type),
+        }
+        if self.uppercase_airports:
+            for key in ("origin", "destination"):
+                if values[key]:
+                    values[key] = str(values[key]).upper()
+        for key in ("departure_date", "return_date"):
+            raw = search_params.get(key)
+            values[key] = format_search_date(raw, self.calendar, self.date_format) if raw else None
+        return {key: str(value) for key, value in values.items() if value is not None and value != ""}
+
+    def build(self, search_params: Any) -> Optional[str]:
+        """Results URL for ``search_params`` (dict or ``SearchParameters``), or None to use the form"""
+        if hasattr(search_params, "to_adapters_format"):
+            search_params = search_params.to_adapters_format()
+        if not self.available:
+            return None
+        try:
+            values = self._values(search_params)
+        except ValueError as e:
+            logger.debug(f"Deep link skipped, unparseable search date: {e}")
+            values = None
+        if values is None or not self._path_fields.issubset(values):
+            self.stats["unsupported"] += 1
+            return None
+
+        url = self.url.format(**{key: quote(values[key], safe="") for key in self._path_fields})
+        query = {}
+        for name, template in self.query.items():
+            fields = {field_name for _, field_name, _, _ in _FORMATTER.parse(template) if field_name}
+            if fields.issubset(values):
+                query[name] = template.format(**values)
+        self.stats["built"] += 1
+        return f"{url}?{urlencode(query)}" if query else url
+
+    def matches(self, page_url: str) -> bool:
+        """False when the site redirected away from the results path (e.g. back to its home page)"""
+        return urlsplit(page_url).path.startswith(self._expected_path)
+
+    def record(self, success: bool) -> None:
+        """Track outcomes; repeated failures fall back to the form flow for ``cooldown``"""
+        if success:
+            self.consecutive_failures = 0
+            self.stats["succeeded"] += 1
+            return
+        self.consecutive_failures += 1
+        self.stats["failed"] += 1
+        if self.consecutive_failures >= self.max_failures:
+            self.disabled_until = time.monotonic() + self.cooldown
+            self.consecutive_failures = 0
+            logger.warning(f"Deep link {self.url} disabled for {self.cooldown:.0f}s after repeated failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "available": self.available}
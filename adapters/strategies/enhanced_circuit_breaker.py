@@ -8,7 +8,7 @@ import logging
 import time
 import math
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, Union
+from typing import Dict, List, Optional, Any, Callable, Set, Union
 from dataclasses import dataclass, field
 from collections import deque, defaultdict
 from enum import Enum
@@ -24,6 +24,12 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 from config import config
+from utils.circuit_state import (
+    CLOSED as SHARED_CLOSED,
+    CircuitStateStore,
+    SharedCircuitState,
+    get_circuit_state_store,
+)
 
 
 class CircuitState(Enum):
@@ -103,11 +109,22 @@ class CircuitMetrics:
 class EnhancedCircuitBreaker:
     """Enhanced circuit breaker with intelligent failure detection and recovery"""
     
-    def __init__(self, name: str, config: CircuitBreakerConfig = None):
+    def __init__(
+        self,
+        name: str,
+        config: CircuitBreakerConfig = None,
+        shared_state: Optional[CircuitStateStore] = None,
+    ):
         self.name = name
         self.config = config or CircuitBreakerConfig()
         self.logger = logging.getLogger(__name__)
         
+        # Fleet-wide open/half-open state shared with other workers
+        self.shared_state = shared_state
+        self._shared_version = 0
+        # Shared-state writes started from sync code, kept until they finish
+        self._shared_tasks: Set[asyncio.Task] = set()
+        
         # Circuit state
         self.state = CircuitState.CLOSED
         self.state_changed_time = datetime.now()
@@ -170,6 +187,11 @@ class EnhancedCircuitBreaker:
     
     async def _can_execute(self) -> bool:
         """Check if request can be executed based on current circuit state"""
+        if self.shared_state is not None:
+            verdict = await self._check_shared_state()
+            if verdict is not None:
+                return verdict
+        
         with self.lock:
             current_time = datetime.now()
             
@@ -203,6 +225,49 @@ class EnhancedCircuitBreaker:
             
             return False
     
+    async def _check_shared_state(self) -> Optional[bool]:
+        """Apply the fleet-wide state; None defers to the local state machine"""
+        shared = await self.shared_state.get(self.name)
+        now = time.time()
+        
+        if shared.state == SHARED_CLOSED:
+            if self.state != CircuitState.CLOSED and shared.version > self._shared_version:
+                # Another worker's probe succeeded
+                self._shared_version = shared.version
+                await self._transition_to_closed(f"closed by {shared.origin}", publish=False)
+            return None
+        
+        if shared.blocks(self.shared_state.worker_id, now):
+            if self.state != CircuitState.OPEN:
+                self._adopt_shared_open(shared, now)
+            return False
+        
+        if shared.probe_available(now):
+            if await self.shared_state.claim_probe(self.name, self.config.max_half_open_duration):
+                self._shared_version = self.shared_state.cached(self.name).version
+                await self._transition_to_half_open()
+                return None
+            return False
+        
+        # Half-open with this worker holding the probe
+        return None
+    
+    def _adopt_shared_open(self, shared: SharedCircuitState, now: float):
+        """Open locally because another worker opened the circuit"""
+        with self.lock:
+            self.state = CircuitState.OPEN
+            self.state_changed_time = datetime.now()
+            self.current_recovery_timeout = shared.remaining(now)
+            self.metrics.state_changes += 1
+            self.half_open_attempts = 0
+            self.half_open_successes = 0
+            self.half_open_start_time = None
+            self._shared_version = shared.version
+        self.logger.warning(
+            f"Circuit breaker '{self.name}' opened by {shared.origin}: {shared.reason} "
+            f"(recovery in {self.current_recovery_timeout:.1f}s)"
+        )
+    
     def _classify_failure(self, exception: Exception) -> FailureType:
         """Classify the type of failure based on exception"""
         exception_str = str(exception).lower()
@@ -310,7 +375,7 @@ class EnhancedCircuitBreaker:
         
         return False
     
-    async def _transition_to_open(self, reason: str):
+    async def _transition_to_open(self, reason: str, publish: bool = True):
         """Transition circuit to open state"""
         if self.state != CircuitState.OPEN:
             old_state = self.state
@@ -330,6 +395,11 @@ class EnhancedCircuitBreaker:
                 f"Circuit breaker '{self.name}' opened: {reason} "
                 f"(was {old_state.value}, recovery in {self.current_recovery_timeout}s)"
             )
+            
+            if publish and self.shared_state is not None:
+                shared = await self.shared_state.trip(self.name, self.current_recovery_timeout, reason)
+                if shared is not None:
+                    self._shared_version = shared.version
     
     async def _transition_to_half_open(self):
         """Transition circuit to half-open state"""
@@ -349,7 +419,7 @@ class EnhancedCircuitBreaker:
                 f"(was {old_state.value}, attempting recovery)"
             )
     
-    async def _transition_to_closed(self, reason: str):
+    async def _transition_to_closed(self, reason: str, publish: bool = True):
         """Transition circuit to closed state"""
         if self.state != CircuitState.CLOSED:
             old_state = self.state
@@ -370,6 +440,11 @@ class EnhancedCircuitBreaker:
                 f"Circuit breaker '{self.name}' closed: {reason} "
                 f"(was {old_state.value})"
             )
+            
+            if publish and self.shared_state is not None:
+                shared = await self.shared_state.close(self.name, reason)
+                if shared is not None:
+                    self._shared_version = shared.version
     
     def _calculate_recovery_timeout(self):
         """Calculate recovery timeout based on strategy"""
@@ -466,7 +541,12 @@ class EnhancedCircuitBreaker:
                 }
                 for f in list(self.failure_history)[-5:]  # Last 5 failures
             ],
-            "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None
+            "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None,
+            "shared_state": (
+                self.shared_state.cached(self.name).to_dict()
+                if self.shared_state is not None and self.shared_state.cached(self.name) is not None
+                else None
+            )
         }
     
     def reset(self):
@@ -484,6 +564,22 @@ class EnhancedCircuitBreaker:
             self.current_recovery_timeout = self.config.recovery_timeout
             
             self.logger.info(f"Circuit breaker '{self.name}' reset")
+        
+        if self.shared_state is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(
+                    self.shared_state.close(self.name, "manual reset")
+                )
+            except RuntimeError:
+                # No running loop; the shared state keeps its own expiry
+                return
+            self._shared_tasks.add(task)
+            task.add_done_callback(self._shared_tasks.discard)
+
+    async def wait_shared_writes(self) -> None:
+        """Wait until shared-state writes started by ``reset`` have finished"""
+        if self._shared_tasks:
+            await asyncio.gather(*list(self._shared_tasks), return_exceptions=True)
 
 
 class CircuitBreakerOpenError(Exception):
@@ -501,7 +597,9 @@ class CircuitBreakerManager:
     def get_circuit_breaker(self, name: str, config: CircuitBreakerConfig = None) -> EnhancedCircuitBreaker:
         """Get or create circuit breaker"""
         if name not in self.circuit_breakers:
-            self.circuit_breakers[name] = EnhancedCircuitBreaker(name, config)
+            self.circuit_breakers[name] = EnhancedCircuitBreaker(
+                name, config, shared_state=get_circuit_state_store()
+            )
         return self.circuit_breakers[name]
     
     async def call_with_circuit_breaker(self, name: str, func: Callable, *args, **kwargs) -> Any:
@@ -16,9 +16,10 @@ import logging
 from contextlib import asynccontextmanager
 import statistics
 from collections import deque, defaultdict
-import psutil
 import gc
 
+from utils.system_sampler import SystemSnapshot, current_snapshot
+
 try:
     import aioredis
     REDIS_AVAILABLE = True
@@ -371,20 +372,15 @@ class SystemMonitor:
         self.error_counts = deque(maxlen=100)
         self.last_system_check = datetime.now()
     
+    def get_snapshot(self) -> SystemSnapshot:
+        """Latest background sample of CPU, memory, connections and loop lag"""
+        return current_snapshot()
+    
     async def get_system_load(self) -> float:
-        """Get current system load (0.0 to 1.0)"""
+        """Get current system load (0.0 to 1.0) without blocking the loop"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            
-            # Average load
-            system_load = (cpu_percent + memory_percent) / 200.0
-            return min(system_load, 1.0)
-        except:
+            return self.get_snapshot().load
+        except Exception:
             return 0.5  # Default moderate load
     
     async def get_error_rate(self) -> float:
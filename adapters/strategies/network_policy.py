@@ -0,0 +1,350 @@
+"""
+Browser network policy.
+
+``EnhancedBaseCrawler`` used to route ``**/*`` through a Python handler that
+aborted by resource type, so every script, XHR and beacon made a round trip
+to Python and trackers still loaded. ``NetworkPolicy`` registers only glob
+patterns on the browser context. Playwright matches them in the browser, so
+only requests that are going to be aborted reach Python at all. There are
+three sets of patterns:
+
+- static: file extensions of the blocked resource types, known trackers and
+  ad networks, and any ``block_patterns`` from the site config;
+- learned: third-party hosts the site does not need. A host counts as needed
+  once it served data (document, XHR or fetch responses before extraction
+  started) in at least ``min_support`` of the crawls that did not fail
+  during learning; hosts that only load scripts, pixels or beacons never
+  do, however often they appear. After ``learn_after`` such crawls every
+  other third-party host observed so far is blocked. If crawls then keep
+  failing, learning starts over and the hosts that were blocked are kept
+  unblocked from then on;
+- ``allow_domains`` from the site config are never blocked.
+
+``PageNetworkTracker`` counts the hosts, requests and bytes of each crawl. It
+uses a CDP session (exact encoded bytes) when the browser is Chromium and
+falls back to ``Content-Length`` otherwise. ``get_network_policy`` keeps one
+policy per site so what is learned survives crawler restarts within the
+process.
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "stylesheet": ["css"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m4a"],
+}
+
+# Responses that carry search results to the page
+DATA_RESOURCE_TYPES = frozenset({"document", "xhr", "fetch"})
+
+# Analytics, ads, chat widgets and push services seen on Iranian and international travel sites
+TRACKER_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "mc.yandex.ru",
+    "yektanet.com",
+    "mediaad.org",
+    "najva.com",
+    "pushe.co",
+    "goftino.com",
+    "raychat.io",
+    "sentry.io",
+]
+
+_MULTI_LABEL_SUFFIXES = {"co", "com", "org", "net", "ac", "gov", "edu"}
+
+
+def registrable_domain(host: str) -> str:
+    """``www.alibaba.ir`` -> ``alibaba.ir``; keeps three labels for ``*.co.uk``-style suffixes"""
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) > 2 and labels[-2] in _MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def resource_type_patterns(resource_types: List[str]) -> List[str]:
+    """Context route globs for the file extensions of ``resource_types``"""
+    extensions = [ext for kind in resource_types for ext in RESOURCE_TYPE_EXTENSIONS.get(kind, [])]
+    if not extensions:
+        return []
+    group = "{" + ",".join(extensions) + "}"
+    return [f"**/*.{group}", f"**/*.{group}?*"]
+
+
+def host_patterns(host: str) -> List[str]:
+    """Context route globs for ``host`` and its subdomains"""
+    return [f"*://{host}/**", f"*://*.{host}/**"]
+
+
+@dataclass
+class NetworkPolicyConfig:
+    """Site network policy, from the crawler config and the ``network_policy`` site section"""
+    first_party_domains: List[str] = field(default_factory=list)
+    blocked_resources: List[str] = field(default_factory=lambda: ["image", "stylesheet", "font", "media"])
+    block_trackers: bool = True
+    block_patterns: List[str] = field(default_factory=list)
+    allow_domains: List[str] = field(default_factory=list)
+    learn: bool = True
+    learn_after: int = 5
+    min_support: float = 0.6
+    max_enforced_failures: int = 3
+    max_observed_hosts: int = 500
+
+    @classmethod
+    def from_crawler_config(cls, crawler_config: Any) -> "NetworkPolicyConfig":
+        section = dict(getattr(crawler_config, "network_policy", None) or {})
+        first_party = section.pop("first_party_domains", None) or [
+            registrable_domain(urlsplit(url).hostname)
+            for url in (crawler_config.base_url, crawler_config.search_url)
+            if url and urlsplit(url).hostname
+        ]
+        known = cls.__dataclass_fields__
+        return cls(
+            first_party_domains=sorted(set(first_party)),
+            blocked_resources=list(crawler_config.blocked_resources) if crawler_config.block_resources else [],
+            **{key: value for key, value in section.items() if key in known},
+        )
+
+
+class PageNetworkTracker:
+    """Hosts, requests and bytes of the current crawl on one page"""
+
+    def __init__(self, policy: "NetworkPolicy"):
+        self.policy = policy
+        self.page = None
+        self.cdp_session = None
+        self._hosts_by_request: Dict[str, str] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.hosts: Set[str] = set()
+        self.data_hosts: Set[str] = set()
+        self.extracting = False
+        self.requests = 0
+        self.bytes = 0
+        self.bytes_by_host: Counter = Counter()
+        self.requests_by_type: Counter = Counter()
+        self._hosts_by_request.clear()
+
+    async def attach(self, page: Any) -> "PageNetworkTracker":
+        self.page = page
+        try:
+            self.cdp_session = await page.context.new_cdp_session(page)
+            await self.cdp_session.send("Network.enable")
+            self.cdp_session.on("Network.responseReceived", self._on_cdp_response)
+            self.cdp_session.on("Network.loadingFinished", self._on_cdp_finished)
+        except Exception as e:
+            # Not Chromium: fall back to Content-Length from response events
+            logger.debug(f"CDP network accounting unavailable: {e}")
+            self.cdp_session = None
+            page.on("response", self._on_response)
+        return self
+
+    async def detach(self) -> None:
+        if self.cdp_session is not None:
+            try:
+                await self.cdp_session.detach()
+            except Exception:
+                pass
+            self.cdp_session = None
+        elif self.page is not None:
+            try:
+                self.page.remove_listener("response", self._on_response)
+            except Exception:
+                pass
+        self.page = None
+
+    def start_extraction(self) -> None:
+        """Results are on the page; later responses did not feed them"""
+        self.extracting = True
+
+    def _count(self, host: str, resource_type: str) -> None:
+        self.requests += 1
+        self.requests_by_type[resource_type] += 1
+        if host:
+            self.hosts.add(host)
+            if resource_type in DATA_RESOURCE_TYPES and not self.extracting:
+                self.data_hosts.add(host)
+
+    def _on_cdp_response(self, event: Dict[str, Any]) -> None:
+        host = urlsplit(event["response"]["url"]).hostname or ""
+        self._hosts_by_request[event["requestId"]] = host
+        self._count(host, str(event.get("type", "other")).lower())
+
+    def _on_cdp_finished(self, event: Dict[str, Any]) -> None:
+        host = self._hosts_by_request.pop(event["requestId"], None)
+        if host is None:
+            return
+        size = int(event.get("encodedDataLength", 0))
+        self.bytes += size
+        self.bytes_by_host[host] += size
+
+    def _on_response(self, response: Any) -> None:
+        host = urlsplit(response.url).hostname or ""
+        self._count(host, response.request.resource_type)
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except ValueError:
+            size = 0
+        self.bytes += size
+        self.bytes_by_host[host] += size
+
+
+class NetworkPolicy:
+    """Blocking patterns and learned third-party blocklist for one site"""
+
+    def __init__(self, site: str, config: NetworkPolicyConfig):
+        self.site = site
+        self.config = config
+        self.successes = 0
+        self.host_support: Counter = Counter()
+        self.observed_hosts: Set[str] = set()
+        self.learned_blocklist: Set[str] = set()
+        self.kept_hosts: Set[str] = set()  # Blocked when crawls kept failing
+        self.enforced_failures = 0
+        self._applied: "WeakKeyDictionary[Any, Set[str]]" = WeakKeyDictionary()
+        self.stats = {"crawls": 0, "requests": 0, "bytes": 0, "blocked": 0, "relearns": 0}
+        self.bytes_by_host: Counter = Counter()
+
+    def is_first_party(self, host: str) -> bool:
+        host = host.lower()
+        return any(host == domain or host.endswith("." + domain) for domain in self.config.first_party_domains)
+
+    def _is_allowed(self, host: str) -> bool:
+        if self.is_first_party(host):
+            return True
+        return any(host == domain or host.endswith("." + domain) for domain in self.config.allow_domains)
+
+    def static_patterns(self) -> List[str]:
+        patterns = resource_type_patterns(self.config.blocked_resources)
+        if self.config.block_trackers:
+            for domain in TRACKER_DOMAINS:
+                if not self._is_allowed(domain):
+                    patterns.extend(host_patterns(domain))
+        patterns.extend(self.config.block_patterns)
+        return patterns
+
+    def block_patterns(self) -> List[str]:
+        """Every glob currently blocked for this site"""
+        patterns = self.static_patterns()
+        for host in sorted(self.learned_blocklist):
+            patterns.append(f"*://{host}/**")
+        return list(dict.fromkeys(patterns))
+
+    async def apply(self, context: Any) -> int:
+        """Bring ``context``'s routes in line with ``block_patterns``; returns routes changed"""
+        applied = self._applied.setdefault(context, set())
+        wanted = set(self.block_patterns())
+        changed = 0
+        for pattern in applied - wanted:
+            await context.unroute(pattern, self._abort)
+            changed += 1
+        for pattern in wanted - applied:
+            await context.route(pattern, self._abort)
+            changed += 1
+        self._applied[context] = wanted
+        return changed
+
+    async def _abort(self, route: Any, request: Any = None) -> None:
+        self.stats["blocked"] += 1
+        try:
+            await route.abort()
+        except Exception as e:
+            logger.debug(f"Route abort failed for {self.site}: {e}")
+
+    async def attach(self, page: Any) -> PageNetworkTracker:
+        """Start byte and host accounting on ``page``"""
+        return await PageNetworkTracker(self).attach(page)
+
+    def finish_crawl(self, tracker: PageNetworkTracker, success: bool) -> bool:
+        """
+        Fold one crawl into the site totals and learning; True when the blocklist changed.
+
+        ``success`` means the crawl did not fail - a search with no flights
+        still counts - so empty routes do not trigger relearning.
+        """
+        self.stats["crawls"] += 1
+        self.stats["requests"] += tracker.requests
+        self.stats["bytes"] += tracker.bytes
+        self.bytes_by_host.update(tracker.bytes_by_host)
+        third_party = {host for host in tracker.hosts if not self._is_allowed(host)}
+        data_hosts = third_party & tracker.data_hosts
+        tracker.reset()
+        if not self.config.learn:
+            return False
+
+        before = set(self.learned_blocklist)
+        if success:
+            self.enforced_failures = 0
+            self.successes += 1
+            self.host_support.update(data_hosts)
+        elif self.learned_blocklist:
+            self.enforced_failures += 1
+            if self.enforced_failures >= self.config.max_enforced_failures:
+                logger.warning(
+                    f"{self.site}: {self.enforced_failures} failed crawls with learned blocklist, relearning"
+                )
+                self.kept_hosts |= self.learned_blocklist
+                self.relearn()
+                return True
+
+        for host in third_party:
+            if len(self.observed_hosts) >= self.config.max_observed_hosts:
+                break
+            self.observed_hosts.add(host)
+        if self.successes >= self.config.learn_after:
+            needed = {
+                host for host, count in self.host_support.items()
+                if count / self.successes >= self.config.min_support
+            }
+            self.learned_blocklist = self.observed_hosts - needed - self.kept_hosts
+        return self.learned_blocklist != before
+
+    def relearn(self) -> None:
+        self.successes = 0
+        self.host_support.clear()
+        self.observed_hosts.clear()
+        self.learned_blocklist.clear()
+        self.enforced_failures = 0
+        self.stats["relearns"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        crawls = self.stats["crawls"]
+        return {
+            **self.stats,
+            "bytes_per_crawl": round(self.stats["bytes"] / crawls) if crawls else 0,
+            "top_hosts_by_bytes": self.bytes_by_host.most_common(10),
+            "learning": self.successes < self.config.learn_after,
+            "learned_blocklist": sorted(self.learned_blocklist),
+            "kept_hosts": sorted(self.kept_hosts),
+            "patterns": len(self.block_patterns()),
+        }
+
+
+_network_policies: Dict[str, NetworkPolicy] = {}
+
+
+def get_network_policy(site: str, config: Optional[NetworkPolicyConfig] = None) -> NetworkPolicy:
+    """Process-wide policy for ``site``; a given config replaces the previous one"""
+    policy = _network_policies.get(site)
+    if policy is None:
+        policy = _network_policies[site] = NetworkPolicy(site, config or NetworkPolicyConfig())
+    elif config is not None:
+        policy.config = config
+    return policy
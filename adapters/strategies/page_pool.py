@@ -0,0 +1,123 @@
+"""
+Page pool for concurrent searches in one browser context.
+
+An adapter used to run every search on its single ``self.page``, so crawling
+fifteen dates of a route either ran them one after another or launched more
+browsers. ``PagePool`` hands out up to ``size`` pages of the crawler's
+context. The pages share cookies, HTTP cache and the warmed-up session, and
+more are opened lazily as concurrent searches need them.
+
+Adapter code keeps using ``self.page``. The crawler resolves it (together
+with the per-page readiness waiter and network tracker) through
+``bound_slot``, a context variable set for the task running a crawl, so
+concurrent ``crawl`` calls each see their own page without any changes to
+site adapters.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class PageSlot:
+    """A page plus the per-page helpers and state one search needs"""
+    page: Any = None
+    result_readiness: Any = None
+    network_tracker: Any = None
+    debug_artifacts: Any = None
+    current_url: Optional[str] = None
+    failed_step: Optional[str] = None  # Last site-facing step of the crawl that failed
+
+
+_bound_slot: ContextVar[Optional[Tuple[Any, PageSlot]]] = ContextVar("bound_page_slot", default=None)
+
+
+def bound_slot(owner: Any) -> Optional[PageSlot]:
+    """The slot bound to ``owner`` in the running task, if any"""
+    bound = _bound_slot.get()
+    if bound is not None and bound[0] is owner:
+        return bound[1]
+    return None
+
+
+@contextmanager
+def bind_slot(owner: Any, slot: PageSlot) -> Iterator[PageSlot]:
+    """Make ``slot`` the page ``owner`` works on inside this task"""
+    token = _bound_slot.set((owner, slot))
+    try:
+        yield slot
+    finally:
+        _bound_slot.reset(token)
+
+
+class PagePool:
+    """Bounded set of pages in one context, opened on demand"""
+
+    def __init__(self, factory: Callable[[], Awaitable[PageSlot]], size: int = 3):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self._slots: List[PageSlot] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._opening = 0
+        self.stats = {"leases": 0, "waits": 0, "opened": 0, "discarded": 0}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def reset(self, slots: Optional[List[PageSlot]] = None) -> None:
+        """Forget every page and start over with ``slots`` (e.g. the crawler's first page)"""
+        self._slots = []
+        self._idle = asyncio.Queue()
+        for slot in slots or []:
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+
+    def clear(self) -> List[PageSlot]:
+        """Empty the pool; returns the slots so the caller can close their pages"""
+        slots = self._slots
+        self.reset()
+        return slots
+
+    async def acquire(self) -> PageSlot:
+        if self._idle.empty() and len(self._slots) + self._opening < self.size:
+            self._opening += 1
+            try:
+                slot = await self.factory()
+            finally:
+                self._opening -= 1
+            self._slots.append(slot)
+            self.stats["opened"] += 1
+        else:
+            if self._idle.empty():
+                self.stats["waits"] += 1
+            slot = await self._idle.get()
+        self.stats["leases"] += 1
+        return slot
+
+    def release(self, slot: PageSlot) -> None:
+        if slot not in self._slots:
+            return
+        is_closed = getattr(slot.page, "is_closed", None)
+        if callable(is_closed) and is_closed():
+            # Crashed or closed by the site; the next lease opens a fresh page
+            self._slots.remove(slot)
+            self.stats["discarded"] += 1
+            return
+        self._idle.put_nowait(slot)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PageSlot]:
+        slot = await self.acquire()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "size": self.size, "open": len(self._slots), "idle": self._idle.qsize()}
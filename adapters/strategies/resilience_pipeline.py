@@ -0,0 +1,335 @@
+"""
+Fused resilience pipeline.
+
+A crawl step used to pass through the unified rate limiter, the integrated
+circuit breaker (four ``EnhancedCircuitBreaker`` instances per site), the
+backoff manager and the error handler, each taking its own lock, recording
+its own metrics and building its own dicts. ``ResiliencePipeline`` keeps
+everything one site needs - token bucket, circuit, retry budget and counters -
+in a single slotted ``SiteResilienceState`` and decides rate limit, circuit
+state, retry budget and backoff delay in one pass over it. ``admit``,
+``record`` and ``retry_delay`` are plain synchronous calls with no locks: the
+state is only touched from the event loop thread.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from .enhanced_circuit_breaker import CircuitBreakerOpenError
+from utils.circuit_state import CircuitStateStore, get_circuit_state_store
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """Rate, circuit, retry and backoff settings for one site"""
+    requests_per_second: float = 2.0
+    burst: int = 5
+    failure_threshold: int = 5
+    recovery_timeout: float = 60.0
+    half_open_max_calls: int = 1
+    success_threshold: int = 1
+    max_retries: int = 3
+    retry_budget: float = 10.0         # Retries available to a site at once
+    retry_refill_ratio: float = 0.2    # Retry tokens earned per successful call
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    exponential_base: float = 2.0
+    jitter: bool = True
+
+    @classmethod
+    def from_crawler_config(cls, crawler_config: Any) -> "ResiliencePolicy":
+        """Policy from an ``EnhancedBaseCrawler`` config's rate, retry and breaker sections"""
+        rate = crawler_config.rate_limiting or {}
+        retry = crawler_config.retry_config or {}
+        breaker = (crawler_config.error_handling or {}).get("circuit_breaker") or {}
+        defaults = cls()
+        return cls(
+            requests_per_second=float(rate.get("requests_per_second", defaults.requests_per_second)),
+            burst=int(rate.get("burst_limit", defaults.burst)),
+            failure_threshold=int(breaker.get("failure_threshold", defaults.failure_threshold)),
+            recovery_timeout=float(breaker.get("recovery_timeout", defaults.recovery_timeout)),
+            max_retries=int(retry.get("max_retries", defaults.max_retries)),
+            base_delay=float(retry.get("base_delay", defaults.base_delay)),
+            max_delay=float(retry.get("max_delay", defaults.max_delay)),
+            exponential_base=float(retry.get("exponential_base", defaults.exponential_base)),
+            jitter=bool(retry.get("jitter", defaults.jitter)),
+        )
+
+
+class Admission(NamedTuple):
+    """Outcome of one admission check"""
+    allowed: bool
+    reason: str
+    wait: float
+
+
+ALLOWED = Admission(True, "allowed", 0.0)
+
+
+class SiteResilienceState:
+    """Everything the pipeline knows about one site"""
+
+    __slots__ = (
+        "site", "policy", "tokens", "refilled_at", "circuit", "consecutive_failures",
+        "opened_until", "half_open_since", "half_open_admitted", "half_open_successes",
+        "retry_tokens", "admitted", "rate_limited", "circuit_rejected", "successes",
+        "failures", "retries", "budget_exhausted", "circuit_opens",
+    )
+
+    def __init__(self, site: str, policy: ResiliencePolicy, now: float):
+        self.site = site
+        self.policy = policy
+        self.tokens = float(policy.burst)
+        self.refilled_at = now
+        self.circuit = CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.half_open_since = 0.0
+        self.half_open_admitted = 0
+        self.half_open_successes = 0
+        self.retry_tokens = policy.retry_budget
+        self.admitted = 0
+        self.rate_limited = 0
+        self.circuit_rejected = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.circuit_opens = 0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "circuit": self.circuit,
+            "open_remaining": round(max(0.0, self.opened_until - now), 3) if self.circuit == OPEN else 0.0,
+            "consecutive_failures": self.consecutive_failures,
+            "tokens": round(min(self.policy.burst, self.tokens + (now - self.refilled_at) * self.policy.requests_per_second), 3),
+            "retry_tokens": round(self.retry_tokens, 3),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "circuit_rejected": self.circuit_rejected,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "circuit_opens": self.circuit_opens,
+        }
+
+
+class ResiliencePipeline:
+    """Per-site rate limiting, circuit breaking, retry budget and backoff in one pass"""
+
+    def __init__(
+        self,
+        policy: Optional[ResiliencePolicy] = None,
+        shared_state: Optional[CircuitStateStore] = None,
+    ):
+        self.default_policy = policy or ResiliencePolicy()
+        self.shared_state = shared_state
+        self._sites: Dict[str, SiteResilienceState] = {}
+
+    def configure(self, site: str, policy: ResiliencePolicy) -> None:
+        """Set the policy for ``site``; counters and circuit state are kept"""
+        state = self._sites.get(site)
+        if state is None:
+            self._sites[site] = SiteResilienceState(site, policy, time.monotonic())
+        else:
+            state.policy = policy
+            state.tokens = min(state.tokens, float(policy.burst))
+            state.retry_tokens = min(state.retry_tokens, policy.retry_budget)
+
+    def _state(self, site: str, now: float) -> SiteResilienceState:
+        state = self._sites.get(site)
+        if state is None:
+            state = self._sites[site] = SiteResilienceState(site, self.default_policy, now)
+        return state
+
+    def admit(self, site: str) -> Admission:
+        """Check the circuit and take a rate token in one pass"""
+        now = time.monotonic()
+        state = self._state(site, now)
+        policy = state.policy
+
+        if state.circuit == OPEN:
+            if now < state.opened_until:
+                state.circuit_rejected += 1
+                return Admission(False, "circuit_open", state.opened_until - now)
+            state.circuit = HALF_OPEN
+            state.half_open_since = now
+            state.half_open_admitted = 0
+            state.half_open_successes = 0
+        if state.circuit == HALF_OPEN:
+            if now - state.half_open_since > policy.recovery_timeout:
+                # Probes never reported back; allow a fresh round
+                state.half_open_since = now
+                state.half_open_admitted = 0
+            if state.half_open_admitted >= policy.half_open_max_calls:
+                state.circuit_rejected += 1
+                return Admission(False, "circuit_half_open", policy.base_delay)
+
+        tokens = state.tokens + (now - state.refilled_at) * policy.requests_per_second
+        if tokens > policy.burst:
+            tokens = policy.burst
+        state.refilled_at = now
+        if tokens < 1.0:
+            state.tokens = tokens
+            state.rate_limited += 1
+            return Admission(False, "rate_limited", (1.0 - tokens) / policy.requests_per_second)
+        state.tokens = tokens - 1.0
+
+        if state.circuit == HALF_OPEN:
+            state.half_open_admitted += 1
+        state.admitted += 1
+        return ALLOWED
+
+    def record(self, site: str, success: bool) -> bool:
+        """Record a site-facing outcome; returns True when it opened the circuit"""
+        now = time.monotonic()
+        state = self._state(site, now)
+        policy = state.policy
+
+        if success:
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.retry_tokens = min(policy.retry_budget, state.retry_tokens + policy.retry_refill_ratio)
+            if state.circuit == HALF_OPEN:
+                state.half_open_successes += 1
+                if state.half_open_successes >= policy.success_threshold:
+                    state.circuit = CLOSED
+                    logger.info(f"Circuit for {site} closed after successful probe")
+            return False
+
+        state.failures += 1
+        state.consecutive_failures += 1
+        if state.circuit == HALF_OPEN or (
+            state.circuit == CLOSED and state.consecutive_failures >= policy.failure_threshold
+        ):
+            state.circuit = OPEN
+            state.opened_until = now + policy.recovery_timeout
+            state.circuit_opens += 1
+            logger.warning(
+                f"Circuit for {site} opened after {state.consecutive_failures} consecutive failures "
+                f"(recovery in {policy.recovery_timeout:.0f}s)"
+            )
+            return True
+        return False
+
+    def retry_delay(self, site: str, attempt: int) -> Optional[float]:
+        """Backoff before retry ``attempt + 1``, or None when no retry is allowed"""
+        state = self._state(site, time.monotonic())
+        policy = state.policy
+        if attempt >= policy.max_retries or state.circuit == OPEN:
+            return None
+        if state.retry_tokens < 1.0:
+            state.budget_exhausted += 1
+            return None
+        state.retry_tokens -= 1.0
+        state.retries += 1
+
+        delay = policy.base_delay * (policy.exponential_base ** attempt)
+        if delay > policy.max_delay:
+            delay = policy.max_delay
+        if policy.jitter:
+            delay *= 0.5 + random.random() * 0.5
+        return delay
+
+    def _shared_name(self, site: str) -> str:
+        return f"resilience:{site}"
+
+    async def _check_shared(self, site: str) -> None:
+        shared = await self.shared_state.get(self._shared_name(site))
+        if shared.blocks(self.shared_state.worker_id):
+            raise CircuitBreakerOpenError(
+                f"Circuit for {site} opened by {shared.origin}. "
+                f"Next attempt in {shared.remaining():.1f} seconds"
+            )
+
+    async def _publish_open(self, site: str) -> None:
+        if self.shared_state is not None:
+            state = self._sites[site]
+            await self.shared_state.trip(
+                self._shared_name(site), state.policy.recovery_timeout, "consecutive failures"
+            )
+
+    async def acquire(self, site: str) -> None:
+        """Wait for a rate token; raises ``CircuitBreakerOpenError`` while the circuit is open"""
+        if self.shared_state is not None:
+            await self._check_shared(site)
+        while True:
+            admission = self.admit(site)
+            if admission.allowed:
+                return
+            if admission.reason == "circuit_open":
+                raise CircuitBreakerOpenError(
+                    f"Circuit for {site} is open. Next attempt in {admission.wait:.1f} seconds"
+                )
+            await asyncio.sleep(admission.wait)
+
+    async def report(self, site: str, success: bool) -> None:
+        """``record`` plus publishing a newly opened circuit to other workers"""
+        if self.record(site, success):
+            await self._publish_open(site)
+
+    async def execute(
+        self,
+        site: str,
+        operation: Callable,
+        *args,
+        is_retryable: Optional[Callable[[Exception], bool]] = None,
+        **kwargs,
+    ) -> Any:
+        """Run ``operation`` behind the rate limit and circuit, retrying within budget"""
+        attempt = 0
+        while True:
+            await self.acquire(site)
+            try:
+                result = await operation(*args, **kwargs)
+            except Exception as e:
+                if is_retryable is not None and not is_retryable(e):
+                    raise
+                await self.report(site, False)
+                delay = self.retry_delay(site, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.record(site, True)
+            return result
+
+    def get_stats(self, site: Optional[str] = None) -> Dict[str, Any]:
+        now = time.monotonic()
+        if site is not None:
+            state = self._sites.get(site)
+            return state.to_dict(now) if state is not None else {}
+        return {name: state.to_dict(now) for name, state in self._sites.items()}
+
+    def reset(self, site: Optional[str] = None) -> None:
+        """Forget state for ``site`` (or every site); policies are kept"""
+        now = time.monotonic()
+        names = [site] if site is not None else list(self._sites)
+        for name in names:
+            state = self._sites.get(name)
+            if state is not None:
+                self._sites[name] = SiteResilienceState(name, state.policy, now)
+
+
+_resilience_pipeline: Optional[ResiliencePipeline] = None
+
+
+def get_resilience_pipeline() -> ResiliencePipeline:
+    """Process-wide pipeline; circuits are shared across workers when configured"""
+    global _resilience_pipeline
+    if _resilience_pipeline is None:
+        _resilience_pipeline = ResiliencePipeline(shared_state=get_circuit_state_store())
+    return _resilience_pipeline
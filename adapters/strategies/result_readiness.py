@@ -0,0 +1,217 @@
+"""
+Event-driven result readiness.
+
+``EnhancedBaseCrawler._wait_for_results`` used to wait for the results
+container, then for ``networkidle`` (up to 15 s) and then sleep another two
+seconds. Sites with long-polling connections or analytics beacons never go
+idle, so every crawl paid the whole idle timeout. ``ResultReadinessWaiter``
+races the signals a results page actually gives and returns on the first:
+
+- ``response``: a response whose URL matches the site's results endpoint.
+  The listener is armed before navigation so the XHR cannot be missed.
+- ``cards_stable``: a MutationObserver in the page saw the number of result
+  cards stop changing for ``quiet_ms``.
+- ``empty_results``: the site's "no flights found" marker appeared.
+
+Sites without a container or endpoint configured fall back to
+``networkidle``; if nothing fires before ``timeout`` extraction proceeds
+with whatever is on the page. Readiness latency is recorded per site in the
+latency sketch registry under the ``result_readiness`` step.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from utils.latency_sketch import get_latency_sketches
+
+logger = logging.getLogger(__name__)
+
+READINESS_STEP = "result_readiness"
+
+# Resolves once the card count has held steady for quietMs (or the empty
+# marker shows up); the observer is disconnected on every exit path.
+_CARDS_STABLE_JS = """
+({selector, emptySelector, minCards, quietMs, timeoutMs}) => new Promise((resolve) => {
+    let last = -1;
+    let quiet = null;
+    let observer = null;
+    let deadline = null;
+    const finish = (reason) => {
+        if (observer) observer.disconnect();
+        clearTimeout(quiet);
+        clearTimeout(deadline);
+        resolve({reason, count: document.querySelectorAll(selector).length});
+    };
+    const check = () => {
+        if (emptySelector && document.querySelector(emptySelector)) {
+            finish("empty_results");
+            return;
+        }
+        const count = document.querySelectorAll(selector).length;
+        if (count !== last) {
+            last = count;
+            clearTimeout(quiet);
+            if (count >= minCards) quiet = setTimeout(() => finish("cards_stable"), quietMs);
+        }
+    };
+    observer = new MutationObserver(check);
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+    deadline = setTimeout(() => finish("timeout"), timeoutMs);
+    check();
+})
+"""
+
+
+@dataclass(frozen=True)
+class ReadinessConfig:
+    """Per-site readiness signals, from the ``result_readiness`` site config section"""
+    container: Optional[str] = None
+    response_pattern: Optional[str] = None  # Regex searched in response URLs
+    empty_selector: Optional[str] = None
+    min_cards: int = 1
+    quiet_ms: int = 500
+    render_timeout: float = 5.0  # Container wait after the results response
+    timeout: float = 30.0
+
+    @classmethod
+    def from_site_config(cls, readiness: Optional[Dict[str, Any]], container: Optional[str] = None) -> "ReadinessConfig":
+        readiness = readiness or {}
+        defaults = cls()
+        return cls(
+            container=readiness.get("container", container),
+            response_pattern=readiness.get("response_pattern"),
+            empty_selector=readiness.get("empty_selector"),
+            min_cards=int(readiness.get("min_cards", defaults.min_cards)),
+            quiet_ms=int(readiness.get("quiet_ms", defaults.quiet_ms)),
+            render_timeout=float(readiness.get("render_timeout", defaults.render_timeout)),
+            timeout=float(readiness.get("timeout", defaults.timeout)),
+        )
+
+
+class ResultReadinessWaiter:
+    """Waits for the first readiness signal of one site's results page"""
+
+    def __init__(self, site: str, config: ReadinessConfig, stats: Optional[Dict[str, Any]] = None):
+        self.site = site
+        self.config = config
+        self._pattern = re.compile(config.response_pattern) if config.response_pattern else None
+        self._page = None
+        self._response_seen: Optional[asyncio.Event] = None
+        # Waiters of one site's pooled pages may share a stats dict
+        self.stats: Dict[str, Any] = stats if stats is not None else {"waits": 0, "signals": {}, "last_latency": None}
+
+    def arm(self, page: Any) -> None:
+        """Start listening for the results response; call before navigating or submitting"""
+        self.disarm()
+        self._page = page
+        self._response_seen = asyncio.Event()
+        if self._pattern is not None:
+            page.on("response", self._on_response)
+
+    def disarm(self) -> None:
+        if self._page is not None and self._pattern is not None:
+            try:
+                self._page.remove_listener("response", self._on_response)
+            except Exception:
+                pass
+        self._page = None
+
+    def _on_response(self, response: Any) -> None:
+        if response.ok and self._pattern.search(response.url):
+            self._response_seen.set()
+
+    async def wait(self, page: Any) -> str:
+        """Return the name of the first signal that fired, or ``timeout``"""
+        if self._page is not page:
+            self.arm(page)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = loop.time() + self.config.timeout
+
+        waiters = []
+        if self._pattern is not None:
+            waiters.append(self._wait_for_response(page))
+        if self.config.container:
+            waiters.append(self._wait_for_cards(page, deadline))
+        if not waiters:
+            waiters.append(self._wait_for_network_idle(page))
+        pending = {asyncio.ensure_future(waiter) for waiter in waiters}
+
+        signal = None
+        try:
+            while pending and signal is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        signal = task.result()
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.disarm()
+
+        signal = signal or "timeout"
+        elapsed = time.perf_counter() - started
+        get_latency_sketches().record(self.site, READINESS_STEP, elapsed)
+        self.stats["waits"] += 1
+        self.stats["signals"][signal] = self.stats["signals"].get(signal, 0) + 1
+        self.stats["last_latency"] = round(elapsed, 3)
+        return signal
+
+    async def _wait_for_response(self, page: Any) -> Optional[str]:
+        await self._response_seen.wait()
+        if self.config.container:
+            try:
+                await page.wait_for_selector(
+                    self.config.container, state="attached", timeout=self.config.render_timeout * 1000
+                )
+            except Exception:
+                # The endpoint answered; an unrendered container usually means no results
+                pass
+        return "response"
+
+    async def _wait_for_cards(self, page: Any, deadline: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                outcome = await page.evaluate(
+                    _CARDS_STABLE_JS,
+                    {
+                        "selector": self.config.container,
+                        "emptySelector": self.config.empty_selector,
+                        "minCards": self.config.min_cards,
+                        "quietMs": self.config.quiet_ms,
+                        "timeoutMs": int(remaining * 1000),
+                    },
+                )
+            except Exception as e:
+                # A navigation replaced the document; observe the new one once it exists
+                logger.debug(f"Card observer for {self.site} restarted: {e}")
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=remaining * 1000)
+                except Exception:
+                    return None
+                continue
+            reason = (outcome or {}).get("reason")
+            return reason if reason in ("cards_stable", "empty_results") else None
+
+    async def _wait_for_network_idle(self, page: Any) -> Optional[str]:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.config.timeout * 1000)
+        except Exception:
+            return None
+        return "network_idle"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"site": self.site, **self.stats, "signals": dict(self.stats["signals"])}
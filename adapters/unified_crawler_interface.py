@@ -246,6 +246,30 @@ class UnifiedCrawlerInterface(ABC):
                 system_used=self._get_system_type()
             )
     
+    async def crawl_many(
+        self, params_list: List[SearchParameters], max_concurrency: Optional[int] = None
+    ) -> List[CrawlerResult]:
+        """
+        Crawl several searches - e.g. every date of a route.
+
+        Most wrapped crawlers drive a single driver or page, so searches run
+        one at a time unless ``max_concurrency`` allows more. Bridges to
+        page-pooled crawlers override this to hand the batch over. Results
+        keep the order of ``params_list``; a failed search yields an
+        unsuccessful result.
+        """
+        limit = max_concurrency or 1
+        semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+        async def crawl_one(params: SearchParameters) -> CrawlerResult:
+            async with semaphore:
+                return await self.crawl_async(params)
+
+        self._notify_progress(f"Starting {len(params_list)} searches...")
+        results = await asyncio.gather(*(crawl_one(params) for params in params_list))
+        self._notify_progress(f"{sum(1 for result in results if result.success)}/{len(results)} searches succeeded")
+        return list(results)
+
     def crawl_sync(self, params: SearchParameters) -> CrawlerResult:
         """Sync crawl method for backwards compatibility"""
         try:
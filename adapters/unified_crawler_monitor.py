@@ -31,6 +31,9 @@ import uuid
 import weakref
 from concurrent.futures import ThreadPoolExecutor
 
+from utils.latency_sketch import get_latency_sketches
+from utils.metric_store import MetricStore
+
 # Type checking imports
 if TYPE_CHECKING:
     from .unified_crawler_interface import UnifiedCrawlerInterface
@@ -185,7 +188,10 @@ class UnifiedCrawlerMonitor:
         self.registered_components: Dict[str, Any] = {}
         
         # Metrics and events storage
-        self.metrics_history: deque = deque(maxlen=self.config.get('metrics_history_size', 10000))
+        # Columnar per-metric ring buffers; windows are binary-searched
+        self.metrics_store = MetricStore(
+            capacity=self.config.get('metrics_series_capacity', 4096)
+        )
         self.events_history: deque = deque(maxlen=self.config.get('events_history_size', 5000))
         self.health_status: Dict[str, UnifiedHealthStatus] = {}
         self.active_alerts: Dict[str, UnifiedAlert] = {}
@@ -543,24 +549,13 @@ class UnifiedCrawlerMonitor:
 
     async def _analyze_performance(self):
         """Analyze performance metrics and generate insights."""
-        # Analyze recent metrics
-        recent_metrics = [
-            m for m in self.metrics_history 
-            if m.timestamp >= datetime.now() - timedelta(minutes=10)
-        ]
-        
-        if not recent_metrics:
-            return
-        
-        # Group metrics by component
-        component_metrics = defaultdict(list)
-        for metric in recent_metrics:
-            component_metrics[metric.component].append(metric)
+        start = time.time() - 600
+        component_counts = self.metrics_store.counts_by_component(start)
         
         # Analyze each component
-        for component, metrics in component_metrics.items():
+        for component, metrics_count in component_counts.items():
             try:
-                analysis = self._analyze_component_performance(component, metrics)
+                analysis = self._analyze_component_performance(component, start, metrics_count)
                 if analysis.get('alerts'):
                     for alert in analysis['alerts']:
                         await self._create_alert(alert)
@@ -568,22 +563,36 @@ class UnifiedCrawlerMonitor:
             except Exception as e:
                 self.logger.error(f"Performance analysis failed for {component}: {e}")
 
-    def _analyze_component_performance(self, component: str, metrics: List[UnifiedMetric]) -> Dict[str, Any]:
-        """Analyze performance for a specific component."""
+    def _analyze_component_performance(self, component: str, start: float, metrics_count: int) -> Dict[str, Any]:
+        """Analyze performance for a specific component since ``start``."""
+        store = self.metrics_store
+        first, last = None, None
+        response_total, response_count, error_count = 0.0, 0, 0
+        for name in store.names():
+            timestamps, values, _ = store.window(name, start, component=component)
+            if not len(timestamps):
+                continue
+            first = timestamps[0] if first is None else min(first, timestamps[0])
+            last = timestamps[-1] if last is None else max(last, timestamps[-1])
+            if name.endswith('_response_time'):
+                response_total += float(values.sum())
+                response_count += len(values)
+            if 'error' in name.lower():
+                error_count += len(values)
+        
         analysis = {
             'component': component,
-            'metrics_count': len(metrics),
+            'metrics_count': metrics_count,
             'time_range': {
-                'start': min(m.timestamp for m in metrics),
-                'end': max(m.timestamp for m in metrics)
+                'start': datetime.fromtimestamp(first) if first is not None else None,
+                'end': datetime.fromtimestamp(last) if last is not None else None
             },
             'alerts': []
         }
         
         # Analyze response times
-        response_times = [m.value for m in metrics if m.metric_name.endswith('_response_time')]
-        if response_times:
-            avg_response_time = sum(response_times) / len(response_times)
+        if response_count:
+            avg_response_time = response_total / response_count
             if avg_response_time > self.config.get('response_time_threshold', 5000):
                 analysis['alerts'].append({
                     'severity': 'warning',
@@ -592,9 +601,8 @@ class UnifiedCrawlerMonitor:
                 })
         
         # Analyze error rates
-        error_metrics = [m for m in metrics if 'error' in m.metric_name.lower()]
-        if error_metrics:
-            error_rate = len(error_metrics) / len(metrics) * 100
+        if error_count and metrics_count:
+            error_rate = error_count / metrics_count * 100
             if error_rate > self.config.get('error_rate_threshold', 5):
                 analysis['alerts'].append({
                     'severity': 'critical',
@@ -689,16 +697,14 @@ class UnifiedCrawlerMonitor:
     def _record_metric(self, timestamp: datetime, metric_name: str, value: Union[int, float], 
                       labels: Dict[str, str], source_system: str, component: str):
         """Record a unified metric."""
-        metric = UnifiedMetric(
-            timestamp=timestamp,
-            metric_name=metric_name,
-            value=value,
+        self.metrics_store.record(
+            metric_name,
+            timestamp.timestamp(),
+            value,
+            component=component,
             labels=labels,
-            source_system=source_system,
-            component=component
+            source_system=source_system
         )
-        
-        self.metrics_history.append(metric)
 
     def _update_health_status(self, component: str, health_data: Dict[str, Any], timestamp: datetime = None):
         """Update health status for a component."""
@@ -818,12 +824,11 @@ class UnifiedCrawlerMonitor:
                 'components': len(self.registered_components)
             },
             'metrics': {
-                'total_metrics': len(self.metrics_history),
-                'recent_metrics': len([
-                    m for m in self.metrics_history 
-                    if m.timestamp >= datetime.now() - timedelta(minutes=5)
-                ])
+                'total_metrics': len(self.metrics_store),
+                'recent_metrics': self.metrics_store.count_since(time.time() - 300),
+                'store': self.metrics_store.get_stats()
             },
+            'latency': get_latency_sketches().local_summary(),
             'events': {
                 'total_events': len(self.events_history),
                 'recent_events': len([
@@ -861,24 +866,16 @@ class UnifiedCrawlerMonitor:
 
     def get_recent_metrics(self, component: str = None, minutes: int = 30) -> List[Dict[str, Any]]:
         """Get recent metrics for a component or all components."""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        
-        recent_metrics = [
-            m for m in self.metrics_history 
-            if m.timestamp >= cutoff_time and (component is None or m.component == component)
-        ]
-        
-        return [
-            {
-                'timestamp': m.timestamp.isoformat(),
-                'metric_name': m.metric_name,
-                'value': m.value,
-                'labels': m.labels,
-                'source_system': m.source_system,
-                'component': m.component
-            }
-            for m in recent_metrics
-        ]
+        records = self.metrics_store.records(time.time() - minutes * 60, component=component)
+        for record in records:
+            record['timestamp'] = datetime.fromtimestamp(record['timestamp']).isoformat()
+        return records
+
+    def get_metric_summary(self, metric_name: str, component: str = None, minutes: int = 10) -> Dict[str, float]:
+        """Vectorized count/mean/min/max/percentiles for one metric."""
+        return self.metrics_store.aggregate(
+            metric_name, time.time() - minutes * 60, component=component
+        )
 
     def get_active_alerts(self) -> List[Dict[str, Any]]:
         """Get all active alerts."""
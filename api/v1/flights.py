@@ -4,14 +4,19 @@ API v1 - Flights Router
 Contains all flight-related endpoints for v1 API
 """
 
+import json
+import time
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from main_crawler import IranianFlightCrawler
 from ml_predictor import FlightPricePredictor
 from intelligent_search import SearchOptimization
+from date_range_search import DateRangeSearchExecutor, date_window
+from fare_calendar import get_fare_calendar
 from api_versioning import APIVersion, api_versioned, add_api_version_headers
 
 router = APIRouter(prefix="/api/v1/flights", tags=["flights-v1"])
@@ -45,6 +50,17 @@ class CrawlRequest(BaseModel):
     passengers: int = 1
     seat_class: str = "economy"
 
+class CalendarSearchRequest(BaseModel):
+    """Flexible-date price calendar request model"""
+    origin: str
+    destination: str
+    date: str
+    days_before: int = 3
+    days_after: int = 3
+    passengers: int = 1
+    seat_class: str = "economy"
+    include_flights: bool = False
+
 class IntelligentSearchRequest(BaseModel):
     """Intelligent search request model"""
     origin: str
@@ -60,6 +76,40 @@ class IntelligentSearchRequest(BaseModel):
 from api.dependencies import get_crawler
 from adapters.unified_crawler_interface import UnifiedCrawlerInterface
 
+
+def _date_range_executor(
+    crawler: UnifiedCrawlerInterface,
+    passengers: int,
+    seat_class: str,
+    use_cache: bool = True,
+) -> DateRangeSearchExecutor:
+    """Date-range executor crawling through the unified interface"""
+    from adapters.unified_crawler_interface import SearchParameters
+
+    async def crawl(params: Dict) -> List[Dict]:
+        result = await crawler.crawl_async(
+            SearchParameters(
+                origin=params["origin"],
+                destination=params["destination"],
+                departure_date=params["departure_date"],
+                passengers=passengers,
+                seat_class=seat_class,
+            )
+        )
+        if not result.success:
+            raise RuntimeError(result.error or result.message or "crawl failed")
+        return [flight.to_dict() for flight in result.flights]
+
+    data_manager = None
+    if use_cache:
+        legacy = getattr(crawler, "requests_crawler", crawler)
+        data_manager = getattr(legacy, "data_manager", None)
+    return DateRangeSearchExecutor(
+        crawl,
+        data_manager=data_manager,
+        site=crawler.metadata.site_name,
+    )
+
 @router.post("/search", response_model=FlightSearchResponse)
 @api_versioned(APIVersion.V1)
 async def search_flights(
@@ -165,33 +215,29 @@ async def manual_crawl(
     try:
         add_api_version_headers(response, APIVersion.V1)
         
-        from adapters.unified_crawler_interface import SearchParameters
-        results = []
-        
-        for date in request_data.dates:
-            search_params = SearchParameters(
-                origin=request_data.origin,
-                destination=request_data.destination,
-                departure_date=date,
-                passengers=request_data.passengers,
-                seat_class=request_data.seat_class
-            )
-            
-            # Crawl using unified interface
-            result = await crawler.crawl_async(search_params)
-            
-            flights = [flight.to_dict() for flight in result.flights]
-            results.append({
-                "date": date,
-                "flights": flights,
-                "count": len(flights),
+        # Dates are crawled concurrently within the per-site limit
+        executor = _date_range_executor(
+            crawler, request_data.passengers, request_data.seat_class, use_cache=False
+        )
+        summary = await executor.search(
+            {"origin": request_data.origin, "destination": request_data.destination},
+            request_data.dates,
+        )
+        results = [
+            {
+                "date": result.date,
+                "flights": result.flights,
+                "count": len(result.flights),
                 "success": result.success,
-                "execution_time": result.execution_time
-            })
+                "execution_time": result.latency_ms / 1000,
+            }
+            for result in summary["results"]
+        ]
         
         return {
             "results": results,
             "total_flights": sum(r["count"] for r in results),
+            "total_execution_time": summary["total_latency_ms"] / 1000,
             "crawl_timestamp": datetime.now().isoformat(),
             "version": "v1"
         }
@@ -199,6 +245,116 @@ async def manual_crawl(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Manual crawl failed: {str(e)}")
 
+@router.post("/search/calendar")
+@api_versioned(APIVersion.V1)
+async def search_price_calendar(
+    request_data: CalendarSearchRequest,
+    request: Request,
+    response: Response,
+    crawler: UnifiedCrawlerInterface = Depends(get_crawler)
+):
+    """
+    Flexible-date price calendar
+    
+    Streams one JSON line per date as soon as it resolves (cache, stored
+    flights or a live crawl), followed by a summary line with the overall
+    latency and how many dates each source served.
+    """
+    try:
+        dates = date_window(request_data.date, request_data.days_before, request_data.days_after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {str(e)}")
+    if len(dates) > 31:
+        raise HTTPException(status_code=400, detail="Calendar range is limited to 31 days")
+    
+    executor = _date_range_executor(crawler, request_data.passengers, request_data.seat_class)
+    search_params = {
+        "origin": request_data.origin,
+        "destination": request_data.destination,
+        "passengers": request_data.passengers,
+        "seat_class": request_data.seat_class,
+    }
+    
+    async def stream():
+        start = time.perf_counter()
+        sources: Dict[str, int] = {}
+        async for result in executor.iter_dates(search_params, dates):
+            sources[result.source] = sources.get(result.source, 0) + 1
+            yield json.dumps(result.to_dict(request_data.include_flights), default=str) + "\n"
+        yield json.dumps({
+            "done": True,
+            "dates": len(dates),
+            "sources": sources,
+            "total_latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "version": "v1"
+        }) + "\n"
+    
+    streaming = StreamingResponse(stream(), media_type="application/x-ndjson")
+    add_api_version_headers(streaming, APIVersion.V1)
+    return streaming
+
+@router.get("/calendar/{origin}/{destination}")
+@api_versioned(APIVersion.V1)
+async def get_fare_calendar_month(
+    origin: str,
+    destination: str,
+    request: Request,
+    response: Response,
+    month: str = Query(..., pattern=r"^\d{4}-\d{2}$"),
+    crawler: UnifiedCrawlerInterface = Depends(get_crawler)
+):
+    """
+    Cheapest fare per departure day for one month
+    
+    Served from the precomputed fare calendar in a single read. A month
+    with no entries is seeded once from stored flights.
+    """
+    try:
+        add_api_version_headers(response, APIVersion.V1)
+        
+        start = time.perf_counter()
+        route = f"{origin}-{destination}".upper()
+        fare_calendar = get_fare_calendar()
+        days = await fare_calendar.get_month(route, month)
+        
+        if not days:
+            legacy = getattr(crawler, "requests_crawler", crawler)
+            data_manager = getattr(legacy, "data_manager", None)
+            if data_manager is not None:
+                month_start = datetime.strptime(month, "%Y-%m")
+                fares = await data_manager.get_route_min_fares(
+                    origin,
+                    destination,
+                    month_start,
+                    (month_start + timedelta(days=32)).replace(day=1),
+                    scraped_since=datetime.now() - timedelta(seconds=fare_calendar.fare_ttl),
+                )
+                if await fare_calendar.backfill(
+                    route,
+                    month,
+                    {
+                        day: (price, scraped_at.timestamp() if scraped_at else 0.0)
+                        for day, (price, scraped_at) in fares.items()
+                    },
+                ):
+                    days = await fare_calendar.get_month(route, month)
+        
+        cheapest = min(days.items(), key=lambda item: item[1]["price"]) if days else None
+        return {
+            "route": route,
+            "month": month,
+            "days": days,
+            "cheapest": {"date": cheapest[0], **cheapest[1]} if cheapest else None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "timestamp": datetime.now().isoformat(),
+            "version": "v1"
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid calendar request: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get fare calendar: {str(e)}")
+
 @router.post("/search/intelligent")
 @api_versioned(APIVersion.V1)
 async def intelligent_search(
@@ -6,13 +6,16 @@ Contains monitoring-related endpoints for v1 API including price alerts and rout
 
 from typing import Dict, List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, Request, Response
 from fastapi.websockets import WebSocketDisconnect, WebSocketState
 from pydantic import BaseModel
 
 from main_crawler import IranianFlightCrawler
 from price_monitor import PriceMonitor, WebSocketManager, PriceAlert
 from provider_insights import get_provider_insights
+from utils.timer_wheel import get_periodic_scheduler
+from utils.latency_sketch import get_latency_sketches
+from utils.tracing import get_tracer
 from api_versioning import APIVersion, api_versioned, add_api_version_headers
 
 router = APIRouter(prefix="/api/v1/monitoring", tags=["monitoring-v1"])
@@ -237,6 +240,96 @@ async def get_monitoring_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get monitoring status: {str(e)}")
 
+@router.get("/scheduler")
+@api_versioned(APIVersion.V1)
+async def get_scheduler_stats(request: Request, response: Response):
+    """
+    Get periodic scheduler statistics
+    
+    Returns tick lag, per-job batch sizes and handler durations.
+    """
+    try:
+        add_api_version_headers(response, APIVersion.V1)
+        
+        return {
+            "scheduler": get_periodic_scheduler().get_stats(),
+            "timestamp": datetime.now().isoformat(),
+            "version": "v1"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get scheduler stats: {str(e)}")
+
+@router.get("/latency")
+@api_versioned(APIVersion.V1)
+async def get_latency_percentiles(
+    request: Request,
+    response: Response,
+    minutes: int = Query(5, ge=1, le=60)
+):
+    """
+    Get crawl latency percentiles per site and workflow step
+    
+    Percentiles come from sketches merged across all workers when Redis is
+    shared, so they are fleet-wide rather than per process.
+    """
+    try:
+        add_api_version_headers(response, APIVersion.V1)
+        sketches = get_latency_sketches()
+        
+        return {
+            "latency": await sketches.fleet_summary(minutes),
+            "window_minutes": minutes,
+            "stats": sketches.get_stats(),
+            "timestamp": datetime.now().isoformat(),
+            "version": "v1"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get latency percentiles: {str(e)}")
+
+@router.get("/traces")
+@api_versioned(APIVersion.V1)
+async def get_recent_traces(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    min_duration_ms: float = Query(0, ge=0)
+):
+    """
+    Get recently sampled crawl traces, newest first
+    
+    Use ``min_duration_ms`` to find slow crawls, then open one with
+    ``/traces/{trace_id}``.
+    """
+    try:
+        add_api_version_headers(response, APIVersion.V1)
+        tracer = get_tracer()
+        
+        return {
+            "traces": tracer.recent(limit, min_duration_ms),
+            "stats": tracer.get_stats(),
+            "timestamp": datetime.now().isoformat(),
+            "version": "v1"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get traces: {str(e)}")
+
+@router.get("/traces/{trace_id}")
+@api_versioned(APIVersion.V1)
+async def get_trace_waterfall(trace_id: str, request: Request, response: Response):
+    """
+    Get the span waterfall of one trace
+    
+    Each span has its offset from the start of the crawl, duration and depth.
+    """
+    add_api_version_headers(response, APIVersion.V1)
+    waterfall = get_tracer().waterfall(trace_id)
+    if waterfall is None:
+        raise HTTPException(status_code=404, detail="Trace not found or no longer buffered")
+    return {**waterfall, "version": "v1"}
+
 @router.get("/insights")
 @api_versioned(APIVersion.V1)
 async def get_provider_insights_endpoint(
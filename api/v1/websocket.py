@@ -24,6 +24,29 @@ from security.authentication_system import User
 from monitoring import CrawlerMonitor
 from data_manager import DataManager
 from adapters.strategies.exponential_backoff_strategies import execute_with_exponential_backoff
+from utils.websocket_fanout import (
+    ConnectionSendQueue,
+    EncodedMessage,
+    LatencyWindow,
+    OverflowPolicy,
+    SendQueueStats,
+    encode_message,
+)
+from utils.flight_change_feed import (
+    FlightChange,
+    FlightChangeFeed,
+    FlightTopic,
+    collapse_changes,
+    flight_change_feed,
+)
+from utils.event_broker import (
+    FLIGHTS_INGESTED_CHANNEL,
+    WS_BROADCAST_CHANNEL,
+    BrokerEvent,
+    EventBroker,
+    get_event_broker,
+)
+from config import config
 
 
 logger = logging.getLogger(__name__)
@@ -87,24 +110,52 @@ class ClientConnection:
     connected_at: datetime = field(default_factory=datetime.now)
     last_heartbeat: datetime = field(default_factory=datetime.now)
     subscriptions: Set[SubscriptionTopic] = field(default_factory=set)
+    route_subscriptions: Set[str] = field(default_factory=set)
     is_active: bool = True
     message_count: int = 0
     error_count: int = 0
+    send_queue: Optional[ConnectionSendQueue] = None
 
 
 class WebSocketManager:
     """Manages WebSocket connections and message broadcasting"""
     
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        max_queue_size: int = 10000,
+        send_timeout: float = 10.0,
+        send_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        change_feed: Optional[FlightChangeFeed] = None,
+        broker: Optional[EventBroker] = None,
+    ):
         self.connections: Dict[str, ClientConnection] = {}
         self.topic_subscribers: Dict[SubscriptionTopic, Set[str]] = defaultdict(set)
+        # Route/date/site topic key -> connection ids
+        self.route_subscribers: Dict[str, Set[str]] = defaultdict(set)
+        self.change_feed = change_feed or flight_change_feed
+        
+        # Events published once and fanned out locally by every worker
+        self.broker = broker
+        if broker is not None:
+            broker.subscribe(WS_BROADCAST_CHANNEL, self._on_broadcast_event)
+            broker.subscribe(FLIGHTS_INGESTED_CHANNEL, self._on_flights_ingested)
         self.user_connections: Dict[str, Set[str]] = defaultdict(set)
         self.redis_client = redis_client
         self.logger = logging.getLogger(__name__)
         
-        # Message queue for handling backpressure
-        self.message_queue: deque = deque(maxlen=10000)
-        self.broadcast_lock = asyncio.Lock()
+        # Broadcast queue; created with the background tasks so it binds to
+        # the serving event loop rather than the import-time one
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.message_queue: Optional[asyncio.Queue] = None
+        self.delivery_latency = LatencyWindow()
+        
+        # Per-connection outbound queues
+        self.send_queue_size = send_queue_size
+        self.overflow_policy = overflow_policy
+        self._closed_queue_totals = SendQueueStats()
         
         # Statistics
         self.stats = {
@@ -112,6 +163,10 @@ class WebSocketManager:
             'active_connections': 0,
             'messages_sent': 0,
             'messages_failed': 0,
+            'messages_dropped': 0,
+            'messages_coalesced': 0,
+            'slow_consumers_evicted': 0,
+            'broadcasts_dropped': 0,
             'bytes_sent': 0,
             'last_reset': datetime.now()
         }
@@ -120,12 +175,12 @@ class WebSocketManager:
         self._heartbeat_task: Optional[asyncio.Task] = None
         self._cleanup_task: Optional[asyncio.Task] = None
         self._message_processor_task: Optional[asyncio.Task] = None
-        
-        # Start background tasks
-        self._start_background_tasks()
     
     def _start_background_tasks(self):
-        """Start background tasks for maintenance"""
+        """Start background tasks for maintenance on the running loop"""
+        if self._message_processor_task is not None:
+            return
+        self.message_queue = asyncio.Queue(maxsize=self.max_queue_size)
         self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
         self._message_processor_task = asyncio.create_task(self._message_processor_loop())
@@ -133,6 +188,7 @@ class WebSocketManager:
     async def connect(self, websocket: WebSocket, user_id: str) -> str:
         """Connect a new WebSocket client"""
         connection_id = f"{user_id}_{int(time.time() * 1000)}"
+        self._start_background_tasks()
         
         try:
             await websocket.accept()
@@ -142,6 +198,15 @@ class WebSocketManager:
                 user_id=user_id,
                 connection_id=connection_id
             )
+            connection.send_queue = ConnectionSendQueue(
+                websocket.send_text,
+                max_size=self.send_queue_size,
+                policy=self.overflow_policy,
+                send_timeout=self.send_timeout,
+                on_evict=lambda reason: self._evict_connection(connection_id, reason),
+                latency=self.delivery_latency,
+            )
+            connection.send_queue.start()
             
             self.connections[connection_id] = connection
             self.user_connections[user_id].add(connection_id)
@@ -183,6 +248,8 @@ class WebSocketManager:
             # Remove from all subscriptions
             for topic in connection.subscriptions:
                 self.topic_subscribers[topic].discard(connection_id)
+            for topic_key in connection.route_subscriptions:
+                self._discard_route_subscriber(topic_key, connection_id)
             
             # Remove from user connections
             self.user_connections[connection.user_id].discard(connection_id)
@@ -191,8 +258,11 @@ class WebSocketManager:
             if not self.user_connections[connection.user_id]:
                 del self.user_connections[connection.user_id]
             
-            # Remove connection
+            # Remove connection and fold its queue counters into the totals
             del self.connections[connection_id]
+            if connection.send_queue is not None:
+                await connection.send_queue.close()
+                self._accumulate_queue_stats(self._closed_queue_totals, connection.send_queue.stats)
             
             # Update statistics
             self.stats['active_connections'] = len(self.connections)
@@ -252,56 +322,275 @@ class WebSocketManager:
         
         await self._send_to_connection(connection_id, confirmation)
     
-    async def broadcast_to_topic(self, topic: SubscriptionTopic, message: WebSocketMessage):
-        """Broadcast message to all subscribers of a topic"""
-        if topic not in self.topic_subscribers:
+    async def subscribe_route(
+        self,
+        connection_id: str,
+        topic: FlightTopic,
+        last_seq: Optional[int] = None
+    ):
+        """
+        Subscribe a connection to offer changes for a route, optionally
+        narrowed to a date and site.
+        
+        A client resuming with ``last_seq`` receives the changes it missed as
+        a single delta; new clients, or clients whose position has aged out
+        of the change log, receive a full snapshot instead.
+        """
+        if connection_id not in self.connections:
+            return
+        
+        connection = self.connections[connection_id]
+        connection.route_subscriptions.add(topic.key)
+        self.route_subscribers[topic.key].add(connection_id)
+        
+        self.logger.info(f"Connection {connection_id} subscribed to route {topic.key}")
+        
+        delta = None
+        if last_seq is not None:
+            delta = self.change_feed.changes_since(topic, last_seq)
+        
+        if delta is not None:
+            data = {"status": "resumed", **delta.to_dict()}
+        else:
+            data = {"status": "subscribed", **self.change_feed.snapshot(topic)}
+        
+        confirmation = WebSocketMessage(
+            type=MessageType.SUBSCRIPTION,
+            topic=SubscriptionTopic.FLIGHT_UPDATES,
+            data=data,
+            user_id=connection.user_id
+        )
+        
+        await self._send_to_connection(connection_id, confirmation)
+    
+    async def unsubscribe_route(self, connection_id: str, topic: FlightTopic):
+        """Unsubscribe a connection from a route topic"""
+        if connection_id not in self.connections:
+            return
+        
+        connection = self.connections[connection_id]
+        connection.route_subscriptions.discard(topic.key)
+        self._discard_route_subscriber(topic.key, connection_id)
+        
+        confirmation = WebSocketMessage(
+            type=MessageType.UNSUBSCRIPTION,
+            topic=SubscriptionTopic.FLIGHT_UPDATES,
+            data={"status": "unsubscribed", "topic_key": topic.key},
+            user_id=connection.user_id
+        )
+        
+        await self._send_to_connection(connection_id, confirmation)
+    
+    def _discard_route_subscriber(self, topic_key: str, connection_id: str):
+        subscribers = self.route_subscribers.get(topic_key)
+        if subscribers is None:
             return
+        subscribers.discard(connection_id)
+        if not subscribers:
+            del self.route_subscribers[topic_key]
+    
+    async def broadcast_to_route(self, topic_key: str, message: WebSocketMessage):
+        """
+        Broadcast to subscribers of a route topic key.
         
-        subscribers = self.topic_subscribers[topic].copy()
+        Deltas are never coalesced: each one carries ``from_seq`` so a client
+        that lost a message to queue overflow can detect the gap and resume.
+        """
+        subscribers = self.route_subscribers.get(topic_key)
         if not subscribers:
             return
         
-        # Add to message queue for processing
-        self.message_queue.append((topic, message, subscribers))
+        self._enqueue_broadcast(
+            SubscriptionTopic.FLIGHT_UPDATES,
+            encode_message(message.to_dict()),
+            subscribers.copy(),
+            None
+        )
+    
+    async def broadcast_to_topic(
+        self,
+        topic: SubscriptionTopic,
+        message: WebSocketMessage,
+        coalesce_key: Optional[str] = None
+    ):
+        """
+        Broadcast message to all subscribers of a topic.
+        
+        ``coalesce_key`` lets connections using the coalesce policy replace a
+        still-queued older message with this one; messages carrying a
+        ``route`` in their data default to ``<topic>:<route>``.
+        """
+        if self.broker is None and not self.topic_subscribers.get(topic):
+            return
+        
+        # Serialize once here; the processor only writes frames
+        encoded = encode_message(message.to_dict())
+        if coalesce_key is None and message.data.get("route"):
+            coalesce_key = f"{topic.value}:{message.data['route']}"
+        
+        if self.broker is not None:
+            await self._publish_broadcast("topic", topic.value, encoded, coalesce_key)
+            return
+        
+        self._deliver_to_topic(topic, encoded, coalesce_key)
+    
+    def _deliver_to_topic(
+        self,
+        topic: SubscriptionTopic,
+        encoded: EncodedMessage,
+        coalesce_key: Optional[str]
+    ):
+        subscribers = self.topic_subscribers.get(topic)
+        if subscribers:
+            self._enqueue_broadcast(topic, encoded, subscribers.copy(), coalesce_key)
+    
+    async def _publish_broadcast(
+        self,
+        kind: str,
+        target: str,
+        encoded: EncodedMessage,
+        coalesce_key: Optional[str] = None
+    ):
+        """Publish a pre-encoded frame once for every worker to deliver"""
+        try:
+            await self.broker.publish(WS_BROADCAST_CHANNEL, {
+                "kind": kind,
+                "target": target,
+                "frame": encoded.text,
+                "coalesce_key": coalesce_key
+            })
+        except Exception as e:
+            self.logger.error(f"Error publishing {kind} broadcast for {target}: {e}")
+    
+    async def _on_broadcast_event(self, event: BrokerEvent):
+        """Deliver a broadcast published by any worker to local connections"""
+        payload = event.payload
+        # Backdate so delivery latency covers the whole publish -> write path
+        age = max(0.0, time.time() - event.published_at)
+        encoded = EncodedMessage(
+            payload=payload["frame"].encode("utf-8"),
+            created_at=time.monotonic() - age
+        )
+        
+        if payload["kind"] == "topic":
+            self._deliver_to_topic(
+                SubscriptionTopic(payload["target"]), encoded, payload.get("coalesce_key")
+            )
+        elif payload["kind"] == "user":
+            connection_ids = self.user_connections.get(payload["target"])
+            if connection_ids:
+                await self._fan_out(connection_ids.copy(), encoded)
+    
+    async def _on_flights_ingested(self, event: BrokerEvent):
+        """Keep this worker's change feed replica in step with ingest"""
+        await self.change_feed.ingest(event.payload, seq=event.seq)
+    
+    async def is_leader(self, job: str, ttl: float) -> bool:
+        """Whether this worker should run a periodic job shared by all workers"""
+        if self.broker is None:
+            return True
+        try:
+            return await self.broker.acquire_leadership(f"ws:{job}", ttl)
+        except Exception as e:
+            self.logger.error(f"Error acquiring leadership for {job}: {e}")
+            return False
+    
+    def _enqueue_broadcast(
+        self,
+        topic: SubscriptionTopic,
+        encoded: EncodedMessage,
+        subscribers: Set[str],
+        coalesce_key: Optional[str]
+    ):
+        self._start_background_tasks()
+        
+        item = (topic, encoded, subscribers, coalesce_key)
+        try:
+            self.message_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Same policy as the old bounded deque: drop the oldest broadcast
+            self.message_queue.get_nowait()
+            self.message_queue.task_done()
+            self.stats['broadcasts_dropped'] += 1
+            self.message_queue.put_nowait(item)
         
         self.logger.debug(f"Queued message for topic {topic.value} to {len(subscribers)} subscribers")
     
     async def send_to_user(self, user_id: str, message: WebSocketMessage):
-        """Send message to all connections of a specific user"""
-        if user_id not in self.user_connections:
+        """Send message to all connections of a specific user, on any worker"""
+        encoded = encode_message(message.to_dict())
+        if self.broker is not None:
+            await self._publish_broadcast("user", user_id, encoded)
             return
         
-        user_connection_ids = self.user_connections[user_id].copy()
+        if user_id not in self.user_connections:
+            return
         
-        for connection_id in user_connection_ids:
-            await self._send_to_connection(connection_id, message)
+        await self._fan_out(self.user_connections[user_id].copy(), encoded)
     
     async def _send_to_connection(self, connection_id: str, message: WebSocketMessage):
         """Send message to a specific connection"""
-        if connection_id not in self.connections:
+        await self._fan_out([connection_id], encode_message(message.to_dict()))
+    
+    async def _fan_out(
+        self,
+        connection_ids,
+        encoded: EncodedMessage,
+        coalesce_key: Optional[str] = None
+    ) -> None:
+        """Hand one encoded frame to each connection's send queue without waiting on sockets"""
+        for connection_id in connection_ids:
+            connection = self.connections.get(connection_id)
+            if connection is None or connection.send_queue is None:
+                continue
+            if connection.send_queue.offer(encoded, coalesce_key):
+                connection.message_count += 1
+    
+    async def _evict_connection(self, connection_id: str, reason: str):
+        """Close a connection whose send queue gave up on it"""
+        connection = self.connections.get(connection_id)
+        if connection is None:
             return
         
-        connection = self.connections[connection_id]
-        
+        self.logger.warning(f"Evicting slow WebSocket consumer {connection_id}: {reason}")
+        self.stats['slow_consumers_evicted'] += 1
+        await self.disconnect(connection_id)
         try:
-            message_data = message.to_dict()
-            json_data = json.dumps(message_data)
-            
-            await connection.websocket.send_text(json_data)
-            
-            # Update statistics
-            connection.message_count += 1
-            self.stats['messages_sent'] += 1
-            self.stats['bytes_sent'] += len(json_data)
-            
+            # 1013: try again later
+            await connection.websocket.close(code=1013)
         except Exception as e:
-            self.logger.error(f"Failed to send message to {connection_id}: {e}")
-            connection.error_count += 1
-            self.stats['messages_failed'] += 1
-            
-            # Disconnect if too many errors
-            if connection.error_count > 5:
-                await self.disconnect(connection_id)
+            self.logger.debug(f"Error closing evicted connection {connection_id}: {e}")
+    
+    @staticmethod
+    def _accumulate_queue_stats(total: SendQueueStats, stats: SendQueueStats) -> None:
+        total.sent += stats.sent
+        total.failed += stats.failed
+        total.dropped += stats.dropped
+        total.coalesced += stats.coalesced
+        total.bytes_sent += stats.bytes_sent
+        total.max_depth = max(total.max_depth, stats.max_depth)
+    
+    def _refresh_delivery_stats(self) -> None:
+        """Fold per-connection queue counters into the manager statistics"""
+        totals = SendQueueStats()
+        self._accumulate_queue_stats(totals, self._closed_queue_totals)
+        for connection in self.connections.values():
+            if connection.send_queue is not None:
+                self._accumulate_queue_stats(totals, connection.send_queue.stats)
+        
+        self.stats['messages_sent'] = totals.sent
+        self.stats['messages_failed'] = totals.failed
+        self.stats['messages_dropped'] = totals.dropped
+        self.stats['messages_coalesced'] = totals.coalesced
+        self.stats['bytes_sent'] = totals.bytes_sent
+    
+    def get_send_queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-connection queue depth, drops and throughput"""
+        return {
+            connection_id: connection.send_queue.snapshot()
+            for connection_id, connection in self.connections.items()
+            if connection.send_queue is not None
+        }
     
     async def _heartbeat_loop(self):
         """Background task for heartbeat management"""
@@ -311,23 +600,26 @@ class WebSocketManager:
                 
                 current_time = datetime.now()
                 expired_connections = []
+                live_connections = []
                 
                 # Check for expired connections
                 for connection_id, connection in self.connections.items():
                     if (current_time - connection.last_heartbeat).total_seconds() > 60:
                         expired_connections.append(connection_id)
                     else:
-                        # Send heartbeat
-                        heartbeat = WebSocketMessage(
-                            type=MessageType.HEARTBEAT,
-                            topic=SubscriptionTopic.USER_NOTIFICATIONS,
-                            data={
-                                "timestamp": current_time.isoformat(),
-                                "server_status": "healthy"
-                            },
-                            user_id=connection.user_id
-                        )
-                        await self._send_to_connection(connection_id, heartbeat)
+                        live_connections.append(connection_id)
+                
+                # One heartbeat frame shared by every live connection
+                if live_connections:
+                    heartbeat = WebSocketMessage(
+                        type=MessageType.HEARTBEAT,
+                        topic=SubscriptionTopic.USER_NOTIFICATIONS,
+                        data={
+                            "timestamp": current_time.isoformat(),
+                            "server_status": "healthy"
+                        }
+                    )
+                    await self._fan_out(live_connections, encode_message(heartbeat.to_dict()))
                 
                 # Clean up expired connections
                 for connection_id in expired_connections:
@@ -359,48 +651,41 @@ class WebSocketManager:
                 self.logger.error(f"Error in cleanup loop: {e}")
     
     async def _message_processor_loop(self):
-        """Background task for processing message queue"""
+        """Background task draining the broadcast queue as messages arrive"""
         while True:
+            topic, encoded, subscribers, coalesce_key = await self.message_queue.get()
             try:
-                if not self.message_queue:
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                async with self.broadcast_lock:
-                    # Process messages in batches
-                    batch_size = min(100, len(self.message_queue))
-                    
-                    for _ in range(batch_size):
-                        if not self.message_queue:
-                            break
-                        
-                        topic, message, subscribers = self.message_queue.popleft()
-                        
-                        # Send to all subscribers
-                        tasks = []
-                        for connection_id in subscribers:
-                            if connection_id in self.connections:
-                                tasks.append(self._send_to_connection(connection_id, message))
-                        
-                        if tasks:
-                            await asyncio.gather(*tasks, return_exceptions=True)
-                
-                await asyncio.sleep(0.01)  # Small delay to prevent CPU spinning
-                
+                await self._fan_out(subscribers, encoded, coalesce_key)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Error in message processor loop: {e}")
+            finally:
+                self.message_queue.task_done()
     
     async def get_connection_stats(self) -> Dict[str, Any]:
         """Get WebSocket connection statistics"""
+        self._refresh_delivery_stats()
+        queue_depths = [
+            connection.send_queue.depth
+            for connection in self.connections.values()
+            if connection.send_queue is not None
+        ]
         return {
             **self.stats,
             'active_connections': len(self.connections),
             'total_subscribers': sum(len(subscribers) for subscribers in self.topic_subscribers.values()),
             'topics_with_subscribers': len(self.topic_subscribers),
+            'route_topics_with_subscribers': len(self.route_subscribers),
             'average_messages_per_connection': (
                 self.stats['messages_sent'] / max(self.stats['total_connections'], 1)
             ),
-            'queue_size': len(self.message_queue)
+            'queue_size': self.message_queue.qsize() if self.message_queue else 0,
+            'delivery_latency': self.delivery_latency.summary(),
+            'send_queue_policy': self.overflow_policy.value,
+            'send_queue_depth_total': sum(queue_depths),
+            'send_queue_depth_max': max(queue_depths, default=0),
+            'broker': self.broker.get_stats() if self.broker else None
         }
     
     async def shutdown(self):
@@ -421,7 +706,13 @@ class WebSocketManager:
 
 
 # Global WebSocket manager instance
-websocket_manager = WebSocketManager()
+websocket_manager = WebSocketManager(
+    max_queue_size=config.WEBSOCKET.BROADCAST_QUEUE_SIZE,
+    send_timeout=config.WEBSOCKET.SEND_TIMEOUT,
+    send_queue_size=config.WEBSOCKET.SEND_QUEUE_SIZE,
+    overflow_policy=OverflowPolicy(config.WEBSOCKET.OVERFLOW_POLICY),
+    broker=get_event_broker(),
+)
 
 
 class CrawlerStatusBroadcaster:
@@ -444,6 +735,10 @@ class CrawlerStatusBroadcaster:
             try:
                 await asyncio.sleep(5)  # Broadcast every 5 seconds
                 
+                # One worker polls and publishes for all of them
+                if not await self.manager.is_leader("crawler_status", ttl=15):
+                    continue
+                
                 # Get current status for all sites
                 for site_name in self.crawler_monitor.get_monitored_sites():
                     current_status = await self._get_site_status(site_name)
@@ -502,59 +797,54 @@ class CrawlerStatusBroadcaster:
 
 
 class FlightUpdateBroadcaster:
-    """Broadcasts flight data updates via WebSocket"""
+    """
+    Pushes offer deltas from the ingest change feed to route subscribers.
+    
+    Each message carries only the new, changed and removed offers for one
+    topic key, together with ``from_seq``/``seq`` so clients can detect gaps
+    and resume after reconnecting.
+    """
     
-    def __init__(self, manager: WebSocketManager, data_manager: DataManager):
+    def __init__(
+        self,
+        manager: WebSocketManager,
+        data_manager: DataManager,
+        change_feed: Optional[FlightChangeFeed] = None
+    ):
         self.manager = manager
         self.data_manager = data_manager
+        self.change_feed = change_feed or manager.change_feed
         self.logger = logging.getLogger(__name__)
         
-        # Track last broadcast time for each route
-        self.last_broadcast: Dict[str, datetime] = {}
-        
-        # Start broadcasting task
-        self._broadcasting_task = asyncio.create_task(self._broadcast_loop())
+        self.stats = {'deltas_sent': 0, 'offers_sent': 0}
+        self.change_feed.add_listener(self._on_changes)
     
-    async def _broadcast_loop(self):
-        """Background task for broadcasting flight updates"""
-        while True:
-            try:
-                await asyncio.sleep(10)  # Check for updates every 10 seconds
-                
-                # Get recent flight data
-                recent_flights = await self._get_recent_flights()
-                
-                if recent_flights:
-                    message = WebSocketMessage(
-                        type=MessageType.FLIGHT_UPDATE,
-                        topic=SubscriptionTopic.FLIGHT_UPDATES,
-                        data={
-                            "flights": recent_flights,
-                            "count": len(recent_flights),
-                            "timestamp": datetime.now().isoformat()
-                        }
-                    )
-                    
-                    await self.manager.broadcast_to_topic(
-                        SubscriptionTopic.FLIGHT_UPDATES, message
-                    )
-                
-            except Exception as e:
-                self.logger.error(f"Error in flight update broadcast loop: {e}")
-    
-    async def _get_recent_flights(self) -> List[Dict[str, Any]]:
-        """Get recently updated flight data"""
-        try:
-            # Get flights updated in the last 30 seconds
-            cutoff_time = datetime.now() - timedelta(seconds=30)
+    async def _on_changes(self, changes: List[FlightChange]):
+        """Group a change batch by subscribed topic key and broadcast deltas"""
+        by_topic: Dict[str, List[FlightChange]] = defaultdict(list)
+        for change in changes:
+            for topic_key in change.topic_keys():
+                if self.manager.route_subscribers.get(topic_key):
+                    by_topic[topic_key].append(change)
+        
+        for topic_key, topic_changes in by_topic.items():
+            from_seq = self.change_feed.seq_before(topic_key, topic_changes[0].seq)
+            delta = collapse_changes(topic_key, from_seq, topic_changes)
+            if delta.is_empty:
+                continue
             
-            # This would be implemented based on your data storage structure
-            # For now, return empty list
-            return []
+            message = WebSocketMessage(
+                type=MessageType.FLIGHT_UPDATE,
+                topic=SubscriptionTopic.FLIGHT_UPDATES,
+                data=delta.to_dict()
+            )
+            await self.manager.broadcast_to_route(topic_key, message)
             
-        except Exception as e:
-            self.logger.error(f"Error getting recent flights: {e}")
-            return []
+            self.stats['deltas_sent'] += 1
+            self.stats['offers_sent'] += len(delta.new) + len(delta.changed) + len(delta.removed)
+    
+    def close(self):
+        self.change_feed.remove_listener(self._on_changes)
 
 
 class SystemMetricsBroadcaster:
@@ -573,6 +863,14 @@ class SystemMetricsBroadcaster:
             try:
                 await asyncio.sleep(30)  # Broadcast every 30 seconds
                 
+                # Nobody here is listening: skip sampling and leave the lease to a
+                # worker that has metrics subscribers
+                if not self.manager.topic_subscribers.get(SubscriptionTopic.SYSTEM_METRICS):
+                    continue
+                
+                if not await self.manager.is_leader("system_metrics", ttl=90):
+                    continue
+                
                 metrics = await self._get_system_metrics()
                 
                 message = WebSocketMessage(
@@ -601,7 +899,7 @@ class SystemMetricsBroadcaster:
                 "memory_percent": psutil.virtual_memory().percent,
                 "disk_percent": psutil.disk_usage('/').percent,
                 "active_connections": len(self.manager.connections),
-                "messages_sent": self.manager.stats['messages_sent'],
+                "messages_sent": (await self.manager.get_connection_stats())['messages_sent'],
                 "uptime": (datetime.now() - self.manager.stats['last_reset']).total_seconds()
             }
         except Exception as e:
@@ -686,7 +984,14 @@ async def handle_client_message(connection_id: str, message: Dict[str, Any]):
         
         if message_type == "subscribe":
             topic_name = data.get("topic")
-            if topic_name:
+            if data.get("route") or data.get("origin"):
+                last_seq = data.get("last_seq")
+                await websocket_manager.subscribe_route(
+                    connection_id,
+                    FlightTopic.from_dict(data),
+                    int(last_seq) if last_seq is not None else None
+                )
+            elif topic_name:
                 try:
                     topic = SubscriptionTopic(topic_name)
                     await websocket_manager.subscribe(connection_id, topic)
@@ -695,7 +1000,11 @@ async def handle_client_message(connection_id: str, message: Dict[str, Any]):
         
         elif message_type == "unsubscribe":
             topic_name = data.get("topic")
-            if topic_name:
+            if data.get("route") or data.get("origin"):
+                await websocket_manager.unsubscribe_route(
+                    connection_id, FlightTopic.from_dict(data)
+                )
+            elif topic_name:
                 try:
                     topic = SubscriptionTopic(topic_name)
                     await websocket_manager.unsubscribe(connection_id, topic)
@@ -768,6 +1077,16 @@ async def get_websocket_stats():
     return await websocket_manager.get_connection_stats()
 
 
+@router.get("/queues")
+async def get_websocket_queue_stats():
+    """Get per-connection send queue depth and drop counters"""
+    return {
+        "policy": websocket_manager.overflow_policy.value,
+        "high_water_mark": websocket_manager.send_queue_size,
+        "connections": websocket_manager.get_send_queue_stats()
+    }
+
+
 @router.post("/broadcast")
 async def broadcast_message(
     topic: str,
@@ -807,6 +1126,7 @@ async def broadcast_message(
 @router.get("/health")
 async def websocket_health():
     """WebSocket service health check"""
+    websocket_manager._refresh_delivery_stats()
     return {
         "status": "healthy",
         "active_connections": len(websocket_manager.connections),
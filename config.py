@@ -228,6 +228,13 @@ class CrawlerConfig:
         MAX_RETRIES: Maximum number of retry attempts
         RATE_LIMIT: Rate limiting settings per domain
         USER_AGENTS: List of user agents to rotate
+        SESSION_STATE_BACKEND: Where warm session snapshots are kept ("file", "redis" or "none")
+        SESSION_STATE_DIR: Directory of the file session state backend
+        DEBUG_ARTIFACTS_ENABLED: Whether failed crawls persist screenshots, HTML and HAR
+        DEBUG_ARTIFACTS_DIR: Directory debug artifacts are written to
+        DEBUG_ARTIFACTS_RING_SIZE: Recent responses kept in memory per crawler
+        DEBUG_ARTIFACTS_SAMPLE_RATE: Fraction of successful crawls captured as well
+        LEG_CRAWL_CONCURRENCY: Connection legs crawled at once by one connecting-flight search
     """
     DOMAINS: List[str] = field(
         default_factory=lambda: [
@@ -268,6 +275,13 @@ class CrawlerConfig:
             "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
         ]
     )
+    SESSION_STATE_BACKEND: str = os.getenv("SESSION_STATE_BACKEND", "file")
+    SESSION_STATE_DIR: str = os.getenv("SESSION_STATE_DIR", "data/session_state")
+    DEBUG_ARTIFACTS_ENABLED: bool = os.getenv("DEBUG_ARTIFACTS_ENABLED", "true").lower() == "true"
+    DEBUG_ARTIFACTS_DIR: str = os.getenv("DEBUG_ARTIFACTS_DIR", "data/debug_artifacts")
+    DEBUG_ARTIFACTS_RING_SIZE: int = int(os.getenv("DEBUG_ARTIFACTS_RING_SIZE", "20"))
+    DEBUG_ARTIFACTS_SAMPLE_RATE: float = float(os.getenv("DEBUG_ARTIFACTS_SAMPLE_RATE", "0"))
+    LEG_CRAWL_CONCURRENCY: int = int(os.getenv("LEG_CRAWL_CONCURRENCY", "4"))
 
 
 @dataclass
@@ -280,12 +294,24 @@ class MonitoringConfig:
         METRICS_PORT: Port for Prometheus metrics endpoint
         HEALTH_CHECK_PORT: Port for health check endpoint
         LOG_FILE: Name of the log file
+        TRACE_SAMPLE_RATE: Fraction of crawls traced span by span (0 disables)
+        TRACE_EXPORT_PATH: JSON-lines file finished traces are appended to
+        TRACE_BUFFER_SIZE: Recent traces kept in memory for the waterfall view
+        LOOP_LAG_INTERVAL: Seconds between event-loop lag probes
+        LOOP_BLOCK_THRESHOLD: Seconds a callback may hold the loop before its stack is captured
+        SYSTEM_SAMPLE_INTERVAL: Seconds between background CPU/memory/connection samples
     """
     ENABLED: bool = True
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     METRICS_PORT: int = 9090
     HEALTH_CHECK_PORT: int = 8000
     LOG_FILE: str = "flight_crawler.log"
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "")
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+    LOOP_BLOCK_THRESHOLD: float = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+    SYSTEM_SAMPLE_INTERVAL: float = float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "1.0"))
 
 
 @dataclass
@@ -295,10 +321,32 @@ class ErrorConfig:
     Attributes:
         circuit_breaker_threshold: Number of failures before opening circuit
         circuit_breaker_timeout: Timeout in seconds before attempting to close circuit
+        circuit_state_backend: local (per process), memory or redis (shared by all workers)
+        circuit_state_cache_ttl: Seconds a worker trusts its cached copy of shared circuit state
     """
 
     circuit_breaker_threshold: int = 5
     circuit_breaker_timeout: int = 300  # seconds
+    circuit_state_backend: str = os.getenv("CIRCUIT_STATE_BACKEND", "local")
+    circuit_state_cache_ttl: float = float(os.getenv("CIRCUIT_STATE_CACHE_TTL", "1.0"))
+
+
+@dataclass
+class WebSocketConfig:
+    """Configuration for WebSocket delivery and backpressure.
+    
+    Attributes:
+        SEND_QUEUE_SIZE: Per-connection outbound queue high-water mark
+        OVERFLOW_POLICY: drop_oldest, coalesce or disconnect when full
+        SEND_TIMEOUT: Seconds a single frame write may take
+        BROADCAST_QUEUE_SIZE: Size of the shared broadcast queue
+        EVENT_BROKER: memory (single worker) or redis (events shared by all workers)
+    """
+    SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    OVERFLOW_POLICY: str = os.getenv("WS_OVERFLOW_POLICY", "coalesce")
+    SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+    BROADCAST_QUEUE_SIZE: int = int(os.getenv("WS_BROADCAST_QUEUE_SIZE", "10000"))
+    EVENT_BROKER: str = os.getenv("EVENT_BROKER", "memory")
 
 
 @dataclass
@@ -314,12 +362,14 @@ class Config:
         CRAWLER: Crawler configuration
         MONITORING: Monitoring configuration
         ERROR: Error handling configuration
+        WEBSOCKET: WebSocket delivery configuration
     """
     DATABASE: DatabaseConfig = field(default_factory=DatabaseConfig)
     REDIS: RedisConfig = field(default_factory=RedisConfig)
     CRAWLER: CrawlerConfig = field(default_factory=CrawlerConfig)
     MONITORING: MonitoringConfig = field(default_factory=MonitoringConfig)
     ERROR: ErrorConfig = field(default_factory=ErrorConfig)
+    WEBSOCKET: WebSocketConfig = field(default_factory=WebSocketConfig)
 
     # API Configuration
     API_VERSION: str = "v1"
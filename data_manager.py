@@ -15,12 +15,16 @@ from sqlalchemy import (
     func,
     Boolean,
     text,
+    and_,
+    or_,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, Session
 from sqlalchemy.pool import QueuePool
 from redis import Redis
 from config import config
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, get_event_broker
+from utils.tracing import get_tracer
 import copy
 import datetime as dt
 import re
@@ -314,7 +318,7 @@ class DataManager:
             raise RuntimeError("Database not initialized")
         return self.SessionLocal()
 
-    def store_flights(self, flights_data: Dict[str, List[Dict[str, Any]]]) -> None:
+    def store_flights_sync(self, flights_data: Dict[str, List[Dict[str, Any]]]) -> None:
         """Store flight data in database with security validation"""
         if not self.engine:
             logger.error("Database not available")
@@ -658,30 +662,7 @@ class DataManager:
                 .all()
             )
 
-            return [
-                {
-                    "flight_id": f.flight_id,
-                    "airline": f.airline,
-                    "flight_number": f.flight_number,
-                    "origin": f.origin,
-                    "destination": f.destination,
-                    "departure_time": (
-                        f.departure_time.isoformat() if f.departure_time else None
-                    ),
-                    "arrival_time": (
-                        f.arrival_time.isoformat() if f.arrival_time else None
-                    ),
-                    "price": f.price,
-                    "currency": f.currency,
-                    "seat_class": f.seat_class,
-                    "aircraft_type": f.aircraft_type,
-                    "duration_minutes": f.duration_minutes,
-                    "flight_type": f.flight_type,
-                    "scraped_at": f.scraped_at.isoformat() if f.scraped_at else None,
-                    "source_url": f.source_url,
-                }
-                for f in flights
-            ]
+            return [self._flight_to_dict(f) for f in flights]
 
         except Exception as e:
             logger.error(f"Error getting recent flights: {e}")
@@ -689,6 +670,133 @@ class DataManager:
         finally:
             session.close()
 
+    @staticmethod
+    def _flight_to_dict(f: Flight) -> Dict[str, Any]:
+        return {
+            "flight_id": f.flight_id,
+            "airline": f.airline,
+            "flight_number": f.flight_number,
+            "origin": f.origin,
+            "destination": f.destination,
+            "departure_time": (
+                f.departure_time.isoformat() if f.departure_time else None
+            ),
+            "arrival_time": (
+                f.arrival_time.isoformat() if f.arrival_time else None
+            ),
+            "price": f.price,
+            "currency": f.currency,
+            "seat_class": f.seat_class,
+            "aircraft_type": f.aircraft_type,
+            "duration_minutes": f.duration_minutes,
+            "flight_type": f.flight_type,
+            "scraped_at": f.scraped_at.isoformat() if f.scraped_at else None,
+            "source_url": f.source_url,
+        }
+
+    async def get_route_flights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        scraped_since: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get stored flights for a route departing on ``departure_date``"""
+        if not self.engine:
+            return []
+
+        origin = InputValidator.validate_airport_code(origin)
+        destination = InputValidator.validate_airport_code(destination)
+        day_start = datetime.fromisoformat(departure_date[:10])
+
+        session = self.get_session()
+        try:
+            query = session.query(Flight).filter(
+                Flight.origin == origin,
+                Flight.destination == destination,
+                Flight.departure_time >= day_start,
+                Flight.departure_time < day_start + timedelta(days=1),
+            )
+            if scraped_since is not None:
+                query = query.filter(Flight.scraped_at >= scraped_since)
+            return [self._flight_to_dict(f) for f in query.order_by(Flight.price).all()]
+
+        except Exception as e:
+            logger.error(f"Error getting route flights: {e}")
+            return []
+        finally:
+            session.close()
+
+    async def get_route_min_fares(
+        self,
+        origin: str,
+        destination: str,
+        start: datetime,
+        end: datetime,
+        scraped_since: Optional[datetime] = None,
+    ) -> Dict[str, Tuple[float, datetime]]:
+        """Cheapest stored fare per departure date in ``[start, end)``
+
+        Each date maps to ``(price, scraped_at)``; ``scraped_at`` is the
+        oldest scrape among the date's fares, so data derived from it never
+        outlives any fare behind it.
+        """
+        if not self.engine:
+            return {}
+
+        origin = InputValidator.validate_airport_code(origin)
+        destination = InputValidator.validate_airport_code(destination)
+
+        session = self.get_session()
+        try:
+            departure_day = func.date(Flight.departure_time)
+            query = session.query(
+                departure_day, func.min(Flight.price), func.min(Flight.scraped_at)
+            ).filter(
+                Flight.origin == origin,
+                Flight.destination == destination,
+                Flight.departure_time >= start,
+                Flight.departure_time < end,
+                Flight.price > 0,
+            )
+            if scraped_since is not None:
+                query = query.filter(Flight.scraped_at >= scraped_since)
+            rows = query.group_by(departure_day).all()
+            return {
+                str(day)[:10]: (float(price), scraped_at)
+                for day, price, scraped_at in rows
+                if day and price
+            }
+
+        except Exception as e:
+            logger.error(f"Error getting route minimum fares: {e}")
+            return {}
+        finally:
+            session.close()
+
+    async def get_flights_departing(
+        self, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """Get stored flights departing in ``[start, end)`` from any airport"""
+        if not self.engine:
+            return []
+
+        session = self.get_session()
+        try:
+            flights = (
+                session.query(Flight)
+                .filter(Flight.departure_time >= start, Flight.departure_time < end)
+                .order_by(Flight.departure_time)
+                .all()
+            )
+            return [self._flight_to_dict(f) for f in flights]
+
+        except Exception as e:
+            logger.error(f"Error getting departing flights: {e}")
+            return []
+        finally:
+            session.close()
+
     async def get_cached_search(self, search_key: str) -> Optional[Dict[str, Any]]:
         """Get cached search results asynchronously"""
         if not self.redis:
@@ -787,6 +895,51 @@ class DataManager:
             logger.error(f"Error getting current price: {e}")
             return 0.0
 
+    async def get_current_prices(self, routes: List[str]) -> Dict[str, float]:
+        """Get current average prices for several routes with one grouped query"""
+        if not self.engine or not routes:
+            return {}
+
+        try:
+            pairs = {}
+            for route in routes:
+                origin, destination = InputValidator.validate_route_string(route)
+                pairs[(origin, destination)] = route
+
+            session = self.get_session()
+            try:
+                cutoff_date = datetime.now() - timedelta(hours=24)
+                rows = (
+                    session.query(
+                        Flight.origin, Flight.destination, func.avg(Flight.price)
+                    )
+                    .filter(
+                        or_(
+                            *[
+                                and_(Flight.origin == origin, Flight.destination == destination)
+                                for origin, destination in pairs
+                            ]
+                        ),
+                        Flight.scraped_at >= cutoff_date,
+                    )
+                    .group_by(Flight.origin, Flight.destination)
+                    .all()
+                )
+
+                prices = {route: 0.0 for route in pairs.values()}
+                for origin, destination, avg_price in rows:
+                    route = pairs.get((origin, destination))
+                    if route is not None and avg_price:
+                        prices[route] = float(avg_price)
+                return prices
+
+            finally:
+                session.close()
+
+        except Exception as e:
+            logger.error(f"Error getting current prices: {e}")
+            return {}
+
     async def get_search_count(self, route: str) -> int:
         """Get search count for a route"""
         if not self.engine:
@@ -817,8 +970,15 @@ class DataManager:
             return 0
 
     async def store_flights(self, flights: Dict[str, List[Dict[str, Any]]]) -> None:
-        """Store flights asynchronously"""
-        self.store_flights(flights)
+        """Store flights and publish them once to every worker's change feed"""
+        with get_tracer().span(
+            "db.store_flights", flights=sum(len(batch) for batch in flights.values())
+        ):
+            self.store_flights_sync(flights)
+        try:
+            await get_event_broker().publish(FLIGHTS_INGESTED_CHANNEL, flights)
+        except Exception as e:
+            logger.error(f"Error publishing ingested flights: {e}")
 
     async def cache_search_results(
         self, search_params: Dict[str, Any], results: Dict[str, Any]
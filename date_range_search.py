@@ -0,0 +1,199 @@
+"""
+Concurrent, cache-aware date-range search.
+
+A flexible-date search (e.g. +/-3 days) resolves each date from the cheapest
+source available: the Redis search cache, then recently stored flights, and
+only then a live crawl. Dates that need a crawl are fanned out concurrently,
+bounded by a semaphore per crawled site shared by every search in the process
+so a burst of calendar requests cannot open unbounded browser sessions against
+one site. A crawl that fans out to several sites holds a slot at each of them. Results are yielded as each date completes, with per-date latency
+and source, so callers can render a price calendar progressively.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CrawlFunction = Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+
+SOURCE_CACHE = "cache"
+SOURCE_STORED = "stored"
+SOURCE_CRAWL = "crawl"
+
+DEFAULT_SITE_CONCURRENCY = 2
+
+# Per event loop so semaphores never outlive or cross loops
+_site_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _site_semaphore(site: str, limit: int) -> asyncio.Semaphore:
+    semaphores = _site_semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(site)
+    if semaphore is None:
+        semaphore = semaphores[site] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def date_window(center: str, days_before: int, days_after: int) -> List[str]:
+    """ISO dates from ``center - days_before`` to ``center + days_after``"""
+    base = datetime.fromisoformat(center).date()
+    return [
+        (base + timedelta(days=offset)).isoformat()
+        for offset in range(-days_before, days_after + 1)
+    ]
+
+
+@dataclass
+class DateResult:
+    """Outcome of one date in a range search"""
+
+    date: str
+    flights: List[Dict[str, Any]] = field(default_factory=list)
+    source: str = SOURCE_CRAWL
+    latency_ms: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+
+    @property
+    def min_price(self) -> Optional[float]:
+        prices = [f["price"] for f in self.flights if f.get("price")]
+        return min(prices) if prices else None
+
+    def to_dict(self, include_flights: bool = True) -> Dict[str, Any]:
+        data = {
+            "date": self.date,
+            "count": len(self.flights),
+            "min_price": self.min_price,
+            "source": self.source,
+            "latency_ms": round(self.latency_ms, 1),
+            "success": self.success,
+            "error": self.error,
+        }
+        if include_flights:
+            data["flights"] = self.flights
+        return data
+
+
+class DateRangeSearchExecutor:
+    """Resolve many departure dates for one route with bounded concurrency"""
+
+    def __init__(
+        self,
+        crawl: CrawlFunction,
+        data_manager=None,
+        site: Optional[str] = None,
+        site_concurrency: int = DEFAULT_SITE_CONCURRENCY,
+        sites: Optional[Iterable[str]] = None,
+        stored_max_age_hours: float = 1.0,
+        cache_results: bool = True,
+    ):
+        """
+        ``crawl`` takes search params and returns flight dicts. With a
+        ``data_manager`` dates are served from the search cache and from
+        flights stored within ``stored_max_age_hours`` before crawling.
+
+        ``site`` is the site ``crawl`` searches, or ``sites`` the sites it fans
+        out to; without either, crawls are only bounded within this executor.
+        """
+        self.crawl = crawl
+        self.data_manager = data_manager
+        self.sites = sorted(set(sites or ())) or ([site] if site else [])
+        self.site_concurrency = site_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stored_max_age_hours = stored_max_age_hours
+        self.cache_results = cache_results
+
+    async def _from_local(self, params: Dict[str, Any]) -> Optional[DateResult]:
+        if self.data_manager is None:
+            return None
+        try:
+            if hasattr(self.data_manager, "get_cached_results"):
+                cached = self.data_manager.get_cached_results(params)
+                if cached and cached.get("flights") is not None:
+                    return DateResult(params["departure_date"], cached["flights"], SOURCE_CACHE)
+
+            if self.stored_max_age_hours > 0 and hasattr(self.data_manager, "get_route_flights"):
+                stored = await self.data_manager.get_route_flights(
+                    params["origin"],
+                    params["destination"],
+                    params["departure_date"],
+                    scraped_since=datetime.now() - timedelta(hours=self.stored_max_age_hours),
+                )
+                if stored:
+                    return DateResult(params["departure_date"], stored, SOURCE_STORED)
+        except Exception as e:
+            logger.warning(f"Local lookup for {params['departure_date']} failed: {e}")
+        return None
+
+    async def _acquire_sites(self, stack: AsyncExitStack) -> None:
+        if not self.sites:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.site_concurrency)
+            await stack.enter_async_context(self._semaphore)
+            return
+        # Sorted, so searches over overlapping sites cannot deadlock
+        for site in self.sites:
+            await stack.enter_async_context(_site_semaphore(site, self.site_concurrency))
+
+    async def _from_crawl(self, params: Dict[str, Any]) -> DateResult:
+        date = params["departure_date"]
+        async with AsyncExitStack() as stack:
+            await self._acquire_sites(stack)
+            try:
+                flights = list(await self.crawl(params) or [])
+            except Exception as e:
+                logger.error(f"Crawl for {date} failed: {e}")
+                return DateResult(date, [], SOURCE_CRAWL, success=False, error=str(e))
+
+        if self.cache_results and hasattr(self.data_manager, "cache_search_results"):
+            try:
+                await self.data_manager.cache_search_results(
+                    params, {"flights": flights, "cached_at": datetime.now().isoformat()}
+                )
+            except Exception as e:
+                logger.warning(f"Caching results for {date} failed: {e}")
+        return DateResult(date, flights, SOURCE_CRAWL)
+
+    async def _resolve(self, params: Dict[str, Any]) -> DateResult:
+        start = time.perf_counter()
+        result = await self._from_local(params)
+        if result is None:
+            result = await self._from_crawl(params)
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    async def iter_dates(
+        self, search_params: Dict[str, Any], dates: List[str]
+    ) -> AsyncIterator[DateResult]:
+        """Yield one result per date in completion order"""
+        tasks = [
+            asyncio.ensure_future(self._resolve({**search_params, "departure_date": date}))
+            for date in dict.fromkeys(dates)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search(self, search_params: Dict[str, Any], dates: List[str]) -> Dict[str, Any]:
+        """Resolve every date and return results in date order with timings"""
+        start = time.perf_counter()
+        results = {result.date: result async for result in self.iter_dates(search_params, dates)}
+        ordered = [results[date] for date in sorted(results)]
+        return {
+            "results": ordered,
+            "total_latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "sources": {
+                source: sum(1 for r in ordered if r.source == source)
+                for source in (SOURCE_CACHE, SOURCE_STORED, SOURCE_CRAWL)
+            },
+        }
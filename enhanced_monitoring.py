@@ -16,6 +16,7 @@ from prometheus_client import (
 import asyncio
 import json
 from config import config
+from utils.latency_sketch import get_latency_sketches
 
 
 @dataclass
@@ -147,6 +148,7 @@ class EnhancedMonitoring:
         # Update histograms
         self.crawler_duration_seconds.labels(site=site).observe(duration)
         self.crawler_response_size_bytes.labels(site=site).observe(response_size)
+        get_latency_sketches().record(site, "request", duration)
 
         # Update business metrics
         if flights_found > 0:
@@ -183,6 +185,7 @@ class EnhancedMonitoring:
         # Update histograms if duration available
         if duration > 0:
             self.crawler_duration_seconds.labels(site=site).observe(duration)
+            get_latency_sketches().record(site, "request", duration)
 
         # Update crawler metrics
         if site in self.crawler_metrics:
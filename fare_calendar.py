@@ -0,0 +1,287 @@
+"""
+Cheapest-fare calendar per route.
+
+For every route and departure month one Redis hash holds the cheapest fare
+seen per departure day, so a month calendar is a single ``HGETALL``::
+
+    fare_calendar:THR-KIH:2024-06  ->  {"01": "1850000|alibaba|1717200000", ...}
+
+Each cell is ``price|site|observed_at``. Ingest batches are folded in
+incrementally: a cell is replaced when the new fare is cheaper, when it comes
+from the site that set the current minimum (a re-crawl is authoritative, so
+the minimum can rise when a fare sells out), when the current fare has
+expired. Cells backfilled from stored flights keep the time their flights
+were scraped, so they expire with the data behind them; any crawled fare
+replaces them, and they never replace a crawled fare that is still current. Expired cells are hidden and dropped on read, and each month hash
+expires on its own once the month is over. With Redis the merge runs in a
+Lua script so workers cannot overwrite each other's cheaper fares.
+"""
+
+import calendar
+import inspect
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, BrokerEvent, EventBroker
+
+logger = logging.getLogger(__name__)
+
+# (price, site, observed_at)
+FareCell = Tuple[float, str, float]
+
+DEFAULT_FARE_TTL = 6 * 3600
+
+# Site of cells backfilled from stored flights; any crawled fare replaces them
+STORED_SITE = "stored"
+
+_MERGE_SCRIPT = f"""
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local updated = 0
+for i = 4, #ARGV, 4 do
+    local day, price, site = ARGV[i], tonumber(ARGV[i + 1]), ARGV[i + 2]
+    local replace = true
+    local current = redis.call('HGET', KEYS[1], day)
+    if current then
+        local p1 = string.find(current, '|', 1, true)
+        local p2 = string.find(current, '|', p1 + 1, true)
+        local cur_price = tonumber(string.sub(current, 1, p1 - 1))
+        local cur_site = string.sub(current, p1 + 1, p2 - 1)
+        local cur_ts = tonumber(string.sub(current, p2 + 1))
+        replace = now - cur_ts > ttl or site == cur_site or cur_site == '{STORED_SITE}'
+            or (site ~= '{STORED_SITE}' and price < cur_price)
+    end
+    if replace then
+        redis.call('HSET', KEYS[1], day, ARGV[i + 3])
+        updated = updated + 1
+    end
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return updated
+"""
+
+
+async def _resolve(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+def encode_cell(price: float, site: str, observed_at: float) -> str:
+    return f"{price:.15g}|{site}|{int(observed_at)}"
+
+
+def decode_cell(value) -> Optional[FareCell]:
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        price, site, observed_at = value.split("|", 2)
+        return float(price), site, float(observed_at)
+    except (AttributeError, ValueError):
+        return None
+
+
+def should_replace(current: Optional[FareCell], price: float, site: str, now: float, ttl: float) -> bool:
+    """Python twin of the Lua merge rule"""
+    if current is None:
+        return True
+    current_price, current_site, observed_at = current
+    if now - observed_at > ttl or site == current_site or current_site == STORED_SITE:
+        return True
+    return site != STORED_SITE and price < current_price
+
+
+def _month_end(month: str) -> datetime:
+    year, month_number = (int(part) for part in month.split("-"))
+    last_day = calendar.monthrange(year, month_number)[1]
+    return datetime(year, month_number, last_day) + timedelta(days=1)
+
+
+def batch_minimums(
+    flights_by_source: Dict[str, List[Dict]]
+) -> Dict[Tuple[str, str], Dict[str, Tuple[float, str]]]:
+    """Cheapest ``(price, site)`` per ``(route, month) -> day`` in an ingest batch"""
+    minimums: Dict[Tuple[str, str], Tuple[float, str]] = {}
+    for source, flights in flights_by_source.items():
+        for flight in flights:
+            origin, destination = flight.get("origin"), flight.get("destination")
+            departure = str(flight.get("departure_time") or flight.get("departure_date") or "")
+            try:
+                price = float(flight.get("price") or 0)
+                day = date.fromisoformat(departure[:10])
+            except (TypeError, ValueError):
+                continue
+            if not origin or not destination or price <= 0:
+                continue
+            site = flight.get("source_site") or flight.get("site") or source
+            key = (f"{origin}-{destination}".upper(), day.isoformat())
+            if key not in minimums or price < minimums[key][0]:
+                minimums[key] = (price, site)
+
+    grouped: Dict[Tuple[str, str], Dict[str, Tuple[float, str]]] = defaultdict(dict)
+    for (route, day), cell in minimums.items():
+        grouped[(route, day[:7])][day[8:10]] = cell
+    return grouped
+
+
+class FareCalendar:
+    """Route x departure-day minimum fare matrix"""
+
+    KEY_PREFIX = "fare_calendar"
+
+    def __init__(self, redis_client=None, fare_ttl: float = DEFAULT_FARE_TTL):
+        self.redis_client = redis_client
+        self.fare_ttl = fare_ttl
+        self._months: Dict[str, Dict[str, str]] = {}
+        self._merge_script = None
+        if redis_client is not None and hasattr(redis_client, "register_script"):
+            self._merge_script = redis_client.register_script(_MERGE_SCRIPT)
+        self.broker: Optional[EventBroker] = None
+        self.stats = {"batches": 0, "cells_updated": 0, "reads": 0, "expired": 0}
+
+    def key(self, route: str, month: str) -> str:
+        return f"{self.KEY_PREFIX}:{route.upper()}:{month}"
+
+    def attach(self, broker: EventBroker) -> None:
+        """Fold every ingested batch into the calendar"""
+        self.broker = broker
+        broker.subscribe(FLIGHTS_INGESTED_CHANNEL, self._on_flights_ingested)
+
+    async def _on_flights_ingested(self, event: BrokerEvent) -> None:
+        # One worker merges each batch; the others read the shared hashes
+        if self.redis_client is not None and not await self.broker.acquire_leadership(
+            "fare_calendar", ttl=60
+        ):
+            return
+        try:
+            await self.ingest(event.payload)
+        except Exception as e:
+            logger.error(f"Error updating fare calendar: {e}")
+
+    async def ingest(self, flights_by_source: Dict[str, List[Dict]], now: Optional[float] = None) -> int:
+        """Merge an ingest batch; returns the number of cells changed"""
+        now = time.time() if now is None else now
+        updated = 0
+        for (route, month), days in batch_minimums(flights_by_source).items():
+            updated += await self._merge(self.key(route, month), month, days, now)
+        self.stats["batches"] += 1
+        self.stats["cells_updated"] += updated
+        return updated
+
+    async def _merge(self, key: str, month: str, days: Dict[str, Tuple], now: float) -> int:
+        """Fold ``{day: (price, site[, observed_at])}`` into a month hash"""
+        expire_at = int(_month_end(month).timestamp()) + 86400
+        cells_in = {day: (cell[0], cell[1], cell[2] if len(cell) > 2 else now) for day, cell in days.items()}
+        if self._merge_script is not None:
+            args: List[Any] = [now, self.fare_ttl, expire_at]
+            for day, (price, site, observed_at) in cells_in.items():
+                args.extend([day, price, site, encode_cell(price, site, observed_at)])
+            return int(await _resolve(self._merge_script(keys=[key], args=args)))
+
+        if self.redis_client is not None:
+            stored = await _resolve(self.redis_client.hgetall(key)) or {}
+            cells = {
+                (field.decode() if isinstance(field, bytes) else field): value
+                for field, value in stored.items()
+            }
+        else:
+            cells = self._months.setdefault(key, {})
+
+        changes = {}
+        for day, (price, site, observed_at) in cells_in.items():
+            if should_replace(decode_cell(cells.get(day)), price, site, now, self.fare_ttl):
+                changes[day] = encode_cell(price, site, observed_at)
+        if changes:
+            if self.redis_client is not None:
+                await _resolve(self.redis_client.hset(key, mapping=changes))
+                await _resolve(self.redis_client.expireat(key, expire_at))
+            else:
+                cells.update(changes)
+        return len(changes)
+
+    async def get_month(self, route: str, month: str, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Current cheapest fare per departure date for one month"""
+        now = time.time() if now is None else now
+        key = self.key(route, month)
+        self.stats["reads"] += 1
+        if self.redis_client is not None:
+            stored = await _resolve(self.redis_client.hgetall(key)) or {}
+        else:
+            stored = self._months.get(key, {})
+
+        days, expired = {}, []
+        for field, value in stored.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            cell = decode_cell(value)
+            if cell is None or now - cell[2] > self.fare_ttl:
+                expired.append(field)
+                continue
+            price, site, observed_at = cell
+            days[f"{month}-{field}"] = {
+                "price": price,
+                "site": site,
+                "observed_at": datetime.fromtimestamp(observed_at).isoformat(),
+            }
+        if expired:
+            await self._drop(key, expired)
+        return dict(sorted(days.items()))
+
+    async def _drop(self, key: str, days: List[str]) -> None:
+        self.stats["expired"] += len(days)
+        if self.redis_client is not None:
+            await _resolve(self.redis_client.hdel(key, *days))
+        else:
+            for day in days:
+                self._months.get(key, {}).pop(day, None)
+
+    async def invalidate(self, route: str, departure_date: Optional[str] = None, month: Optional[str] = None) -> None:
+        """Forget one day, or a whole month, of a route"""
+        if departure_date is not None:
+            await self._drop(self.key(route, departure_date[:7]), [departure_date[8:10]])
+        elif month is not None:
+            key = self.key(route, month)
+            if self.redis_client is not None:
+                await _resolve(self.redis_client.delete(key))
+            else:
+                self._months.pop(key, None)
+
+    async def backfill(self, route: str, month: str, fares: Dict[str, Tuple[float, float]], now: Optional[float] = None) -> int:
+        """Seed a month from stored flights (``{iso_date: (price, scraped_at)}``)
+
+        Cells keep the scrape time as their observation time and count as
+        ``STORED_SITE``, so any crawled fare replaces them.
+        """
+        now = time.time() if now is None else now
+        days = {
+            day[8:10]: (price, STORED_SITE, min(scraped_at, now))
+            for day, (price, scraped_at) in fares.items()
+            if day.startswith(month)
+        }
+        if not days:
+            return 0
+        return await self._merge(self.key(route, month), month, days, now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "backend": "redis" if self.redis_client is not None else "memory"}
+
+
+_fare_calendar: Optional[FareCalendar] = None
+
+
+def get_fare_calendar() -> FareCalendar:
+    """Process-wide calendar; uses Redis when the event broker does"""
+    global _fare_calendar
+    if _fare_calendar is None:
+        from config import config
+        from utils.event_broker import REDIS_AVAILABLE, aioredis, get_event_broker
+
+        redis_client = None
+        if REDIS_AVAILABLE and config.WEBSOCKET.EVENT_BROKER == "redis":
+            redis_client = aioredis.from_url(config.REDIS_URL, decode_responses=True)
+        _fare_calendar = FareCalendar(redis_client)
+        _fare_calendar.attach(get_event_broker())
+    return _fare_calendar
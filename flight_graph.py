@@ -0,0 +1,280 @@
+"""
+Time-indexed flight graph for connecting-flight search.
+
+Stored flights are indexed per departure airport in lists sorted by
+departure time. A connection from ``A`` to ``C`` is found by walking the
+day's departures from ``A`` and, for each arrival at ``B``, bisecting ``B``'s
+departures to the ``[arrival + min_connection, arrival + max_connection]``
+window and keeping the legs that continue to ``C``. Joining a day of local
+data takes milliseconds, so the crawler is only needed for legs that have
+no stored flights at all.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# Domestic and regional hubs tried when no stored leg reaches the destination
+DEFAULT_CONNECTION_HUBS = ["THR", "IKA", "MHD", "SYZ", "IFN", "TBZ", "IST", "DXB"]
+
+SORT_KEYS = ("price", "duration", "layover")
+
+
+# Legs are compared in the wall-clock time of their airport, as sites list
+# them; airports not listed here are in Iran
+LOCAL_TIMEZONE = ZoneInfo("Asia/Tehran")
+AIRPORT_TIMEZONES = {
+    "IST": ZoneInfo("Europe/Istanbul"),
+    "SAW": ZoneInfo("Europe/Istanbul"),
+    "DXB": ZoneInfo("Asia/Dubai"),
+    "SHJ": ZoneInfo("Asia/Dubai"),
+    "DOH": ZoneInfo("Asia/Qatar"),
+    "NJF": ZoneInfo("Asia/Baghdad"),
+    "BGW": ZoneInfo("Asia/Baghdad"),
+    "EVN": ZoneInfo("Asia/Yerevan"),
+    "TBS": ZoneInfo("Asia/Tbilisi"),
+    "GYD": ZoneInfo("Asia/Baku"),
+}
+
+
+def _parse_time(value, airport: Optional[str] = None) -> Optional[datetime]:
+    """Naive wall-clock time at ``airport``; aware times are converted first"""
+    if not isinstance(value, datetime):
+        if not value:
+            return None
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        zone = AIRPORT_TIMEZONES.get((airport or "").upper(), LOCAL_TIMEZONE)
+        value = value.astimezone(zone)
+    return value.replace(tzinfo=None)
+
+
+@dataclass(eq=False)
+class FlightLeg:
+    """One stored flight"""
+
+    departure: datetime
+    arrival: datetime
+    origin: str
+    destination: str
+    price: float
+    key: str
+    flight: Dict = field(repr=False)
+
+    @classmethod
+    def from_flight(cls, flight: Dict) -> Optional["FlightLeg"]:
+        origin, destination = flight.get("origin"), flight.get("destination")
+        departure = _parse_time(flight.get("departure_time"), origin)
+        arrival = _parse_time(flight.get("arrival_time"), destination)
+        try:
+            price = float(flight.get("price") or 0)
+        except (TypeError, ValueError):
+            return None
+        if not departure or not arrival or not origin or not destination or price <= 0:
+            return None
+        if arrival <= departure:
+            return None
+        key = flight.get("flight_id") or "|".join(
+            str(flight.get(name) or "")
+            for name in ("airline", "flight_number", "source_site")
+        ) + f"|{origin}|{destination}|{departure.isoformat()}"
+        return cls(
+            departure=departure,
+            arrival=arrival,
+            origin=origin.upper(),
+            destination=destination.upper(),
+            price=price,
+            key=key,
+            flight=flight,
+        )
+
+
+@dataclass
+class Itinerary:
+    """A two-leg connection found in the graph"""
+
+    first: FlightLeg
+    second: FlightLeg
+
+    @property
+    def layover_minutes(self) -> int:
+        return int((self.second.departure - self.first.arrival).total_seconds() // 60)
+
+    @property
+    def total_duration_minutes(self) -> int:
+        return int((self.second.arrival - self.first.departure).total_seconds() // 60)
+
+    @property
+    def total_price(self) -> float:
+        return self.first.price + self.second.price
+
+    @property
+    def airports(self) -> List[str]:
+        return [self.first.origin, self.first.destination, self.second.destination]
+
+    def sort_key(self, sort_by: str) -> Tuple:
+        if sort_by == "duration":
+            return (self.total_duration_minutes, self.total_price, self.layover_minutes)
+        if sort_by == "layover":
+            return (self.layover_minutes, self.total_price, self.total_duration_minutes)
+        return (self.total_price, self.total_duration_minutes, self.layover_minutes)
+
+
+class _Departures:
+    """Legs leaving one airport, sorted by departure time"""
+
+    __slots__ = ("times", "legs")
+
+    def __init__(self):
+        self.times: List[datetime] = []
+        self.legs: List[FlightLeg] = []
+
+    def insert(self, leg: FlightLeg) -> None:
+        index = bisect_right(self.times, leg.departure)
+        self.times.insert(index, leg.departure)
+        self.legs.insert(index, leg)
+
+    def remove(self, leg: FlightLeg) -> None:
+        low = bisect_left(self.times, leg.departure)
+        high = bisect_right(self.times, leg.departure)
+        for index in range(low, high):
+            if self.legs[index] is leg:
+                del self.times[index]
+                del self.legs[index]
+                return
+
+    def window(self, start: datetime, end: datetime) -> List[FlightLeg]:
+        return self.legs[bisect_left(self.times, start):bisect_right(self.times, end)]
+
+
+class FlightGraph:
+    """In-memory departure index over stored flights"""
+
+    def __init__(self):
+        self._departures: Dict[str, _Departures] = {}
+        self._legs: Dict[str, FlightLeg] = {}
+        self._loaded_days: Set[date] = set()
+
+    def __len__(self) -> int:
+        return len(self._legs)
+
+    def add_flight(self, flight: Dict) -> bool:
+        """Index a flight, replacing an earlier copy with the same key"""
+        leg = FlightLeg.from_flight(flight)
+        if leg is None:
+            return False
+        previous = self._legs.get(leg.key)
+        if previous is not None:
+            if previous.price == leg.price and previous.arrival == leg.arrival:
+                return False
+            self._departures[previous.origin].remove(previous)
+        self._legs[leg.key] = leg
+        self._departures.setdefault(leg.origin, _Departures()).insert(leg)
+        return True
+
+    def add_flights(self, flights: Iterable[Dict]) -> int:
+        return sum(1 for flight in flights if self.add_flight(flight))
+
+    def prune(self, before: datetime) -> int:
+        """Drop legs departing before ``before``"""
+        removed = 0
+        for departures in self._departures.values():
+            cut = bisect_left(departures.times, before)
+            if not cut:
+                continue
+            for leg in departures.legs[:cut]:
+                self._legs.pop(leg.key, None)
+            del departures.times[:cut]
+            del departures.legs[:cut]
+            removed += cut
+        self._loaded_days = {day for day in self._loaded_days if day >= before.date()}
+        return removed
+
+    def is_loaded(self, day: date) -> bool:
+        return day in self._loaded_days
+
+    def mark_loaded(self, day: date) -> None:
+        self._loaded_days.add(day)
+
+    def departures(
+        self,
+        origin: str,
+        start: datetime,
+        end: datetime,
+        destination: Optional[str] = None,
+    ) -> List[FlightLeg]:
+        index = self._departures.get(origin.upper())
+        if index is None:
+            return []
+        legs = index.window(start, end)
+        if destination is not None:
+            destination = destination.upper()
+            legs = [leg for leg in legs if leg.destination == destination]
+        return legs
+
+    def find_connections(
+        self,
+        origin: str,
+        destination: str,
+        day: date,
+        min_connection_minutes: int = 60,
+        max_connection_minutes: int = 240,
+        sort_by: str = "price",
+        limit: Optional[int] = 50,
+    ) -> List[Itinerary]:
+        """One-stop itineraries departing ``origin`` on ``day``"""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}")
+        origin, destination = origin.upper(), destination.upper()
+        start = datetime.combine(day, datetime.min.time())
+        min_gap = timedelta(minutes=min_connection_minutes)
+        max_gap = timedelta(minutes=max_connection_minutes)
+
+        itineraries = []
+        for first in self.departures(origin, start, start + timedelta(days=1)):
+            if first.destination in (origin, destination):
+                continue
+            for second in self.departures(
+                first.destination, first.arrival + min_gap, first.arrival + max_gap, destination
+            ):
+                itineraries.append(Itinerary(first, second))
+
+        itineraries.sort(key=lambda itinerary: itinerary.sort_key(sort_by))
+        return itineraries[:limit] if limit else itineraries
+
+    def missing_legs(
+        self,
+        origin: str,
+        destination: str,
+        day: date,
+        hubs: Iterable[str] = DEFAULT_CONNECTION_HUBS,
+    ) -> List[Tuple[str, str, date]]:
+        """Legs via ``hubs`` with no stored departures, as crawl candidates"""
+        origin, destination = origin.upper(), destination.upper()
+        start = datetime.combine(day, datetime.min.time())
+        missing = []
+        for hub in hubs:
+            hub = hub.upper()
+            if hub in (origin, destination):
+                continue
+            if not self.departures(origin, start, start + timedelta(days=1), hub):
+                missing.append((origin, hub, day))
+            # Second legs may leave the hub up to the next morning
+            if not self.departures(hub, start, start + timedelta(days=2), destination):
+                missing.append((hub, destination, day))
+        return missing
+
+    def get_stats(self) -> Dict:
+        return {
+            "legs": len(self._legs),
+            "airports": len(self._departures),
+            "loaded_days": sorted(day.isoformat() for day in self._loaded_days),
+        }
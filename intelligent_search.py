@@ -1,7 +1,14 @@
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Iterable
 import asyncio
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime, timedelta
+
+from date_range_search import DateRangeSearchExecutor, date_window
+from flight_graph import DEFAULT_CONNECTION_HUBS, FlightGraph, Itinerary
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, BrokerEvent, EventBroker
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -29,10 +36,30 @@ class ConnectingFlight:
 
 
 class IntelligentSearchEngine:
-    def __init__(self, main_crawler, db_manager):
-        """Initialize the intelligent search engine."""
+    def __init__(
+        self,
+        main_crawler,
+        db_manager,
+        flight_graph: Optional[FlightGraph] = None,
+        broker: Optional[EventBroker] = None,
+        leg_concurrency: Optional[int] = None,
+    ):
+        """Initialize the intelligent search engine.
+
+        Connections are joined from a time-indexed graph of stored flights;
+        with a broker, every ingested batch is added to the graph as well.
+        At most ``leg_concurrency`` missing legs are crawled at once.
+        """
+        if leg_concurrency is None:
+            from config import config
+
+            leg_concurrency = config.CRAWLER.LEG_CRAWL_CONCURRENCY
         self.main_crawler = main_crawler
         self.db_manager = db_manager
+        self.leg_concurrency = max(1, leg_concurrency)
+        self.flight_graph = flight_graph or FlightGraph()
+        if broker is not None:
+            broker.subscribe(FLIGHTS_INGESTED_CHANNEL, self._on_flights_ingested)
 
     async def optimize_search_strategy(
         self, search_params: Dict, optimization: SearchOptimization
@@ -60,67 +87,124 @@ class IntelligentSearchEngine:
         return results
 
     async def discover_connecting_flights(
-        self, origin: str, destination: str, date: str
+        self,
+        origin: str,
+        destination: str,
+        date: str,
+        min_connection_minutes: int = 60,
+        max_connection_minutes: int = 240,
+        sort_by: str = "price",
+        limit: Optional[int] = 50,
+        crawl_missing: bool = True,
+        hubs: Optional[Iterable[str]] = None,
     ) -> List[ConnectingFlight]:
-        """Discover connecting flight options between origin and destination on a given date."""
-        # Search for flights from origin to destination
-        origin_flights = await self.main_crawler.crawl_all_sites(
-            {"origin": origin, "destination": destination, "departure_date": date}
+        """Discover connecting flight options between origin and destination on a given date.
+
+        Itineraries come from stored flights. Only when none can be formed
+        are legs via ``hubs`` that have no stored departures crawled.
+        """
+        day = datetime.fromisoformat(date).date()
+        await self._load_day(day)
+
+        def connections() -> List[Itinerary]:
+            return self.flight_graph.find_connections(
+                origin,
+                destination,
+                day,
+                min_connection_minutes=min_connection_minutes,
+                max_connection_minutes=max_connection_minutes,
+                sort_by=sort_by,
+                limit=limit,
+            )
+
+        itineraries = connections()
+        if not itineraries and crawl_missing and self.main_crawler is not None:
+            missing = self.flight_graph.missing_legs(
+                origin, destination, day, hubs or DEFAULT_CONNECTION_HUBS
+            )
+            if await self._crawl_legs(missing):
+                itineraries = connections()
+
+        return [
+            ConnectingFlight(
+                origin_flight=itinerary.first.flight,
+                connecting_flight=itinerary.second.flight,
+                layover_duration_minutes=itinerary.layover_minutes,
+                total_price=itinerary.total_price,
+                total_duration_minutes=itinerary.total_duration_minutes,
+                airports_sequence=itinerary.airports,
+            )
+            for itinerary in itineraries
+        ]
+
+    async def _load_day(self, day: date) -> None:
+        """Index stored flights for ``day`` and the following day once."""
+        if self.flight_graph.is_loaded(day):
+            return
+        self.flight_graph.prune(datetime.combine(date.today(), datetime.min.time()))
+        if self.db_manager is not None and hasattr(self.db_manager, "get_flights_departing"):
+            start = datetime.combine(day, datetime.min.time())
+            flights = await self.db_manager.get_flights_departing(
+                start, start + timedelta(days=2)
+            )
+            self.flight_graph.add_flights(flights)
+        self.flight_graph.mark_loaded(day)
+
+    async def _crawl_legs(self, legs: List[Tuple[str, str, date]]) -> int:
+        """Crawl legs with bounded concurrency and index the results."""
+        if not legs:
+            return 0
+        semaphore = asyncio.Semaphore(self.leg_concurrency)
+
+        async def crawl(params: Dict) -> List[Dict]:
+            async with semaphore:
+                return await self.main_crawler.crawl_all_sites(params)
+
+        results = await asyncio.gather(
+            *[
+                crawl(
+                    {
+                        "origin": leg_origin,
+                        "destination": leg_destination,
+                        "departure_date": leg_day.isoformat(),
+                    }
+                )
+                for leg_origin, leg_destination, leg_day in legs
+            ],
+            return_exceptions=True,
         )
-        connecting_flights = []
-        for origin_flight in origin_flights:
-            # Search for connecting flights from destination to a final destination (e.g., a hub)
-            final_destination = "FINAL_DEST"  # Replace with actual logic
-            connecting_flight_list = await self.main_crawler.crawl_all_sites(
-                {
-                    "origin": destination,
-                    "destination": final_destination,
-                    "departure_date": date,
-                }
+        added = 0
+        for (leg_origin, leg_destination, _), flights in zip(legs, results):
+            if isinstance(flights, Exception):
+                logger.warning(f"Crawl for {leg_origin}-{leg_destination} failed: {flights}")
+                continue
+            added += self.flight_graph.add_flights(
+                {"origin": leg_origin, "destination": leg_destination, **flight}
+                for flight in flights or []
             )
-            for connecting_flight in connecting_flight_list:
-                # Calculate layover duration
-                layover_duration = (
-                    datetime.fromisoformat(connecting_flight["departure_time"])
-                    - datetime.fromisoformat(origin_flight["arrival_time"])
-                ).total_seconds() / 60
-                if (
-                    60 <= layover_duration <= 240
-                ):  # Filter by layover duration (1-4 hours)
-                    connecting_flights.append(
-                        ConnectingFlight(
-                            origin_flight=origin_flight,
-                            connecting_flight=connecting_flight,
-                            layover_duration_minutes=int(layover_duration),
-                            total_price=origin_flight["price"]
-                            + connecting_flight["price"],
-                            total_duration_minutes=int(
-                                layover_duration
-                                + (
-                                    datetime.fromisoformat(
-                                        connecting_flight["arrival_time"]
-                                    )
-                                    - datetime.fromisoformat(
-                                        origin_flight["departure_time"]
-                                    )
-                                ).total_seconds()
-                                / 60
-                            ),
-                            airports_sequence=[origin, destination, final_destination],
-                        )
-                    )
-        return connecting_flights
+        return added
+
+    async def _on_flights_ingested(self, event: BrokerEvent) -> None:
+        """Keep the graph current with every stored batch."""
+        for flights in event.payload.values():
+            self.flight_graph.add_flights(flights)
+
+    def _date_range_executor(self) -> DateRangeSearchExecutor:
+        return DateRangeSearchExecutor(
+            self.main_crawler.crawl_all_sites,
+            self.db_manager,
+            sites=getattr(self.main_crawler, "crawlers", None),
+        )
 
     async def search_date_range(self, search_params: Dict, days_range: int = 3) -> Dict:
-        """Search for flights over a range of dates."""
-        date_results = {}
-        base_date = datetime.fromisoformat(search_params["departure_date"])
-        for i in range(days_range):
-            current_date = (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            date_results[current_date] = await self.main_crawler.crawl_all_sites(
-                {**search_params, "departure_date": current_date}
-            )
-        return date_results
+        """Search for flights over a range of dates.
+
+        Dates are served from cache or stored flights where possible and the
+        rest are crawled concurrently.
+        """
+        dates = date_window(search_params["departure_date"], 0, days_range - 1)
+        summary = await self._date_range_executor().search(search_params, dates)
+        return {result.date: result.flights for result in summary["results"]}
 
     async def detect_class_upgrades(
         self, flights: List[Dict], threshold: float = 20.0
@@ -153,14 +237,29 @@ class IntelligentSearchEngine:
         search_count = await self.db_manager.get_search_count(route)
         return search_count / 100  # Normalize score
 
-    async def recommend_alternative_dates(self, search_params: Dict) -> List[Dict]:
-        """Recommend alternative dates for better prices or availability."""
-        # Query historical data and recommend dates with lower prices
-        historical_data = await self.db_manager.get_historical_prices(
-            search_params["origin"] + "-" + search_params["destination"]
+    async def recommend_alternative_dates(
+        self, search_params: Dict, flexibility_days: int = 3
+    ) -> List[Dict]:
+        """Recommend alternative dates for better prices or availability.
+
+        Builds a +/-``flexibility_days`` price calendar around the requested
+        date and returns cheaper dates, cheapest first.
+        """
+        dates = date_window(search_params["departure_date"], flexibility_days, flexibility_days)
+        summary = await self._date_range_executor().search(search_params, dates)
+        calendar = {
+            result.date: result.min_price
+            for result in summary["results"]
+            if result.min_price is not None
+        }
+        reference = search_params.get(
+            "price", calendar.get(search_params["departure_date"], float("inf"))
+        )
+        return sorted(
+            (
+                {"date": date, "price": price}
+                for date, price in calendar.items()
+                if date != search_params["departure_date"] and price < reference
+            ),
+            key=lambda item: item["price"],
         )
-        return [
-            {"date": date, "price": price}
-            for date, price in historical_data.items()
-            if price < search_params.get("price", float("inf"))
-        ]
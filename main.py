@@ -23,6 +23,11 @@ from rate_limiter import RateLimitMiddleware, RateLimitManager, get_rate_limit_m
 import aiohttp
 from fastapi.security import APIKeyHeader
 from api.dependencies import initialize_dependencies, shutdown_dependencies
+from utils.timer_wheel import get_periodic_scheduler
+from fare_calendar import get_fare_calendar
+from utils.latency_sketch import get_latency_sketches
+from utils.loop_monitor import get_loop_monitor
+from utils.event_broker import get_event_broker
 
 # Import versioning utilities
 from api_versioning import (
@@ -100,6 +105,30 @@ async def get_api_key(api_key: str = Security(api_key_header)):
             status_code=403, detail="Could not validate credentials"
         )
 
+SNAPSHOT_REFRESH_JOB = "snapshot_refresh"
+SNAPSHOT_REFRESH_INTERVAL = 6 * 3600
+
+
+async def refresh_snapshots(keys: List[str]) -> None:
+    """Validate archived pages off the event loop, in one worker of the fleet."""
+    from scripts.replay_requests import replay_all
+
+    try:
+        # Held across ticks by the worker that renews it every interval
+        if not await get_event_broker().acquire_leadership(
+            SNAPSHOT_REFRESH_JOB, ttl=SNAPSHOT_REFRESH_INTERVAL + 600
+        ):
+            return
+    except Exception as e:
+        logger.error(f"Error acquiring leadership for {SNAPSHOT_REFRESH_JOB}: {e}")
+        return
+
+    summary = await asyncio.to_thread(replay_all)
+    logger.info(
+        f"Snapshot refresh: {sum(summary.values())}/{len(summary)} pages with results"
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     """Application startup event."""
@@ -114,6 +143,27 @@ async def startup_event():
     initialize_dependencies(crawler=app.state.crawler, monitor=app.state.monitor, rate_limit_manager=get_rate_limit_manager(), http_session=app.state.http_session)
     # Start background tasks
     asyncio.create_task(app.state.monitor.log_memory_usage_periodically(interval_seconds=60))
+
+    # Subscribe the fare calendar to ingest before the first crawl lands
+    get_fare_calendar()
+
+    # Read cross-worker events from startup; the stream reader begins at the
+    # tail, so anything published before it runs never reaches this worker
+    await get_event_broker().start()
+
+    # Periodic route work (price monitoring, snapshot refresh) shares one scheduler
+    app.state.scheduler = get_periodic_scheduler()
+    app.state.scheduler.register_job(SNAPSHOT_REFRESH_JOB, refresh_snapshots)
+    app.state.scheduler.schedule(
+        SNAPSHOT_REFRESH_JOB, "requests/pages", interval=SNAPSHOT_REFRESH_INTERVAL
+    )
+    app.state.scheduler.start()
+
+    # Share per-site latency sketches with the other workers
+    get_latency_sketches().start()
+
+    # Measure loop lag and capture stacks of callbacks that block it
+    get_loop_monitor().start()
     
     logger.info("Application startup complete. Crawler and HTTP session initialized.")
 
@@ -122,6 +172,11 @@ async def shutdown_event():
     """Application shutdown event."""
     logger.info("Application shutting down...")
     await shutdown_dependencies()
+    if hasattr(app.state, 'scheduler'):
+        await app.state.scheduler.stop()
+    await get_latency_sketches().stop()
+    await get_loop_monitor().stop()
+    await get_event_broker().close()
     # Gracefully close the crawler's active tasks
     if hasattr(app.state, 'crawler') and app.state.crawler:
         await app.state.crawler.shutdown()
@@ -196,6 +251,20 @@ async def root(request: Request, response: Response):
         "openapi": "/openapi.json"
     }
 
+@app.get("/admin/loop-health", tags=["system-v1"], dependencies=[Depends(get_api_key)])
+async def get_loop_health(limit: int = Query(20, ge=1, le=100)):
+    """Event-loop lag and the call sites that blocked the loop (admin only)"""
+    return {
+        **get_loop_monitor().get_stats(limit),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/admin/loop-health/reset", tags=["system-v1"], dependencies=[Depends(get_api_key)])
+async def reset_loop_health():
+    """Clear collected lag samples and blocking offenders (admin only)"""
+    get_loop_monitor().reset()
+    return {"message": "Loop health statistics reset", "reset_at": datetime.now().isoformat()}
+
 # API documentation endpoint
 @app.get("/api/v1/docs", tags=["system-v1"])
 async def get_api_documentation(request: Request, response: Response):
@@ -0,0 +1,325 @@
+"""
+Streaming price anomaly detection.
+
+Each ``(route, site, cabin)`` series keeps a fixed-size state that is updated
+in O(1) per observation:
+
+- Welford running mean/variance over the whole series
+- EWMA mean/variance that tracks recent price levels
+- a frugal streaming median with an exponentially weighted absolute
+  deviation around it (a streaming stand-in for MAD), which stays stable
+  when individual prices spike
+
+An observation is anomalous when its robust z-score against the median
+sketch exceeds a threshold and it is also far enough from the median in
+relative terms. States pack into 64 bytes (base64 in Redis, so clients
+with ``decode_responses`` work too) and are persisted to a single Redis hash, so detection scales to every crawled route without re-reading
+price history.
+"""
+
+import base64
+import inspect
+import logging
+import math
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[str, str, str]
+
+# count, mean, m2, ewma, ewm_var, median, mad, last_price
+_STATE_FORMAT = "<Q7d"
+STATE_SIZE = struct.calcsize(_STATE_FORMAT)
+
+# Scales mean absolute deviation to a standard deviation for normal prices
+_ABS_DEV_TO_SIGMA = 1.2533
+
+
+@dataclass
+class PriceAnomaly:
+    """Detected price anomaly"""
+
+    route: str
+    current_price: float
+    expected_price: float
+    deviation_percent: float
+    confidence_score: float
+    detected_at: datetime
+    site: str = "all"
+    cabin: str = "all"
+    z_score: float = 0.0
+
+
+class SeriesState:
+    """O(1) summary of one price series"""
+
+    __slots__ = ("count", "mean", "m2", "ewma", "ewm_var", "median", "mad", "last_price")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+        self.median = 0.0
+        self.mad = 0.0
+        self.last_price = 0.0
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def robust_sigma(self) -> float:
+        """Spread from the absolute-deviation sketch, falling back to EWMA variance"""
+        sigma = self.mad * _ABS_DEV_TO_SIGMA
+        if sigma <= 0:
+            sigma = math.sqrt(self.ewm_var)
+        return sigma
+
+    def update(self, price: float, alpha: float, step: float) -> None:
+        self.count += 1
+        self.last_price = price
+
+        # Welford
+        delta = price - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (price - self.mean)
+
+        if self.count == 1:
+            self.ewma = price
+            self.median = price
+            return
+
+        # EWMA mean and variance
+        diff = price - self.ewma
+        increment = alpha * diff
+        self.ewma += increment
+        self.ewm_var = (1 - alpha) * (self.ewm_var + diff * increment)
+
+        # Frugal median: move a step proportional to the current spread, so a
+        # single spike shifts it by at most ``step * spread``
+        deviation = abs(price - self.median)
+        scale = max(self.mad, abs(self.median) * 0.001, 1e-9)
+        if price > self.median:
+            self.median += min(step * scale, deviation)
+        elif price < self.median:
+            self.median -= min(step * scale, deviation)
+        self.mad += alpha * (deviation - self.mad)
+
+    def pack(self) -> bytes:
+        return struct.pack(
+            _STATE_FORMAT,
+            self.count,
+            self.mean,
+            self.m2,
+            self.ewma,
+            self.ewm_var,
+            self.median,
+            self.mad,
+            self.last_price,
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "SeriesState":
+        state = cls()
+        (
+            state.count,
+            state.mean,
+            state.m2,
+            state.ewma,
+            state.ewm_var,
+            state.median,
+            state.mad,
+            state.last_price,
+        ) = struct.unpack(_STATE_FORMAT, data)
+        return state
+
+
+async def _resolve(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class OnlineAnomalyDetector:
+    """Per-series streaming anomaly detector"""
+
+    REDIS_KEY = "price_anomaly:series"
+
+    def __init__(
+        self,
+        redis_client=None,
+        alpha: float = 0.1,
+        step: float = 0.2,
+        z_threshold: float = 3.5,
+        min_deviation_percent: float = 10.0,
+        min_observations: int = 10,
+    ):
+        self.redis_client = redis_client
+        self.alpha = alpha
+        self.step = step
+        self.z_threshold = z_threshold
+        self.min_deviation_percent = min_deviation_percent
+        self.min_observations = min_observations
+        self._series: Dict[SeriesKey, SeriesState] = {}
+        self._dirty: Set[SeriesKey] = set()
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    @staticmethod
+    def _field(key: SeriesKey) -> str:
+        return "|".join(key)
+
+    def get_state(self, route: str, site: str = "all", cabin: str = "all") -> Optional[SeriesState]:
+        return self._series.get((route, site, cabin))
+
+    def observe(
+        self,
+        route: str,
+        price: float,
+        site: str = "all",
+        cabin: str = "all",
+        observed_at: Optional[datetime] = None,
+    ) -> Optional[PriceAnomaly]:
+        """Score ``price`` against the series, then fold it into the state"""
+        key = (route, site, cabin)
+        state = self._series.get(key)
+        if state is None:
+            state = self._series[key] = SeriesState()
+
+        anomaly = None
+        if state.count >= self.min_observations:
+            anomaly = self._score(key, state, price, observed_at)
+
+        # Limit how far a single outlier can drag the sketches
+        update_price = price
+        sigma = state.robust_sigma()
+        if anomaly is not None and sigma > 0:
+            bound = self.z_threshold * sigma
+            update_price = min(max(price, state.median - bound), state.median + bound)
+        state.update(update_price, self.alpha, self.step)
+        self._dirty.add(key)
+        return anomaly
+
+    def score(
+        self,
+        route: str,
+        price: float,
+        site: str = "all",
+        cabin: str = "all",
+        history: Iterable[float] = (),
+        observed_at: Optional[datetime] = None,
+    ) -> Optional[PriceAnomaly]:
+        """Score ``price`` without changing any state.
+
+        Uses the series' streaming statistics, or, when the series has too few
+        observations, statistics built from ``history`` on the side.
+        """
+        key = (route, site, cabin)
+        state = self._series.get(key)
+        if state is None or state.count < self.min_observations:
+            state = SeriesState()
+            for value in history:
+                state.update(float(value), self.alpha, self.step)
+        if state.count < self.min_observations:
+            return None
+        return self._score(key, state, price, observed_at)
+
+    def _score(
+        self,
+        key: SeriesKey,
+        state: SeriesState,
+        price: float,
+        observed_at: Optional[datetime],
+    ) -> Optional[PriceAnomaly]:
+        expected = state.median
+        if expected <= 0:
+            return None
+        deviation_percent = abs(price - expected) / expected * 100
+        if deviation_percent < self.min_deviation_percent:
+            return None
+
+        sigma = state.robust_sigma()
+        z_score = abs(price - expected) / sigma if sigma > 0 else math.inf
+        if z_score < self.z_threshold:
+            return None
+
+        # More history and larger excursions give more confidence
+        history_weight = min(1.0, state.count / (self.min_observations * 5))
+        excess = min(1.0, z_score / (self.z_threshold * 2))
+        route, site, cabin = key
+        return PriceAnomaly(
+            route=route,
+            current_price=price,
+            expected_price=expected,
+            deviation_percent=deviation_percent,
+            confidence_score=round(0.5 * history_weight + 0.5 * excess, 3),
+            detected_at=observed_at or datetime.now(),
+            site=site,
+            cabin=cabin,
+            z_score=z_score if math.isfinite(z_score) else 0.0,
+        )
+
+    def warm_up(self, route: str, prices: Iterable[float], site: str = "all", cabin: str = "all") -> None:
+        """Seed a new series from history without emitting anomalies"""
+        key = (route, site, cabin)
+        state = self._series.setdefault(key, SeriesState())
+        for price in prices:
+            state.update(float(price), self.alpha, self.step)
+        self._dirty.add(key)
+
+    async def flush(self) -> int:
+        """Write series changed since the last flush to Redis"""
+        if self.redis_client is None or not self._dirty:
+            return 0
+        mapping = {
+            self._field(key): base64.b64encode(self._series[key].pack()).decode("ascii")
+            for key in self._dirty
+        }
+        await _resolve(self.redis_client.hset(self.REDIS_KEY, mapping=mapping))
+        self._dirty.clear()
+        return len(mapping)
+
+    async def load(self) -> int:
+        """Restore every persisted series with a single read"""
+        if self.redis_client is None:
+            return 0
+        stored = await _resolve(self.redis_client.hgetall(self.REDIS_KEY)) or {}
+        for field, data in stored.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            try:
+                data = base64.b64decode(data)
+            except (ValueError, TypeError):
+                data = b""
+            if len(data) != STATE_SIZE:
+                logger.warning(f"Skipping malformed anomaly state for {field}")
+                continue
+            self._series[tuple(field.split("|", 2))] = SeriesState.unpack(data)
+        return len(stored)
+
+
+def series_minimums(flights_by_source: Dict[str, List[Dict]]) -> Dict[SeriesKey, float]:
+    """Cheapest price per (route, site, cabin) in an ingest batch"""
+    minimums: Dict[SeriesKey, float] = {}
+    for source, flights in flights_by_source.items():
+        for flight in flights:
+            origin, destination = flight.get("origin"), flight.get("destination")
+            try:
+                price = float(flight.get("price") or 0)
+            except (TypeError, ValueError):
+                continue
+            if not origin or not destination or price <= 0:
+                continue
+            key = (
+                f"{origin}-{destination}".upper(),
+                flight.get("source_site") or flight.get("site") or source,
+                flight.get("seat_class") or "economy",
+            )
+            if key not in minimums or price < minimums[key]:
+                minimums[key] = price
+    return minimums
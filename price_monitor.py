@@ -1,10 +1,23 @@
 from fastapi import WebSocket
 import statistics
-from typing import Set, Callable, List, Dict, Optional
+from typing import Any, Set, Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
-import asyncio
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+import inspect
 import json
+import logging
+
+from utils.event_broker import (
+    FLIGHTS_INGESTED_CHANNEL,
+    PRICE_EVENTS_CHANNEL,
+    BrokerEvent,
+    EventBroker,
+)
+from utils.timer_wheel import PeriodicScheduler, get_periodic_scheduler
+from utils.websocket_fanout import encode_message, fan_out
+from price_anomaly_detector import OnlineAnomalyDetector, PriceAnomaly, series_minimums
 
 
 @dataclass
@@ -18,70 +31,349 @@ class PriceAlert:
     notification_methods: List[str]  # ['email', 'websocket', 'sms']
 
 
-@dataclass
-class PriceAnomaly:
-    """Detected price anomaly"""
+logger = logging.getLogger(__name__)
+
+
+async def _resolve(result):
+    """Accept both sync and asyncio Redis clients."""
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class PriceAlertIndex:
+    """Per-route alert index evaluated against each new price observation.
+
+    Redis holds the alert bodies in the ``alerts:data`` hash and one sorted
+    set per route and alert type (``alerts:below:THR-MHD`` scored by target
+    price), so any process can find triggered alerts with a range query.
+    The same layout is mirrored in memory as sorted ``(target, alert_id)``
+    lists, making a price write a bisect per alert type instead of a scan.
+
+    Alerts saved by older versions as one ``alert:<user>:<route>`` string key
+    each are moved into this layout by ``load``.
+    """
+
+    DATA_KEY = "alerts:data"
+    LEGACY_PATTERN = "alert:*"
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        self._alerts: Dict[str, Dict] = {}
+        self._thresholds: Dict[Tuple[str, str], List[Tuple[float, str]]] = defaultdict(list)
+        self._change_alerts: Dict[str, Set[str]] = defaultdict(set)
+        self._last_price: Dict[str, float] = {}
+        self._notified_price: Dict[str, float] = {}
+
+    @staticmethod
+    def _zset_key(alert_type: str, route: str) -> str:
+        return f"alerts:{alert_type}:{route}"
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def routes(self) -> List[str]:
+        """Routes with at least one alert."""
+        return sorted({alert["route"] for alert in self._alerts.values()})
+
+    def alerts(self) -> List[Dict]:
+        return [{**alert, "id": alert_id} for alert_id, alert in self._alerts.items()]
+
+    def add_local(self, alert_id: str, alert: Dict) -> None:
+        """Insert into the in-memory mirror only."""
+        self.remove_local(alert_id)
+        self._alerts[alert_id] = alert
+        if alert["alert_type"] == "change":
+            self._change_alerts[alert["route"]].add(alert_id)
+        else:
+            insort(
+                self._thresholds[(alert["route"], alert["alert_type"])],
+                (float(alert["target_price"]), alert_id),
+            )
+
+    def remove_local(self, alert_id: str) -> Optional[Dict]:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        self._notified_price.pop(alert_id, None)
+        if alert["alert_type"] == "change":
+            self._change_alerts[alert["route"]].discard(alert_id)
+        else:
+            entries = self._thresholds[(alert["route"], alert["alert_type"])]
+            entry = (float(alert["target_price"]), alert_id)
+            index = bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+        return alert
+
+    async def add(self, alert_id: str, alert: Dict) -> None:
+        if self.redis_client is not None:
+            await _resolve(self.redis_client.hset(self.DATA_KEY, alert_id, json.dumps(alert)))
+            await _resolve(
+                self.redis_client.zadd(
+                    self._zset_key(alert["alert_type"], alert["route"]),
+                    {alert_id: float(alert["target_price"])},
+                )
+            )
+        self.add_local(alert_id, alert)
+
+    async def remove(self, alert_id: str) -> bool:
+        alert = self.remove_local(alert_id)
+        if self.redis_client is None:
+            return alert is not None
+        if alert is None:
+            data = await _resolve(self.redis_client.hget(self.DATA_KEY, alert_id))
+            if not data:
+                return False
+            alert = json.loads(data)
+        await _resolve(self.redis_client.hdel(self.DATA_KEY, alert_id))
+        await _resolve(
+            self.redis_client.zrem(self._zset_key(alert["alert_type"], alert["route"]), alert_id)
+        )
+        return True
+
+    async def load(self) -> int:
+        """Rebuild the in-memory mirror from Redis with a single read."""
+        if self.redis_client is None:
+            return len(self._alerts)
+        await self.migrate_legacy()
+        stored = await _resolve(self.redis_client.hgetall(self.DATA_KEY)) or {}
+        for alert_id, data in stored.items():
+            if isinstance(alert_id, bytes):
+                alert_id = alert_id.decode()
+            self.add_local(alert_id, json.loads(data))
+        return len(self._alerts)
+
+    async def _legacy_keys(self) -> List[Any]:
+        scan_iter = getattr(self.redis_client, "scan_iter", None)
+        if scan_iter is None:
+            return list(await _resolve(self.redis_client.keys(self.LEGACY_PATTERN)) or [])
+        keys = scan_iter(match=self.LEGACY_PATTERN)
+        if hasattr(keys, "__aiter__"):
+            return [key async for key in keys]
+        return list(keys)
+
+    async def migrate_legacy(self) -> int:
+        """Move alerts stored as ``alert:*`` string keys into the index."""
+        migrated = 0
+        for key in await self._legacy_keys():
+            alert_id = key.decode() if isinstance(key, bytes) else key
+            try:
+                data = await _resolve(self.redis_client.get(key))
+                if not data:
+                    continue
+                await self.add(alert_id, json.loads(data))
+                await _resolve(self.redis_client.delete(key))
+                migrated += 1
+            except Exception as e:
+                logger.warning(f"Could not migrate legacy alert {alert_id}: {e}")
+        if migrated:
+            logger.info(f"Migrated {migrated} legacy price alerts")
+        return migrated
+
+    def match(self, route: str, price: float) -> List[Dict]:
+        """Alerts triggered by a new price observation for ``route``."""
+        if not price or price <= 0:
+            # Missing data reads as 0.0 and would trip every "below" alert
+            return []
+        triggered: List[str] = []
+
+        # below: target >= price
+        below = self._thresholds.get((route, "below"), [])
+        start = bisect_left(below, (price, ""))
+        triggered.extend(alert_id for _, alert_id in below[start:])
+
+        # above: target <= price
+        above = self._thresholds.get((route, "above"), [])
+        end = bisect_right(above, (price, "\uffff"))
+        triggered.extend(alert_id for _, alert_id in above[:end])
+
+        previous = self._last_price.get(route)
+        self._last_price[route] = price
+        if previous is not None and previous != price:
+            triggered.extend(self._change_alerts.get(route, ()))
+
+        fired = []
+        for alert_id in triggered:
+            # Only notify again once the price has moved
+            if self._notified_price.get(alert_id) == price:
+                continue
+            self._notified_price[alert_id] = price
+            fired.append({**self._alerts[alert_id], "id": alert_id})
+        return fired
+
+    async def match_remote(self, route: str, price: float) -> List[Dict]:
+        """Range query Redis directly, for processes without a loaded mirror."""
+        if not price or price <= 0:
+            return []
+        if self.redis_client is None:
+            return self.match(route, price)
+        alert_ids = list(
+            await _resolve(
+                self.redis_client.zrangebyscore(self._zset_key("below", route), price, "+inf")
+            )
+        )
+        alert_ids.extend(
+            await _resolve(
+                self.redis_client.zrangebyscore(self._zset_key("above", route), "-inf", price)
+            )
+        )
+        if not alert_ids:
+            return []
+        bodies = await _resolve(self.redis_client.hmget(self.DATA_KEY, alert_ids))
+        alerts = []
+        for alert_id, data in zip(alert_ids, bodies):
+            if data:
+                if isinstance(alert_id, bytes):
+                    alert_id = alert_id.decode()
+                alerts.append({**json.loads(data), "id": alert_id})
+        return alerts
 
-    route: str
-    current_price: float
-    expected_price: float
-    deviation_percent: float
-    confidence_score: float
-    detected_at: datetime
+
+def _route_min_prices(flights_by_source: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    """Cheapest observed price per route in an ingest batch."""
+    prices: Dict[str, float] = {}
+    for flights in flights_by_source.values():
+        for flight in flights:
+            origin, destination = flight.get("origin"), flight.get("destination")
+            try:
+                price = float(flight.get("price") or 0)
+            except (TypeError, ValueError):
+                continue
+            if not origin or not destination or price <= 0:
+                continue
+            route = f"{origin}-{destination}".upper()
+            if route not in prices or price < prices[route]:
+                prices[route] = price
+    return prices
 
 
 class PriceMonitor:
-    def __init__(self, db_manager, redis_client):
-        """Initialize the price monitor."""
+    MONITOR_JOB = "price_monitor"
+
+    def __init__(
+        self,
+        db_manager,
+        redis_client,
+        broker: Optional[EventBroker] = None,
+        scheduler: Optional[PeriodicScheduler] = None,
+    ):
+        """Initialize the price monitor.
+
+        With a broker, alerts are evaluated against every ingested batch
+        and alert additions/removals are mirrored into every worker.
+        Monitored routes are polled in batches by the shared periodic
+        scheduler rather than one sleeping task per route.
+        """
         self.db_manager = db_manager
         self.redis_client = redis_client
-        self.monitoring_tasks = {}
+        self.scheduler = scheduler or get_periodic_scheduler()
+        self.scheduler.register_job(self.MONITOR_JOB, self._monitor_routes)
         # websocket_manager will be attached externally
         self.websocket_manager: Optional[WebSocketManager] = None
+        self.alert_index = PriceAlertIndex(redis_client)
+        self.anomaly_detector = OnlineAnomalyDetector(redis_client)
+        self.recent_anomalies: deque = deque(maxlen=1000)
+        self.broker = broker
+        if broker is not None:
+            broker.subscribe(FLIGHTS_INGESTED_CHANNEL, self._on_flights_ingested)
+            broker.subscribe(PRICE_EVENTS_CHANNEL, self._on_alert_event)
 
     async def start_monitoring(self, routes: List[str], interval_minutes: int = 5):
         """Start monitoring prices for the given routes."""
+        monitored = set(self.scheduler.scheduled_keys(self.MONITOR_JOB))
         for route in routes:
-            if route not in self.monitoring_tasks:
-                self.monitoring_tasks[route] = asyncio.create_task(
-                    self._monitor_route(route, interval_minutes)
+            if route not in monitored:
+                self.scheduler.schedule(
+                    self.MONITOR_JOB, route, interval=interval_minutes * 60
                 )
+        self.scheduler.start()
 
     async def stop_monitoring(self, routes: Optional[List[str]] = None):
         """Stop monitoring prices for the given routes or all if None."""
         if routes is None:
-            routes = list(self.monitoring_tasks.keys())
+            routes = self.scheduler.scheduled_keys(self.MONITOR_JOB)
         for route in routes:
-            if route in self.monitoring_tasks:
-                self.monitoring_tasks[route].cancel()
-                del self.monitoring_tasks[route]
+            self.scheduler.unschedule(self.MONITOR_JOB, route)
 
     async def add_price_alert(self, alert: PriceAlert) -> str:
         """Add a new price alert."""
         alert_id = f"alert:{alert.user_id}:{alert.route}"
-        await self.redis_client.set(alert_id, json.dumps(alert.__dict__))
+        await self.alert_index.add(alert_id, alert.__dict__)
+        if self.broker is not None:
+            await self.broker.publish(
+                PRICE_EVENTS_CHANNEL,
+                {"kind": "alert_added", "id": alert_id, "alert": alert.__dict__},
+            )
         return alert_id
 
     async def remove_price_alert(self, alert_id: str) -> bool:
         """Remove a price alert by ID."""
-        return await self.redis_client.delete(alert_id) > 0
+        removed = await self.alert_index.remove(alert_id)
+        if removed and self.broker is not None:
+            await self.broker.publish(
+                PRICE_EVENTS_CHANNEL, {"kind": "alert_removed", "id": alert_id}
+            )
+        return removed
+
+    async def load_alerts(self) -> int:
+        """Load persisted alerts into the in-memory index."""
+        return await self.alert_index.load()
 
     async def get_active_alerts(self) -> List[Dict]:
         """Return all active price alerts."""
-        keys = self.redis_client.keys("alert:*")
-        alerts = []
-        for key in keys:
-            data = self.redis_client.get(key)
-            if not data:
-                continue
-            alert = json.loads(data)
-            alert["id"] = key.decode() if isinstance(key, bytes) else key
-            alerts.append(alert)
-        return alerts
+        return self.alert_index.alerts()
+
+    async def record_price(self, route: str, price: float) -> List[Dict]:
+        """Evaluate alerts against a new price observation for a route.
+
+        Non-positive prices mean no data and are ignored.
+        """
+        triggered = self.alert_index.match(route, price)
+        for alert in triggered:
+            try:
+                await self.send_price_alert(alert, price)
+            except Exception as e:
+                logger.error(f"Error sending price alert {alert['id']}: {e}")
+        return triggered
+
+    async def _on_flights_ingested(self, event: BrokerEvent):
+        """Evaluate alerts once per ingest batch, in whichever worker holds the lease."""
+        if not await self.broker.acquire_leadership("price_alerts", ttl=60):
+            return
+        for route, price in _route_min_prices(event.payload).items():
+            await self.record_price(route, price)
+            # Route-wide series read by detect_price_anomalies
+            self.anomaly_detector.observe(route, price)
+
+        for (route, site, cabin), price in series_minimums(event.payload).items():
+            anomaly = self.anomaly_detector.observe(route, price, site=site, cabin=cabin)
+            if anomaly is not None:
+                self.recent_anomalies.append(anomaly)
+                logger.info(
+                    f"Price anomaly on {route} ({site}/{cabin}): {price} vs "
+                    f"{anomaly.expected_price:.0f} expected"
+                )
+        try:
+            await self.anomaly_detector.flush()
+        except Exception as e:
+            logger.error(f"Error persisting anomaly state: {e}")
+
+    async def load_anomaly_state(self) -> int:
+        """Restore per-series anomaly statistics from Redis."""
+        return await self.anomaly_detector.load()
+
+    async def _on_alert_event(self, event: BrokerEvent):
+        """Keep this worker's alert index in step with other workers."""
+        payload = event.payload
+        if payload["kind"] == "alert_added":
+            self.alert_index.add_local(payload["id"], payload["alert"])
+        elif payload["kind"] == "alert_removed":
+            self.alert_index.remove_local(payload["id"])
 
     async def get_monitored_routes(self) -> List[str]:
         """Return list of currently monitored routes."""
-        return list(self.monitoring_tasks.keys())
+        return self.scheduler.scheduled_keys(self.MONITOR_JOB)
 
     async def send_price_alert(self, alert: Dict, current_price: float) -> None:
         """Send price alert to user via configured methods."""
@@ -102,23 +394,22 @@ class PriceMonitor:
     async def detect_price_anomalies(
         self, route_prices: Dict[str, List[float]]
     ) -> List[PriceAnomaly]:
-        """Detect price anomalies for the given route prices."""
+        """Detect price anomalies for the given route prices.
+
+        The last price of each list is scored against the route-wide series
+        of cheapest ingested prices, or against the earlier prices while the
+        route has too little history. Only the ingest path updates the
+        statistics, so repeated calls return the same result.
+        """
         anomalies = []
         for route, prices in route_prices.items():
-            current_price = prices[-1]
-            expected_price = statistics.mean(prices[:-1])  # Simple mean as expected price
-            deviation = abs(current_price - expected_price) / expected_price * 100
-            if deviation > 10:  # Threshold for anomaly
-                anomalies.append(
-                    PriceAnomaly(
-                        route=route,
-                        current_price=current_price,
-                        expected_price=expected_price,
-                        deviation_percent=deviation,
-                        confidence_score=0.8,  # Placeholder
-                        detected_at=datetime.now(),
-                    )
-                )
+            if not prices:
+                continue
+            anomaly = self.anomaly_detector.score(
+                route.upper(), prices[-1], history=prices[:-1]
+            )
+            if anomaly is not None:
+                anomalies.append(anomaly)
         return anomalies
 
     async def send_websocket_update(self, websocket: WebSocket, price_data: Dict):
@@ -145,21 +436,47 @@ class PriceMonitor:
             "max": max(historical_data),
         }
 
-    async def _monitor_route(self, route: str, interval_minutes: int):
-        """Background task to monitor prices for a route."""
-        while True:
-            try:
-                current_price = await self.db_manager.get_current_price(route)
-                await self.broadcast_price_update(route, {"price": current_price})
-                await asyncio.sleep(interval_minutes * 60)
-            except asyncio.CancelledError:
-                break
+    async def _holds_monitor_lease(self) -> bool:
+        """Whether this worker polls monitored routes; False when no lease can be held."""
+        is_leader = getattr(self.websocket_manager, "is_leader", None)
+        if is_leader is None:
+            return False
+        try:
+            return bool(await is_leader(self.MONITOR_JOB, ttl=120))
+        except Exception as e:
+            logger.error(f"Error acquiring {self.MONITOR_JOB} lease: {e}")
+            return False
+
+    async def _monitor_routes(self, routes: List[str]):
+        """Poll every route that is due this tick with one grouped price query."""
+        if self.websocket_manager and not await self._holds_monitor_lease():
+            # Another worker polls monitored routes and publishes to everyone
+            return
+        prices = await self.db_manager.get_current_prices(routes)
+        for route in routes:
+            current_price = prices.get(route)
+            if not current_price or current_price <= 0:
+                # No fresh data for the route; 0.0 is not a price
+                continue
+            await self.record_price(route, current_price)
+            if self.websocket_manager:
+                await self.websocket_manager.broadcast_price_update(
+                    route, {"price": current_price}
+                )
 
 
 class WebSocketManager:
-    def __init__(self):
-        """Initialize the WebSocket manager."""
+    def __init__(self, send_timeout: float = 5.0, broker: Optional[EventBroker] = None):
+        """Initialize the WebSocket manager.
+
+        With a broker, updates and alerts are published once and every
+        worker delivers them to its own connections.
+        """
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self.send_timeout = send_timeout
+        self.broker = broker
+        if broker is not None:
+            broker.subscribe(PRICE_EVENTS_CHANNEL, self._on_price_event)
 
     async def connect(self, websocket: WebSocket, user_id: str):
         """Connect a user to the WebSocket manager."""
@@ -171,18 +488,69 @@ class WebSocketManager:
     async def disconnect(self, websocket: WebSocket, user_id: str):
         """Disconnect a user from the WebSocket manager."""
         if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
+            self.active_connections[user_id].discard(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
 
+    async def is_leader(self, job: str, ttl: float) -> bool:
+        """Whether this worker should run a job shared by all workers."""
+        if self.broker is None:
+            return True
+        try:
+            return await self.broker.acquire_leadership(job, ttl)
+        except Exception as e:
+            logger.error(f"Error acquiring leadership for {job}: {e}")
+            return False
+
+    async def _on_price_event(self, event: BrokerEvent):
+        """Deliver a price event published by any worker."""
+        payload = event.payload
+        if payload["kind"] == "update":
+            await self._broadcast_local(payload["route"], payload["data"])
+        elif payload["kind"] == "alert":
+            await self._send_local(payload["user_id"], payload["data"])
+
     async def broadcast_price_update(self, route: str, price_data: Dict):
         """Broadcast a price update to all connected users for a route."""
-        for user_id, connections in self.active_connections.items():
-            for websocket in connections:
-                await websocket.send_json({"route": route, **price_data})
+        if self.broker is not None:
+            await self.broker.publish(
+                PRICE_EVENTS_CHANNEL,
+                {"kind": "update", "route": route, "data": price_data},
+            )
+            return
+        await self._broadcast_local(route, price_data)
+
+    async def _broadcast_local(self, route: str, price_data: Dict):
+        targets = [
+            ((user_id, websocket), websocket.send_text)
+            for user_id, connections in self.active_connections.items()
+            for websocket in connections
+        ]
+        await self._fan_out(targets, {"route": route, **price_data})
 
     async def send_personal_alert(self, user_id: str, alert_data: Dict):
         """Send a personal alert to a specific user."""
-        if user_id in self.active_connections:
-            for websocket in self.active_connections[user_id]:
-                await websocket.send_json(alert_data)
+        if self.broker is not None:
+            await self.broker.publish(
+                PRICE_EVENTS_CHANNEL,
+                {"kind": "alert", "user_id": user_id, "data": alert_data},
+            )
+            return
+        await self._send_local(user_id, alert_data)
+
+    async def _send_local(self, user_id: str, alert_data: Dict):
+        targets = [
+            ((user_id, websocket), websocket.send_text)
+            for websocket in self.active_connections.get(user_id, ())
+        ]
+        await self._fan_out(targets, alert_data)
+
+    async def _fan_out(self, targets, data: Dict) -> None:
+        """Encode once and send to every target concurrently."""
+        if not targets:
+            return
+        result = await fan_out(targets, encode_message(data), self.send_timeout)
+        for user_id, websocket in result.timed_out + [
+            key for key, _ in result.failed
+        ]:
+            await self.disconnect(websocket, user_id)
@@ -22,6 +22,7 @@ import ipaddress
 import statistics
 
 from config import config
+from utils.system_sampler import current_snapshot
 
 # Import integrated circuit breaker
 try:
@@ -462,6 +463,10 @@ class UnifiedRateLimiter:
             # Performance good - increase rate
             adjustment_factor = 1.2
         
+        if adjustment_factor > 1.0 and current_snapshot().overloaded:
+            # The site is fine but this host is not; hold the rate
+            adjustment_factor = 1.0
+        
         # Apply adjustment
         if adjustment_factor != 1.0:
             old_rate = self.metrics.current_rate
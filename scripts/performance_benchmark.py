@@ -116,12 +116,12 @@ class DatabaseBenchmark:
             
             # batch insert هر 100 رکورد
             if len(sample_flights) >= 100:
-                self.data_manager.store_flights({'batch': [f for fd in sample_flights for f in fd['site_1']]})
+                self.data_manager.store_flights_sync({'batch': [f for fd in sample_flights for f in fd['site_1']]})
                 sample_flights = []
         
         # insert باقی‌مانده رکوردها
         if sample_flights:
-            self.data_manager.store_flights({'batch': [f for fd in sample_flights for f in fd['site_1']]})
+            self.data_manager.store_flights_sync({'batch': [f for fd in sample_flights for f in fd['site_1']]})
             
         logger.info("تولید داده‌های نمونه تکمیل شد")
 
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Price anomaly replay benchmark.
+
+Replays recorded price streams through the old full-history mean check
+(recompute the mean of every previous price and flag >10% deviations) and
+the streaming ``OnlineAnomalyDetector``, reporting throughput, per-check
+latency, state size and, for synthetic streams, precision/recall against
+the injected anomalies.
+
+Recorded streams are JSON lines with ``route``, ``site``, ``cabin`` (optional)
+and ``price`` fields in observation order, e.g. an export of
+``flight_price_history`` joined with ``flights``. Without ``--input`` a
+synthetic random-walk stream with injected spikes is generated.
+
+Usage:
+    python scripts/price_anomaly_replay_benchmark.py --series 500 --length 400
+    python scripts/price_anomaly_replay_benchmark.py --input prices.jsonl
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from price_anomaly_detector import STATE_SIZE, OnlineAnomalyDetector
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+Observation = Tuple[str, str, str, float, bool]
+
+
+def _load_stream(path: Path) -> List[Observation]:
+    observations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            observations.append(
+                (
+                    row["route"],
+                    row.get("site", "all"),
+                    row.get("cabin", "economy"),
+                    float(row["price"]),
+                    bool(row.get("anomaly", False)),
+                )
+            )
+    return observations
+
+
+def _synthetic_stream(series: int, length: int, spike_rate: float, seed: int) -> List[Observation]:
+    """Interleaved random walks with occasional +/-40-80% spikes"""
+    rng = random.Random(seed)
+    levels = {}
+    for i in range(series):
+        key = (f"R{i:04d}", rng.choice(["alibaba", "safarmarket", "mz724"]), "economy")
+        levels[key] = rng.uniform(1_500_000, 9_000_000)
+
+    observations = []
+    for step in range(length):
+        for key in levels:
+            levels[key] *= 1 + rng.gauss(0, 0.01)
+            price = levels[key]
+            # Leave the first observations clean so both detectors warm up
+            is_spike = step > 20 and rng.random() < spike_rate
+            if is_spike:
+                price *= rng.choice([rng.uniform(1.4, 1.8), rng.uniform(0.3, 0.6)])
+            observations.append((*key, round(price), is_spike))
+    return observations
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _score(flags: Set[int], truth: Set[int]) -> Dict[str, Optional[float]]:
+    if not truth:
+        return {"precision": None, "recall": None}
+    true_positives = len(flags & truth)
+    return {
+        "precision": true_positives / len(flags) if flags else 0.0,
+        "recall": true_positives / len(truth),
+    }
+
+
+def run_full_history(stream: List[Observation], sample_every: int) -> Dict:
+    """The previous check: mean of the whole history on every observation"""
+    history: Dict[Tuple[str, str, str], List[float]] = {}
+    flags: Set[int] = set()
+    latencies = []
+    start = time.perf_counter()
+    for index, (route, site, cabin, price, _) in enumerate(stream):
+        prices = history.setdefault((route, site, cabin), [])
+        check_start = time.perf_counter()
+        if len(prices) >= 10:
+            expected = statistics.mean(prices)
+            if abs(price - expected) / expected * 100 > 10:
+                flags.add(index)
+        if index % sample_every == 0:
+            latencies.append(time.perf_counter() - check_start)
+        prices.append(price)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": "full_history",
+        "elapsed_s": elapsed,
+        "observations_per_s": len(stream) / elapsed,
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+        "state_bytes_per_series": 8 * len(stream) / max(len(history), 1),
+        "flags": flags,
+    }
+
+
+def run_streaming(stream: List[Observation], sample_every: int) -> Dict:
+    detector = OnlineAnomalyDetector()
+    flags: Set[int] = set()
+    latencies = []
+    start = time.perf_counter()
+    for index, (route, site, cabin, price, _) in enumerate(stream):
+        check_start = time.perf_counter()
+        if detector.observe(route, price, site=site, cabin=cabin) is not None:
+            flags.add(index)
+        if index % sample_every == 0:
+            latencies.append(time.perf_counter() - check_start)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": "streaming",
+        "elapsed_s": elapsed,
+        "observations_per_s": len(stream) / elapsed,
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+        "state_bytes_per_series": STATE_SIZE,
+        "flags": flags,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Price anomaly replay benchmark")
+    parser.add_argument("--input", type=str, help="JSON lines price stream to replay")
+    parser.add_argument("--series", type=int, default=500, help="Synthetic series count")
+    parser.add_argument("--length", type=int, default=400, help="Observations per synthetic series")
+    parser.add_argument("--spike-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=str, help="Write JSON results to file")
+    args = parser.parse_args()
+
+    if args.input:
+        stream = _load_stream(Path(args.input))
+    else:
+        stream = _synthetic_stream(args.series, args.length, args.spike_rate, args.seed)
+    truth = {index for index, observation in enumerate(stream) if observation[4]}
+    sample_every = max(1, len(stream) // 20000)
+    logger.info(f"Replaying {len(stream)} observations ({len(truth)} labelled anomalies)")
+
+    results = []
+    for runner in (run_full_history, run_streaming):
+        result = runner(stream, sample_every)
+        result.update(_score(result.pop("flags"), truth))
+        results.append(result)
+        quality = ""
+        if result["precision"] is not None:
+            quality = f" precision={result['precision']:.2f} recall={result['recall']:.2f}"
+        logger.info(
+            f"{result['mode']}: {result['observations_per_s']:.0f} obs/s "
+            f"p50={result['p50_us']:.1f}us p99={result['p99_us']:.1f}us "
+            f"state={result['state_bytes_per_series']:.0f}B/series{quality}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+WebSocket fan-out benchmark.
+
+Starts a local websocket server, connects thousands of local clients and
+broadcasts flight-update sized messages to all of them, comparing the old
+per-connection ``json.dumps`` + sequential send loop with the encode-once
+concurrent fan-out in ``utils.websocket_fanout``. Reports p50/p95/p99
+delivery latency measured at the clients.
+
+Usage:
+    python scripts/websocket_fanout_benchmark.py --clients 2000 --messages 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import websockets
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.websocket_fanout import encode_message, fan_out
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+logging.getLogger("websockets").setLevel(logging.WARNING)
+
+
+def _raise_fd_limit() -> None:
+    """Each client needs two sockets in this process"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _sample_payload(flights: int) -> Dict:
+    return {
+        "type": "flight_update",
+        "topic": "flight_updates",
+        "data": {
+            "flights": [
+                {
+                    "flight_number": f"IR-{i:04d}",
+                    "airline": "Iran Air",
+                    "origin": "THR",
+                    "destination": "MHD",
+                    "departure_time": "2024-06-01T08:30:00",
+                    "price": 2500000 + i * 1000,
+                    "currency": "IRR",
+                }
+                for i in range(flights)
+            ]
+        },
+    }
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run_mode(mode: str, clients: int, messages: int, flights: int, port: int) -> Dict:
+    server_connections = []
+    ready = asyncio.Event()
+
+    async def handler(websocket, *args):
+        server_connections.append(websocket)
+        if len(server_connections) == clients:
+            ready.set()
+        await websocket.wait_closed()
+
+    latencies: List[float] = []
+
+    async def client() -> None:
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=None) as ws:
+            for _ in range(messages):
+                frame = await ws.recv()
+                received = time.perf_counter()
+                latencies.append(received - json.loads(frame)["sent_at"])
+
+    async with websockets.serve(handler, "127.0.0.1", port, max_size=None):
+        client_tasks = [asyncio.create_task(client()) for _ in range(clients)]
+        await asyncio.wait_for(ready.wait(), timeout=120)
+
+        payload = _sample_payload(flights)
+        broadcast_times = []
+        for _ in range(messages):
+            payload["sent_at"] = time.perf_counter()
+            start = time.perf_counter()
+            if mode == "sequential":
+                for websocket in server_connections:
+                    await websocket.send(json.dumps(payload))
+            else:
+                encoded = encode_message(payload)
+                await fan_out(
+                    [(i, ws.send) for i, ws in enumerate(server_connections)],
+                    encoded,
+                    timeout=30,
+                )
+            broadcast_times.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+        await asyncio.gather(*client_tasks)
+
+    return {
+        "mode": mode,
+        "clients": clients,
+        "messages": messages,
+        "deliveries": len(latencies),
+        "broadcast_mean_ms": statistics.mean(broadcast_times) * 1000,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="WebSocket fan-out benchmark")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--flights", type=int, default=50, help="Flights per message")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", type=str, help="Write JSON results to file")
+    args = parser.parse_args()
+
+    _raise_fd_limit()
+    results = []
+    for offset, mode in enumerate(("sequential", "fanout")):
+        logger.info(f"Running {mode} with {args.clients} clients")
+        result = await _run_mode(
+            mode, args.clients, args.messages, args.flights, args.port + offset
+        )
+        results.append(result)
+        logger.info(
+            f"{mode}: p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+            f"p99={result['p99_ms']:.1f}ms broadcast={result['broadcast_mean_ms']:.1f}ms"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,22 +1,43 @@
 from __future__ import annotations
 
 import aiohttp
-from typing import Optional
+from typing import Dict, Optional
 
 from requests.selenium_handler import SeleniumHandler
+from utils.session_state import SessionStatePolicy, SessionStateStore, WarmSession, get_session_state_store
 
 
 class SessionManager:
     """Unified session manager for HTTP and browser sessions."""
 
-    def __init__(self) -> None:
+    def __init__(self, state_store: Optional[SessionStateStore] = None) -> None:
         self._http_session: Optional[aiohttp.ClientSession] = None
+        self._site_sessions: Dict[str, aiohttp.ClientSession] = {}
         self._selenium: Optional[SeleniumHandler] = None
-
-    async def get_http_session(self) -> aiohttp.ClientSession:
-        if not self._http_session:
-            self._http_session = aiohttp.ClientSession()
-        return self._http_session
+        self._state_store = state_store
+
+    async def get_http_session(
+        self, site: Optional[str] = None, policy: Optional[SessionStatePolicy] = None
+    ) -> aiohttp.ClientSession:
+        """Shared session, or one carrying ``site``'s warm cookies and headers when given."""
+        if site is None:
+            if not self._http_session:
+                self._http_session = aiohttp.ClientSession()
+            return self._http_session
+
+        session = self._site_sessions.get(site)
+        if session is None or session.closed:
+            store = self._state_store or get_session_state_store()
+            policy = policy or SessionStatePolicy()
+            snapshot = await WarmSession(site, store, policy).restore()
+            if snapshot is None:
+                session = aiohttp.ClientSession()
+            else:
+                session = aiohttp.ClientSession(
+                    cookie_jar=snapshot.cookie_jar(), headers=snapshot.headers(policy.csrf_header)
+                )
+            self._site_sessions[site] = session
+        return session
 
     def get_selenium(self) -> SeleniumHandler:
         if not self._selenium:
@@ -27,6 +48,10 @@ class SessionManager:
     async def close(self) -> None:
         if self._http_session and not self._http_session.closed:
             await self._http_session.close()
+        for session in self._site_sessions.values():
+            if not session.closed:
+                await session.close()
+        self._site_sessions.clear()
         if self._selenium:
             self._selenium.close_driver()
             self._selenium = None
@@ -70,7 +70,7 @@ class FlytodayCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -122,10 +122,12 @@ class FlytodayCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling Flytoday: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             fallback = await self._api_fallback(search_params)
@@ -160,7 +162,7 @@ class FlightioCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -212,10 +214,12 @@ class FlightioCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling Flightio: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -242,7 +246,8 @@ class AlibabaCrawler(BaseSiteCrawler):
                     await asyncio.sleep(wait_time)
 
             # Navigate to search page
-            await self.crawler.navigate(f"{self.base_url}/flight/search")
+            search_url = f"{self.base_url}/flight/search"
+            await self.crawler.navigate(search_url)
 
             # Fill search form
             await self._execute_js(
@@ -271,11 +276,8 @@ class AlibabaCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".flight-list", timeout=30):
                 raise Exception("Flight results not found")
 
-            # Take screenshot for debugging
-            await self._take_screenshot("search_results")
-
             # Extract flight data
-            html = await self.crawler.content()
+            html = await self._page_content(search_url)
             soup = BeautifulSoup(html, "html.parser")
 
             flights = []
@@ -314,12 +316,14 @@ class AlibabaCrawler(BaseSiteCrawler):
                     continue
 
             # Track successful request
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
 
             return flights
 
         except Exception as e:
             self.logger.error(f"Error crawling Alibaba: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -355,7 +359,7 @@ class SnapptripCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".flight-item", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
 
             flights = []
@@ -418,12 +422,14 @@ class SnapptripCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
 
             return flights
 
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -521,12 +527,14 @@ class SafarmarketCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
 
             return flights
 
         except Exception as e:
             self.logger.error(f"Error crawling Safarmarket: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -567,7 +575,7 @@ class Mz724Crawler(BaseSiteCrawler):
             await self._wait_for_element(".resu", timeout=30)
 
             # Extract flight data
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -621,11 +629,12 @@ class Mz724Crawler(BaseSiteCrawler):
                     }
                 )
 
-            await self._take_screenshot("search_results")
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -662,7 +671,7 @@ class PartoCRSCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -714,11 +723,12 @@ class PartoCRSCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
-            await self._take_screenshot("search_results")
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -755,7 +765,7 @@ class PartoTicketCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -807,11 +817,12 @@ class PartoTicketCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
-            await self._take_screenshot("search_results")
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -848,7 +859,7 @@ class BookCharter724Crawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -900,11 +911,12 @@ class BookCharter724Crawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
-            await self._take_screenshot("search_results")
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -941,7 +953,7 @@ class BookCharterCrawler(BaseSiteCrawler):
             if not await self._wait_for_element(".resu", timeout=30):
                 raise Exception("Flight results not found")
 
-            html = await self.crawler.content()
+            html = await self._page_content(url)
             soup = BeautifulSoup(html, "html.parser")
             flights: List[Dict] = []
 
@@ -993,11 +1005,12 @@ class BookCharterCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
-            await self._take_screenshot("search_results")
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -1082,10 +1095,12 @@ class MrbilitCrawler(BaseSiteCrawler):
                     self.logger.error(f"Error parsing flight: {parse_err}")
                     continue
 
+            await self._capture_debug_artifacts(search_params)
             await self.monitor.track_request(self.domain, start_time.timestamp())
             return flights
         except Exception as e:
             self.logger.error(f"Error crawling {self.domain}: {e}")
+            await self._capture_debug_artifacts(search_params, e)
             context = ErrorContext(adapter_name=self.domain, operation="search_flights")
             await self.error_handler.handle_error(e, context)
             return await self._api_fallback(search_params)
@@ -121,16 +121,18 @@ async def process_price_alerts():
     """Process price alerts and send notifications"""
     try:
         crawler = IranianFlightCrawler()
-        alerts = await crawler.price_monitor.get_active_alerts()
+        price_monitor = crawler.price_monitor
+        await price_monitor.load_alerts()
 
-        for alert in alerts:
-            current_price = await crawler.data_manager.get_current_price(alert["route"])
-
-            if current_price <= alert["target_price"]:
-                await crawler.price_monitor.send_price_alert(alert, current_price)
+        # One price lookup per alerted route; the index finds triggered alerts
+        triggered = 0
+        for route in price_monitor.alert_index.routes():
+            current_price = await crawler.data_manager.get_current_price(route)
+            triggered += len(await price_monitor.record_price(route, current_price))
 
         return {
-            "alerts_processed": len(alerts),
+            "alerts_processed": len(price_monitor.alert_index),
+            "alerts_triggered": triggered,
             "timestamp": datetime.now().isoformat(),
         }
 
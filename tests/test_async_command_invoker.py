@@ -0,0 +1,262 @@
+"""
+Tests for the asyncio-native command invoker and adapter pool
+"""
+
+import asyncio
+import pytest
+
+from adapters.patterns.command_pattern import (
+    AdapterPool,
+    AsyncCommandInvoker,
+    BatchCrawlCommand,
+    Command,
+    CommandPriority,
+    CommandResult,
+    CommandStatus,
+    CrawlSiteCommand,
+)
+
+
+class FakeAdapter:
+    """Adapter stand-in that records lifecycle calls"""
+
+    instances = []
+
+    def __init__(self, site, delay=0.0):
+        self.site = site
+        self.delay = delay
+        self.entered = 0
+        self.closed = False
+        self.crawled = []
+        FakeAdapter.instances.append(self)
+
+    async def __aenter__(self):
+        self.entered += 1
+        return self
+
+    async def close(self):
+        self.closed = True
+
+    async def crawl(self, search_params):
+        await asyncio.sleep(self.delay)
+        self.crawled.append(search_params["departure_date"])
+        return [{"price": 100, "departure_date": search_params["departure_date"]}]
+
+
+class RecordingCommand(Command):
+    """Command that records execution order"""
+
+    def __init__(self, name, log, priority=CommandPriority.NORMAL):
+        super().__init__(name, priority=priority)
+        self.log = log
+
+    def execute(self, **kwargs):
+        return CommandResult(success=True)
+
+    async def execute_async(self, **kwargs):
+        self.log.append(self.name)
+        return CommandResult(success=True)
+
+
+def make_pool(max_per_site=2, delay=0.0):
+    FakeAdapter.instances = []
+    return AdapterPool(
+        adapter_factory=lambda site: FakeAdapter(site, delay),
+        max_per_site=max_per_site,
+    )
+
+
+def crawl_command(site, date, priority=CommandPriority.NORMAL):
+    return CrawlSiteCommand(
+        site_url=f"https://{site}.example",
+        adapter_name=site,
+        search_params={"origin": "THR", "destination": "MHD", "departure_date": date},
+        priority=priority,
+    )
+
+
+class TestAdapterPool:
+    """Test warm adapter reuse"""
+
+    @pytest.mark.asyncio
+    async def test_adapters_are_reused(self):
+        pool = make_pool()
+        adapter = await pool.acquire("alibaba")
+        await pool.release("alibaba", adapter)
+        again = await pool.acquire("alibaba")
+
+        assert again is adapter
+        assert adapter.entered == 1
+        assert pool.get_stats()["created"] == 1
+        assert pool.get_stats()["reused"] == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_at_capacity(self):
+        pool = make_pool(max_per_site=1)
+        adapter = await pool.acquire("alibaba")
+        waiter = asyncio.create_task(pool.acquire("alibaba"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await pool.release("alibaba", adapter)
+        assert await asyncio.wait_for(waiter, 1) is adapter
+
+    @pytest.mark.asyncio
+    async def test_lease_discards_on_error(self):
+        pool = make_pool()
+        with pytest.raises(RuntimeError):
+            async with pool.lease("alibaba"):
+                raise RuntimeError("broken page")
+
+        assert FakeAdapter.instances[0].closed
+        assert pool.get_stats()["discarded"] == 1
+
+
+class TestAsyncCommandInvoker:
+    """Test scheduling, site caps and history"""
+
+    @pytest.mark.asyncio
+    async def test_crawl_reuses_pooled_adapter(self):
+        invoker = AsyncCommandInvoker(adapter_pool=make_pool(max_per_site=1))
+        results = await invoker.execute_many(
+            [crawl_command("alibaba", f"2024-06-0{day}") for day in range(1, 4)]
+        )
+        await invoker.shutdown()
+
+        assert all(result.success for result in results)
+        assert len(FakeAdapter.instances) == 1
+        assert len(FakeAdapter.instances[0].crawled) == 3
+        assert FakeAdapter.instances[0].closed
+
+    @pytest.mark.asyncio
+    async def test_per_site_limit(self):
+        active = {"now": 0, "peak": 0}
+
+        class TrackingAdapter(FakeAdapter):
+            async def crawl(self, search_params):
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+                await asyncio.sleep(0.01)
+                active["now"] -= 1
+                return []
+
+        pool = AdapterPool(adapter_factory=TrackingAdapter, max_per_site=4)
+        invoker = AsyncCommandInvoker(
+            max_concurrency=8, per_site_limits={"alibaba": 2}, adapter_pool=pool
+        )
+        await invoker.execute_many(
+            [crawl_command("alibaba", "2024-06-01") for _ in range(6)]
+        )
+        await invoker.shutdown()
+
+        assert active["peak"] == 2
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        log = []
+        invoker = AsyncCommandInvoker(max_concurrency=1)
+        await invoker.start()
+        # Occupy the only slot so the rest queue up behind it
+        blocker = asyncio.Event()
+
+        class BlockingCommand(RecordingCommand):
+            async def execute_async(self, **kwargs):
+                await blocker.wait()
+                return CommandResult(success=True)
+
+        first = await invoker.submit(BlockingCommand("blocker", log))
+        futures = [
+            await invoker.submit(RecordingCommand("low", log, CommandPriority.LOW)),
+            await invoker.submit(
+                RecordingCommand("critical", log, CommandPriority.CRITICAL)
+            ),
+            await invoker.submit(RecordingCommand("normal", log)),
+        ]
+        await asyncio.sleep(0.01)
+        blocker.set()
+        await asyncio.gather(first, *futures)
+        await invoker.shutdown()
+
+        assert log == ["critical", "normal", "low"]
+
+    @pytest.mark.asyncio
+    async def test_batch_command_runs_dates_on_one_adapter(self):
+        invoker = AsyncCommandInvoker(adapter_pool=make_pool())
+        command = BatchCrawlCommand(
+            site_url="https://alibaba.example",
+            adapter_name="alibaba",
+            search_params={"origin": "THR", "destination": "MHD"},
+            dates=["2024-06-01", "2024-06-02", "2024-06-03"],
+        )
+        result = await invoker.execute_command(command)
+        await invoker.shutdown()
+
+        assert result.success
+        assert result.metadata["successful_dates"] == 3
+        assert len(FakeAdapter.instances) == 1
+        assert FakeAdapter.instances[0].crawled == list(result.data.keys())
+
+    @pytest.mark.asyncio
+    async def test_history_is_bounded(self):
+        log = []
+        invoker = AsyncCommandInvoker(history_size=5)
+        commands = [RecordingCommand(f"cmd{i}", log) for i in range(12)]
+        await invoker.execute_many(commands)
+        await invoker.shutdown()
+
+        assert len(invoker.command_history) == 5
+        assert invoker.get_command_status(commands[-1].context.command_id) == (
+            CommandStatus.COMPLETED
+        )
+        assert invoker.get_command_status(commands[0].context.command_id) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_command_is_retried(self):
+        attempts = []
+
+        class FlakyCommand(RecordingCommand):
+            async def execute_async(self, **kwargs):
+                attempts.append(1)
+                return CommandResult(success=len(attempts) >= 3)
+
+        invoker = AsyncCommandInvoker(retry_base_delay=0.01)
+        result = await invoker.execute_command(FlakyCommand("flaky", []))
+        await invoker.shutdown()
+
+        assert result.success
+        assert len(attempts) == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_back_off_exponentially(self):
+        attempts = []
+        loop = asyncio.get_running_loop()
+
+        class FlakyCommand(RecordingCommand):
+            async def execute_async(self, **kwargs):
+                attempts.append(loop.time())
+                return CommandResult(success=len(attempts) >= 3)
+
+        invoker = AsyncCommandInvoker(retry_base_delay=0.05)
+        await invoker.execute_command(FlakyCommand("flaky", []))
+        await invoker.shutdown()
+
+        assert attempts[1] - attempts[0] >= 0.05
+        assert attempts[2] - attempts[1] >= 0.1
+        assert invoker._retry_delay(20) == invoker.retry_max_delay
+
+    @pytest.mark.asyncio
+    async def test_adapter_of_failed_command_is_discarded(self):
+        class BrokenAdapter(FakeAdapter):
+            async def crawl(self, search_params):
+                raise RuntimeError("browser crashed")
+
+        pool = AdapterPool(adapter_factory=BrokenAdapter, max_per_site=1)
+        invoker = AsyncCommandInvoker(adapter_pool=pool, retry_base_delay=0.01)
+        result = await invoker.execute_command(crawl_command("alibaba", "2024-06-01"))
+        await invoker.shutdown()
+
+        assert not result.success
+        # Every attempt ran on a fresh adapter; none went back to the pool
+        assert pool.get_stats()["created"] == 4
+        assert pool.get_stats()["discarded"] == 4
+        assert pool.get_stats()["reused"] == 0
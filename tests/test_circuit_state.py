@@ -0,0 +1,165 @@
+"""
+Tests for fleet-wide circuit breaker state
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from adapters.strategies.adaptive_rate_limiter import AdaptiveConfig, AdaptiveRateLimiter
+from adapters.strategies.circuit_breaker_integration import IntegratedCircuitBreaker
+from adapters.strategies.enhanced_circuit_breaker import (
+    CircuitBreakerConfig,
+    CircuitState,
+    EnhancedCircuitBreaker,
+    FailureType,
+)
+from utils.circuit_state import (
+    HALF_OPEN,
+    OPEN,
+    CircuitStateStore,
+    InMemoryCircuitStateBus,
+    InMemoryCircuitStateStore,
+    SharedCircuitState,
+)
+
+
+def make_workers(count=2, cache_ttl=60.0):
+    bus = InMemoryCircuitStateBus()
+    return [InMemoryCircuitStateStore(bus, worker_id=f"worker-{i}", cache_ttl=cache_ttl) for i in range(count)]
+
+
+def make_breaker(store, recovery_timeout=60.0):
+    config = CircuitBreakerConfig(failure_threshold=3, recovery_timeout=recovery_timeout, success_threshold=2)
+    return EnhancedCircuitBreaker("alibaba_adapter", config, shared_state=store)
+
+
+async def trip(breaker):
+    for _ in range(breaker.config.failure_threshold):
+        await breaker._record_failure(FailureType.NETWORK_ERROR, "connection refused", 0)
+
+
+class TestCircuitStateStore:
+    """Test transitions and the local cache"""
+
+    @pytest.mark.asyncio
+    async def test_reads_are_served_from_cache_until_invalidated(self):
+        first, second = make_workers()
+        for _ in range(100):
+            assert (await second.get("alibaba")).state == "closed"
+        assert second.stats["misses"] == 1
+
+        await first.trip("alibaba", 30, "timeouts")
+        assert second.cached("alibaba") is None
+        state = await second.get("alibaba")
+        assert state.state == OPEN
+        assert state.origin == "worker-0"
+        assert second.stats["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_trip_never_shortens_an_open_period(self):
+        (store,) = make_workers(1)
+        long = await store.trip("alibaba", 300, "long")
+        short = await store.trip("alibaba", 5, "short")
+        assert short.open_until == long.open_until
+        assert short.version == long.version
+
+    @pytest.mark.asyncio
+    async def test_only_one_worker_claims_the_probe(self):
+        workers = make_workers(3)
+        await workers[0].trip("alibaba", 0, "probe now")
+        claims = [await store.claim_probe("alibaba", 30) for store in workers]
+        assert claims == [True, False, False]
+        state = await workers[2].get("alibaba")
+        assert state.state == HALF_OPEN
+        assert state.blocks("worker-2") and not state.blocks("worker-0")
+
+    def test_expired_probe_lease_is_available(self):
+        state = SharedCircuitState("alibaba", state=HALF_OPEN, probe_owner="worker-0", probe_until=time.time() - 1)
+        assert state.probe_available()
+        assert not state.blocks("worker-1")
+
+
+class TestSharedCircuitBreaker:
+    """Test EnhancedCircuitBreaker instances in different workers"""
+
+    @pytest.mark.asyncio
+    async def test_circuit_opened_by_one_worker_blocks_the_fleet(self):
+        stores = make_workers()
+        first, second = make_breaker(stores[0]), make_breaker(stores[1])
+        assert await second._can_execute()
+
+        await trip(first)
+        assert first.state == CircuitState.OPEN
+        assert not await second._can_execute()
+        assert second.state == CircuitState.OPEN
+        assert 0 < second._time_until_next_attempt() <= 60
+        assert second.metrics.failed_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_single_probe_closes_the_circuit_everywhere(self):
+        stores = make_workers(3)
+        breakers = [make_breaker(store, recovery_timeout=0.05) for store in stores]
+        await trip(breakers[0])
+        await asyncio.sleep(0.06)
+
+        allowed = [await breaker._can_execute() for breaker in breakers]
+        assert allowed == [True, False, False]
+        assert breakers[0].state == CircuitState.HALF_OPEN
+
+        for _ in range(2):
+            await breakers[0]._record_success(10)
+        assert breakers[0].state == CircuitState.CLOSED
+        assert all([await breaker._can_execute() for breaker in breakers])
+        assert all(breaker.state == CircuitState.CLOSED for breaker in breakers)
+
+    @pytest.mark.asyncio
+    async def test_reset_closes_the_shared_circuit(self):
+        stores = make_workers()
+        first, second = make_breaker(stores[0]), make_breaker(stores[1])
+        await trip(first)
+
+        first.reset()
+        assert len(first._shared_tasks) == 1
+        await first.wait_shared_writes()
+        assert not first._shared_tasks
+        assert await second._can_execute()
+
+    def test_store_requires_backend_methods(self):
+        with pytest.raises(TypeError):
+            CircuitStateStore()
+
+    @pytest.mark.asyncio
+    async def test_integrated_breaker_shares_every_circuit(self):
+        stores = make_workers()
+        first = IntegratedCircuitBreaker("alibaba", shared_state=stores[0])
+        second = IntegratedCircuitBreaker("alibaba", shared_state=stores[1])
+
+        for _ in range(first.config.adapter_failure_threshold):
+            await first.adapter_circuit._record_failure(FailureType.NETWORK_ERROR, "down", 0)
+        assert not await second.can_make_request("adapter")
+        assert await second.can_make_request("rate_limiter")
+
+
+class TestSharedAdaptiveRateLimiter:
+    """Test the deprecated adaptive limiter with a shared store"""
+
+    @pytest.mark.asyncio
+    async def test_circuit_and_backoff_are_shared(self):
+        stores = make_workers()
+        config = AdaptiveConfig(circuit_breaker_threshold=2, circuit_breaker_timeout=60)
+        with pytest.warns(DeprecationWarning):
+            first = AdaptiveRateLimiter("alibaba", config, shared_state=stores[0])
+            second = AdaptiveRateLimiter("alibaba", config, shared_state=stores[1])
+
+        for _ in range(2):
+            await first.record_request(100.0, success=False, error_type="timeout")
+        allowed, reason, wait = await second.can_make_request()
+        assert (allowed, reason) == (False, "circuit_breaker_open")
+        assert 0 < wait <= 60
+
+        await stores[0].close(first._shared_name("circuit"), "recovered")
+        await first._share_hold("backoff", 10, "degraded")
+        allowed, reason, _ = await second.can_make_request()
+        assert (allowed, reason) == (False, "backoff_period")
@@ -0,0 +1,148 @@
+"""
+Tests for concurrent, cache-aware date-range search
+"""
+
+import asyncio
+import pytest
+
+from date_range_search import (
+    SOURCE_CACHE,
+    SOURCE_CRAWL,
+    SOURCE_STORED,
+    DateRangeSearchExecutor,
+    date_window,
+)
+
+PARAMS = {"origin": "THR", "destination": "MHD", "passengers": 1, "seat_class": "economy"}
+
+
+class SlowCrawler:
+    """Crawls take a fixed time and record peak concurrency"""
+
+    def __init__(self, delay=0.05, prices=None, fail=()):
+        self.delay = delay
+        self.prices = prices or {}
+        self.fail = set(fail)
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+
+    async def crawl(self, params):
+        date = params["departure_date"]
+        self.calls.append(date)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if date in self.fail:
+                raise RuntimeError("blocked")
+            return [{"price": self.prices.get(date, 1000)}]
+        finally:
+            self.active -= 1
+
+
+class LocalData:
+    """Search cache and stored flights keyed by date"""
+
+    def __init__(self, cached=None, stored=None):
+        self.cached = cached or {}
+        self.stored = stored or {}
+        self.written = {}
+
+    def get_cached_results(self, params):
+        flights = self.cached.get(params["departure_date"])
+        return {"flights": flights} if flights is not None else None
+
+    async def get_route_flights(self, origin, destination, departure_date, scraped_since=None):
+        return self.stored.get(departure_date, [])
+
+    async def cache_search_results(self, params, results):
+        self.written[params["departure_date"]] = results["flights"]
+
+
+def test_date_window():
+    assert date_window("2024-06-10", 1, 2) == [
+        "2024-06-09",
+        "2024-06-10",
+        "2024-06-11",
+        "2024-06-12",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_missing_dates_crawl_concurrently_within_site_limit():
+    crawler = SlowCrawler(delay=0.05)
+    executor = DateRangeSearchExecutor(crawler.crawl, site="test-limit", site_concurrency=3)
+
+    summary = await executor.search(PARAMS, date_window("2024-06-10", 3, 3))
+
+    assert len(summary["results"]) == 7
+    assert crawler.peak == 3
+    # Seven 50 ms crawls, three at a time: three waves rather than seven
+    assert summary["total_latency_ms"] < 7 * 50
+
+
+@pytest.mark.asyncio
+async def test_local_sources_are_used_before_crawling():
+    crawler = SlowCrawler(delay=0)
+    local = LocalData(
+        cached={"2024-06-10": [{"price": 900}]},
+        stored={"2024-06-11": [{"price": 800}]},
+    )
+    executor = DateRangeSearchExecutor(crawler.crawl, data_manager=local, site="test-local")
+
+    summary = await executor.search(PARAMS, ["2024-06-10", "2024-06-11", "2024-06-12"])
+
+    assert [r.source for r in summary["results"]] == [SOURCE_CACHE, SOURCE_STORED, SOURCE_CRAWL]
+    assert crawler.calls == ["2024-06-12"]
+    assert local.written == {"2024-06-12": [{"price": 1000}]}
+    assert summary["sources"] == {SOURCE_CACHE: 1, SOURCE_STORED: 1, SOURCE_CRAWL: 1}
+
+
+@pytest.mark.asyncio
+async def test_results_stream_in_completion_order_and_failures_are_reported():
+    crawler = SlowCrawler(delay=0.02, fail={"2024-06-11"})
+    local = LocalData(cached={"2024-06-12": [{"price": 700}]})
+    executor = DateRangeSearchExecutor(crawler.crawl, data_manager=local, site="test-stream")
+
+    seen = [r async for r in executor.iter_dates(PARAMS, ["2024-06-10", "2024-06-11", "2024-06-12"])]
+
+    assert seen[0].date == "2024-06-12" and seen[0].min_price == 700
+    failed = next(r for r in seen if r.date == "2024-06-11")
+    assert not failed.success and failed.error == "blocked"
+    assert all(r.latency_ms >= 0 for r in seen)
+
+
+
+@pytest.mark.asyncio
+async def test_limits_are_keyed_by_the_crawled_sites():
+    active = {"key-alibaba": 0, "key-flytoday": 0}
+    peak = dict(active)
+
+    def crawler_for(*sites):
+        async def crawl(params):
+            for site in sites:
+                active[site] += 1
+                peak[site] = max(peak[site], active[site])
+            await asyncio.sleep(0.02)
+            for site in sites:
+                active[site] -= 1
+            return []
+
+        return crawl
+
+    dates = date_window("2024-06-10", 0, 3)
+    alibaba = DateRangeSearchExecutor(crawler_for("key-alibaba"), site="key-alibaba", site_concurrency=2)
+    flytoday = DateRangeSearchExecutor(crawler_for("key-flytoday"), site="key-flytoday", site_concurrency=2)
+    both = DateRangeSearchExecutor(
+        crawler_for("key-alibaba", "key-flytoday"), sites=["key-flytoday", "key-alibaba"], site_concurrency=2
+    )
+
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(alibaba.search(PARAMS, dates), flytoday.search(PARAMS, dates))
+    # Different sites do not queue behind each other: two waves of 20 ms each
+    assert asyncio.get_running_loop().time() - start < 0.07
+    assert peak == {"key-alibaba": 2, "key-flytoday": 2}
+
+    await asyncio.gather(*(executor.search(PARAMS, dates) for executor in (alibaba, flytoday, both)))
+    assert peak == {"key-alibaba": 2, "key-flytoday": 2}
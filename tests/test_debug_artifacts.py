@@ -0,0 +1,185 @@
+"""
+Tests for failure-only debug artifact capture
+"""
+
+import asyncio
+import gzip
+import json
+import time
+
+import pytest
+
+from utils.debug_artifacts import DebugArtifactConfig, DebugArtifactRecorder
+
+
+class FakeRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+        self.method = "GET"
+
+
+class FakeResponse:
+    def __init__(self, url, resource_type="xhr", body=b'{"flights": []}'):
+        self.url = url
+        self.status = 200
+        self.headers = {"content-type": "application/json"}
+        self.request = FakeRequest(resource_type)
+        self._body = body
+        self.body_reads = 0
+
+    async def body(self):
+        self.body_reads += 1
+        return self._body
+
+
+class SlowResponse(FakeResponse):
+    async def body(self):
+        await asyncio.sleep(10)
+        return b"never"
+
+
+class FakePage:
+    url = "https://www.alibaba.ir/flights/THR-MHD"
+
+    def __init__(self):
+        self.screenshots = 0
+
+    async def screenshot(self, full_page=False):
+        self.screenshots += 1
+        return b"\x89PNG fake"
+
+    async def content(self):
+        return "<html><body>چیزی پیدا نشد</body></html>"
+
+
+def recorder_for(tmp_path, **overrides):
+    return DebugArtifactRecorder("alibaba", DebugArtifactConfig(directory=str(tmp_path), **overrides))
+
+
+def read_gz(path):
+    return gzip.decompress(path.read_bytes()).decode("utf-8")
+
+
+class TestRingBuffer:
+    """Test the in-memory response history"""
+
+    def test_keeps_last_responses_without_reading_bodies(self, tmp_path):
+        recorder = recorder_for(tmp_path, ring_size=3)
+        responses = [FakeResponse(f"https://www.alibaba.ir/api/{n}") for n in range(5)]
+        for response in responses:
+            recorder.on_response(response)
+        recorder.on_response(FakeResponse("https://www.alibaba.ir/logo.png", resource_type="image"))
+
+        assert [record.url for record in recorder.ring] == [f"https://www.alibaba.ir/api/{n}" for n in (2, 3, 4)]
+        assert sum(response.body_reads for response in responses) == 0
+
+    @pytest.mark.asyncio
+    async def test_pages_record_into_their_own_rings(self, tmp_path):
+        recorder = recorder_for(tmp_path, screenshot=False, html=False)
+        first, second = recorder.for_page(), recorder.for_page()
+        first.on_response(FakeResponse("https://www.alibaba.ir/api/THR-MHD"))
+        second.on_response(FakeResponse("https://www.alibaba.ir/api/THR-KIH"))
+
+        directory = await first.maybe_capture(FakePage(), error=RuntimeError("blocked"))
+        await second.capture("failure", FakePage())
+        await recorder.flush()
+
+        har = json.loads(read_gz(directory / "responses.har.gz"))
+        assert [entry["request"]["url"] for entry in har["log"]["entries"]] == ["https://www.alibaba.ir/api/THR-MHD"]
+        # Writes, numbering and stats are shared by the site's recorders
+        stats = recorder.get_stats()
+        assert stats["recorded"] == 2 and stats["written"] == 2 and stats["captures"] == {"failure": 2}
+        assert len({path.name for path in (tmp_path / "alibaba").iterdir()}) == 2
+
+    def test_raw_bodies_are_truncated(self, tmp_path):
+        recorder = recorder_for(tmp_path, max_body_bytes=10)
+        recorder.record_response("https://www.flytoday.ir/flight/search", "x" * 100)
+        assert recorder.ring[0].body == b"x" * 10
+
+
+class TestCapture:
+    """Test when and what gets persisted"""
+
+    @pytest.mark.asyncio
+    async def test_successful_crawls_are_not_captured_by_default(self, tmp_path):
+        recorder = recorder_for(tmp_path)
+        page = FakePage()
+        assert await recorder.maybe_capture(page) is None
+        await recorder.flush()
+
+        assert page.screenshots == 0
+        assert not list(tmp_path.iterdir())
+        assert recorder.get_stats()["sampled_out"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sampled_successes_are_captured(self, tmp_path):
+        recorder = recorder_for(tmp_path, sample_rate=1.0)
+        directory = await recorder.maybe_capture(FakePage())
+        await recorder.flush()
+        assert directory.name.endswith("_sample")
+        assert recorder.get_stats()["captures"] == {"sample": 1}
+
+    @pytest.mark.asyncio
+    async def test_failure_writes_compressed_bundle(self, tmp_path):
+        recorder = recorder_for(tmp_path)
+        recorder.on_response(FakeResponse("https://www.alibaba.ir/api/v1/flights/domestic/available"))
+        error = TimeoutError("results never rendered")
+
+        directory = await recorder.maybe_capture(
+            FakePage(), error=error, context={"search_params": {"origin": "THR"}}
+        )
+        await recorder.flush()
+
+        assert sorted(path.name for path in directory.iterdir()) == [
+            "meta.json.gz", "page.html.gz", "responses.har.gz", "screenshot.png",
+        ]
+        assert (directory / "screenshot.png").read_bytes() == b"\x89PNG fake"
+        assert "چیزی پیدا نشد" in read_gz(directory / "page.html.gz")
+
+        har = json.loads(read_gz(directory / "responses.har.gz"))
+        entry = har["log"]["entries"][0]
+        assert entry["request"]["url"].endswith("/domestic/available")
+        assert entry["response"]["content"]["text"] == '{"flights": []}'
+
+        meta = json.loads(read_gz(directory / "meta.json.gz"))
+        assert meta["reason"] == "failure" and "results never rendered" in meta["error"]
+        assert meta["traceback"].startswith("TimeoutError")
+        assert meta["context"] == {"search_params": {"origin": "THR"}}
+        assert meta["url"] == FakePage.url
+        stats = recorder.get_stats()
+        assert stats["written"] == 1 and stats["bytes_written"] > 0 and stats["pending_writes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_bodies_are_read_under_one_deadline(self, tmp_path):
+        recorder = recorder_for(tmp_path, body_timeout=0.1, screenshot=False, html=False)
+        for n in range(5):
+            recorder.on_response(SlowResponse(f"https://www.alibaba.ir/api/slow/{n}"))
+        recorder.on_response(FakeResponse("https://www.alibaba.ir/api/fast"))
+
+        started = time.perf_counter()
+        directory = await recorder.maybe_capture(FakePage(), error=RuntimeError("blocked"))
+        assert time.perf_counter() - started < 0.5
+        await recorder.flush()
+
+        entries = json.loads(read_gz(directory / "responses.har.gz"))["log"]["entries"]
+        assert [entry["response"]["content"].get("text") for entry in entries] == [None] * 5 + ['{"flights": []}']
+
+    @pytest.mark.asyncio
+    async def test_old_captures_are_pruned(self, tmp_path):
+        recorder = recorder_for(tmp_path, max_captures=2, screenshot=False)
+        for _ in range(4):
+            await recorder.capture("failure", FakePage())
+            await recorder.flush()
+        captures = sorted(path.name for path in (tmp_path / "alibaba").iterdir())
+        assert len(captures) == 2 and captures[-1].endswith("0004_failure")
+
+    @pytest.mark.asyncio
+    async def test_disabled_and_site_overrides(self, tmp_path):
+        defaults = DebugArtifactConfig(directory=str(tmp_path), sample_rate=0.5)
+        config = DebugArtifactConfig.from_site_config({"enabled": False, "unknown": 1}, defaults)
+        assert config.sample_rate == 0.5 and config.directory == str(tmp_path)
+
+        recorder = DebugArtifactRecorder("alibaba", config)
+        recorder.record_response("https://www.alibaba.ir/", "<html></html>")
+        assert await recorder.maybe_capture(FakePage(), error=RuntimeError("blocked")) is None
+        assert len(recorder.ring) == 0
@@ -0,0 +1,73 @@
+"""
+Tests for deep-link search URL builders
+"""
+
+import json
+from datetime import date
+from pathlib import Path
+
+from adapters.strategies.deep_link import DeepLinkBuilder, format_search_date
+from adapters.unified_crawler_interface import SearchParameters
+
+
+def load_site_builder(site):
+    path = Path(__file__).parent.parent / "config" / "site_configs" / f"{site}.json"
+    return DeepLinkBuilder.from_site_config(json.loads(path.read_text(encoding="utf-8")).get("deep_link"))
+
+
+class TestSearchDates:
+    """Test calendar conversion"""
+
+    def test_jalali_and_gregorian_formats(self):
+        assert format_search_date("2024-08-06", "jalali") == "1403-05-16"
+        assert format_search_date(date(2025, 3, 21), "jalali", "%Y/%m/%d") == "1404/01/01"
+        assert format_search_date("2024-08-06T10:30:00", date_format="%d.%m.%Y") == "06.08.2024"
+
+
+class TestDeepLinkBuilder:
+    """Test URL construction and fallback to the form flow"""
+
+    def test_alibaba_link_from_search_parameters(self):
+        builder = load_site_builder("alibaba")
+        params = SearchParameters(origin="thr", destination="MHD", departure_date="2024-08-06", passengers=2)
+        assert builder.build(params) == (
+            "https://www.alibaba.ir/flights/THR-MHD?adult=2&child=0&infant=0&departing=1403-05-16"
+        )
+
+        round_trip = builder.build(
+            {"origin": "THR", "destination": "KIH", "departure_date": "2024-08-06", "return_date": "2024-08-10"}
+        )
+        assert round_trip.endswith("departing=1403-05-16&returning=1403-05-20")
+
+    def test_unsupported_searches_return_none(self):
+        builder = DeepLinkBuilder(
+            url="https://example.com/{origin}/{destination}/{departure_date}",
+            seat_classes={"economy": "Y", "business": "C"},
+            trip_types={"one_way": "OW"},
+            query={"cabin": "{seat_class}"},
+        )
+        search = {"origin": "IKA", "destination": "IST", "departure_date": "2024-08-06"}
+        assert builder.build({**search, "seat_class": "business"}) == "https://example.com/IKA/IST/2024-08-06?cabin=C"
+        assert builder.build({**search, "seat_class": "first"}) is None
+        assert builder.build({**search, "return_date": "2024-08-10"}) is None
+        assert builder.build({"origin": "IKA", "destination": "IST"}) is None
+        assert builder.build({**search, "departure_date": "not a date"}) is None
+        assert builder.stats["unsupported"] == 4
+
+    def test_repeated_failures_fall_back_to_form_flow(self):
+        builder = DeepLinkBuilder(url="https://example.com/flights/{origin}-{destination}", max_failures=2)
+        search = {"origin": "THR", "destination": "MHD", "departure_date": "2024-08-06"}
+        assert builder.matches("https://example.com/flights/THR-MHD?x=1")
+        assert not builder.matches("https://example.com/")
+
+        builder.record(False)
+        builder.record(True)
+        builder.record(False)
+        assert builder.build(search) is not None
+        builder.record(False)
+        assert builder.build(search) is None
+        assert not builder.get_stats()["available"]
+
+    def test_sites_without_a_deep_link(self):
+        assert load_site_builder("flytoday") is None
+        assert DeepLinkBuilder.from_site_config({"query": {"a": "{origin}"}}) is None
@@ -0,0 +1,142 @@
+"""
+Tests for the indexed error correlation window
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.error_correlation import ErrorCorrelationIndex, message_fingerprint
+
+
+def make_error(adapter, operation="search", error_type="TimeoutError", category="timeout", message="timed out"):
+    return SimpleNamespace(
+        adapter_name=adapter,
+        operation=operation,
+        error_type=error_type,
+        category=category,
+        error_message=message,
+    )
+
+
+def key_for(error):
+    return (
+        error.category,
+        error.adapter_name,
+        error.operation,
+        message_fingerprint(error.error_type, error.error_message),
+    )
+
+
+def score(a, b):
+    """Same weights as EnhancedErrorHandler._calculate_correlation_score inside the window"""
+    total = 0.2
+    total += 0.3 if a.adapter_name == b.adapter_name else 0.0
+    total += 0.2 if a.operation == b.operation else 0.0
+    total += 0.2 if a.error_type == b.error_type else 0.0
+    total += 0.1 if a.category == b.category else 0.0
+    return total
+
+
+class TestFingerprint:
+    """Test message normalisation"""
+
+    def test_volatile_tokens_are_masked(self):
+        assert message_fingerprint("TimeoutError", "Timeout 30000ms exceeded") == message_fingerprint(
+            "TimeoutError", "Timeout 45000ms exceeded"
+        )
+        assert message_fingerprint(
+            "KeyError", "session 3f2b8c1e-9a7d-4c2e-8b1f-0e6d5a4c3b2a missing"
+        ) == message_fingerprint("KeyError", "session 7a1c2d3e-4f5a-4b6c-8d7e-9f0a1b2c3d4e missing")
+        assert message_fingerprint("TimeoutError", "x") != message_fingerprint("ValueError", "x")
+
+
+class TestErrorCorrelationIndex:
+    """Test correlation, bounds and expiry"""
+
+    def test_links_match_the_pairwise_scan(self):
+        index = ErrorCorrelationIndex(max_links=100)
+        errors = [
+            make_error("alibaba"),
+            make_error("alibaba", operation="parse"),
+            make_error("alibaba", error_type="ValueError", category="parsing"),
+            make_error("flytoday"),
+            make_error("alibaba", message="timed out again"),
+        ]
+        for i, error in enumerate(errors):
+            index.correlate(key_for(error), error, score, 0.8, timestamp=1000.0 + i)
+
+        new = make_error("alibaba")
+        linked = index.correlate(key_for(new), new, score, 0.8, timestamp=1010.0)
+        expected = [error for error in reversed(errors) if score(new, error) >= 0.8]
+        assert {id(e) for e in linked} == {id(e) for e in expected}
+        assert errors[3] not in linked
+
+    def test_links_and_memory_are_bounded(self):
+        index = ErrorCorrelationIndex(bucket_seconds=60, per_key_capacity=8, max_links=5)
+        for i in range(1000):
+            error = make_error("alibaba")
+            linked = index.correlate(key_for(error), error, score, 0.8, timestamp=1000.0 + i * 0.01)
+        assert len(linked) == 5
+        assert len(index) == 8
+
+    def test_expired_buckets_are_dropped(self):
+        index = ErrorCorrelationIndex(window_seconds=120, bucket_seconds=60)
+        old = make_error("alibaba")
+        index.correlate(key_for(old), old, score, 0.8, timestamp=0.0)
+
+        new = make_error("alibaba")
+        assert index.correlate(key_for(new), new, score, 0.8, timestamp=500.0) == []
+        assert index.get_stats()["buckets_expired"] == 1
+        assert len(index) == 1
+
+    def test_remove_adapter(self):
+        index = ErrorCorrelationIndex()
+        for adapter in ("alibaba", "flytoday"):
+            error = make_error(adapter)
+            index.correlate(key_for(error), error, score, 0.8, timestamp=1000.0)
+        index.remove_adapter("alibaba")
+
+        error = make_error("alibaba")
+        assert index.correlate(key_for(error), error, score, 0.8, timestamp=1001.0) == []
+        assert index.get_stats()["keys"] == 2
+
+
+class TestErrorStormBenchmark:
+    """Replay an error storm through the index"""
+
+    @pytest.mark.performance
+    def test_50k_error_storm_correlates_in_constant_time_per_error(self):
+        adapters = [f"site_{i}" for i in range(10)]
+        operations = ["navigate", "fill_form", "wait_for_results", "parse"]
+        kinds = [("TimeoutError", "timeout"), ("ValueError", "parsing"), ("ConnectionError", "network")]
+        storm = [
+            make_error(
+                adapters[i % 10],
+                operations[(i // 10) % 4],
+                *kinds[(i // 40) % 3],
+                message=f"request {i} failed after {i % 997}ms",
+            )
+            for i in range(50_000)
+        ]
+
+        index = ErrorCorrelationIndex()
+        timings = []
+        started = time.perf_counter()
+        for chunk in range(10):
+            chunk_started = time.perf_counter()
+            for i in range(chunk * 5000, (chunk + 1) * 5000):
+                error = storm[i]
+                # 50k errors inside five minutes: the whole storm stays in the window
+                index.correlate(key_for(error), error, score, 0.8, timestamp=1000.0 + i * 0.006)
+            timings.append(time.perf_counter() - chunk_started)
+        elapsed = time.perf_counter() - started
+
+        stats = index.get_stats()
+        print(f"\n50k-error storm: {elapsed:.2f}s total, {elapsed / 50_000 * 1e6:.1f}us/error, {stats}")
+        assert stats["indexed"] == 50_000
+        assert stats["links"] <= 50_000 * index.max_links
+        # A full scan would make the last chunk ~19x slower than the first
+        assert timings[-1] < timings[0] * 4 + 0.05
+        assert elapsed < 20
@@ -0,0 +1,194 @@
+"""
+Tests for the cross-process event broker
+"""
+
+import json
+import pytest
+
+from utils.event_broker import (
+    PRICE_EVENTS_CHANNEL,
+    BrokerEvent,
+    EventBroker,
+    InMemoryEventBroker,
+    InMemoryEventBus,
+    create_event_broker,
+)
+from utils.flight_change_feed import FlightChangeFeed, FlightTopic
+from price_monitor import PriceMonitor, WebSocketManager as PriceWebSocketManager
+
+
+class FakeSocket:
+    """Socket stand-in recording frames"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(text)
+
+
+def workers(count):
+    bus = InMemoryEventBus()
+    return [InMemoryEventBroker(bus, worker_id=f"worker-{i}") for i in range(count)]
+
+
+class TestInMemoryEventBroker:
+    """Test publish-once delivery, sequencing and leases"""
+
+    @pytest.mark.asyncio
+    async def test_event_reaches_every_worker_once(self):
+        received = {}
+        brokers = workers(3)
+        for broker in brokers:
+
+            async def handler(event, worker=broker.worker_id):
+                received.setdefault(worker, []).append(event.payload)
+
+            broker.subscribe("updates", handler)
+
+        await brokers[0].publish("updates", {"n": 1})
+
+        assert received == {f"worker-{i}": [{"n": 1}] for i in range(3)}
+
+    @pytest.mark.asyncio
+    async def test_sequences_are_per_channel(self):
+        broker = workers(1)[0]
+        first = await broker.publish("a", {})
+        second = await broker.publish("a", {})
+        other = await broker.publish("b", {})
+
+        assert (first.seq, second.seq, other.seq) == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_gaps_and_duplicates_are_counted(self):
+        broker = workers(1)[0]
+        delivered = []
+
+        async def handler(event):
+            delivered.append(event.seq)
+
+        broker.subscribe("a", handler)
+        for seq in (1, 2, 5, 5, 4, 6):
+            await broker._deliver(BrokerEvent("a", seq, {}, "elsewhere"))
+
+        channel = broker.get_stats()["channels"]["a"]
+        assert delivered == [1, 2, 5, 6]
+        assert channel["gaps"] == 1
+        assert channel["missed_events"] == 2
+        assert channel["duplicates"] == 2
+
+    @pytest.mark.asyncio
+    async def test_latency_is_recorded(self):
+        broker = workers(1)[0]
+        broker.subscribe("a", lambda event: _noop())
+        await broker.publish("a", {})
+
+        assert broker.get_stats()["end_to_end_latency"]["samples"] == 1
+
+    @pytest.mark.asyncio
+    async def test_only_one_worker_holds_a_lease(self):
+        first, second = workers(2)
+
+        assert await first.acquire_leadership("metrics", ttl=60)
+        assert await first.acquire_leadership("metrics", ttl=60)
+        assert not await second.acquire_leadership("metrics", ttl=60)
+
+        # An expired lease can be taken over
+        assert await second.acquire_leadership("crawl", ttl=0)
+        assert await first.acquire_leadership("crawl", ttl=60)
+
+    def test_brokers_must_implement_publish_and_leases(self):
+        class PublishOnly(EventBroker):
+            async def publish(self, channel, payload):
+                return None
+
+        with pytest.raises(TypeError):
+            PublishOnly()
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError):
+            create_event_broker("kafka")
+
+
+class TestCrossWorkerDelivery:
+    """Test consumers built on the broker"""
+
+    @pytest.mark.asyncio
+    async def test_price_alert_reaches_user_on_another_worker(self):
+        first, second = workers(2)
+        publisher = PriceWebSocketManager(broker=first)
+        holder = PriceWebSocketManager(broker=second)
+        socket = FakeSocket()
+        await holder.connect(socket, "user1")
+
+        await publisher.send_personal_alert("user1", {"route": "THR-MHD", "price": 900})
+
+        assert [json.loads(frame)["price"] for frame in socket.frames] == [900]
+
+    @pytest.mark.asyncio
+    async def test_monitor_lease_defaults_to_not_leader(self):
+        class UnreachableBroker(InMemoryEventBroker):
+            async def acquire_leadership(self, name, ttl):
+                raise ConnectionError("redis down")
+
+        monitor = PriceMonitor(db_manager=None, redis_client=None)
+        monitor.websocket_manager = PriceWebSocketManager(broker=UnreachableBroker())
+        assert not await monitor.websocket_manager.is_leader(PriceMonitor.MONITOR_JOB, ttl=120)
+        assert not await monitor._holds_monitor_lease()
+
+        # A manager with no lease support never claims the job
+        monitor.websocket_manager = object()
+        assert not await monitor._holds_monitor_lease()
+
+        first, second = workers(2)
+        monitor.websocket_manager = PriceWebSocketManager(broker=first)
+        assert await monitor._holds_monitor_lease()
+        monitor.websocket_manager = PriceWebSocketManager(broker=second)
+        assert not await monitor._holds_monitor_lease()
+
+    @pytest.mark.asyncio
+    async def test_feed_replicas_agree_on_sequence(self):
+        first, second = workers(2)
+        feeds = [FlightChangeFeed(), FlightChangeFeed()]
+        for broker, feed in zip((first, second), feeds):
+
+            async def handler(event, feed=feed):
+                await feed.ingest(event.payload, seq=event.seq)
+
+            broker.subscribe("flights", handler)
+
+        flight = {
+            "flight_number": "IR1",
+            "origin": "THR",
+            "destination": "MHD",
+            "departure_time": "2024-06-01T08:30:00",
+            "price": 100,
+        }
+        await first.publish("flights", {"alibaba": [flight]})
+        await first.publish("flights", {"alibaba": [{**flight, "price": 120}]})
+
+        topic = FlightTopic("THR", "MHD")
+        assert feeds[0].snapshot(topic) == feeds[1].snapshot(topic)
+        assert feeds[1].changes_since(topic, 1).changed[0]["price"] == 120
+
+    @pytest.mark.asyncio
+    async def test_replica_that_joined_late_sends_snapshot(self):
+        feed = FlightChangeFeed()
+        flight = {
+            "flight_number": "IR1",
+            "origin": "THR",
+            "destination": "MHD",
+            "departure_time": "2024-06-01T08:30:00",
+            "price": 100,
+        }
+        await feed.ingest({"alibaba": [flight]}, seq=40)
+
+        # Position 10 predates anything this replica has seen
+        assert feed.changes_since(FlightTopic("THR", "MHD"), 10) is None
+
+
+async def _noop():
+    return None
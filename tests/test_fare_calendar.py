@@ -0,0 +1,134 @@
+"""
+Tests for the precomputed cheapest-fare calendar
+"""
+
+import pytest
+
+from fare_calendar import FareCalendar, batch_minimums, decode_cell, encode_cell
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, InMemoryEventBroker
+
+NOW = 1_717_200_000.0
+
+
+class FakeRedis:
+    """Hash-only asyncio Redis stand-in"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.expiry = {}
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    async def expireat(self, key, when):
+        self.expiry[key] = when
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+def fare(day, price, site="alibaba", route=("THR", "KIH")):
+    return {
+        "origin": route[0],
+        "destination": route[1],
+        "departure_time": f"2024-06-{day:02d}T08:00:00",
+        "price": price,
+        "source_site": site,
+    }
+
+
+def test_batch_minimums_groups_by_route_month_and_day():
+    grouped = batch_minimums(
+        {"alibaba": [fare(1, 900), fare(1, 800), fare(2, 1000), fare(1, 700, route=("THR", "MHD"))]}
+    )
+
+    assert grouped[("THR-KIH", "2024-06")] == {"01": (800, "alibaba"), "02": (1000, "alibaba")}
+    assert grouped[("THR-MHD", "2024-06")] == {"01": (700, "alibaba")}
+
+
+def test_cells_keep_full_price_precision():
+    assert decode_cell(encode_cell(18_550_000, "alibaba", NOW)) == (18_550_000, "alibaba", NOW)
+
+
+class TestFareCalendar:
+    """Test merge rules, expiry and reads"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("redis_client", [None, FakeRedis()])
+    async def test_cheaper_fares_win_and_same_site_can_raise(self, redis_client):
+        calendar = FareCalendar(redis_client)
+        await calendar.ingest({"alibaba": [fare(1, 1000)]}, now=NOW)
+        # A dearer fare from another site does not displace the minimum
+        assert await calendar.ingest({"mz724": [fare(1, 1200, "mz724")]}, now=NOW + 60) == 0
+        await calendar.ingest({"mz724": [fare(1, 900, "mz724")]}, now=NOW + 120)
+        # The site holding the minimum re-crawled and the fare is gone
+        await calendar.ingest({"mz724": [fare(1, 1100, "mz724")]}, now=NOW + 180)
+
+        days = await calendar.get_month("THR-KIH", "2024-06", now=NOW + 200)
+        assert days["2024-06-01"]["price"] == 1100
+        assert days["2024-06-01"]["site"] == "mz724"
+
+    @pytest.mark.asyncio
+    async def test_expired_fares_are_hidden_and_dropped(self):
+        redis_client = FakeRedis()
+        calendar = FareCalendar(redis_client, fare_ttl=3600)
+        await calendar.ingest({"alibaba": [fare(1, 1000), fare(2, 900)]}, now=NOW)
+        await calendar.ingest({"alibaba": [fare(2, 950)]}, now=NOW + 3000)
+
+        days = await calendar.get_month("THR-KIH", "2024-06", now=NOW + 4000)
+
+        assert list(days) == ["2024-06-02"]
+        assert set(redis_client.hashes["fare_calendar:THR-KIH:2024-06"]) == {"02"}
+        # Month hashes expire by themselves after the month is over
+        assert redis_client.expiry["fare_calendar:THR-KIH:2024-06"] > NOW
+
+    @pytest.mark.asyncio
+    async def test_invalidate_and_backfill(self):
+        calendar = FareCalendar()
+        await calendar.ingest({"alibaba": [fare(1, 1000), fare(2, 900)]}, now=NOW)
+        await calendar.invalidate("THR-KIH", departure_date="2024-06-01")
+        assert list(await calendar.get_month("THR-KIH", "2024-06", now=NOW)) == ["2024-06-02"]
+
+        await calendar.invalidate("THR-KIH", month="2024-06")
+        assert await calendar.backfill(
+            "THR-KIH", "2024-06", {"2024-06-05": (700, NOW), "2024-07-01": (1, NOW)}, now=NOW
+        ) == 1
+        assert list(await calendar.get_month("THR-KIH", "2024-06", now=NOW)) == ["2024-06-05"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("redis_client", [None, FakeRedis()])
+    async def test_backfilled_cells_age_from_scrape_and_yield_to_crawls(self, redis_client):
+        calendar = FareCalendar(redis_client, fare_ttl=3600)
+        await calendar.backfill(
+            "THR-KIH", "2024-06", {"2024-06-01": (700, NOW - 3000), "2024-06-02": (700, NOW)}, now=NOW
+        )
+
+        days = await calendar.get_month("THR-KIH", "2024-06", now=NOW + 1000)
+        assert list(days) == ["2024-06-02"]
+        assert days["2024-06-02"]["site"] == "stored"
+
+        # A live crawl replaces stored cells even when its fare is higher
+        await calendar.ingest({"alibaba": [fare(2, 950)]}, now=NOW + 1000)
+        days = await calendar.get_month("THR-KIH", "2024-06", now=NOW + 1000)
+        assert (days["2024-06-02"]["price"], days["2024-06-02"]["site"]) == (950, "alibaba")
+
+        # but stored data never displaces a crawled fare
+        await calendar.backfill("THR-KIH", "2024-06", {"2024-06-02": (900, NOW + 1000)}, now=NOW + 1000)
+        assert (await calendar.get_month("THR-KIH", "2024-06", now=NOW + 1000))["2024-06-02"]["price"] == 950
+
+    @pytest.mark.asyncio
+    async def test_ingest_events_update_the_calendar(self):
+        broker = InMemoryEventBroker()
+        calendar = FareCalendar()
+        calendar.attach(broker)
+
+        await broker.publish(FLIGHTS_INGESTED_CHANNEL, {"alibaba": [fare(3, 800)]})
+
+        assert (await calendar.get_month("THR-KIH", "2024-06"))["2024-06-03"]["price"] == 800
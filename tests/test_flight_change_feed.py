@@ -0,0 +1,155 @@
+"""
+Tests for the ingest change feed behind route-topic WebSocket updates
+"""
+
+from datetime import date
+
+import pytest
+
+from utils.flight_change_feed import FlightChangeFeed, FlightTopic
+
+
+def offer(flight_number, price, date="2024-06-01", origin="THR", destination="MHD"):
+    return {
+        "airline": "Iran Air",
+        "flight_number": flight_number,
+        "origin": origin,
+        "destination": destination,
+        "departure_time": f"{date}T08:30:00",
+        "price": price,
+        "seat_class": "economy",
+    }
+
+
+class TestFlightChangeFeed:
+    """Test diffing, deltas and resume"""
+
+    @pytest.mark.asyncio
+    async def test_ingest_reports_new_changed_and_removed(self):
+        feed = FlightChangeFeed()
+        await feed.ingest({"alibaba": [offer("IR1", 100), offer("IR2", 200)]})
+        changes = await feed.ingest({"alibaba": [offer("IR1", 150), offer("IR3", 300)]})
+
+        kinds = {(c.kind, c.offer["flight_number"]) for c in changes}
+        assert kinds == {("changed", "IR1"), ("new", "IR3"), ("removed", "IR2")}
+
+    @pytest.mark.asyncio
+    async def test_unchanged_offers_produce_no_changes(self):
+        feed = FlightChangeFeed()
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+
+        assert await feed.ingest({"alibaba": [offer("IR1", 100)]}) == []
+
+    @pytest.mark.asyncio
+    async def test_other_sites_are_left_untouched(self):
+        feed = FlightChangeFeed()
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+        changes = await feed.ingest({"safarmarket": [offer("W5", 90)]})
+
+        assert [c.kind for c in changes] == ["new"]
+        assert len(feed.snapshot(FlightTopic("THR", "MHD"))["offers"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_resume_returns_only_missed_changes(self):
+        feed = FlightChangeFeed()
+        topic = FlightTopic("THR", "MHD", date="2024-06-01")
+        await feed.ingest({"alibaba": [offer("IR1", 100), offer("IR2", 200)]})
+        seen = feed.snapshot(topic)["seq"]
+
+        await feed.ingest({"alibaba": [offer("IR1", 120), offer("IR2", 200)]})
+        await feed.ingest({"alibaba": [offer("IR1", 110), offer("IR2", 200)]})
+        # A different route must not show up in the delta
+        await feed.ingest({"alibaba": [offer("EP1", 50, destination="KIH")]})
+        delta = feed.changes_since(topic, seen)
+
+        assert delta.from_seq == seen
+        assert [o["price"] for o in delta.changed] == [110]
+        assert delta.new == [] and delta.removed == []
+
+    @pytest.mark.asyncio
+    async def test_new_then_removed_collapses_to_nothing(self):
+        feed = FlightChangeFeed()
+        topic = FlightTopic("THR", "MHD")
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+        seen = feed.snapshot(topic)["seq"]
+
+        await feed.ingest({"alibaba": [offer("IR1", 100), offer("IR2", 200)]})
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+
+        assert feed.changes_since(topic, seen).is_empty
+
+    @pytest.mark.asyncio
+    async def test_stale_position_requires_snapshot(self):
+        feed = FlightChangeFeed(history_per_topic=3)
+        topic = FlightTopic("THR", "MHD")
+        for price in range(100, 106):
+            await feed.ingest({"alibaba": [offer("IR1", price)]})
+
+        assert feed.changes_since(topic, 1) is None
+        assert feed.changes_since(topic, feed.topic_seq(topic.key) - 1) is not None
+
+    @pytest.mark.asyncio
+    async def test_listeners_receive_batches(self):
+        feed = FlightChangeFeed()
+        batches = []
+
+        async def listener(changes):
+            batches.append(changes)
+
+        feed.add_listener(listener)
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+        await feed.ingest({"alibaba": [offer("IR1", 100)]})
+
+        assert len(batches) == 1
+        assert {key for c in batches[0] for key in c.topic_keys()} >= {
+            "THR-MHD",
+            "THR-MHD/2024-06-01/*",
+            "THR-MHD/*/alibaba",
+            "THR-MHD/2024-06-01/alibaba",
+        }
+
+    @pytest.mark.asyncio
+    async def test_past_dates_and_idle_topics_are_evicted(self):
+        clock = {"now": 0.0}
+        feed = FlightChangeFeed(topic_ttl=100, eviction_interval=1000, clock=lambda: clock["now"])
+        await feed.ingest({"alibaba": [offer("IR1", 100, date="2024-06-01")]})
+        await feed.ingest({"alibaba": [offer("EP1", 50, date="2024-06-03", destination="KIH")]})
+        assert feed.get_stats()["topics"] == 8
+
+        # June 1st has departed: its dated topics and scope go, the route topics stay
+        assert feed.evict(today=date(2024, 6, 2)) == 2
+        assert feed.get_stats()["scopes"] == 1
+        assert "THR-MHD/2024-06-01/*" not in feed._logs and "THR-MHD" in feed._logs
+        assert feed.snapshot(FlightTopic("THR", "MHD"))["offers"] == []
+
+        # Only THR-KIH keeps receiving changes; THR-MHD goes idle
+        clock["now"] = 150
+        await feed.ingest({"alibaba": [offer("EP1", 55, date="2024-06-03", destination="KIH")]})
+        clock["now"] = 200
+        assert feed.evict(today=date(2024, 6, 2)) == 2
+        assert set(feed._logs) == {
+            "THR-KIH", "THR-KIH/2024-06-03/*", "THR-KIH/*/alibaba", "THR-KIH/2024-06-03/alibaba",
+        }
+        assert feed.get_stats()["evicted_topics"] == 4
+
+        # A client resuming on an evicted topic gets a snapshot, even once the topic is back
+        assert feed.changes_since(FlightTopic("THR", "MHD"), 0) is None
+        await feed.ingest({"alibaba": [offer("IR2", 120, date="2024-06-05")]})
+        assert feed.changes_since(FlightTopic("THR", "MHD"), 0) is None
+        assert feed.changes_since(FlightTopic("THR", "MHD"), feed.seq - 1) is not None
+
+    @pytest.mark.asyncio
+    async def test_ingest_evicts_periodically(self):
+        clock = {"now": 0.0}
+        feed = FlightChangeFeed(eviction_interval=10, clock=lambda: clock["now"])
+        await feed.ingest({"alibaba": [offer("IR1", 100, date="2000-01-01")]})
+        assert feed.get_stats()["scopes"] == 1
+
+        clock["now"] = 11
+        await feed.ingest({})
+        assert feed.get_stats()["scopes"] == 0
+
+    def test_topic_from_client_payload(self):
+        topic = FlightTopic.from_dict({"route": "thr-mhd", "site": "alibaba"})
+
+        assert topic.key == "THR-MHD/*/alibaba"
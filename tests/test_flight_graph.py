@@ -0,0 +1,89 @@
+"""
+Tests for the time-indexed flight graph
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from flight_graph import FlightGraph
+
+DAY = date(2024, 6, 1)
+
+
+def flight(origin, destination, depart, arrive, price, number="100"):
+    return {
+        "airline": "IR",
+        "flight_number": number,
+        "origin": origin,
+        "destination": destination,
+        "departure_time": f"2024-06-01T{depart}:00",
+        "arrival_time": f"2024-06-01T{arrive}:00",
+        "price": price,
+    }
+
+
+@pytest.fixture
+def graph():
+    graph = FlightGraph()
+    graph.add_flights(
+        [
+            flight("THR", "MHD", "08:00", "09:30", 1000, "1"),
+            flight("THR", "SYZ", "07:00", "08:30", 900, "2"),
+            flight("MHD", "KIH", "10:15", "11:45", 1500, "3"),  # 45 min: too short
+            flight("MHD", "KIH", "11:00", "12:30", 1200, "4"),
+            flight("MHD", "KIH", "16:00", "17:30", 800, "5"),  # 6.5 h: too long
+            flight("SYZ", "KIH", "12:00", "13:00", 1400, "6"),
+            flight("THR", "KIH", "09:00", "11:00", 5000, "7"),  # direct, not a connection
+        ]
+    )
+    return graph
+
+
+class TestFlightGraph:
+    """Test windowed joins and ranking"""
+
+    def test_connections_respect_layover_window(self, graph):
+        itineraries = graph.find_connections("THR", "KIH", DAY)
+
+        assert [(i.airports, i.layover_minutes) for i in itineraries] == [
+            (["THR", "MHD", "KIH"], 90),
+            (["THR", "SYZ", "KIH"], 210),
+        ]
+        assert itineraries[0].total_price == 2200
+        assert itineraries[0].total_duration_minutes == 270
+
+    def test_ranking_by_duration_and_layover(self, graph):
+        by_duration = graph.find_connections("THR", "KIH", DAY, sort_by="duration")
+        assert by_duration[0].airports[1] == "MHD"
+
+        wider = graph.find_connections("THR", "KIH", DAY, max_connection_minutes=420)
+        assert [i.total_price for i in wider] == [1800, 2200, 2300]
+
+        with pytest.raises(ValueError):
+            graph.find_connections("THR", "KIH", DAY, sort_by="stops")
+
+    def test_repriced_flight_replaces_previous_copy(self, graph):
+        graph.add_flight(flight("MHD", "KIH", "11:00", "12:30", 300, "4"))
+
+        itineraries = graph.find_connections("THR", "KIH", DAY)
+        assert itineraries[0].total_price == 1300
+        assert len(graph.departures("MHD", datetime(2024, 6, 1), datetime(2024, 6, 2))) == 3
+
+    def test_missing_legs_and_prune(self, graph):
+        missing = graph.missing_legs("THR", "KIH", DAY, hubs=["MHD", "IFN"])
+        assert missing == [("THR", "IFN", DAY), ("IFN", "KIH", DAY)]
+
+        assert graph.prune(datetime(2024, 6, 1, 10, 0)) == 3
+        assert graph.find_connections("THR", "KIH", DAY) == []
+
+    def test_aware_times_use_airport_wall_clock(self):
+        graph = FlightGraph()
+        first = flight("THR", "IST", "", "", 1000, "1")
+        # 08:00 in Tehran to 11:00 in Istanbul
+        first.update(departure_time="2024-06-01T04:30:00Z", arrival_time="2024-06-01T08:00:00Z")
+        graph.add_flights([first, flight("IST", "CDG", "13:00", "15:00", 2000, "2")])
+
+        itineraries = graph.find_connections("THR", "CDG", DAY)
+        assert [i.layover_minutes for i in itineraries] == [120]
+        assert itineraries[0].first.departure == datetime(2024, 6, 1, 8, 0)
@@ -0,0 +1,140 @@
+"""
+Tests for mergeable latency sketches
+"""
+
+import numpy as np
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+from utils.latency_sketch import LatencySketch, LatencySketchRegistry
+
+
+class FakeRedis:
+    """Hash subset used by the sketch flush and fleet reads"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.expiries = {}
+        self.fail = False
+
+    def hincrby(self, key, field, amount):
+        if self.fail:
+            raise ConnectionError("redis down")
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = str(float(bucket.get(field, 0)) + amount)
+
+    def expire(self, key, ttl):
+        self.expiries[key] = ttl
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+def lognormal(seed, size=20_000):
+    return np.random.default_rng(seed).lognormal(mean=0.5, sigma=0.8, size=size)
+
+
+class TestLatencySketch:
+    """Test accuracy and merging"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        samples = lognormal(1)
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in samples:
+            sketch.record(float(value))
+
+        for q in (0.5, 0.95, 0.99):
+            exact = np.quantile(samples, q, method="lower")
+            assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+        assert sketch.count == len(samples)
+        assert sketch.summary()["mean"] == pytest.approx(samples.mean())
+
+    def test_merge_matches_single_sketch(self):
+        first, second = lognormal(2, 5000), lognormal(3, 5000) * 4
+        merged, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for value in first:
+            left.record(float(value))
+            merged.record(float(value))
+        for value in second:
+            right.record(float(value))
+            merged.record(float(value))
+
+        left.merge(right)
+        assert left.buckets == merged.buckets
+        assert left.quantile(0.99) == merged.quantile(0.99)
+
+    def test_fields_round_trip(self):
+        sketch = LatencySketch()
+        for value in (0.0, 0.2, 1.5, 1.5, 30.0):
+            sketch.record(value)
+
+        restored = LatencySketch.from_fields(
+            {field: str(value) for field, value in sketch.to_fields().items()}
+        )
+        assert restored.buckets == sketch.buckets
+        assert restored.zero_count == 1 and restored.count == 5
+        assert restored.quantile(0.5) == pytest.approx(1.5, rel=0.01)
+
+    def test_histogram_counts_are_cumulative(self):
+        sketch = LatencySketch()
+        for value in (0.04, 0.3, 0.3, 2.0, 100.0):
+            sketch.record(value)
+
+        assert sketch.cumulative_counts([0.05, 0.5, 5.0, 60.0]) == [1, 3, 4, 4]
+
+
+class TestLatencySketchRegistry:
+    """Test fleet-wide merging and Prometheus export"""
+
+    @pytest.mark.asyncio
+    async def test_workers_merge_through_redis(self):
+        redis = FakeRedis()
+        workers = [LatencySketchRegistry(redis), LatencySketchRegistry(redis)]
+        samples = [lognormal(4, 3000), lognormal(5, 3000) * 3]
+        now = 1_700_000_000.0
+        for worker, values in zip(workers, samples):
+            for value in values:
+                worker.record("alibaba", "navigation", float(value), timestamp=now)
+            assert await worker.flush() == 1
+
+        fleet = await workers[0].fleet_sketch("alibaba", "navigation", minutes=5, now=now)
+        combined = np.concatenate(samples)
+        assert fleet.count == len(combined)
+        exact = np.quantile(combined, 0.95, method="lower")
+        assert abs(fleet.quantile(0.95) - exact) / exact <= 0.011
+        # The local view only covers one worker
+        assert workers[0].local_sketch("alibaba", "navigation").count == 3000
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self):
+        redis = FakeRedis()
+        sketches = LatencySketchRegistry(redis)
+        sketches.record("flytoday", "form_filling", 0.5, timestamp=60.0)
+
+        redis.fail = True
+        assert await sketches.flush() == 0
+        sketches.record("flytoday", "form_filling", 0.7, timestamp=60.0)
+        redis.fail = False
+        assert await sketches.flush() == 1
+
+        fleet = await sketches.fleet_sketch("flytoday", "form_filling", now=60.0)
+        assert fleet.count == 2
+        assert sketches.get_stats()["flush_errors"] == 1
+
+    def test_prometheus_export(self):
+        sketches = LatencySketchRegistry()
+        with sketches.time("alibaba", "wait_for_results"):
+            pass
+        sketches.record("alibaba", "wait_for_results", 1.2)
+
+        registry = CollectorRegistry()
+        registry.register(sketches)
+        output = generate_latest(registry).decode()
+
+        assert 'crawler_step_latency_seconds{quantile="0.95",site="alibaba",step="wait_for_results"}' in output
+        assert 'crawler_step_latency_seconds_count{site="alibaba",step="wait_for_results"} 2.0' in output
+        assert 'crawler_step_latency_histogram_seconds_bucket{le="+Inf",site="alibaba",step="wait_for_results"} 2.0' in output
@@ -0,0 +1,78 @@
+"""
+Tests for the event-loop lag monitor and blocking-call detector
+"""
+
+import asyncio
+import os
+import time
+import traceback
+
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+from utils.loop_monitor import LoopHealthMonitor, call_site
+
+
+def blocking_parse():
+    time.sleep(0.25)
+
+
+class TestLoopHealthMonitor:
+    """Test lag measurement and stack capture"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_charged_to_its_call_site(self):
+        async with LoopHealthMonitor(interval=0.02, block_threshold=0.05) as monitor:
+            await asyncio.sleep(0.05)
+            blocking_parse()
+            await asyncio.sleep(0.1)
+
+        stats = monitor.get_stats()
+        assert stats["blocking_events"] == 1
+        offender = stats["offenders"][0]
+        assert offender["site"].startswith("tests/test_loop_monitor.py:")
+        assert offender["site"].endswith("in blocking_parse")
+        assert offender["max_ms"] >= 150
+        assert any("blocking_parse()" in line for line in offender["stack"])
+        assert stats["lag"]["max_ms"] >= 150
+
+    @pytest.mark.asyncio
+    async def test_cooperative_code_reports_no_offenders(self):
+        async with LoopHealthMonitor(interval=0.01, block_threshold=0.1) as monitor:
+            for _ in range(20):
+                await asyncio.sleep(0.005)
+
+        stats = monitor.get_stats()
+        assert stats["blocking_events"] == 0
+        assert stats["lag"]["samples"] > 0
+        assert not monitor.running
+
+    @pytest.mark.asyncio
+    async def test_prometheus_export_and_reset(self):
+        async with LoopHealthMonitor(interval=0.02, block_threshold=0.05) as monitor:
+            await asyncio.sleep(0.03)
+            blocking_parse()
+            await asyncio.sleep(0.05)
+
+        registry = CollectorRegistry()
+        registry.register(monitor)
+        output = generate_latest(registry).decode()
+        assert "event_loop_blocking_events_total{site=" in output
+        assert 'event_loop_lag_seconds{quantile="0.99"}' in output
+
+        monitor.reset()
+        assert monitor.get_stats()["offenders"] == []
+
+
+class TestCallSite:
+    """Test call-site selection"""
+
+    def test_library_frames_are_skipped(self):
+        project_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data_manager.py")
+        stack = traceback.StackSummary.from_list(
+            [
+                (project_file, 330, "store_flights_sync", "session.commit()"),
+                ("/usr/lib/python3/site-packages/sqlalchemy/orm/session.py", 1900, "commit", ""),
+            ]
+        )
+        assert call_site(stack).endswith("data_manager.py:330 in store_flights_sync")
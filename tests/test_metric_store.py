@@ -0,0 +1,99 @@
+"""
+Tests for the columnar metric ring buffers
+"""
+
+import numpy as np
+
+from utils.metric_store import MetricSeries, MetricStore
+
+
+class TestMetricSeries:
+    """Test ring wraparound and windowing"""
+
+    def test_window_across_wraparound(self):
+        series = MetricSeries(capacity=8)
+        for i in range(13):
+            series.append(float(i), float(i * 10), 0)
+
+        assert len(series) == 8
+        timestamps, values, _ = series.window(0)
+        assert timestamps.tolist() == [float(i) for i in range(5, 13)]
+        assert values.tolist() == [float(i * 10) for i in range(5, 13)]
+
+        timestamps, _, _ = series.window(6, 9)
+        assert timestamps.tolist() == [6.0, 7.0, 8.0, 9.0]
+
+    def test_out_of_order_timestamps_are_clamped(self):
+        series = MetricSeries(capacity=4)
+        series.append(10.0, 1.0, 0)
+        series.append(5.0, 2.0, 0)
+
+        timestamps, values, _ = series.window(10)
+        assert timestamps.tolist() == [10.0, 10.0]
+        assert values.tolist() == [1.0, 2.0]
+
+
+class TestMetricStore:
+    """Test component filters, aggregates and row export"""
+
+    def fill(self, store, count=1000):
+        rng = np.random.default_rng(7)
+        values = rng.uniform(100, 900, count)
+        for i, value in enumerate(values):
+            store.record(
+                "alibaba_response_time" if i % 2 else "flytoday_response_time",
+                float(i),
+                float(value),
+                component="alibaba" if i % 2 else "flytoday",
+            )
+        return values
+
+    def test_aggregate_matches_numpy(self):
+        store = MetricStore(capacity=256)
+        values = self.fill(store)
+
+        # Odd timestamps 801..999 are alibaba's newest 100 points
+        expected = values[801::2]
+        summary = store.aggregate("alibaba_response_time", 800)
+        assert summary["count"] == 100
+        assert np.isclose(summary["mean"], expected.mean())
+        assert np.isclose(summary["p95"], np.percentile(expected, 95))
+        assert summary["max"] == expected.max()
+
+    def test_component_filter_and_counts(self):
+        store = MetricStore(capacity=64)
+        store.record("errors", 1.0, 1, component="alibaba")
+        store.record("errors", 2.0, 1, component="flytoday")
+        store.record("response_time", 3.0, 250, component="alibaba")
+
+        timestamps, _, _ = store.window("errors", 0, component="alibaba")
+        assert timestamps.tolist() == [1.0]
+        assert store.window("errors", 0, component="mahan")[0].size == 0
+        assert store.counts_by_component(0) == {"alibaba": 2, "flytoday": 1}
+        assert store.counts_by_component(2.5) == {"alibaba": 1}
+        assert store.count_since(2) == 2
+
+    def test_non_numeric_values_are_skipped(self):
+        store = MetricStore()
+        assert not store.record("status", 1.0, "healthy")
+        assert store.record("latency", 1.0, True)
+        assert store.get_stats()["dropped_non_numeric"] == 1
+        assert store.names() == ["latency"]
+
+    def test_records_are_ordered_rows(self):
+        store = MetricStore()
+        store.record("b", 2.0, 5, component="alibaba", labels={"k": "v"}, source_system="monitoring")
+        store.record("a", 1.0, 3, component="alibaba")
+
+        rows = store.records(0, component="alibaba")
+        assert [row["metric_name"] for row in rows] == ["a", "b"]
+        assert rows[1]["labels"] == {"k": "v"}
+        assert rows[1]["source_system"] == "monitoring"
+
+    def test_memory_is_bounded_per_metric(self):
+        store = MetricStore(capacity=1024)
+        for i in range(10_000):
+            store.record("response_time", float(i), i, component=f"site{i % 20}")
+
+        assert len(store) == 1024
+        assert store.memory_bytes() == 1024 * 20
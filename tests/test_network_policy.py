@@ -0,0 +1,230 @@
+"""
+Tests for the browser network policy
+"""
+
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from adapters.strategies.network_policy import (
+    NetworkPolicy,
+    NetworkPolicyConfig,
+    registrable_domain,
+    resource_type_patterns,
+)
+
+
+class FakeContext:
+    def __init__(self, cdp=True):
+        self.routes = {}
+        self.cdp = cdp
+
+    async def route(self, pattern, handler):
+        self.routes[pattern] = handler
+
+    async def unroute(self, pattern, handler):
+        del self.routes[pattern]
+
+    async def new_cdp_session(self, page):
+        if not self.cdp:
+            raise RuntimeError("CDP session is only available in Chromium")
+        return FakeCDPSession()
+
+
+class FakeCDPSession:
+    def __init__(self):
+        self.handlers = {}
+
+    async def send(self, method, params=None):
+        return {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def detach(self):
+        pass
+
+    def load(self, request_id, url, size, kind="XHR"):
+        self.handlers["Network.responseReceived"]({"requestId": request_id, "type": kind, "response": {"url": url}})
+        self.handlers["Network.loadingFinished"]({"requestId": request_id, "encodedDataLength": size})
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.listeners = {}
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+
+def make_policy(**settings):
+    settings.setdefault("first_party_domains", ["alibaba.ir"])
+    return NetworkPolicy("alibaba", NetworkPolicyConfig(**settings))
+
+
+async def crawl(policy, tracker, hosts, success=True, kind="XHR"):
+    for i, host in enumerate(hosts):
+        tracker.cdp_session.load(str(i), f"https://{host}/api", 1000, kind=kind)
+    return policy.finish_crawl(tracker, success)
+
+
+class TestPatterns:
+    """Test static patterns applied at context level"""
+
+    def test_helpers(self):
+        assert registrable_domain("www.alibaba.ir") == "alibaba.ir"
+        assert registrable_domain("static.example.co.uk") == "example.co.uk"
+        assert resource_type_patterns(["font"]) == ["**/*.{woff,woff2,ttf,otf,eot}", "**/*.{woff,woff2,ttf,otf,eot}?*"]
+        assert resource_type_patterns([]) == []
+
+    def test_config_from_crawler_config(self):
+        crawler_config = SimpleNamespace(
+            base_url="https://www.alibaba.ir",
+            search_url="https://ws.alibaba.ir/flight/search",
+            block_resources=False,
+            blocked_resources=["image"],
+            network_policy={"learn_after": 10, "unknown": True},
+        )
+        config = NetworkPolicyConfig.from_crawler_config(crawler_config)
+        assert config.first_party_domains == ["alibaba.ir"]
+        assert config.blocked_resources == []
+        assert config.learn_after == 10
+
+    @pytest.mark.asyncio
+    async def test_context_gets_globs_not_a_catch_all(self):
+        policy = make_policy(allow_domains=["sentry.io"], block_patterns=["**/banners/**"])
+        context = FakeContext()
+        await policy.apply(context)
+
+        assert "**/*" not in context.routes
+        assert "*://*.google-analytics.com/**" in context.routes
+        assert "**/banners/**" in context.routes
+        assert not any("sentry.io" in pattern for pattern in context.routes)
+        assert await policy.apply(context) == 0
+
+        await context.routes["**/banners/**"](SimpleNamespace(abort=_noop), None)
+        assert policy.stats["blocked"] == 1
+
+
+async def _noop():
+    return None
+
+
+class TestLearning:
+    """Test the learned third-party blocklist"""
+
+    @pytest.mark.asyncio
+    async def test_sporadic_third_parties_are_blocked_after_learning(self):
+        policy = make_policy(learn_after=3, min_support=0.6)
+        context = FakeContext()
+        tracker = await policy.attach(FakePage(context))
+
+        assert not await crawl(policy, tracker, ["www.alibaba.ir", "cdn.jsdelivr.net", "ads.rotator-a.com"])
+        assert not await crawl(policy, tracker, ["ws.alibaba.ir", "cdn.jsdelivr.net"])
+        assert await crawl(policy, tracker, ["www.alibaba.ir", "cdn.jsdelivr.net", "ads.rotator-b.com"])
+
+        assert policy.learned_blocklist == {"ads.rotator-a.com", "ads.rotator-b.com"}
+        await policy.apply(context)
+        assert "*://ads.rotator-a.com/**" in context.routes
+        assert not any("jsdelivr" in pattern or "alibaba" in pattern for pattern in context.routes)
+
+    @pytest.mark.asyncio
+    async def test_hosts_that_never_serve_data_are_blocked(self):
+        policy = make_policy(learn_after=3)
+        tracker = await policy.attach(FakePage(FakeContext()))
+
+        for _ in range(3):
+            # A widget on every page, and an API call the widget makes after the results rendered
+            tracker.cdp_session.load("1", "https://ws.flightdata.example/search", 1000)
+            tracker.cdp_session.load("2", "https://widget.chat.example/loader.js", 1000, kind="Script")
+            tracker.start_extraction()
+            tracker.cdp_session.load("3", "https://api.chat.example/poll", 1000, kind="Fetch")
+            policy.finish_crawl(tracker, True)
+
+        assert policy.learned_blocklist == {"widget.chat.example", "api.chat.example"}
+
+    @pytest.mark.asyncio
+    async def test_failures_under_enforcement_trigger_relearning(self):
+        policy = make_policy(learn_after=1, max_enforced_failures=2)
+        context = FakeContext()
+        tracker = await policy.attach(FakePage(context))
+        await crawl(policy, tracker, ["tracker.example.com"], success=False)
+        await crawl(policy, tracker, ["www.alibaba.ir"])
+        assert policy.learned_blocklist == {"tracker.example.com"}
+        await policy.apply(context)
+
+        await crawl(policy, tracker, [], success=False)
+        assert await crawl(policy, tracker, [], success=False)
+        assert policy.learned_blocklist == set()
+        assert policy.stats["relearns"] == 1
+        await policy.apply(context)
+        assert "*://tracker.example.com/**" not in context.routes
+
+        # A host blocked while crawls kept failing is not blocked again
+        await crawl(policy, tracker, ["tracker.example.com", "beacon.example.net"], kind="Script")
+        assert policy.learned_blocklist == {"beacon.example.net"}
+        assert policy.get_stats()["kept_hosts"] == ["tracker.example.com"]
+
+
+class TestCrawlerAccounting:
+    """Test what the crawler reports as a successful crawl"""
+
+    @pytest.mark.asyncio
+    async def test_empty_searches_keep_the_learned_blocklist(self, enhanced_crawler):
+        policy = make_policy(first_party_domains=["test.com"], learn_after=1, max_enforced_failures=2)
+        tracker = await policy.attach(FakePage(FakeContext()))
+        await crawl(policy, tracker, ["ads.example.com"], kind="Script")
+        assert policy.learned_blocklist == {"ads.example.com"}
+
+        enhanced_crawler.network_policy = policy
+        enhanced_crawler.network_tracker = tracker
+        enhanced_crawler.monitoring = Mock()
+        enhanced_crawler._execute_crawling_workflow = _no_flights
+        for _ in range(3):
+            assert await enhanced_crawler.crawl({"origin": "THR", "destination": "KIH"}) == []
+
+        assert policy.stats["relearns"] == 0
+        assert policy.learned_blocklist == {"ads.example.com"}
+
+
+async def _no_flights(search_params):
+    return []
+
+
+class TestBandwidth:
+    """Test per-site byte accounting"""
+
+    @pytest.mark.asyncio
+    async def test_cdp_bytes_are_attributed_per_host(self):
+        policy = make_policy()
+        tracker = await policy.attach(FakePage(FakeContext()))
+        tracker.cdp_session.load("1", "https://www.alibaba.ir/", 40_000, kind="Document")
+        tracker.cdp_session.load("2", "https://ws.alibaba.ir/api/v1/flights", 120_000)
+        policy.finish_crawl(tracker, True)
+
+        stats = policy.get_stats()
+        assert stats["bytes"] == 160_000
+        assert stats["bytes_per_crawl"] == 160_000
+        assert stats["top_hosts_by_bytes"][0] == ("ws.alibaba.ir", 120_000)
+        assert tracker.bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_content_length_fallback_without_cdp(self):
+        policy = make_policy()
+        page = FakePage(FakeContext(cdp=False))
+        tracker = await policy.attach(page)
+        response = SimpleNamespace(
+            url="https://www.alibaba.ir/api",
+            headers={"content-length": "2048"},
+            request=SimpleNamespace(resource_type="fetch"),
+        )
+        page.listeners["response"][0](response)
+        assert (tracker.bytes, dict(tracker.requests_by_type)) == (2048, {"fetch": 1})
+
+        await tracker.detach()
+        assert page.listeners["response"] == []
@@ -0,0 +1,187 @@
+"""
+Tests for the page pool and batched crawling
+"""
+
+import asyncio
+
+import pytest
+
+from adapters.crawlers_to_adapters_bridge import CrawlersToAdaptersBridge
+from adapters.strategies.page_pool import PagePool, PageSlot, bind_slot, bound_slot
+from adapters.unified_crawler_interface import (
+    CrawlerResult,
+    CrawlerSystemType,
+    SearchParameters,
+    UnifiedCrawlerInterface,
+)
+
+
+class FakePage:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_slot(self):
+        await asyncio.sleep(0)
+        page = FakePage(len(self.pages))
+        self.pages.append(page)
+        return PageSlot(page=page)
+
+
+class FakeCrawler:
+    """Resolves ``page`` like EnhancedBaseCrawler does"""
+
+    def __init__(self, size):
+        self.context = FakeContext()
+        self.default_slot = PageSlot(page=FakePage("default"))
+        self.page_pool = PagePool(self.context.new_slot, size)
+        self.page_pool.reset([self.default_slot])
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def page(self):
+        return (bound_slot(self) or self.default_slot).page
+
+    async def crawl(self, date):
+        async with self.page_pool.lease() as slot:
+            with bind_slot(self, slot):
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                page = self.page
+                await asyncio.sleep(0.01)
+                # Still our page after other searches ran on theirs
+                assert self.page is page
+                self.active -= 1
+                return date, page.number
+
+
+class TestPagePool:
+    """Test leasing pages of one context"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_searches_use_separate_pages(self):
+        crawler = FakeCrawler(size=3)
+        results = await asyncio.gather(*(crawler.crawl(day) for day in range(15)))
+
+        assert [date for date, _ in results] == list(range(15))
+        assert crawler.peak == 3
+        assert len(crawler.context.pages) == 2
+        assert {number for _, number in results} == {"default", 0, 1}
+        stats = crawler.page_pool.get_stats()
+        assert (stats["leases"], stats["opened"], stats["idle"]) == (15, 2, 3)
+        assert stats["waits"] > 0
+        assert crawler.page.number == "default"
+
+    @pytest.mark.asyncio
+    async def test_closed_pages_are_replaced(self):
+        context = FakeContext()
+        pool = PagePool(context.new_slot, size=1)
+        async with pool.lease() as slot:
+            slot.page.closed = True
+        async with pool.lease() as slot:
+            assert slot.page.number == 1
+        assert pool.get_stats()["discarded"] == 1
+        assert len(pool.clear()) == 1 and len(pool) == 0
+
+    def test_binding_is_per_owner(self):
+        first, second = object(), object()
+        slot = PageSlot(page="page")
+        with bind_slot(first, slot):
+            assert bound_slot(first) is slot
+            assert bound_slot(second) is None
+        assert bound_slot(first) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_crawls_keep_their_own_url(self, enhanced_crawler):
+        async def crawl(url):
+            with bind_slot(enhanced_crawler, PageSlot()):
+                enhanced_crawler.current_url = url
+                await asyncio.sleep(0.01)
+                return enhanced_crawler.current_url, enhanced_crawler._create_error_context("navigation").url
+
+        results = await asyncio.gather(crawl("https://test.com/a"), crawl("https://test.com/b"))
+        assert results == [("https://test.com/a",) * 2, ("https://test.com/b",) * 2]
+        assert enhanced_crawler.current_url is None
+
+
+class BatchCrawler(UnifiedCrawlerInterface):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.active = 0
+        self.peak = 0
+
+    def _get_system_type(self):
+        return CrawlerSystemType.ADAPTERS
+
+    async def _async_crawl_implementation(self, params):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if params.departure_date.endswith("13"):
+            raise RuntimeError("results page blocked")
+        return CrawlerResult(success=True, message=params.departure_date)
+
+
+class TestCrawlMany:
+    """Test the batched entry point on UnifiedCrawlerInterface"""
+
+    @pytest.mark.asyncio
+    async def test_batches_are_bounded_and_ordered(self):
+        # A wrapped crawler is not assumed to be safe to run concurrently
+        crawler = BatchCrawler({"max_concurrent_pages": 4})
+        dates = [f"2024-08-{day:02d}" for day in range(1, 16)]
+        results = await crawler.crawl_many(
+            [SearchParameters(origin="THR", destination="MHD", departure_date=date) for date in dates]
+        )
+
+        assert crawler.peak == 1
+        assert [result.message for result in results if result.success] == [d for d in dates if d != "2024-08-13"]
+        assert results[12].error == "results page blocked"
+
+        crawler.peak = 0
+        await crawler.crawl_many(
+            [SearchParameters(origin="THR", destination="MHD", departure_date=date) for date in dates[:5]],
+            max_concurrency=2,
+        )
+        assert crawler.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_bridge_hands_batches_to_a_pooled_crawler(self):
+        class PooledCrawler:
+            def __init__(self):
+                self.batches = []
+
+            async def crawl(self, search_params):
+                raise AssertionError("searches go through crawl_many")
+
+            async def crawl_many(self, search_params_list):
+                self.batches.append([params["departure_date"] for params in search_params_list])
+                return [[], RuntimeError("results page blocked")]
+
+        pooled = PooledCrawler()
+        bridge = CrawlersToAdaptersBridge(pooled)
+        bridge._pooled_crawler = lambda: pooled
+        results = await bridge.crawl_many(
+            [SearchParameters(origin="THR", destination="MHD", departure_date=date) for date in ("2024-08-01", "2024-08-02")]
+        )
+
+        assert pooled.batches == [["2024-08-01", "2024-08-02"]]
+        assert [result.success for result in results] == [True, False]
+        assert results[1].error == "results page blocked"
+
+        # Any other wrapped crawler searches one at a time
+        plain = CrawlersToAdaptersBridge(PooledCrawler())
+        assert plain._pooled_crawler() is None
+
+        for wrapper in (bridge, plain):
+            await wrapper.error_handler.close()
@@ -0,0 +1,185 @@
+"""
+Tests for the push-based price alert index
+"""
+
+import json
+
+import pytest
+
+from price_monitor import PriceAlert, PriceAlertIndex, PriceMonitor
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, InMemoryEventBroker
+
+
+class FakeRedis:
+    """Minimal asyncio Redis stand-in for hashes and sorted sets"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.strings = {}
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hdel(self, key, field):
+        return int(self.hashes.get(key, {}).pop(field, None) is not None)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def delete(self, key):
+        return int(self.strings.pop(key, None) is not None)
+
+    async def keys(self, pattern):
+        prefix = pattern.rstrip("*")
+        return [key for key in self.strings if key.startswith(prefix)]
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def zrangebyscore(self, key, low, high):
+        low = float("-inf") if low == "-inf" else float(low)
+        high = float("inf") if high == "+inf" else float(high)
+        members = self.zsets.get(key, {})
+        return [m for m, score in sorted(members.items(), key=lambda i: i[1]) if low <= score <= high]
+
+
+def alert(user, target, alert_type="below", route="THR-MHD"):
+    return PriceAlert(
+        user_id=user,
+        route=route,
+        target_price=target,
+        alert_type=alert_type,
+        notification_methods=["websocket"],
+    )
+
+
+class RecordingMonitor(PriceMonitor):
+    """Price monitor capturing sent alerts"""
+
+    def __init__(self, redis_client=None, broker=None):
+        super().__init__(db_manager=None, redis_client=redis_client, broker=broker)
+        self.sent = []
+
+    async def send_price_alert(self, alert, current_price):
+        self.sent.append((alert["user_id"], current_price))
+
+
+class TestPriceAlertIndex:
+    """Test matching and persistence"""
+
+    @pytest.mark.asyncio
+    async def test_price_write_matches_by_range(self):
+        monitor = RecordingMonitor()
+        await monitor.add_price_alert(alert("cheap", 900))
+        await monitor.add_price_alert(alert("mid", 1100))
+        await monitor.add_price_alert(alert("spike", 1000, "above"))
+        await monitor.add_price_alert(alert("other", 5000, route="THR-KIH"))
+
+        triggered = await monitor.record_price("THR-MHD", 1000)
+
+        assert {a["user_id"] for a in triggered} == {"mid", "spike"}
+
+    @pytest.mark.asyncio
+    async def test_alert_is_not_repeated_at_same_price(self):
+        monitor = RecordingMonitor()
+        await monitor.add_price_alert(alert("user1", 1000))
+
+        await monitor.record_price("THR-MHD", 950)
+        await monitor.record_price("THR-MHD", 950)
+        await monitor.record_price("THR-MHD", 900)
+
+        assert monitor.sent == [("user1", 950), ("user1", 900)]
+
+    @pytest.mark.asyncio
+    async def test_change_alerts_fire_on_movement(self):
+        monitor = RecordingMonitor()
+        await monitor.add_price_alert(alert("watcher", 0, "change"))
+
+        assert await monitor.record_price("THR-MHD", 1000) == []
+        assert await monitor.record_price("THR-MHD", 1000) == []
+        assert len(await monitor.record_price("THR-MHD", 1200)) == 1
+
+    @pytest.mark.asyncio
+    async def test_removed_alert_no_longer_matches(self):
+        monitor = RecordingMonitor(redis_client=FakeRedis())
+        alert_id = await monitor.add_price_alert(alert("user1", 1000))
+
+        assert await monitor.remove_price_alert(alert_id)
+        assert await monitor.record_price("THR-MHD", 500) == []
+        assert await monitor.get_active_alerts() == []
+
+    @pytest.mark.asyncio
+    async def test_mirror_reloads_and_range_query_in_redis(self):
+        redis_client = FakeRedis()
+        monitor = RecordingMonitor(redis_client=redis_client)
+        await monitor.add_price_alert(alert("user1", 1000))
+        await monitor.add_price_alert(alert("user2", 800))
+
+        index = PriceAlertIndex(redis_client)
+        assert await index.load() == 2
+        assert {a["user_id"] for a in index.match("THR-MHD", 900)} == {"user1"}
+        assert {a["user_id"] for a in await index.match_remote("THR-MHD", 700)} == {
+            "user1",
+            "user2",
+        }
+
+    @pytest.mark.asyncio
+    async def test_missing_prices_trigger_nothing(self):
+        monitor = RecordingMonitor(redis_client=FakeRedis())
+        await monitor.add_price_alert(alert("cheap", 900))
+        await monitor.add_price_alert(alert("watcher", 0, "change"))
+
+        # get_current_price returns 0.0 without data
+        assert await monitor.record_price("THR-MHD", 0.0) == []
+        assert await monitor.record_price("THR-MHD", None) == []
+        assert await monitor.alert_index.match_remote("THR-MHD", 0.0) == []
+        assert monitor.sent == []
+        # and does not count as a price movement for change alerts
+        await monitor.record_price("THR-MHD", 1000)
+        await monitor.record_price("THR-MHD", 0.0)
+        assert await monitor.record_price("THR-MHD", 1000) == []
+
+    @pytest.mark.asyncio
+    async def test_legacy_alert_keys_are_migrated(self):
+        redis_client = FakeRedis()
+        legacy = alert("old", 950)
+        redis_client.strings["alert:old:THR-MHD"] = json.dumps(legacy.__dict__)
+
+        index = PriceAlertIndex(redis_client)
+        assert await index.load() == 1
+        assert redis_client.strings == {}
+        assert "alert:old:THR-MHD" in redis_client.hashes["alerts:data"]
+        assert [a["user_id"] for a in await index.match_remote("THR-MHD", 900)] == ["old"]
+        # A second start finds nothing left to migrate
+        assert await PriceAlertIndex(redis_client).load() == 1
+
+    @pytest.mark.asyncio
+    async def test_ingest_evaluates_alerts_once(self):
+        broker = InMemoryEventBroker()
+        monitor = RecordingMonitor(broker=broker)
+        await monitor.add_price_alert(alert("user1", 1000))
+
+        await broker.publish(
+            FLIGHTS_INGESTED_CHANNEL,
+            {
+                "alibaba": [
+                    {"origin": "THR", "destination": "MHD", "price": 1200},
+                    {"origin": "THR", "destination": "MHD", "price": 950},
+                ]
+            },
+        )
+
+        assert monitor.sent == [("user1", 950)]
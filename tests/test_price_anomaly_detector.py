@@ -0,0 +1,159 @@
+"""
+Tests for streaming price anomaly detection
+"""
+
+import random
+import pytest
+
+from price_anomaly_detector import (
+    STATE_SIZE,
+    OnlineAnomalyDetector,
+    SeriesState,
+    series_minimums,
+)
+from price_monitor import PriceMonitor
+from utils.event_broker import FLIGHTS_INGESTED_CHANNEL, InMemoryEventBroker
+
+
+class FakeRedis:
+    """Hash-only asyncio Redis stand-in"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+def random_walk(length, seed=3, start=2_000_000):
+    rng = random.Random(seed)
+    price = start
+    for _ in range(length):
+        price *= 1 + rng.gauss(0, 0.01)
+        yield price
+
+
+class TestOnlineAnomalyDetector:
+    """Test detection quality and state handling"""
+
+    def test_spike_is_flagged(self):
+        detector = OnlineAnomalyDetector()
+        for price in random_walk(50):
+            assert detector.observe("THR-MHD", price) is None
+
+        anomaly = detector.observe("THR-MHD", price * 1.6, site="alibaba")
+        assert anomaly is None  # different series, still warming up
+
+        anomaly = detector.observe("THR-MHD", price * 1.6)
+        assert anomaly is not None
+        assert anomaly.deviation_percent > 50
+        assert 0 < anomaly.confidence_score <= 1
+
+    def test_random_walk_has_no_false_positives(self):
+        detector = OnlineAnomalyDetector()
+        flagged = [detector.observe("THR-MHD", price) for price in random_walk(1000, seed=11)]
+
+        assert not any(flagged)
+
+    def test_outlier_barely_moves_the_median(self):
+        detector = OnlineAnomalyDetector()
+        for _ in range(30):
+            detector.observe("THR-MHD", 1_000_000)
+        before = detector.get_state("THR-MHD").median
+
+        detector.observe("THR-MHD", 5_000_000)
+
+        assert detector.get_state("THR-MHD").median == pytest.approx(before, rel=0.01)
+
+    def test_welford_matches_batch_statistics(self):
+        prices = list(random_walk(200))
+        state = SeriesState()
+        for price in prices:
+            state.update(price, alpha=0.1, step=0.2)
+
+        mean = sum(prices) / len(prices)
+        variance = sum((p - mean) ** 2 for p in prices) / (len(prices) - 1)
+        assert state.mean == pytest.approx(mean)
+        assert state.variance == pytest.approx(variance)
+
+    def test_state_round_trips_compactly(self):
+        state = SeriesState()
+        for price in random_walk(20):
+            state.update(price, alpha=0.1, step=0.2)
+
+        packed = state.pack()
+        restored = SeriesState.unpack(packed)
+
+        assert len(packed) == STATE_SIZE == 64
+        assert restored.count == 20
+        assert restored.median == state.median
+
+    @pytest.mark.asyncio
+    async def test_flush_and_load(self):
+        redis_client = FakeRedis()
+        detector = OnlineAnomalyDetector(redis_client)
+        for price in random_walk(15):
+            detector.observe("THR-MHD", price, site="alibaba", cabin="economy")
+
+        assert await detector.flush() == 1
+        assert await detector.flush() == 0
+
+        restored = OnlineAnomalyDetector(redis_client)
+        assert await restored.load() == 1
+        assert restored.get_state("THR-MHD", "alibaba", "economy").count == 15
+
+    def test_series_minimums_groups_by_site_and_cabin(self):
+        minimums = series_minimums(
+            {
+                "alibaba": [
+                    {"origin": "THR", "destination": "MHD", "price": 900, "seat_class": "economy"},
+                    {"origin": "THR", "destination": "MHD", "price": 800, "seat_class": "economy"},
+                    {"origin": "THR", "destination": "MHD", "price": 3000, "seat_class": "business"},
+                ]
+            }
+        )
+
+        assert minimums == {
+            ("THR-MHD", "alibaba", "economy"): 800,
+            ("THR-MHD", "alibaba", "business"): 3000,
+        }
+
+
+class TestPriceMonitorAnomalies:
+    """Test the PriceMonitor entry point"""
+
+    @pytest.mark.asyncio
+    async def test_detection_reads_without_observing(self):
+        monitor = PriceMonitor(db_manager=None, redis_client=None)
+        history = list(random_walk(30))
+        spike = {"THR-MHD": history + [history[-1] * 2]}
+
+        # Scored against the supplied history while the route has no statistics
+        for _ in range(3):
+            assert len(await monitor.detect_price_anomalies(spike)) == 1
+        assert monitor.anomaly_detector.get_state("THR-MHD") is None
+        assert await monitor.detect_price_anomalies({"THR-MHD": history[:5]}) == []
+
+    @pytest.mark.asyncio
+    async def test_detection_uses_the_ingested_route_series(self):
+        broker = InMemoryEventBroker()
+        monitor = PriceMonitor(db_manager=None, redis_client=None, broker=broker)
+        history = list(random_walk(30))
+        for price in history:
+            await broker.publish(
+                FLIGHTS_INGESTED_CHANNEL,
+                {
+                    "alibaba": [{"origin": "thr", "destination": "mhd", "price": price}],
+                    "flytoday": [{"origin": "THR", "destination": "MHD", "price": price * 1.05}],
+                },
+            )
+
+        # The cheapest price across sites forms one route-wide series
+        state = monitor.anomaly_detector.get_state("THR-MHD")
+        assert state.count == len(history)
+        assert len(await monitor.detect_price_anomalies({"thr-mhd": [history[-1] * 2]})) == 1
+        assert await monitor.detect_price_anomalies({"THR-MHD": [history[-1]]}) == []
+        assert monitor.anomaly_detector.get_state("THR-MHD").count == len(history)
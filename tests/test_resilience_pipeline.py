@@ -0,0 +1,195 @@
+"""
+Tests for the fused resilience pipeline
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from adapters.strategies.enhanced_circuit_breaker import CircuitBreakerOpenError
+from adapters.strategies.exponential_backoff_strategies import BackoffConfig, ComprehensiveBackoffManager
+from adapters.strategies.resilience_pipeline import ResiliencePipeline, ResiliencePolicy
+from rate_limiter import UnifiedRateConfig, UnifiedRateLimiter
+from utils.circuit_state import InMemoryCircuitStateBus, InMemoryCircuitStateStore
+
+
+def fast_policy(**overrides):
+    settings = dict(
+        requests_per_second=1000.0,
+        burst=1000,
+        failure_threshold=3,
+        recovery_timeout=0.05,
+        base_delay=0.0,
+        jitter=False,
+    )
+    settings.update(overrides)
+    return ResiliencePolicy(**settings)
+
+
+class TestAdmission:
+    """Test rate limiting and circuit state in one pass"""
+
+    def test_token_bucket_limits_bursts(self):
+        pipeline = ResiliencePipeline(ResiliencePolicy(requests_per_second=10, burst=2))
+        assert pipeline.admit("alibaba").allowed
+        assert pipeline.admit("alibaba").allowed
+        rejected = pipeline.admit("alibaba")
+        assert (rejected.allowed, rejected.reason) == (False, "rate_limited")
+        assert 0 < rejected.wait <= 0.1
+        assert pipeline.admit("flytoday").allowed
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_probes_once_and_closes(self):
+        pipeline = ResiliencePipeline(fast_policy())
+        for _ in range(3):
+            pipeline.record("alibaba", False)
+        assert pipeline.admit("alibaba").reason == "circuit_open"
+
+        await asyncio.sleep(0.06)
+        assert pipeline.admit("alibaba").allowed
+        assert pipeline.admit("alibaba").reason == "circuit_half_open"
+        pipeline.record("alibaba", True)
+        assert pipeline.admit("alibaba").allowed
+        assert pipeline.get_stats("alibaba")["circuit"] == "closed"
+
+    def test_failed_probe_reopens(self):
+        pipeline = ResiliencePipeline(fast_policy(recovery_timeout=0.0))
+        for _ in range(3):
+            pipeline.record("alibaba", False)
+        assert pipeline.admit("alibaba").allowed
+        assert pipeline.record("alibaba", False)
+        assert pipeline.get_stats("alibaba")["circuit_opens"] == 2
+
+
+class TestRetryBudget:
+    """Test retry limits and backoff"""
+
+    def test_retry_budget_stops_retry_storms(self):
+        pipeline = ResiliencePipeline(fast_policy(retry_budget=2, retry_refill_ratio=0.5))
+        assert pipeline.retry_delay("alibaba", 0) == 0.0
+        assert pipeline.retry_delay("alibaba", 0) == 0.0
+        assert pipeline.retry_delay("alibaba", 0) is None
+        pipeline.record("alibaba", True)
+        pipeline.record("alibaba", True)
+        assert pipeline.retry_delay("alibaba", 0) == 0.0
+        assert pipeline.get_stats("alibaba")["budget_exhausted"] == 1
+
+    def test_backoff_is_exponential_and_capped(self):
+        pipeline = ResiliencePipeline(ResiliencePolicy(base_delay=1.0, max_delay=5.0, jitter=False, max_retries=5))
+        assert [pipeline.retry_delay("alibaba", attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+        assert pipeline.retry_delay("alibaba", 5) is None
+
+    @pytest.mark.asyncio
+    async def test_execute_stops_retrying_once_the_circuit_opens(self):
+        pipeline = ResiliencePipeline(fast_policy(recovery_timeout=60, max_retries=5))
+        calls = 0
+
+        async def flaky():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("connection reset")
+
+        with pytest.raises(ConnectionError):
+            await pipeline.execute("alibaba", flaky)
+        assert calls == 3
+        with pytest.raises(CircuitBreakerOpenError):
+            await pipeline.execute("alibaba", flaky)
+        assert calls == 3
+
+        with pytest.raises(ValueError):
+            await pipeline.execute(
+                "flytoday", self._raise_value_error, is_retryable=lambda e: not isinstance(e, ValueError)
+            )
+        assert pipeline.get_stats("flytoday")["failures"] == 0
+
+    @staticmethod
+    async def _raise_value_error():
+        raise ValueError("bad search parameters")
+
+    @pytest.mark.asyncio
+    async def test_opened_circuit_is_shared(self):
+        bus = InMemoryCircuitStateBus()
+        first = ResiliencePipeline(fast_policy(recovery_timeout=60), InMemoryCircuitStateStore(bus, "worker-0"))
+        second = ResiliencePipeline(fast_policy(recovery_timeout=60), InMemoryCircuitStateStore(bus, "worker-1"))
+        for _ in range(3):
+            await first.report("alibaba", False)
+        with pytest.raises(CircuitBreakerOpenError):
+            await second.acquire("alibaba")
+
+
+class TestCrawlerSteps:
+    """Test which crawler steps feed the site's circuit"""
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_waits_for_a_site_step(self, enhanced_crawler):
+        site = enhanced_crawler.adapter_name
+        enhanced_crawler.resilience = ResiliencePipeline(fast_policy(failure_threshold=1, recovery_timeout=0.01))
+        enhanced_crawler.resilience.record(site, False)
+        await asyncio.sleep(0.02)
+
+        async def step():
+            return "ok"
+
+        await enhanced_crawler._execute_with_retry(enhanced_crawler.resilience.acquire, "rate_limiting", None, site)
+        await enhanced_crawler._execute_with_retry(step, "parameter_validation")
+        assert enhanced_crawler.resilience.get_stats(site)["circuit"] == "half_open"
+
+        await enhanced_crawler._execute_with_retry(step, "navigation", site_facing=True)
+        assert enhanced_crawler.resilience.get_stats(site)["circuit"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_only_site_step_failures_count(self, enhanced_crawler):
+        site = enhanced_crawler.adapter_name
+        enhanced_crawler.resilience = ResiliencePipeline(fast_policy(failure_threshold=2))
+        enhanced_crawler.retry_config.max_retries = 1
+        enhanced_crawler.retry_config.base_delay = 0.0
+
+        async def timeout():
+            raise asyncio.TimeoutError("Connection timeout")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await enhanced_crawler._execute_with_retry(timeout, "debug_capture")
+        assert enhanced_crawler.resilience.get_stats(site)["failures"] == 0
+
+        with pytest.raises(asyncio.TimeoutError):
+            await enhanced_crawler._execute_with_retry(timeout, "navigation", site_facing=True)
+        assert enhanced_crawler.resilience.get_stats(site)["failures"] > 0
+
+
+class TestOverheadBenchmark:
+    """Compare per-call overhead with the layered stack"""
+
+    @pytest.mark.performance
+    @pytest.mark.asyncio
+    async def test_fused_pipeline_overhead(self):
+        logging.disable(logging.CRITICAL)
+        try:
+            calls = 5000
+
+            async def step():
+                return None
+
+            limiter = UnifiedRateLimiter(
+                "benchmark", UnifiedRateConfig(requests_per_second=1e9, burst_limit=10**9, max_rate_per_second=1e9)
+            )
+            backoff = ComprehensiveBackoffManager(BackoffConfig())
+            started = time.perf_counter()
+            for _ in range(calls):
+                await limiter.can_make_request()
+                await backoff.execute_with_backoff(step, "step")
+                await limiter.record_request(5.0, True)
+            layered = (time.perf_counter() - started) / calls
+
+            pipeline = ResiliencePipeline(fast_policy(requests_per_second=1e9, burst=10**9))
+            started = time.perf_counter()
+            for _ in range(calls):
+                await pipeline.execute("benchmark", step)
+            fused = (time.perf_counter() - started) / calls
+        finally:
+            logging.disable(logging.NOTSET)
+
+        print(f"\nper-call overhead: layered {layered * 1e6:.1f}us, fused {fused * 1e6:.1f}us")
+        assert fused < layered / 3
+        assert fused < 50e-6
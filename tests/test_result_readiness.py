@@ -0,0 +1,122 @@
+"""
+Tests for event-driven result readiness
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from adapters.strategies.result_readiness import (
+    READINESS_STEP,
+    ReadinessConfig,
+    ResultReadinessWaiter,
+)
+from utils.latency_sketch import get_latency_sketches
+
+
+class FakePage:
+    """Page whose network never goes idle and whose cards appear on demand"""
+
+    def __init__(self, cards_after=None, navigations=0):
+        self.listeners = {}
+        self.cards_after = cards_after
+        self.navigations = navigations
+        self.observer_args = []
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    def emit_response(self, url, status=200):
+        for handler in list(self.listeners.get("response", [])):
+            handler(SimpleNamespace(url=url, ok=200 <= status < 300))
+
+    async def evaluate(self, script, args):
+        self.observer_args.append(args)
+        if self.navigations:
+            self.navigations -= 1
+            raise RuntimeError("Execution context was destroyed, most likely because of a navigation")
+        if self.cards_after is None:
+            await asyncio.sleep(args["timeoutMs"] / 1000)
+            return {"reason": "timeout", "count": 0}
+        await asyncio.sleep(self.cards_after)
+        return {"reason": "cards_stable", "count": 12}
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        return None
+
+    async def wait_for_load_state(self, state, timeout=None):
+        if state == "networkidle":
+            await asyncio.sleep(3600)
+
+
+def make_waiter(site, **settings):
+    return ResultReadinessWaiter(site, ReadinessConfig(**settings))
+
+
+class TestReadinessSignals:
+    """Test which signal resolves the wait"""
+
+    @pytest.mark.asyncio
+    async def test_results_response_resolves_without_network_idle(self):
+        waiter = make_waiter("readiness_xhr", container=".flight-item", response_pattern=r"/flights/available", timeout=5)
+        page = FakePage()
+        waiter.arm(page)
+        page.emit_response("https://www.google-analytics.com/collect")
+        page.emit_response("https://ws.example.ir/api/v1/flights/available", status=500)
+        asyncio.get_running_loop().call_later(
+            0.02, page.emit_response, "https://ws.example.ir/api/v1/flights/available?id=1"
+        )
+
+        started = time.perf_counter()
+        assert await waiter.wait(page) == "response"
+        assert time.perf_counter() - started < 1
+        assert page.listeners["response"] == []
+
+    @pytest.mark.asyncio
+    async def test_stable_card_count_resolves_after_navigation(self):
+        waiter = make_waiter("readiness_dom", container=".flight-result", quiet_ms=250, timeout=5)
+        page = FakePage(cards_after=0.02, navigations=1)
+
+        assert await waiter.wait(page) == "cards_stable"
+        assert len(page.observer_args) == 2
+        assert page.observer_args[-1]["selector"] == ".flight-result"
+        assert page.observer_args[-1]["quietMs"] == 250
+
+    @pytest.mark.asyncio
+    async def test_timeout_proceeds_and_records_latency(self):
+        waiter = make_waiter("readiness_timeout", container=".flight-result", timeout=0.1)
+        assert await waiter.wait(FakePage()) == "timeout"
+        assert await waiter.wait(FakePage(cards_after=0.01)) == "cards_stable"
+
+        stats = waiter.get_stats()
+        assert stats["waits"] == 2
+        assert stats["signals"] == {"timeout": 1, "cards_stable": 1}
+        assert get_latency_sketches().local_sketch("readiness_timeout", READINESS_STEP).count == 2
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_site_falls_back_to_network_idle(self):
+        waiter = make_waiter("readiness_idle", timeout=0.05)
+        assert await waiter.wait(FakePage()) == "timeout"
+
+
+class TestReadinessConfig:
+    """Test loading the site config section"""
+
+    def test_site_config_section(self):
+        path = Path(__file__).parent.parent / "config" / "site_configs" / "alibaba.json"
+        site = json.loads(path.read_text(encoding="utf-8"))
+        config = ReadinessConfig.from_site_config(
+            site["result_readiness"], container=site["extraction_config"]["results_parsing"]["container"]
+        )
+        assert config.container == ".flight-item"
+        assert config.response_pattern
+        assert config.timeout == 30
+
+        assert ReadinessConfig.from_site_config(None) == ReadinessConfig()
@@ -30,3 +30,100 @@ async def test_detect_class_upgrades():
     ]
     upgrades = await engine.detect_class_upgrades(flights, threshold=60)
     assert len(upgrades) == 2
+
+
+class LegCrawler:
+    """Returns fixed legs per route and records what was crawled"""
+
+    def __init__(self, legs):
+        self.legs = legs
+        self.crawled = []
+
+    async def crawl_all_sites(self, params):
+        route = (params["origin"], params["destination"])
+        self.crawled.append(route)
+        return self.legs.get(route, [])
+
+
+class StoredFlightsDB(DummyDB):
+    def __init__(self, flights):
+        self.flights = flights
+
+    async def get_flights_departing(self, start, end):
+        return self.flights
+
+
+def leg(origin, destination, depart, arrive, price):
+    return {
+        "origin": origin,
+        "destination": destination,
+        "departure_time": f"2024-06-01T{depart}:00",
+        "arrival_time": f"2024-06-01T{arrive}:00",
+        "price": price,
+    }
+
+
+@pytest.mark.asyncio
+async def test_connections_come_from_stored_flights():
+    crawler = LegCrawler({})
+    db = StoredFlightsDB(
+        [leg("THR", "MHD", "08:00", "09:30", 1000), leg("MHD", "KIH", "11:00", "12:30", 1200)]
+    )
+    engine = IntelligentSearchEngine(crawler, db)
+
+    connections = await engine.discover_connecting_flights("THR", "KIH", "2024-06-01")
+
+    assert [c.airports_sequence for c in connections] == [["THR", "MHD", "KIH"]]
+    assert connections[0].layover_duration_minutes == 90
+    assert crawler.crawled == []
+
+
+@pytest.mark.asyncio
+async def test_only_missing_legs_are_crawled():
+    crawler = LegCrawler({("MHD", "KIH"): [leg("MHD", "KIH", "11:00", "12:30", 1200)]})
+    db = StoredFlightsDB([leg("THR", "MHD", "08:00", "09:30", 1000)])
+    engine = IntelligentSearchEngine(crawler, db)
+
+    connections = await engine.discover_connecting_flights(
+        "THR", "KIH", "2024-06-01", hubs=["MHD", "SYZ"]
+    )
+
+    assert sorted(crawler.crawled) == [("MHD", "KIH"), ("SYZ", "KIH"), ("THR", "SYZ")]
+    assert connections[0].total_price == 2200
+
+
+@pytest.mark.asyncio
+async def test_alternative_dates_come_from_the_price_calendar():
+    class CalendarCrawler:
+        async def crawl_all_sites(self, params):
+            prices = {"2024-06-09": 800, "2024-06-10": 1000, "2024-06-11": 1200}
+            return [{"price": prices.get(params["departure_date"], 1500)}]
+
+    engine = IntelligentSearchEngine(CalendarCrawler(), DummyDB())
+    alternatives = await engine.recommend_alternative_dates(
+        {"origin": "THR", "destination": "MHD", "departure_date": "2024-06-10"},
+        flexibility_days=1,
+    )
+
+    assert alternatives == [{"date": "2024-06-09", "price": 800}]
+
+
+@pytest.mark.asyncio
+async def test_missing_legs_are_crawled_with_bounded_concurrency():
+    class SlowCrawler:
+        def __init__(self):
+            self.running = 0
+            self.peak = 0
+
+        async def crawl_all_sites(self, params):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            return []
+
+    crawler = SlowCrawler()
+    engine = IntelligentSearchEngine(crawler, StoredFlightsDB([]), leg_concurrency=2)
+
+    await engine.discover_connecting_flights("THR", "KIH", "2024-06-01", hubs=["MHD", "SYZ", "IFN"])
+    assert crawler.peak == 2
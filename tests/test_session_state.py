@@ -0,0 +1,231 @@
+"""
+Tests for warm per-site session state
+"""
+
+import os
+import stat
+import time
+from unittest.mock import Mock
+
+import pytest
+from yarl import URL
+
+from utils.session_state import (
+    FileSessionStateStore,
+    RedisSessionStateStore,
+    SessionSnapshot,
+    SessionStatePolicy,
+    SessionStateStore,
+    WarmSession,
+    create_session_state_store,
+)
+
+
+def make_snapshot(captured_at=None, **overrides):
+    now = time.time()
+    data = {
+        "site": "alibaba",
+        "cookies": [
+            {"name": "session", "value": "abc", "domain": "www.alibaba.ir", "path": "/", "expires": -1},
+            {"name": "consent", "value": "yes", "domain": ".alibaba.ir", "path": "/", "expires": now + 3600},
+            {"name": "XSRF-TOKEN", "value": "xsrf", "domain": "www.alibaba.ir", "path": "/", "expires": now + 3600},
+            {"name": "stale", "value": "old", "domain": ".alibaba.ir", "path": "/", "expires": now - 10},
+        ],
+        "origins": [{"origin": "https://www.alibaba.ir", "localStorage": [{"name": "lang", "value": "fa"}]}],
+        "tokens": {"csrf-token": "meta-token"},
+        "user_agent": "Mozilla/5.0 (X11; Linux x86_64)",
+        "captured_at": now if captured_at is None else captured_at,
+    }
+    data.update(overrides)
+    return SessionSnapshot(**data)
+
+
+class FakeContext:
+    def __init__(self, state):
+        self.state = state
+
+    async def storage_state(self):
+        return self.state
+
+    async def cookies(self):
+        return self.state.get("cookies", [])
+
+
+class FakePage:
+    url = "https://www.alibaba.ir/flights/THR-MHD"
+
+    async def evaluate(self, script):
+        return {"csrf-token": "fresh-token"}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class TestSessionSnapshot:
+    """Test validity checks and restoring into browsers and aiohttp"""
+
+    def test_expired_cookies_are_dropped(self):
+        snapshot = make_snapshot()
+        names = [cookie["name"] for cookie in snapshot.storage_state()["cookies"]]
+        assert names == ["session", "consent", "XSRF-TOKEN"]
+        assert snapshot.storage_state()["origins"] == snapshot.origins
+
+    def test_validity(self):
+        assert make_snapshot().validate(3600) == (True, "valid")
+        assert make_snapshot(captured_at=time.time() - 7200).validate(3600) == (False, "expired")
+        valid, reason = make_snapshot().validate(3600, ("session", "stale"))
+        assert not valid and reason == "missing cookies: stale"
+
+    @pytest.mark.asyncio
+    async def test_headers_and_cookie_jar(self):
+        snapshot = make_snapshot()
+        assert snapshot.headers() == {
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)",
+            "X-CSRF-Token": "meta-token",
+            "X-XSRF-TOKEN": "xsrf",
+        }
+
+        jar = snapshot.cookie_jar()
+        on_site = {name: morsel.value for name, morsel in jar.filter_cookies(URL("https://www.alibaba.ir/flights")).items()}
+        assert on_site == {"session": "abc", "consent": "yes", "XSRF-TOKEN": "xsrf"}
+        # Host-only cookies stay on their host; domain cookies reach subdomains
+        on_api = jar.filter_cookies(URL("https://api.alibaba.ir/"))
+        assert set(on_api) == {"consent"}
+
+
+class TestStores:
+    """Test the file and Redis backends"""
+
+    @pytest.mark.asyncio
+    async def test_file_store_round_trip(self, tmp_path):
+        store = FileSessionStateStore(str(tmp_path / "state"))
+        assert await store.load("alibaba") is None
+
+        snapshot = make_snapshot()
+        await store.save(snapshot)
+        path = tmp_path / "state" / "alibaba.json"
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert await store.load("alibaba") == snapshot
+
+        await store.delete("alibaba")
+        await store.delete("alibaba")
+        assert not path.exists()
+
+    @pytest.mark.asyncio
+    async def test_redis_store_expires_with_max_age(self):
+        redis = FakeRedis()
+        store = RedisSessionStateStore("redis://localhost", redis_client=redis)
+        await store.save(make_snapshot(), ttl=21600)
+        assert redis.ttls == {"session_state:alibaba": 21600}
+        assert (await store.load("alibaba")).tokens == {"csrf-token": "meta-token"}
+
+    def test_stores_must_implement_every_operation(self):
+        class LoadOnly(SessionStateStore):
+            async def load(self, site):
+                return None
+
+        with pytest.raises(TypeError):
+            LoadOnly()
+
+    def test_backend_selection(self, tmp_path):
+        assert create_session_state_store("none") is None
+        assert isinstance(create_session_state_store("file", str(tmp_path)), FileSessionStateStore)
+        with pytest.raises(ValueError):
+            create_session_state_store("redis")
+
+
+class TestWarmSession:
+    """Test the restore, capture and invalidate cycle the crawler runs"""
+
+    @pytest.mark.asyncio
+    async def test_capture_then_restore(self, tmp_path):
+        store = FileSessionStateStore(str(tmp_path))
+        warm = WarmSession("alibaba", store, SessionStatePolicy.from_site_config({"required_cookies": ["session"]}))
+        assert await warm.restore() is None
+        assert warm.needs_refresh(None)
+
+        state = make_snapshot().storage_state()
+        captured = await warm.capture(FakeContext(state), FakePage(), user_agent="UA")
+        assert captured.tokens == {"csrf-token": "fresh-token"}
+        assert not warm.needs_refresh(captured)
+
+        restored = await WarmSession("alibaba", store, warm.policy).restore()
+        assert restored.cookies == state["cookies"] and restored.user_agent == "UA"
+
+        await warm.invalidate("crawl failed")
+        assert await warm.restore() is None
+        assert warm.get_stats()["captured"] == 1 and warm.get_stats()["invalidated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_snapshots_are_rejected_and_deleted(self, tmp_path):
+        store = FileSessionStateStore(str(tmp_path))
+        await store.save(make_snapshot(captured_at=time.time() - 100))
+        warm = WarmSession("alibaba", store, SessionStatePolicy.from_site_config({"max_age": 60}))
+
+        assert await warm.restore() is None
+        assert await store.load("alibaba") is None
+        assert warm.get_stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_store_or_by_site(self, tmp_path):
+        assert await WarmSession("alibaba", None).capture(FakeContext({})) is None
+        disabled = WarmSession("alibaba", FileSessionStateStore(str(tmp_path)), SessionStatePolicy(enabled=False))
+        assert await disabled.capture(FakeContext({"cookies": []})) is None
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_session_loss_signals(self, tmp_path):
+        policy = SessionStatePolicy.from_site_config({"required_cookies": ["session"]})
+        warm = WarmSession("alibaba", FileSessionStateStore(str(tmp_path)), policy)
+        context = FakeContext(make_snapshot().storage_state())
+        assert await warm.session_lost(context, FakePage()) is None
+
+        login = FakePage()
+        login.url = "https://www.alibaba.ir/login?next=/flights"
+        assert (await warm.session_lost(context, login)).startswith("redirected to authentication")
+
+        logged_out = FakeContext({"cookies": [{"name": "consent", "value": "yes"}]})
+        assert await warm.session_lost(logged_out, FakePage()) == "missing cookies: session"
+
+
+class TestCrawlerSessionState:
+    """Test which crawl failures drop the shared snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_only_session_step_failures_invalidate(self, enhanced_crawler, tmp_path):
+        store = FileSessionStateStore(str(tmp_path))
+        await store.save(make_snapshot(site="test"))
+        enhanced_crawler.warm_session = WarmSession("test", store)
+        enhanced_crawler.monitoring = Mock()
+        enhanced_crawler.retry_config.max_retries = 0
+
+        async def blocked():
+            raise ValueError("results never loaded")
+
+        for step in ("navigation", "form_filling"):
+            enhanced_crawler._restored_session = await store.load("test")
+
+            async def workflow(search_params, step=step):
+                await enhanced_crawler._execute_with_retry(blocked, step, site_facing=True)
+
+            enhanced_crawler._execute_crawling_workflow = workflow
+            with pytest.raises(ValueError):
+                await enhanced_crawler.crawl({"origin": "THR", "destination": "MHD"})
+            if step == "navigation":
+                assert await store.load("test") is not None
+
+        assert await store.load("test") is None
+        assert enhanced_crawler.warm_session.get_stats()["invalidated"] == 1
@@ -0,0 +1,85 @@
+"""
+Tests for the background system-load sampler
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from adapters.strategies.exponential_backoff_strategies import SystemMonitor
+from rate_limiter import UnifiedRateLimiter
+from utils.system_sampler import SystemLoadSampler, SystemSnapshot
+
+
+class TestSystemLoadSampler:
+    """Test background sampling and snapshot publishing"""
+
+    def test_thread_publishes_fresh_snapshots(self):
+        sampler = SystemLoadSampler(interval=0.01)
+        first = sampler.snapshot
+        sampler.start()
+        try:
+            deadline = time.time() + 2
+            while sampler.snapshot is first and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            sampler.stop()
+
+        assert sampler.snapshot is not first
+        assert sampler.snapshot.timestamp > first.timestamp
+        assert sampler.snapshot.process_rss_mb > 0
+        assert not sampler.running
+
+    def test_sampling_never_waits_on_cpu(self):
+        with patch("psutil.cpu_percent", return_value=10.0) as cpu_percent:
+            SystemLoadSampler(interval=1.0).sample()
+        assert all(call.kwargs.get("interval") is None for call in cpu_percent.call_args_list)
+
+    def test_overload_thresholds(self):
+        assert not SystemSnapshot(timestamp=0, cpu_percent=50, memory_percent=50).overloaded
+        assert SystemSnapshot(timestamp=0, cpu_percent=95).overloaded
+        assert SystemSnapshot(timestamp=0, loop_lag_ms=400).overloaded
+        assert SystemSnapshot(timestamp=0, cpu_percent=60, memory_percent=40).load == 0.5
+
+
+class TestConsumers:
+    """Test that backoff and rate limiting read the snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_system_load_reads_snapshot_without_blocking(self):
+        monitor = SystemMonitor()
+        snapshot = SystemSnapshot(timestamp=time.time(), cpu_percent=80, memory_percent=60)
+
+        with patch(
+            "adapters.strategies.exponential_backoff_strategies.current_snapshot",
+            return_value=snapshot,
+        ):
+            started = time.perf_counter()
+            loads = [await monitor.get_system_load() for _ in range(100)]
+            elapsed = time.perf_counter() - started
+
+        assert loads == [0.7] * 100
+        # One psutil.cpu_percent(interval=0.1) used to cost 100ms per call
+        assert elapsed < 0.05
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_holds_rate_on_overloaded_host(self):
+        limiter = UnifiedRateLimiter("alibaba")
+        limiter.metrics.response_times.extend([100.0] * 20)
+        limiter.metrics.last_adjustment = limiter.metrics.last_adjustment.replace(year=2000)
+        rate = limiter.metrics.current_rate
+
+        with patch(
+            "rate_limiter.current_snapshot",
+            return_value=SystemSnapshot(timestamp=time.time(), cpu_percent=97),
+        ):
+            await limiter._adjust_rate_adaptively()
+        assert limiter.metrics.current_rate == rate
+
+        with patch(
+            "rate_limiter.current_snapshot",
+            return_value=SystemSnapshot(timestamp=time.time(), cpu_percent=20),
+        ):
+            await limiter._adjust_rate_adaptively()
+        assert limiter.metrics.current_rate > rate
@@ -0,0 +1,186 @@
+"""
+Tests for the timer wheel and batched periodic scheduler
+"""
+
+import asyncio
+import pytest
+
+from price_monitor import PriceMonitor
+from utils.timer_wheel import HierarchicalTimerWheel, PeriodicScheduler, TimerEntry
+
+
+def expire(wheel, job, key, deadline):
+    wheel.add(TimerEntry(job=job, key=key, deadline=deadline))
+
+
+class TestHierarchicalTimerWheel:
+    """Test expiry across wheel levels"""
+
+    def test_timers_expire_on_their_tick(self):
+        wheel = HierarchicalTimerWheel()
+        for deadline in (1, 5, 63, 64, 65, 4095, 4096, 300_000):
+            expire(wheel, "job", deadline, deadline)
+
+        fired = {}
+        for tick in range(1, 300_001):
+            for entry in wheel.advance(tick):
+                fired[entry.key] = tick
+
+        assert fired == {d: d for d in (1, 5, 63, 64, 65, 4095, 4096, 300_000)}
+        assert len(wheel) == 0
+
+    def test_cancel_and_reschedule(self):
+        wheel = HierarchicalTimerWheel()
+        expire(wheel, "job", "THR-MHD", 10)
+        expire(wheel, "job", "THR-KIH", 10)
+        assert wheel.cancel("job", "THR-KIH")
+        # Re-adding replaces the pending timer
+        expire(wheel, "job", "THR-MHD", 200)
+
+        assert wheel.advance(100) == []
+        assert [e.key for e in wheel.advance(200)] == ["THR-MHD"]
+
+    def test_beyond_top_level_uses_overflow(self):
+        wheel = HierarchicalTimerWheel(levels=2)
+        expire(wheel, "job", "far", 10_000)
+
+        assert wheel.advance(9_999) == []
+        assert [e.key for e in wheel.advance(10_000)] == ["far"]
+
+
+class TestPeriodicScheduler:
+    """Test batching, jitter and metrics"""
+
+    @pytest.mark.asyncio
+    async def test_due_keys_are_batched_per_job(self):
+        scheduler = PeriodicScheduler(seed=1)
+        batches = []
+
+        async def handler(keys):
+            batches.append(sorted(keys))
+
+        scheduler.register_job("prices", handler)
+        for route in ("THR-MHD", "THR-KIH", "THR-SYZ"):
+            scheduler.schedule("prices", route, interval=60, first_delay=5)
+
+        scheduler.run_due(5)
+        await asyncio.sleep(0)
+
+        assert batches == [["THR-KIH", "THR-MHD", "THR-SYZ"]]
+        stats = scheduler.get_stats()["jobs"]["prices"]
+        assert stats["batches"] == 1 and stats["max_batch"] == 3
+
+    @pytest.mark.asyncio
+    async def test_rearm_stays_within_jitter(self):
+        scheduler = PeriodicScheduler(seed=2)
+        fired = []
+
+        async def handler(keys):
+            fired.append(scheduler.wheel.current_tick)
+
+        scheduler.register_job("refresh", handler)
+        scheduler.schedule("refresh", "THR-MHD", interval=100, jitter=0.1, first_delay=1)
+
+        for tick in range(1, 2000):
+            scheduler.run_due(tick)
+            await asyncio.sleep(0)
+
+        gaps = [b - a for a, b in zip(fired, fired[1:])]
+        assert len(gaps) > 10
+        assert all(90 <= gap <= 110 for gap in gaps)
+        assert len(set(gaps)) > 1
+
+    @pytest.mark.asyncio
+    async def test_first_runs_are_spread_over_the_interval(self):
+        scheduler = PeriodicScheduler(seed=3)
+        scheduler.register_job("prices", lambda keys: asyncio.sleep(0))
+        for i in range(200):
+            scheduler.schedule("prices", f"R{i}", interval=300)
+
+        deadlines = [entry.deadline for entry in scheduler.wheel._entries.values()]
+        assert max(deadlines) - min(deadlines) > 200
+
+    @pytest.mark.asyncio
+    async def test_busy_job_defers_keys_one_tick(self):
+        scheduler = PeriodicScheduler(seed=4)
+        release = asyncio.Event()
+
+        async def handler(keys):
+            await release.wait()
+
+        scheduler.register_job("slow", handler, max_batch=1)
+        scheduler.schedule("slow", "a", interval=60, first_delay=1)
+        scheduler.schedule("slow", "b", interval=60, first_delay=1)
+
+        dispatched = scheduler.run_due(1)
+        assert len(dispatched["slow"]) == 1
+        assert scheduler.stats["skipped_busy"] == 1
+
+        release.set()
+        await asyncio.sleep(0)
+        assert len(scheduler.run_due(2)["slow"]) == 1
+        await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_loop_records_tick_lag(self):
+        scheduler = PeriodicScheduler(tick_seconds=0.01)
+        calls = []
+
+        async def handler(keys):
+            calls.extend(keys)
+
+        scheduler.register_job("prices", handler)
+        scheduler.schedule("prices", "THR-MHD", interval=0.02, jitter=0, first_delay=0.01)
+        scheduler.start()
+        await asyncio.sleep(0.15)
+        await scheduler.stop()
+
+        assert len(calls) >= 3
+        assert scheduler.get_stats()["tick_lag"]["samples"] > 0
+
+
+class FakeDataManager:
+    """Records grouped price lookups"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    async def get_current_prices(self, routes):
+        self.calls.append(sorted(routes))
+        return {route: self.prices.get(route, 0.0) for route in routes}
+
+
+class TestPriceMonitorScheduling:
+    """Test that monitored routes share one grouped lookup"""
+
+    @pytest.mark.asyncio
+    async def test_due_routes_share_one_query(self):
+        scheduler = PeriodicScheduler(seed=5)
+        db = FakeDataManager({"THR-MHD": 1000.0, "THR-KIH": 2000.0})
+        monitor = PriceMonitor(db_manager=db, redis_client=None, scheduler=scheduler)
+
+        for route in ("THR-MHD", "THR-KIH"):
+            scheduler.schedule(PriceMonitor.MONITOR_JOB, route, interval=300, first_delay=1)
+        scheduler.run_due(1)
+        await asyncio.sleep(0)
+
+        assert db.calls == [["THR-KIH", "THR-MHD"]]
+        assert sorted(await monitor.get_monitored_routes()) == ["THR-KIH", "THR-MHD"]
+
+        await monitor.stop_monitoring(["THR-KIH"])
+        assert await monitor.get_monitored_routes() == ["THR-MHD"]
+
+    @pytest.mark.asyncio
+    async def test_routes_without_prices_are_skipped(self):
+        db = FakeDataManager({"THR-MHD": 1000.0})
+        monitor = PriceMonitor(db_manager=db, redis_client=None, scheduler=PeriodicScheduler(seed=5))
+        recorded = []
+
+        async def record_price(route, price):
+            recorded.append((route, price))
+            return []
+
+        monitor.record_price = record_price
+        await monitor._monitor_routes(["THR-MHD", "THR-KIH"])
+        assert recorded == [("THR-MHD", 1000.0)]
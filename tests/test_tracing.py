@@ -0,0 +1,105 @@
+"""
+Tests for contextvar span tracing
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from utils.tracing import NOOP_SPAN, JsonLinesExporter, Tracer
+
+
+class TestSampling:
+    """Test head-based sampling"""
+
+    def test_unsampled_trace_is_noop_throughout(self):
+        tracer = Tracer(sample_rate=0.0)
+        with tracer.trace("crawl") as root:
+            assert root is NOOP_SPAN
+            with tracer.span("navigation") as span:
+                assert span is NOOP_SPAN
+                span.set_attribute("ignored", True)
+
+        assert tracer.recent() == []
+        assert tracer.get_stats()["unsampled"] == 1
+
+    def test_spans_outside_a_trace_are_noop(self):
+        tracer = Tracer(sample_rate=1.0)
+        with tracer.span("db.store_flights") as span:
+            assert span is NOOP_SPAN
+        assert tracer.get_stats()["sampled"] == 0
+
+    def test_forced_trace_ignores_sample_rate(self):
+        tracer = Tracer(sample_rate=0.0)
+        with tracer.trace("crawl", force=True):
+            pass
+        assert len(tracer.recent()) == 1
+
+
+class TestWaterfall:
+    """Test span nesting, timing and errors"""
+
+    @pytest.mark.asyncio
+    async def test_spans_nest_across_awaits_and_tasks(self):
+        tracer = Tracer(sample_rate=1.0)
+
+        async def step(name, delay):
+            with tracer.span(name):
+                await asyncio.sleep(delay)
+
+        with tracer.trace("crawl", site="alibaba") as root:
+            await step("navigation", 0.01)
+            with tracer.span("extract_and_validate"):
+                await asyncio.gather(step("parse", 0.02), step("validate", 0.0))
+
+        waterfall = tracer.waterfall(root.trace.trace_id)
+        rows = {row["name"]: row for row in waterfall["spans"]}
+        assert rows["crawl"]["depth"] == 0
+        assert rows["navigation"]["depth"] == 1
+        assert rows["parse"]["depth"] == 2
+        assert rows["parse"]["parent_id"] == rows["extract_and_validate"]["span_id"]
+        assert rows["navigation"]["duration_ms"] >= 10
+        assert rows["parse"]["offset_ms"] >= rows["navigation"]["duration_ms"]
+        assert waterfall["duration_ms"] >= rows["extract_and_validate"]["duration_ms"]
+
+    def test_exception_marks_span_and_trace(self):
+        tracer = Tracer(sample_rate=1.0)
+        with pytest.raises(TimeoutError):
+            with tracer.trace("crawl"):
+                with tracer.span("wait_for_results") as span:
+                    span.add_event("attempt_failed", attempt=0)
+                    raise TimeoutError("results did not load")
+
+        summary = tracer.recent()[0]
+        assert summary["status"] == "error"
+        step = tracer.waterfall(summary["trace_id"])["spans"][1]
+        assert step["error"] == "TimeoutError: results did not load"
+        assert [event["name"] for event in step["events"]] == ["attempt_failed", "exception"]
+
+    def test_buffer_keeps_newest_traces(self):
+        tracer = Tracer(sample_rate=1.0, buffer_size=3)
+        for i in range(5):
+            with tracer.trace("crawl", index=i):
+                pass
+
+        assert [t["attributes"]["index"] for t in tracer.recent()] == [4, 3, 2]
+
+
+class TestExporter:
+    """Test the JSON-lines exporter"""
+
+    def test_finished_trace_is_written_as_otlp_json(self, tmp_path):
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(sample_rate=1.0, exporter=JsonLinesExporter(str(path)))
+        with tracer.trace("crawl", site="flytoday"):
+            with tracer.span("form_filling"):
+                pass
+
+        spans = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [span["name"] for span in spans] == ["crawl", "form_filling"]
+        assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+        assert spans[0]["traceId"] == spans[1]["traceId"]
+        assert spans[0]["endTimeUnixNano"] >= spans[1]["endTimeUnixNano"]
+        assert spans[0]["status"]["code"] == "OK"
+        assert tracer.get_stats()["exported"] == 1
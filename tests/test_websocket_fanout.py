@@ -0,0 +1,182 @@
+"""
+Tests for encode-once WebSocket fan-out
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+
+from utils.websocket_fanout import (
+    ConnectionSendQueue,
+    LatencyWindow,
+    OverflowPolicy,
+    encode_message,
+    fan_out,
+)
+from price_monitor import WebSocketManager as PriceWebSocketManager
+
+
+class FakeSocket:
+    """Socket stand-in recording frames"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise ConnectionError("socket closed")
+        await asyncio.sleep(self.delay)
+        self.frames.append(text)
+
+
+class TestFanOut:
+    """Test fan-out delivery"""
+
+    def test_encode_message_round_trip(self):
+        encoded = encode_message({"route": "THR-MHD", "price": 1500000})
+
+        assert isinstance(encoded.payload, bytes)
+        assert json.loads(encoded.text) == {"route": "THR-MHD", "price": 1500000}
+        assert encoded.size == len(encoded.payload)
+
+    @pytest.mark.asyncio
+    async def test_sends_concurrently(self):
+        sockets = [FakeSocket(delay=0.05) for _ in range(50)]
+        result = await fan_out(
+            [(i, s.send_text) for i, s in enumerate(sockets)],
+            encode_message({"n": 1}),
+        )
+
+        assert len(result.delivered) == 50
+        # Sequential sends would take 2.5 seconds
+        assert result.duration < 0.5
+
+    @pytest.mark.asyncio
+    async def test_slow_and_failing_targets_are_reported(self):
+        fast, slow, broken = FakeSocket(), FakeSocket(delay=1.0), FakeSocket(fail=True)
+        result = await fan_out(
+            [("fast", fast.send_text), ("slow", slow.send_text), ("broken", broken.send_text)],
+            encode_message({"n": 1}),
+            timeout=0.05,
+        )
+
+        assert result.delivered == ["fast"]
+        assert result.timed_out == ["slow"]
+        assert [key for key, _ in result.failed] == ["broken"]
+
+    def test_latency_window_percentiles(self):
+        window = LatencyWindow(max_samples=100)
+        for ms in range(1, 101):
+            window.record(ms / 1000)
+
+        summary = window.summary()
+        assert summary["samples"] == 100
+        assert 98 <= summary["p99_ms"] <= 100
+
+
+class TestConnectionSendQueue:
+    """Test per-connection backpressure"""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_when_full(self):
+        socket = FakeSocket()
+        queue = ConnectionSendQueue(socket.send_text, max_size=3)
+        for n in range(5):
+            queue.offer(encode_message({"n": n}))
+
+        queue.start()
+        await asyncio.sleep(0.01)
+        await queue.close()
+
+        assert [json.loads(frame)["n"] for frame in socket.frames] == [2, 3, 4]
+        assert queue.stats.dropped == 2
+
+    @pytest.mark.asyncio
+    async def test_coalesce_keeps_latest_per_key(self):
+        socket = FakeSocket()
+        queue = ConnectionSendQueue(socket.send_text, policy=OverflowPolicy.COALESCE)
+        for price in (100, 200, 300):
+            queue.offer(encode_message({"route": "THR-MHD", "price": price}), "THR-MHD")
+        queue.offer(encode_message({"route": "THR-KIH", "price": 50}), "THR-KIH")
+
+        assert queue.depth == 2
+        queue.start()
+        await asyncio.sleep(0.01)
+        await queue.close()
+
+        assert [json.loads(frame)["price"] for frame in socket.frames] == [300, 50]
+        assert queue.stats.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_evicts(self):
+        evicted = []
+
+        async def on_evict(reason):
+            evicted.append(reason)
+
+        queue = ConnectionSendQueue(
+            FakeSocket().send_text,
+            max_size=2,
+            policy=OverflowPolicy.DISCONNECT,
+            on_evict=on_evict,
+        )
+        results = [queue.offer(encode_message({"n": n})) for n in range(3)]
+        await asyncio.sleep(0)
+
+        assert results == [True, True, False]
+        assert queue.evicted and evicted
+        assert not queue.offer(encode_message({"n": 4}))
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_block_others(self):
+        fast, slow = FakeSocket(), FakeSocket(delay=1.0)
+        queues = [
+            ConnectionSendQueue(socket.send_text, max_size=4) for socket in (fast, slow)
+        ]
+        for queue in queues:
+            queue.start()
+
+        for n in range(10):
+            for queue in queues:
+                queue.offer(encode_message({"n": n}))
+            await asyncio.sleep(0.005)
+
+        assert len(fast.frames) == 10
+        assert slow.frames == []
+        assert queues[1].depth <= 4
+        for queue in queues:
+            await queue.close()
+
+
+class TestPriceMonitorBroadcast:
+    """Test price monitor WebSocket manager"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_encodes_once(self):
+        manager = PriceWebSocketManager()
+        sockets = [FakeSocket() for _ in range(10)]
+        for i, socket in enumerate(sockets):
+            await manager.connect(socket, f"user{i % 3}")
+
+        with patch("price_monitor.encode_message", wraps=encode_message) as encoder:
+            await manager.broadcast_price_update("THR-MHD", {"price": 1200000})
+
+        assert encoder.call_count == 1
+        assert all(json.loads(s.frames[0])["route"] == "THR-MHD" for s in sockets)
+
+    @pytest.mark.asyncio
+    async def test_failed_connection_is_dropped(self):
+        manager = PriceWebSocketManager()
+        healthy, broken = FakeSocket(), FakeSocket(fail=True)
+        await manager.connect(healthy, "user1")
+        await manager.connect(broken, "user1")
+
+        await manager.send_personal_alert("user1", {"route": "THR-MHD"})
+
+        assert manager.active_connections["user1"] == {healthy}
@@ -0,0 +1,438 @@
+"""
+Fleet-wide circuit breaker and backoff state.
+
+Circuit breakers and rate limiters keep their state per process, so every
+Celery and API worker has to rediscover on its own that a site is down. A
+``CircuitStateStore`` shares the part that matters across workers: whether a
+named circuit is open and until when, and which worker holds the half-open
+probe. Failure counting stays local - the first worker to trip opens the
+circuit for the whole fleet.
+
+``RedisCircuitStateStore`` keeps one hash per circuit and performs every
+transition in a Lua script so concurrent workers cannot interleave a
+read-modify-write; each transition is announced on a pub/sub channel.
+Reads go through a small local cache that those announcements invalidate,
+so a circuit opened by one worker is honoured everywhere within
+milliseconds while the hot path costs no Redis round trip. The
+``InMemoryCircuitStateStore`` keeps the same semantics inside one process and
+lets tests attach several "workers" to a shared ``InMemoryCircuitStateBus``.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.event_broker import default_worker_id
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class SharedCircuitState:
+    """Fleet-wide view of one circuit"""
+
+    name: str
+    state: str = CLOSED
+    open_until: float = 0.0
+    probe_owner: str = ""
+    probe_until: float = 0.0
+    reason: str = ""
+    origin: str = ""
+    version: int = 0
+
+    @classmethod
+    def from_fields(cls, name: str, fields: Dict[str, Any]) -> "SharedCircuitState":
+        if not fields:
+            return cls(name)
+        return cls(
+            name=name,
+            state=fields.get("state") or CLOSED,
+            open_until=float(fields.get("open_until") or 0),
+            probe_owner=fields.get("probe_owner") or "",
+            probe_until=float(fields.get("probe_until") or 0),
+            reason=fields.get("reason") or "",
+            origin=fields.get("origin") or "",
+            version=int(fields.get("version") or 0),
+        )
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds until the open period ends"""
+        now = time.time() if now is None else now
+        return max(0.0, self.open_until - now) if self.state == OPEN else 0.0
+
+    def blocks(self, worker_id: str, now: Optional[float] = None) -> bool:
+        """Whether ``worker_id`` must not send requests right now"""
+        now = time.time() if now is None else now
+        if self.state == OPEN:
+            return now < self.open_until
+        if self.state == HALF_OPEN:
+            return self.probe_owner != worker_id and now < self.probe_until
+        return False
+
+    def probe_available(self, now: Optional[float] = None) -> bool:
+        """Whether the open period or an abandoned probe lease has run out"""
+        now = time.time() if now is None else now
+        if self.state == OPEN:
+            return now >= self.open_until
+        if self.state == HALF_OPEN:
+            return now >= self.probe_until
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "remaining": round(self.remaining(), 3)}
+
+
+# Pure-Python transitions; the Lua scripts below implement the same rules
+
+
+def _trip(fields: Dict[str, Any], now: float, open_seconds: float, reason: str, origin: str) -> bool:
+    open_until = now + open_seconds
+    if fields.get("state") == OPEN and float(fields.get("open_until") or 0) >= open_until:
+        return False
+    fields.update(
+        state=OPEN, open_until=open_until, probe_owner="", probe_until=0.0, reason=reason, origin=origin
+    )
+    fields["version"] = int(fields.get("version") or 0) + 1
+    return True
+
+
+def _claim_probe(fields: Dict[str, Any], now: float, lease_seconds: float, worker_id: str) -> bool:
+    state = fields.get("state")
+    available = (state == OPEN and now >= float(fields.get("open_until") or 0)) or (
+        state == HALF_OPEN
+        and (fields.get("probe_owner") == worker_id or now >= float(fields.get("probe_until") or 0))
+    )
+    if not available:
+        return False
+    fields.update(state=HALF_OPEN, probe_owner=worker_id, probe_until=now + lease_seconds, origin=worker_id)
+    fields["version"] = int(fields.get("version") or 0) + 1
+    return True
+
+
+def _close(fields: Dict[str, Any], reason: str, origin: str) -> bool:
+    if (fields.get("state") or CLOSED) == CLOSED:
+        return False
+    fields.update(state=CLOSED, open_until=0.0, probe_owner="", probe_until=0.0, reason=reason, origin=origin)
+    fields["version"] = int(fields.get("version") or 0) + 1
+    return True
+
+
+class CircuitStateStore(ABC):
+    """
+    Base class holding the local read cache.
+
+    Subclasses implement ``_load`` and ``_transition``; transitions return the
+    state after the script ran, which is cached for the calling worker.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, cache_ttl: float = 1.0):
+        self.worker_id = worker_id or default_worker_id()
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, Tuple[float, SharedCircuitState]] = {}
+        self.stats = {"hits": 0, "misses": 0, "transitions": 0, "invalidations": 0, "errors": 0}
+
+    async def get(self, name: str) -> SharedCircuitState:
+        """Cached fleet-wide state; falls back to the last known state on errors"""
+        entry = self._cache.get(name)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < self.cache_ttl:
+            self.stats["hits"] += 1
+            return entry[1]
+        self.stats["misses"] += 1
+        try:
+            state = await self._load(name)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Loading shared circuit state for {name} failed: {e}")
+            return entry[1] if entry is not None else SharedCircuitState(name)
+        self._cache[name] = (now, state)
+        return state
+
+    def cached(self, name: str) -> Optional[SharedCircuitState]:
+        """Last known state without any I/O"""
+        entry = self._cache.get(name)
+        return entry[1] if entry is not None else None
+
+    def invalidate(self, name: str) -> None:
+        if self._cache.pop(name, None) is not None:
+            self.stats["invalidations"] += 1
+
+    async def trip(self, name: str, open_seconds: float, reason: str = "") -> Optional[SharedCircuitState]:
+        """Open ``name`` fleet-wide for ``open_seconds`` unless it is already open longer"""
+        return await self._apply(name, "trip", open_seconds, reason)
+
+    async def claim_probe(self, name: str, lease_seconds: float) -> bool:
+        """Move an expired open circuit to half-open with this worker as the only prober"""
+        state = await self._apply(name, "claim_probe", lease_seconds)
+        return state is not None and state.state == HALF_OPEN and state.probe_owner == self.worker_id
+
+    async def close(self, name: str, reason: str = "") -> Optional[SharedCircuitState]:
+        return await self._apply(name, "close", reason)
+
+    async def _apply(self, name: str, op: str, *args) -> Optional[SharedCircuitState]:
+        try:
+            state = await self._transition(name, op, time.time(), *args)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Shared circuit transition {op} for {name} failed: {e}")
+            return None
+        self.stats["transitions"] += 1
+        self._cache[name] = (time.monotonic(), state)
+        return state
+
+    @abstractmethod
+    async def _load(self, name: str) -> SharedCircuitState:
+        """Read the current state of ``name`` from the backend"""
+
+    @abstractmethod
+    async def _transition(self, name: str, op: str, now: float, *args) -> SharedCircuitState:
+        """Apply ``op`` atomically and return the resulting state"""
+
+    async def close_connections(self) -> None:
+        """Release connections and stop listening for changes"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": type(self).__name__,
+            "worker_id": self.worker_id,
+            "cache_ttl": self.cache_ttl,
+            "circuits": {name: state.to_dict() for name, (_, state) in self._cache.items()},
+        }
+
+
+class InMemoryCircuitStateBus:
+    """Shared circuit hashes for in-process stores"""
+
+    def __init__(self):
+        self.circuits: Dict[str, Dict[str, Any]] = {}
+        self.stores: List["InMemoryCircuitStateStore"] = []
+
+
+class InMemoryCircuitStateStore(CircuitStateStore):
+    """Store whose transitions invalidate every other store on the same bus"""
+
+    def __init__(
+        self,
+        bus: Optional[InMemoryCircuitStateBus] = None,
+        worker_id: Optional[str] = None,
+        cache_ttl: float = 1.0,
+    ):
+        super().__init__(worker_id, cache_ttl)
+        self.bus = bus or InMemoryCircuitStateBus()
+        self.bus.stores.append(self)
+
+    async def _load(self, name: str) -> SharedCircuitState:
+        return SharedCircuitState.from_fields(name, self.bus.circuits.get(name, {}))
+
+    async def _transition(self, name: str, op: str, now: float, *args) -> SharedCircuitState:
+        fields = self.bus.circuits.setdefault(name, {})
+        if op == "trip":
+            changed = _trip(fields, now, args[0], args[1], self.worker_id)
+        elif op == "claim_probe":
+            changed = _claim_probe(fields, now, args[0], self.worker_id)
+        elif op == "close":
+            changed = _close(fields, args[0], self.worker_id)
+        else:
+            raise ValueError(f"Unknown circuit transition: {op}")
+        if changed:
+            for store in self.bus.stores:
+                if store is not self:
+                    store.invalidate(name)
+        return SharedCircuitState.from_fields(name, fields)
+
+    async def close_connections(self) -> None:
+        if self in self.bus.stores:
+            self.bus.stores.remove(self)
+
+
+# KEYS[1] circuit hash; ARGV[1] now, ARGV[2] channel, ARGV[3] key ttl ms, ARGV[4] origin
+_TRIP_SCRIPT = """
+local now = tonumber(ARGV[1])
+local open_until = now + tonumber(ARGV[5])
+if redis.call('HGET', KEYS[1], 'state') == 'open'
+   and tonumber(redis.call('HGET', KEYS[1], 'open_until') or '0') >= open_until then
+    return redis.call('HGETALL', KEYS[1])
+end
+redis.call('HSET', KEYS[1], 'state', 'open', 'open_until', open_until, 'probe_owner', '',
+           'probe_until', 0, 'reason', ARGV[6], 'origin', ARGV[4])
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[2], cjson.encode({name = ARGV[7], origin = ARGV[4]}))
+return redis.call('HGETALL', KEYS[1])
+"""
+
+_CLAIM_PROBE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HGET', KEYS[1], 'state')
+local available = false
+if state == 'open' then
+    available = now >= tonumber(redis.call('HGET', KEYS[1], 'open_until') or '0')
+elseif state == 'half_open' then
+    available = redis.call('HGET', KEYS[1], 'probe_owner') == ARGV[4]
+        or now >= tonumber(redis.call('HGET', KEYS[1], 'probe_until') or '0')
+end
+if available then
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_owner', ARGV[4],
+               'probe_until', now + tonumber(ARGV[5]), 'origin', ARGV[4])
+    redis.call('HINCRBY', KEYS[1], 'version', 1)
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+    redis.call('PUBLISH', ARGV[2], cjson.encode({name = ARGV[6], origin = ARGV[4]}))
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+_CLOSE_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state')
+if state and state ~= 'closed' then
+    redis.call('HSET', KEYS[1], 'state', 'closed', 'open_until', 0, 'probe_owner', '',
+               'probe_until', 0, 'reason', ARGV[5], 'origin', ARGV[4])
+    redis.call('HINCRBY', KEYS[1], 'version', 1)
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+    redis.call('PUBLISH', ARGV[2], cjson.encode({name = ARGV[6], origin = ARGV[4]}))
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def _pairs(flat: List[Any]) -> Dict[str, Any]:
+    return {flat[i]: flat[i + 1] for i in range(0, len(flat), 2)}
+
+
+class RedisCircuitStateStore(CircuitStateStore):
+    """Store backed by one Redis hash per circuit and a change channel"""
+
+    def __init__(
+        self,
+        redis_url: str,
+        prefix: str = "flightio:circuit:",
+        key_ttl: float = 86400.0,
+        worker_id: Optional[str] = None,
+        cache_ttl: float = 1.0,
+    ):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis package with asyncio support is required")
+        super().__init__(worker_id, cache_ttl)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.key_ttl = key_ttl
+        self.channel = f"{prefix}changes"
+        self._redis = None
+        self._scripts: Dict[str, Any] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._scripts = {
+                "trip": self._redis.register_script(_TRIP_SCRIPT),
+                "claim_probe": self._redis.register_script(_CLAIM_PROBE_SCRIPT),
+                "close": self._redis.register_script(_CLOSE_SCRIPT),
+            }
+        if self._listener is None:
+            try:
+                self._listener = asyncio.get_running_loop().create_task(self._listen())
+            except RuntimeError:
+                pass
+        return self._redis
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    async def _load(self, name: str) -> SharedCircuitState:
+        fields = await self._client().hgetall(self._key(name))
+        return SharedCircuitState.from_fields(name, fields)
+
+    async def _transition(self, name: str, op: str, now: float, *args) -> SharedCircuitState:
+        self._client()
+        script = self._scripts.get(op)
+        if script is None:
+            raise ValueError(f"Unknown circuit transition: {op}")
+        flat = await script(
+            keys=[self._key(name)],
+            args=[repr(now), self.channel, int(self.key_ttl * 1000), self.worker_id, *args, name],
+        )
+        return SharedCircuitState.from_fields(name, _pairs(flat))
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    change = json.loads(message["data"])
+                    if change.get("origin") != self.worker_id:
+                        self.invalidate(change["name"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Circuit state listener failed: {e}")
+                # Changes may have been missed; fall back to fresh reads
+                self._cache.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def close_connections(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+def create_circuit_state_store(
+    backend: str = "local", redis_url: Optional[str] = None, cache_ttl: float = 1.0
+) -> Optional[CircuitStateStore]:
+    """Build the store selected by configuration; ``local`` shares nothing"""
+    if backend == "local":
+        return None
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("redis_url is required for the redis circuit state backend")
+        return RedisCircuitStateStore(redis_url, cache_ttl=cache_ttl)
+    if backend == "memory":
+        return InMemoryCircuitStateStore(cache_ttl=cache_ttl)
+    raise ValueError(f"Unknown circuit state backend: {backend}")
+
+
+_circuit_state_store: Optional[CircuitStateStore] = None
+_circuit_state_configured = False
+
+
+def get_circuit_state_store() -> Optional[CircuitStateStore]:
+    """Process-wide store configured from ``config.ERROR``; None when state is per process"""
+    global _circuit_state_store, _circuit_state_configured
+    if not _circuit_state_configured:
+        from config import config
+
+        _circuit_state_store = create_circuit_state_store(
+            config.ERROR.circuit_state_backend,
+            config.REDIS_URL,
+            config.ERROR.circuit_state_cache_ttl,
+        )
+        _circuit_state_configured = True
+    return _circuit_state_store
@@ -0,0 +1,350 @@
+"""
+Failure-only debug artifacts.
+
+Crawlers used to take a full-page screenshot after every search, which cost
+hundreds of milliseconds and megabytes of disk writes on crawls that
+worked. ``DebugArtifactRecorder`` keeps that evidence cheap until it is
+needed:
+
+- The last ``ring_size`` responses stay in a memory ring buffer. Browser
+  responses are kept as handles, so their bodies are only read when a
+  capture happens. Each page of a crawler records into its own ring
+  (``for_page``), so the HAR of a failed search holds only that search's
+  responses even when several searches share the browser context.
+- Artifacts are persisted only when a crawl fails, or for a
+  ``sample_rate`` fraction of successful crawls. A capture holds a
+  screenshot, the page HTML, a HAR built from the ring buffer and a
+  ``meta`` file with the error and search parameters.
+- Files are gzip-compressed (PNG screenshots are kept as they are) and
+  written in a worker thread by a background task, so the crawl does not
+  wait for the disk. Only the newest ``max_captures`` captures per site
+  are kept.
+"""
+
+import asyncio
+import base64
+import gzip
+import itertools
+import json
+import logging
+import random
+import shutil
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Responses worth keeping: the page itself and the calls that feed it results
+RECORDED_RESOURCE_TYPES = frozenset({"document", "xhr", "fetch"})
+_TEXT_MIME_MARKERS = ("json", "html", "text", "xml", "javascript")
+
+
+@dataclass(frozen=True)
+class DebugArtifactConfig:
+    """Capture settings; sites override them with a ``debug_artifacts`` config section"""
+    enabled: bool = True
+    directory: str = "data/debug_artifacts"
+    ring_size: int = 20
+    sample_rate: float = 0.0  # Fraction of successful crawls captured anyway
+    max_body_bytes: int = 256 * 1024
+    body_timeout: float = 2.0  # For reading every buffered body of one capture
+    max_captures: int = 50  # Per site; older captures are deleted
+    screenshot: bool = True
+    html: bool = True
+    har: bool = True
+    compress_level: int = 6
+
+    @classmethod
+    def from_site_config(
+        cls, section: Optional[Dict[str, Any]], defaults: Optional["DebugArtifactConfig"] = None
+    ) -> "DebugArtifactConfig":
+        known = {f.name for f in fields(cls)}
+        return replace(defaults or cls(), **{key: value for key, value in (section or {}).items() if key in known})
+
+
+@dataclass
+class ResponseRecord:
+    """One response in the ring buffer"""
+    url: str
+    status: int = 0
+    method: str = "GET"
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[bytes] = None
+    resource_type: str = "document"
+    timestamp: float = field(default_factory=time.time)
+    handle: Any = None  # Playwright response whose body is read on capture
+
+    def har_entry(self) -> Dict[str, Any]:
+        mime_type = self.headers.get("content-type", "")
+        content: Dict[str, Any] = {"size": len(self.body or b""), "mimeType": mime_type}
+        if self.body is not None:
+            if any(marker in mime_type for marker in _TEXT_MIME_MARKERS) or not mime_type:
+                content["text"] = self.body.decode("utf-8", errors="replace")
+            else:
+                content["text"] = base64.b64encode(self.body).decode("ascii")
+                content["encoding"] = "base64"
+        return {
+            "startedDateTime": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+            "time": 0,
+            "request": {
+                "method": self.method,
+                "url": self.url,
+                "httpVersion": "HTTP/1.1",
+                "headers": [],
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": -1,
+            },
+            "response": {
+                "status": self.status,
+                "statusText": "",
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": name, "value": value} for name, value in self.headers.items()],
+                "cookies": [],
+                "content": content,
+                "redirectURL": "",
+                "headersSize": -1,
+                "bodySize": content["size"],
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": 0, "receive": 0},
+            "_resourceType": self.resource_type,
+        }
+
+
+class DebugArtifactRecorder:
+    """Ring buffer of recent responses and the failure/sample captures of one site"""
+
+    def __init__(self, site: str, config: Optional[DebugArtifactConfig] = None):
+        self.site = site
+        self.config = config or DebugArtifactConfig()
+        self.ring: Deque[ResponseRecord] = deque(maxlen=max(1, self.config.ring_size))
+        self._pending: Set[asyncio.Task] = set()
+        self._sequence = itertools.count(1)
+        self.stats = {
+            "recorded": 0,
+            "captures": {},
+            "sampled_out": 0,
+            "written": 0,
+            "bytes_written": 0,
+            "write_errors": 0,
+        }
+
+    def for_page(self) -> "DebugArtifactRecorder":
+        """Recorder with its own ring for one page, sharing writes and stats with this one"""
+        recorder = DebugArtifactRecorder(self.site, self.config)
+        recorder.stats = self.stats
+        recorder._pending = self._pending
+        recorder._sequence = self._sequence
+        return recorder
+
+    @property
+    def site_directory(self) -> Path:
+        return Path(self.config.directory) / self.site
+
+    def record_response(
+        self,
+        url: str,
+        body: Any = None,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        method: str = "GET",
+        resource_type: str = "document",
+    ) -> None:
+        """Keep a raw response fetched outside a browser page"""
+        if not self.config.enabled:
+            return
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body is not None:
+            body = body[: self.config.max_body_bytes]
+        self.ring.append(ResponseRecord(url, status, method, dict(headers or {}), body, resource_type))
+        self.stats["recorded"] += 1
+
+    def on_response(self, response: Any) -> None:
+        """Playwright ``response`` handler; stores a handle, the body is read only on capture"""
+        try:
+            resource_type = response.request.resource_type
+            if not self.config.enabled or resource_type not in RECORDED_RESOURCE_TYPES:
+                return
+            self.ring.append(
+                ResponseRecord(
+                    url=response.url,
+                    status=response.status,
+                    method=response.request.method,
+                    headers=dict(response.headers),
+                    resource_type=resource_type,
+                    handle=response,
+                )
+            )
+            self.stats["recorded"] += 1
+        except Exception as e:
+            logger.debug(f"Could not record response for {self.site}: {e}")
+
+    def should_capture(self, success: bool) -> bool:
+        if not self.config.enabled:
+            return False
+        if not success:
+            return True
+        if self.config.sample_rate > 0 and random.random() < self.config.sample_rate:
+            return True
+        self.stats["sampled_out"] += 1
+        return False
+
+    async def maybe_capture(
+        self,
+        source: Any = None,
+        error: Optional[BaseException] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Path]:
+        """Capture after a failed crawl, or a sampled successful one"""
+        if not self.should_capture(success=error is None):
+            return None
+        return await self.capture("failure" if error is not None else "sample", source, error=error, context=context)
+
+    async def capture(
+        self,
+        reason: str,
+        source: Any = None,
+        html: Optional[str] = None,
+        error: Optional[BaseException] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Path]:
+        """
+        Collect artifacts from ``source`` (a page with ``content`` and
+        ``screenshot``) and the ring buffer, then write them in the background.
+
+        Returns the capture directory; files appear there once the write finishes.
+        """
+        if not self.config.enabled:
+            return None
+        self.stats["captures"][reason] = self.stats["captures"].get(reason, 0) + 1
+        files: Dict[str, bytes] = {}
+
+        if self.config.screenshot and source is not None:
+            screenshot = await self._call(source, "screenshot", full_page=True)
+            if isinstance(screenshot, (bytes, bytearray)):
+                files["screenshot.png"] = bytes(screenshot)
+        if self.config.html:
+            if html is None and source is not None:
+                html = await self._call(source, "content")
+            if isinstance(html, str):
+                files["page.html.gz"] = html.encode("utf-8")
+        if self.config.har and self.ring:
+            files["responses.har.gz"] = json.dumps(await self._har(), ensure_ascii=False).encode("utf-8")
+
+        meta = {
+            "site": self.site,
+            "reason": reason,
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "url": getattr(source, "url", None) if source is not None else None,
+            "error": repr(error) if error is not None else None,
+            "traceback": (
+                "".join(traceback.format_exception(type(error), error, error.__traceback__))
+                if error is not None
+                else None
+            ),
+            "context": context or {},
+        }
+        files["meta.json.gz"] = json.dumps(meta, ensure_ascii=False, default=str).encode("utf-8")
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        directory = self.site_directory / f"{stamp}_{next(self._sequence):04d}_{reason}"
+        task = asyncio.create_task(asyncio.to_thread(self._write, directory, files))
+        self._pending.add(task)
+        task.add_done_callback(self._write_done)
+        return directory
+
+    async def _call(self, source: Any, method: str, **kwargs) -> Any:
+        try:
+            return await getattr(source, method)(**kwargs)
+        except Exception as e:
+            logger.debug(f"Debug {method} for {self.site} failed: {e}")
+            return None
+
+    async def _har(self) -> Dict[str, Any]:
+        records = list(self.ring)
+        unread = [record for record in records if record.body is None and record.handle is not None]
+        if unread:
+            # Read concurrently under one deadline so a failed crawl re-raises promptly
+            reads = [asyncio.ensure_future(record.handle.body()) for record in unread]
+            done, pending = await asyncio.wait(reads, timeout=self.config.body_timeout)
+            for read in pending:
+                read.cancel()
+            for record, read in zip(unread, reads):
+                # Redirects and responses of closed pages have no body left
+                if read in done and read.exception() is None:
+                    record.body = read.result()[: self.config.max_body_bytes]
+                record.handle = None
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "FlightioCrawler", "version": "1.0"},
+                "entries": [record.har_entry() for record in records],
+            }
+        }
+
+    def _write(self, directory: Path, files: Dict[str, bytes]) -> int:
+        directory.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for name, data in files.items():
+            if name.endswith(".gz"):
+                data = gzip.compress(data, compresslevel=self.config.compress_level)
+            (directory / name).write_bytes(data)
+            written += len(data)
+        self._prune()
+        return written
+
+    def _prune(self) -> None:
+        captures = sorted(path for path in self.site_directory.iterdir() if path.is_dir())
+        for path in captures[: max(0, len(captures) - self.config.max_captures)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats["write_errors"] += 1
+            logger.warning(f"Writing debug artifacts for {self.site} failed: {task.exception()}")
+            return
+        self.stats["written"] += 1
+        self.stats["bytes_written"] += task.result()
+
+    async def flush(self) -> None:
+        """Wait for background writes, e.g. before the crawler shuts down"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "captures": dict(self.stats["captures"]),
+            "buffered": len(self.ring),
+            "pending_writes": len(self._pending),
+            "sample_rate": self.config.sample_rate,
+        }
+
+
+_debug_artifact_config: Optional[DebugArtifactConfig] = None
+
+
+def get_debug_artifact_config() -> DebugArtifactConfig:
+    """Process-wide defaults from ``config.CRAWLER``"""
+    global _debug_artifact_config
+    if _debug_artifact_config is None:
+        from config import config
+
+        _debug_artifact_config = DebugArtifactConfig(
+            enabled=config.CRAWLER.DEBUG_ARTIFACTS_ENABLED,
+            directory=config.CRAWLER.DEBUG_ARTIFACTS_DIR,
+            ring_size=config.CRAWLER.DEBUG_ARTIFACTS_RING_SIZE,
+            sample_rate=config.CRAWLER.DEBUG_ARTIFACTS_SAMPLE_RATE,
+        )
+    return _debug_artifact_config
@@ -0,0 +1,161 @@
+"""
+Incremental error correlation over time-bucketed indexes.
+
+Correlating each new error by scanning every recent error is quadratic over an
+error storm. Here errors are filed under a correlation key
+``(category, adapter, operation, fingerprint)`` inside fixed-width time
+buckets. Each bucket keeps a bounded ring of errors per key plus an
+``adapter -> keys`` set, so a new error only looks at keys that can reach the
+correlation threshold, scores each key once through its newest error and links
+to at most ``max_links`` errors. Expired buckets are dropped whole from the
+left of the window, which keeps memory bounded by
+``buckets x keys x per_key_capacity``.
+"""
+
+import hashlib
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+CorrelationKey = Tuple[str, str, str, str]
+
+# Numbers, hex ids and UUIDs vary between otherwise identical errors
+_VOLATILE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\d+",
+    re.IGNORECASE,
+)
+
+
+def message_fingerprint(error_type: str, message: str) -> str:
+    """Stable fingerprint of an error type and its message with volatile tokens masked"""
+    normalized = _VOLATILE.sub("#", message[:200]).strip().lower()
+    return hashlib.md5(f"{error_type}|{normalized}".encode()).hexdigest()[:16]
+
+
+class _Bucket:
+    """Errors seen during one ``bucket_seconds`` slice"""
+
+    __slots__ = ("index", "entries", "by_adapter")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.entries: Dict[CorrelationKey, Deque[Tuple[float, Any]]] = {}
+        self.by_adapter: Dict[str, Set[CorrelationKey]] = {}
+
+
+class ErrorCorrelationIndex:
+    """Sliding window of errors indexed by correlation key"""
+
+    def __init__(
+        self,
+        window_seconds: float = 600.0,
+        bucket_seconds: float = 60.0,
+        per_key_capacity: int = 32,
+        max_links: int = 20,
+    ):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.per_key_capacity = per_key_capacity
+        self.max_links = max_links
+        self._buckets: Deque[_Bucket] = deque()
+        self.stats = {"indexed": 0, "correlated": 0, "links": 0, "keys_scored": 0, "buckets_expired": 0}
+
+    def __len__(self) -> int:
+        return sum(len(entries) for bucket in self._buckets for entries in bucket.entries.values())
+
+    def correlate(
+        self,
+        key: CorrelationKey,
+        item: Any,
+        scorer: Callable[[Any, Any], float],
+        threshold: float,
+        timestamp: Optional[float] = None,
+        same_adapter_only: bool = True,
+    ) -> List[Any]:
+        """
+        Return up to ``max_links`` recent items correlated with ``item``, newest first,
+        then index ``item`` under ``key``.
+
+        ``scorer(item, other)`` is evaluated once per candidate key against that key's
+        newest item in each bucket; every item filed under a key that scores at least
+        ``threshold`` is treated as correlated. With ``same_adapter_only`` only keys for
+        the same adapter are candidates, which is exact whenever the scorer cannot reach
+        the threshold across adapters.
+        """
+        now = time.time() if timestamp is None else timestamp
+        self._expire(now)
+        horizon = now - self.window_seconds
+        links: List[Any] = []
+
+        for bucket in reversed(self._buckets):
+            for candidate in self._candidate_keys(bucket, key[1], same_adapter_only):
+                entries = bucket.entries[candidate]
+                if entries[-1][0] < horizon:
+                    continue
+                self.stats["keys_scored"] += 1
+                if scorer(item, entries[-1][1]) < threshold:
+                    continue
+                for seen_at, other in reversed(entries):
+                    if seen_at < horizon:
+                        break
+                    if other is item:
+                        continue
+                    links.append(other)
+                    if len(links) >= self.max_links:
+                        break
+                if len(links) >= self.max_links:
+                    break
+            if len(links) >= self.max_links:
+                break
+
+        self._insert(key, item, now)
+        if links:
+            self.stats["correlated"] += 1
+            self.stats["links"] += len(links)
+        return links
+
+    def _candidate_keys(
+        self, bucket: _Bucket, adapter: str, same_adapter_only: bool
+    ) -> Iterator[CorrelationKey]:
+        if same_adapter_only:
+            return iter(bucket.by_adapter.get(adapter, ()))
+        return iter(bucket.entries)
+
+    def _insert(self, key: CorrelationKey, item: Any, timestamp: float) -> None:
+        index = int(timestamp // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1].index < index:
+            self._buckets.append(_Bucket(index))
+        # Late arrivals are filed in the newest bucket rather than reopening old ones
+        bucket = self._buckets[-1]
+        entries = bucket.entries.get(key)
+        if entries is None:
+            entries = bucket.entries[key] = deque(maxlen=self.per_key_capacity)
+            bucket.by_adapter.setdefault(key[1], set()).add(key)
+        entries.append((timestamp, item))
+        self.stats["indexed"] += 1
+
+    def _expire(self, now: float) -> None:
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        while self._buckets and self._buckets[0].index < oldest:
+            self._buckets.popleft()
+            self.stats["buckets_expired"] += 1
+
+    def remove_adapter(self, adapter: str) -> None:
+        """Forget every indexed error for ``adapter``"""
+        for bucket in self._buckets:
+            for key in bucket.by_adapter.pop(adapter, ()):
+                bucket.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "buckets": len(self._buckets),
+            "keys": sum(len(bucket.entries) for bucket in self._buckets),
+            "size": len(self),
+            "window_seconds": self.window_seconds,
+            "bucket_seconds": self.bucket_seconds,
+        }
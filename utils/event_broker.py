@@ -0,0 +1,362 @@
+"""
+Cross-process event broker.
+
+Events are published once and delivered to every worker process, which then
+fans them out to its own WebSocket connections. Each channel carries a
+monotonically increasing sequence number so receivers can detect gaps, and
+every event records its publish time for end-to-end latency metrics.
+
+``RedisStreamEventBroker`` is used when several API workers run; the
+``InMemoryEventBroker`` keeps the same semantics inside one process and lets
+tests wire several "workers" to a shared ``InMemoryEventBus``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.websocket_fanout import LatencyWindow
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Channels shared by the API workers
+WS_BROADCAST_CHANNEL = "ws.broadcast"
+FLIGHTS_INGESTED_CHANNEL = "flights.ingested"
+PRICE_EVENTS_CHANNEL = "price.events"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class BrokerEvent:
+    """An event as delivered to subscribers"""
+    channel: str
+    seq: int
+    payload: Any
+    origin: str
+    published_at: float = field(default_factory=time.time)
+
+
+EventHandler = Callable[[BrokerEvent], Awaitable[Any]]
+
+
+@dataclass
+class ChannelState:
+    """Receive-side bookkeeping for one channel"""
+    last_seq: int = 0
+    received: int = 0
+    gaps: int = 0
+    missed_events: int = 0
+    duplicates: int = 0
+
+
+class EventBroker(ABC):
+    """
+    Base class handling subscriptions, gap detection and latency.
+
+    Subclasses implement ``publish`` and call ``_deliver`` for every event
+    they receive, in sequence order per channel.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or default_worker_id()
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._channels: Dict[str, ChannelState] = defaultdict(ChannelState)
+        self.latency = LatencyWindow()
+        self.stats = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    def subscribe(self, channel: str, handler: EventHandler) -> None:
+        """Register an async handler for every event on ``channel``"""
+        self._handlers[channel].append(handler)
+
+    def unsubscribe(self, channel: str, handler: EventHandler) -> None:
+        handlers = self._handlers.get(channel)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: Any) -> BrokerEvent:
+        """Send ``payload`` to the subscribers of ``channel`` on every worker"""
+
+    @abstractmethod
+    async def acquire_leadership(self, name: str, ttl: float) -> bool:
+        """
+        Claim or renew a named lease so periodic jobs run in one worker.
+
+        Returns True while this worker holds the lease.
+        """
+
+    async def start(self) -> None:
+        """Start receiving events; a no-op for brokers that deliver inline"""
+
+    async def close(self) -> None:
+        """Stop receiving events and release connections"""
+
+    async def _deliver(self, event: BrokerEvent) -> None:
+        state = self._channels[event.channel]
+        if event.seq <= state.last_seq:
+            state.duplicates += 1
+            return
+        if state.last_seq and event.seq > state.last_seq + 1:
+            state.gaps += 1
+            state.missed_events += event.seq - state.last_seq - 1
+            logger.warning(
+                f"Gap on channel {event.channel}: expected {state.last_seq + 1}, got {event.seq}"
+            )
+        state.last_seq = event.seq
+        state.received += 1
+        self.latency.record(max(0.0, time.time() - event.published_at))
+
+        for handler in list(self._handlers.get(event.channel, ())):
+            try:
+                await handler(event)
+                self.stats["delivered"] += 1
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Handler for {event.channel} failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": type(self).__name__,
+            "worker_id": self.worker_id,
+            "end_to_end_latency": self.latency.summary(),
+            "channels": {
+                channel: {
+                    "last_seq": state.last_seq,
+                    "received": state.received,
+                    "gaps": state.gaps,
+                    "missed_events": state.missed_events,
+                    "duplicates": state.duplicates,
+                }
+                for channel, state in self._channels.items()
+            },
+        }
+
+
+class InMemoryEventBus:
+    """Shared sequence counters and leases for in-process brokers"""
+
+    def __init__(self):
+        self.brokers: List["InMemoryEventBroker"] = []
+        self.sequences: Dict[str, int] = defaultdict(int)
+        self.leases: Dict[str, Tuple[str, float]] = {}
+
+
+class InMemoryEventBroker(EventBroker):
+    """
+    Broker delivering inline to every broker attached to the same bus.
+
+    Payloads are round-tripped through JSON so subscribers see exactly what
+    they would receive from Redis.
+    """
+
+    def __init__(self, bus: Optional[InMemoryEventBus] = None, worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self.bus = bus or InMemoryEventBus()
+        self.bus.brokers.append(self)
+
+    async def publish(self, channel: str, payload: Any) -> BrokerEvent:
+        self.bus.sequences[channel] += 1
+        event = BrokerEvent(
+            channel=channel,
+            seq=self.bus.sequences[channel],
+            payload=json.loads(json.dumps(payload, default=str)),
+            origin=self.worker_id,
+        )
+        self.stats["published"] += 1
+        for broker in list(self.bus.brokers):
+            await broker._deliver(event)
+        return event
+
+    async def acquire_leadership(self, name: str, ttl: float) -> bool:
+        now = time.monotonic()
+        holder = self.bus.leases.get(name)
+        if holder is None or holder[0] == self.worker_id or holder[1] <= now:
+            self.bus.leases[name] = (self.worker_id, now + ttl)
+            return True
+        return False
+
+    async def close(self) -> None:
+        if self in self.bus.brokers:
+            self.bus.brokers.remove(self)
+
+
+# INCR and XADD in one step so stream order always matches sequence order
+_PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*',
+           'seq', seq, 'origin', ARGV[2], 'ts', ARGV[3], 'data', ARGV[4])
+return seq
+"""
+
+_LEASE_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder == false or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+class RedisStreamEventBroker(EventBroker):
+    """
+    Broker backed by one Redis stream per channel.
+
+    Streams (rather than pub/sub) let a worker that briefly stalls continue
+    from its last read ID instead of silently losing events.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        prefix: str = "flightio:events:",
+        stream_maxlen: int = 10000,
+        block_ms: int = 1000,
+        worker_id: Optional[str] = None,
+    ):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis package with asyncio support is required")
+        super().__init__(worker_id)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.stream_maxlen = stream_maxlen
+        self.block_ms = block_ms
+        self._redis = None
+        self._publish_script = None
+        self._lease_script = None
+        self._last_ids: Dict[str, str] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._publish_script = self._redis.register_script(_PUBLISH_SCRIPT)
+            self._lease_script = self._redis.register_script(_LEASE_SCRIPT)
+        return self._redis
+
+    def _stream(self, channel: str) -> str:
+        return f"{self.prefix}{channel}"
+
+    async def publish(self, channel: str, payload: Any) -> BrokerEvent:
+        self._client()
+        published_at = time.time()
+        seq = await self._publish_script(
+            keys=[self._stream(channel), f"{self._stream(channel)}:seq"],
+            args=[
+                self.stream_maxlen,
+                self.worker_id,
+                repr(published_at),
+                json.dumps(payload, default=str),
+            ],
+        )
+        self.stats["published"] += 1
+        return BrokerEvent(channel, int(seq), payload, self.worker_id, published_at)
+
+    async def acquire_leadership(self, name: str, ttl: float) -> bool:
+        self._client()
+        acquired = await self._lease_script(
+            keys=[f"{self.prefix}lease:{name}"],
+            args=[self.worker_id, int(ttl * 1000)],
+        )
+        return bool(acquired)
+
+    async def start(self) -> None:
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def _start_position(self, channel: str) -> str:
+        # Begin after the current tail; "$" on every XREAD would skip events
+        # published between two reads
+        latest = await self._client().xrevrange(self._stream(channel), count=1)
+        return latest[0][0] if latest else "0-0"
+
+    async def _read_loop(self) -> None:
+        client = self._client()
+        while True:
+            try:
+                for channel in list(self._handlers):
+                    if channel not in self._last_ids:
+                        self._last_ids[channel] = await self._start_position(channel)
+
+                if not self._last_ids:
+                    await asyncio.sleep(self.block_ms / 1000)
+                    continue
+
+                response = await client.xread(
+                    {self._stream(channel): last_id for channel, last_id in self._last_ids.items()},
+                    block=self.block_ms,
+                    count=500,
+                )
+                for stream, entries in response or ():
+                    channel = stream[len(self.prefix):]
+                    for entry_id, fields in entries:
+                        self._last_ids[channel] = entry_id
+                        await self._deliver(
+                            BrokerEvent(
+                                channel=channel,
+                                seq=int(fields["seq"]),
+                                payload=json.loads(fields["data"]),
+                                origin=fields.get("origin", ""),
+                                published_at=float(fields.get("ts", 0) or 0),
+                            )
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event stream read failed: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+def create_event_broker(backend: str = "memory", redis_url: Optional[str] = None) -> EventBroker:
+    """Build the broker selected by configuration"""
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("redis_url is required for the redis event broker")
+        return RedisStreamEventBroker(redis_url)
+    if backend == "memory":
+        return InMemoryEventBroker()
+    raise ValueError(f"Unknown event broker backend: {backend}")
+
+
+_event_broker: Optional[EventBroker] = None
+
+
+def get_event_broker() -> EventBroker:
+    """Process-wide broker configured from ``config.WEBSOCKET``"""
+    global _event_broker
+    if _event_broker is None:
+        from config import config
+
+        _event_broker = create_event_broker(config.WEBSOCKET.EVENT_BROKER, config.REDIS_URL)
+    return _event_broker
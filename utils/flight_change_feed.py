@@ -0,0 +1,429 @@
+"""
+Ingest change feed for live flight updates.
+
+Every stored crawl result is diffed against the previous result for the same
+``(route, date, site)`` scope, producing ``new``/``changed``/``removed``
+offer changes stamped with a monotonically increasing sequence number.
+Changes are kept in bounded per-topic logs so a client that reconnects with
+its last sequence number receives only what it missed, or a full snapshot
+once its position has fallen out of the log.
+
+Topics and scopes for departure dates in the past, and topic logs idle for
+longer than ``topic_ttl``, are evicted periodically so memory follows the
+live routes rather than every route and date ever crawled.
+"""
+
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+# Offer fields whose change is worth pushing to clients
+TRACKED_FIELDS = (
+    "price",
+    "currency",
+    "seat_class",
+    "available_seats",
+    "arrival_time",
+    "duration_minutes",
+)
+
+Scope = Tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class FlightTopic:
+    """Route subscription, optionally narrowed to a departure date and site"""
+    origin: str
+    destination: str
+    date: Optional[str] = None
+    site: Optional[str] = None
+
+    @property
+    def route(self) -> str:
+        return f"{self.origin}-{self.destination}"
+
+    @property
+    def key(self) -> str:
+        if self.date is None and self.site is None:
+            return self.route
+        return f"{self.route}/{self.date or '*'}/{self.site or '*'}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FlightTopic":
+        """Build a topic from a client subscription payload"""
+        route = data.get("route")
+        if route:
+            origin, destination = route.upper().split("-", 1)
+        else:
+            origin = data["origin"].upper()
+            destination = data["destination"].upper()
+        return cls(
+            origin=origin,
+            destination=destination,
+            date=data.get("date") or None,
+            site=data.get("site") or None,
+        )
+
+    def matches(self, scope: Scope) -> bool:
+        route, departure_date, site = scope
+        return (
+            route == self.route
+            and (self.date is None or self.date == departure_date)
+            and (self.site is None or self.site == site)
+        )
+
+
+@dataclass(frozen=True)
+class FlightChange:
+    """A single offer change produced at ingest"""
+    seq: int
+    kind: str  # "new", "changed" or "removed"
+    route: str
+    date: str
+    site: str
+    offer_key: str
+    offer: Dict[str, Any]
+
+    def topic_keys(self) -> List[str]:
+        """Keys of every subscription granularity this change belongs to"""
+        return [
+            self.route,
+            f"{self.route}/{self.date}/*",
+            f"{self.route}/*/{self.site}",
+            f"{self.route}/{self.date}/{self.site}",
+        ]
+
+
+@dataclass
+class FlightDelta:
+    """Collapsed changes for one topic between two sequence numbers"""
+    topic_key: str
+    from_seq: int
+    seq: int
+    new: List[Dict[str, Any]]
+    changed: List[Dict[str, Any]]
+    removed: List[str]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.new or self.changed or self.removed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "topic_key": self.topic_key,
+            "from_seq": self.from_seq,
+            "seq": self.seq,
+            "new": self.new,
+            "changed": self.changed,
+            "removed": self.removed,
+        }
+
+
+ChangeListener = Callable[[List[FlightChange]], Awaitable[Any]]
+
+
+def _departure_date(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if value:
+        return str(value)[:10]
+    return ""
+
+
+def _offer_key(site: str, offer: Dict[str, Any]) -> str:
+    if offer.get("flight_id"):
+        return str(offer["flight_id"])
+    return "|".join(
+        str(offer.get(field, ""))
+        for field in ("airline", "flight_number", "departure_time", "seat_class")
+    ) + f"|{site}"
+
+
+def _fingerprint(offer: Dict[str, Any]) -> Tuple:
+    return tuple(str(offer.get(field)) for field in TRACKED_FIELDS)
+
+
+def collapse_changes(topic_key: str, from_seq: int, changes: Iterable[FlightChange]) -> FlightDelta:
+    """Reduce a run of changes to the net effect per offer"""
+    first_kind: Dict[str, str] = {}
+    latest: Dict[str, FlightChange] = {}
+    seq = from_seq
+    for change in changes:
+        first_kind.setdefault(change.offer_key, change.kind)
+        latest[change.offer_key] = change
+        seq = max(seq, change.seq)
+
+    delta = FlightDelta(topic_key, from_seq, seq, [], [], [])
+    for offer_key, change in latest.items():
+        if change.kind == "removed":
+            # An offer that appeared and vanished within the window is a no-op
+            if first_kind[offer_key] != "new":
+                delta.removed.append(offer_key)
+        elif first_kind[offer_key] == "new":
+            delta.new.append(change.offer)
+        else:
+            delta.changed.append(change.offer)
+    return delta
+
+
+class FlightChangeFeed:
+    """In-memory diffing change feed with per-topic resumable logs"""
+
+    def __init__(
+        self,
+        history_per_topic: int = 1000,
+        topic_ttl: float = 6 * 3600,
+        eviction_interval: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.history_per_topic = history_per_topic
+        self.topic_ttl = topic_ttl
+        self.eviction_interval = eviction_interval
+        self._clock = clock
+        self._last_eviction = clock()
+        self._seq = 0
+        self._scopes: Dict[Scope, Dict[str, Dict[str, Any]]] = {}
+        self._route_scopes: Dict[str, Set[Scope]] = defaultdict(set)
+        self._logs: Dict[str, Deque[FlightChange]] = {}
+        # Highest sequence evicted from each topic log; resuming below it needs a snapshot
+        self._log_floor: Dict[str, int] = defaultdict(int)
+        self._topic_touched: Dict[str, float] = {}
+        # Latest sequence dropped with an evicted topic; logs created later start above it
+        self._evicted_seq = 0
+        # Positions at or below this predate what this replica has seen
+        self._base_seq = 0
+        self._batch_seq: Optional[int] = None
+        self._listeners: List[ChangeListener] = []
+        self.stats = {"batches": 0, "offers_ingested": 0, "changes": 0, "evicted_topics": 0, "evicted_scopes": 0}
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Register an async callback receiving each batch of changes"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def topic_seq(self, topic_key: str) -> int:
+        """Sequence of the latest change logged for a topic"""
+        log = self._logs.get(topic_key)
+        if log:
+            return log[-1].seq
+        return self._log_floor.get(topic_key, 0)
+
+    def seq_before(self, topic_key: str, seq: int) -> int:
+        """Sequence of the last change logged for a topic before ``seq``"""
+        for change in reversed(self._logs.get(topic_key, ())):
+            if change.seq < seq:
+                return change.seq
+        return self._log_floor.get(topic_key, 0)
+
+    async def ingest(
+        self,
+        flights_by_source: Dict[str, List[Dict[str, Any]]],
+        seq: Optional[int] = None,
+    ) -> List[FlightChange]:
+        """
+        Diff a crawl result against the current state and notify listeners.
+
+        Each ``(route, date, site)`` scope present in the batch replaces the
+        previous offers for that scope; scopes not present are left untouched.
+
+        ``seq`` stamps every change in the batch with an externally assigned
+        sequence (the broker's) so replicas in different workers agree on
+        positions; otherwise each change gets the next local sequence.
+        """
+        if seq is not None:
+            if seq <= self._seq:
+                return []
+            if self._seq == 0:
+                self._base_seq = seq - 1
+            self._batch_seq = seq
+
+        grouped: Dict[Scope, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        for source, flights in flights_by_source.items():
+            for offer in flights:
+                origin = offer.get("origin")
+                destination = offer.get("destination")
+                if not origin or not destination:
+                    continue
+                site = offer.get("source_site") or offer.get("site") or source
+                scope = (
+                    f"{origin}-{destination}".upper(),
+                    _departure_date(offer.get("departure_time") or offer.get("departure_date")),
+                    site,
+                )
+                grouped[scope][_offer_key(site, offer)] = offer
+                self.stats["offers_ingested"] += 1
+
+        changes: List[FlightChange] = []
+        for scope, offers in grouped.items():
+            previous = self._scopes.get(scope, {})
+            for offer_key, offer in offers.items():
+                before = previous.get(offer_key)
+                if before is None:
+                    changes.append(self._change("new", scope, offer_key, offer))
+                elif _fingerprint(before) != _fingerprint(offer):
+                    changes.append(self._change("changed", scope, offer_key, offer))
+            for offer_key, offer in previous.items():
+                if offer_key not in offers:
+                    changes.append(self._change("removed", scope, offer_key, offer))
+
+            self._scopes[scope] = offers
+            self._route_scopes[scope[0]].add(scope)
+
+        if seq is not None:
+            self._seq = seq
+            self._batch_seq = None
+
+        self.stats["batches"] += 1
+        self.stats["changes"] += len(changes)
+        if self._clock() - self._last_eviction >= self.eviction_interval:
+            self.evict()
+        if changes:
+            for listener in list(self._listeners):
+                try:
+                    await listener(changes)
+                except Exception as e:
+                    logger.error(f"Change feed listener failed: {e}")
+        return changes
+
+    def _change(self, kind: str, scope: Scope, offer_key: str, offer: Dict[str, Any]) -> FlightChange:
+        if self._batch_seq is not None:
+            change_seq = self._batch_seq
+        else:
+            self._seq += 1
+            change_seq = self._seq
+        route, departure_date, site = scope
+        change = FlightChange(
+            seq=change_seq,
+            kind=kind,
+            route=route,
+            date=departure_date,
+            site=site,
+            offer_key=offer_key,
+            offer={**offer, "offer_key": offer_key, "site": site},
+        )
+        now = self._clock()
+        for topic_key in change.topic_keys():
+            log = self._logs.get(topic_key)
+            if log is None:
+                log = self._logs[topic_key] = deque(maxlen=self.history_per_topic)
+                if self._evicted_seq:
+                    # The topic may have been evicted with changes a client has not seen
+                    self._log_floor[topic_key] = max(self._log_floor.get(topic_key, 0), self._evicted_seq)
+            if len(log) == log.maxlen:
+                self._log_floor[topic_key] = log[0].seq
+            log.append(change)
+            self._topic_touched[topic_key] = now
+        return change
+
+    def evict(self, today: Optional[date] = None) -> int:
+        """
+        Drop scopes and topics for past departure dates and topic logs idle
+        beyond ``topic_ttl``. Returns the number of topics evicted.
+
+        Clients resuming on an evicted topic are sent a snapshot.
+        """
+        now = self._clock()
+        self._last_eviction = now
+        cutoff = (today or date.today()).isoformat()
+
+        for scope in [scope for scope in self._scopes if scope[1] and scope[1] < cutoff]:
+            del self._scopes[scope]
+            route_scopes = self._route_scopes.get(scope[0])
+            if route_scopes is not None:
+                route_scopes.discard(scope)
+                if not route_scopes:
+                    del self._route_scopes[scope[0]]
+            self.stats["evicted_scopes"] += 1
+
+        evicted = 0
+        for topic_key in list(self._logs):
+            parts = topic_key.split("/")
+            departure_date = parts[1] if len(parts) == 3 else "*"
+            past = departure_date != "*" and departure_date < cutoff
+            idle = now - self._topic_touched.get(topic_key, now) > self.topic_ttl
+            if not (past or idle):
+                continue
+            log = self._logs.pop(topic_key)
+            if log:
+                self._evicted_seq = max(self._evicted_seq, log[-1].seq)
+            self._log_floor.pop(topic_key, None)
+            self._topic_touched.pop(topic_key, None)
+            evicted += 1
+        self.stats["evicted_topics"] += evicted
+        return evicted
+
+    def changes_since(self, topic: FlightTopic, seq: int) -> Optional[FlightDelta]:
+        """
+        Net changes for ``topic`` after ``seq``.
+
+        Returns None when ``seq`` is older than the retained log, in which
+        case the caller should send ``snapshot`` instead.
+        """
+        topic_key = topic.key
+        floor = max(self._log_floor.get(topic_key, 0), self._base_seq)
+        if topic_key not in self._logs:
+            # Nothing logged here since any eviction; changes below it are gone
+            floor = max(floor, self._evicted_seq)
+        if seq < floor:
+            return None
+
+        log = self._logs.get(topic_key, ())
+        pending: List[FlightChange] = []
+        # Logs are in sequence order; walk back only as far as needed
+        for change in reversed(log):
+            if change.seq <= seq:
+                break
+            pending.append(change)
+        pending.reverse()
+        return collapse_changes(topic_key, seq, pending)
+
+    def snapshot(self, topic: FlightTopic) -> Dict[str, Any]:
+        """
+        Current offers for a topic with the sequence they are valid at.
+
+        A client holding a snapshot or delta at ``seq`` has missed changes
+        only when a later delta arrives with ``from_seq`` greater than it.
+        """
+        offers = [
+            {**offer, "offer_key": offer_key, "site": scope[2]}
+            for scope in self._route_scopes.get(topic.route, ())
+            if topic.matches(scope)
+            for offer_key, offer in self._scopes[scope].items()
+        ]
+        return {"topic_key": topic.key, "seq": self._seq, "offers": offers}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "seq": self._seq,
+            "scopes": len(self._scopes),
+            "topics": len(self._logs),
+            "listeners": len(self._listeners),
+        }
+
+
+# Process-wide feed fed by DataManager.store_flights
+flight_change_feed = FlightChangeFeed()
@@ -0,0 +1,410 @@
+"""
+Mergeable latency sketches per site and workflow step.
+
+``LatencySketch`` is a log-bucketed histogram (the DDSketch layout): a value
+``v`` lands in bucket ``ceil(log(v) / log(gamma))`` with
+``gamma = (1 + a) / (1 - a)``, so every quantile it reports is within a
+relative error ``a`` (1% by default) of the true sample. Recording is one
+dict increment, memory is a few hundred buckets regardless of sample count,
+and two sketches merge by adding bucket counts - which is what makes
+percentiles correct across workers instead of averaging per-process p95s.
+
+Each process keeps a cumulative sketch per ``(site, step)`` for its own
+Prometheus histogram, plus a pending delta that ``flush`` folds into Redis
+with ``HINCRBY`` on one hash per one-minute window::
+
+    latency_sketch:alibaba:navigation:28617840  ->  {"-38": 3, "112": 41, "n": 44, "s": 97.2}
+
+Reading the last N windows and adding them up gives the fleet-wide sketch.
+Steps that fail are recorded under their own ``<step>_failed`` key, so
+timeouts show up without skewing the quantiles of steps that completed.
+"""
+
+import asyncio
+import inspect
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from prometheus_client import REGISTRY
+    from prometheus_client.core import HistogramMetricFamily, Metric
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    REGISTRY = None
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Anything faster than a microsecond is reported as zero
+MIN_TRACKED_VALUE = 1e-6
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Appended to the step of attempts that failed, e.g. ``navigation_failed``
+FAILED_STEP_SUFFIX = "_failed"
+
+SketchKey = Tuple[str, str]
+
+
+async def _resolve(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class LatencySketch:
+    """Relative-error quantile sketch over positive durations (seconds)"""
+
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "buckets", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def record(self, value: float, count: int = 1) -> None:
+        if value != value or value < 0:  # NaN or negative
+            return
+        if value < MIN_TRACKED_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        estimate = None
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = self._value(index)
+                break
+        if estimate is None:
+            estimate = self._value(max(self.buckets))
+        # Never report outside what was observed
+        if self.min <= self.max:
+            estimate = min(max(estimate, self.min), self.max)
+        return estimate
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+        return {f"p{round(q * 100):g}": self.quantile(q) for q in qs}
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> List[int]:
+        """Counts ``<= bound`` per bound, for a Prometheus histogram"""
+        totals = [self.zero_count] * len(bounds)
+        for index, count in self.buckets.items():
+            upper = self.gamma ** index
+            for position, bound in enumerate(bounds):
+                if upper <= bound * (1 + 1e-9):
+                    totals[position] += count
+        return totals
+
+    def summary(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"count": self.count}
+        if self.count:
+            data.update(
+                mean=self.sum / self.count,
+                min=self.min if self.min != math.inf else None,
+                max=self.max if self.max != -math.inf else None,
+                **self.quantiles(),
+            )
+        return data
+
+    def to_fields(self) -> Dict[str, float]:
+        """Flat hash fields for ``HINCRBY``: bucket index, ``z``, ``n`` and ``s``"""
+        fields: Dict[str, float] = {str(index): count for index, count in self.buckets.items()}
+        if self.zero_count:
+            fields["z"] = self.zero_count
+        fields["n"] = self.count
+        fields["s"] = self.sum
+        return fields
+
+    @classmethod
+    def from_fields(cls, fields: Dict[Any, Any], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> "LatencySketch":
+        sketch = cls(relative_accuracy)
+        for field, value in fields.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            if isinstance(value, bytes):
+                value = value.decode()
+            if field == "s":
+                sketch.sum = float(value)
+            elif field == "n":
+                sketch.count = int(value)
+            elif field == "z":
+                sketch.zero_count = int(value)
+            else:
+                sketch.buckets[int(field)] = int(value)
+        # Bounds are approximated from the outermost buckets
+        if sketch.zero_count:
+            sketch.min = 0.0
+        elif sketch.buckets:
+            sketch.min = sketch.gamma ** (min(sketch.buckets) - 1)
+        if sketch.buckets:
+            sketch.max = sketch.gamma ** max(sketch.buckets)
+        elif sketch.zero_count:
+            sketch.max = 0.0
+        return sketch
+
+
+class LatencySketchRegistry:
+    """Per ``(site, step)`` sketches with optional fleet-wide merging in Redis"""
+
+    KEY_PREFIX = "latency_sketch"
+
+    def __init__(
+        self,
+        redis_client=None,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        window_seconds: int = 60,
+        retention_windows: int = 60,
+        flush_interval: float = 10.0,
+    ):
+        self.redis_client = redis_client
+        self.relative_accuracy = relative_accuracy
+        self.window_seconds = window_seconds
+        self.retention_windows = retention_windows
+        self.flush_interval = flush_interval
+        self._local: Dict[SketchKey, LatencySketch] = {}
+        self._pending: Dict[SketchKey, Dict[int, LatencySketch]] = {}
+        # Last merged fleet view, refreshed by the flush loop
+        self._fleet: Dict[SketchKey, LatencySketch] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "flushes": 0, "flush_errors": 0}
+
+    def key(self, site: str, step: str, window: int) -> str:
+        return f"{self.KEY_PREFIX}:{site}:{step}:{window}"
+
+    def _window(self, timestamp: float) -> int:
+        return int(timestamp // self.window_seconds)
+
+    def record(self, site: str, step: str, seconds: float, timestamp: Optional[float] = None) -> None:
+        """O(1) update of the local sketch and of the pending Redis delta"""
+        key = (site, step)
+        sketch = self._local.get(key)
+        if sketch is None:
+            sketch = self._local[key] = LatencySketch(self.relative_accuracy)
+        sketch.record(seconds)
+        if self.redis_client is not None:
+            window = self._window(time.time() if timestamp is None else timestamp)
+            windows = self._pending.setdefault(key, {})
+            delta = windows.get(window)
+            if delta is None:
+                delta = windows[window] = LatencySketch(self.relative_accuracy)
+            delta.record(seconds)
+        self.stats["recorded"] += 1
+
+    @contextmanager
+    def time(self, site: str, step: str) -> Iterator[None]:
+        """Record the wall time of a block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(site, step, time.perf_counter() - start)
+
+    def keys(self) -> List[SketchKey]:
+        return sorted(set(self._local) | set(self._fleet))
+
+    def local_sketch(self, site: str, step: str) -> Optional[LatencySketch]:
+        return self._local.get((site, step))
+
+    async def flush(self) -> int:
+        """Add pending deltas to the shared window hashes; returns keys written"""
+        if self.redis_client is None or not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        ttl = self.window_seconds * (self.retention_windows + 1)
+        written = 0
+        try:
+            pipe = self.redis_client.pipeline() if hasattr(self.redis_client, "pipeline") else None
+            client = pipe if pipe is not None else self.redis_client
+            for (site, step), windows in pending.items():
+                for window, delta in windows.items():
+                    key = self.key(site, step, window)
+                    for field, value in delta.to_fields().items():
+                        if field == "s":
+                            await _resolve(client.hincrbyfloat(key, field, value))
+                        else:
+                            await _resolve(client.hincrby(key, field, int(value)))
+                    await _resolve(client.expire(key, ttl))
+                    written += 1
+            if pipe is not None:
+                await _resolve(pipe.execute())
+            self.stats["flushes"] += 1
+        except Exception as e:
+            # Put the deltas back so the next flush retries them
+            for key, windows in pending.items():
+                target = self._pending.setdefault(key, {})
+                for window, delta in windows.items():
+                    if window in target:
+                        delta.merge(target[window])
+                    target[window] = delta
+            self.stats["flush_errors"] += 1
+            logger.warning(f"Latency sketch flush failed: {e}")
+            return 0
+        return written
+
+    async def fleet_sketch(self, site: str, step: str, minutes: int = 5, now: Optional[float] = None) -> LatencySketch:
+        """Merged sketch of every worker over the last ``minutes``"""
+        if self.redis_client is None:
+            return self._local.get((site, step)) or LatencySketch(self.relative_accuracy)
+        now = time.time() if now is None else now
+        last = self._window(now)
+        windows = max(1, math.ceil(minutes * 60 / self.window_seconds))
+        merged = LatencySketch(self.relative_accuracy)
+        for window in range(last - windows + 1, last + 1):
+            fields = await _resolve(self.redis_client.hgetall(self.key(site, step, window)))
+            if fields:
+                merged.merge(LatencySketch.from_fields(fields, self.relative_accuracy))
+        self._fleet[(site, step)] = merged
+        return merged
+
+    async def fleet_summary(self, minutes: int = 5) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """``{site: {step: summary}}`` across all workers"""
+        summary: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for site, step in self.keys():
+            sketch = await self.fleet_sketch(site, step, minutes)
+            summary.setdefault(site, {})[step] = sketch.summary()
+        return summary
+
+    def local_summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        summary: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (site, step), sketch in sorted(self._local.items()):
+            summary.setdefault(site, {})[step] = sketch.summary()
+        return summary
+
+    def start(self) -> None:
+        if self.redis_client is None or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            try:
+                for site, step in list(self._local):
+                    await self.fleet_sketch(site, step)
+            except Exception as e:
+                logger.warning(f"Latency sketch refresh failed: {e}")
+
+    def collect(self):
+        """Prometheus collector: fleet quantiles and local histograms"""
+        summary = Metric(
+            "crawler_step_latency_seconds",
+            "Crawl latency quantiles per site and workflow step (fleet-wide when Redis is shared)",
+            "summary",
+        )
+        histogram = HistogramMetricFamily(
+            "crawler_step_latency_histogram_seconds",
+            "Crawl latency per site and workflow step in this process",
+            labels=["site", "step"],
+        )
+        for site, step in self.keys():
+            labels = {"site": site, "step": step}
+            sketch = self._fleet.get((site, step)) or self._local.get((site, step))
+            if sketch is not None and sketch.count:
+                for q in DEFAULT_QUANTILES:
+                    summary.add_sample(
+                        "crawler_step_latency_seconds",
+                        {**labels, "quantile": str(q)},
+                        sketch.quantile(q),
+                    )
+                summary.add_sample("crawler_step_latency_seconds_count", labels, sketch.count)
+                summary.add_sample("crawler_step_latency_seconds_sum", labels, sketch.sum)
+
+            local = self._local.get((site, step))
+            if local is not None and local.count:
+                counts = local.cumulative_counts(DEFAULT_HISTOGRAM_BUCKETS)
+                buckets = [(f"{bound:g}", count) for bound, count in zip(DEFAULT_HISTOGRAM_BUCKETS, counts)]
+                buckets.append(("+Inf", local.count))
+                histogram.add_metric([site, step], buckets, local.sum)
+        yield summary
+        yield histogram
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "series": len(self._local),
+            "backend": "redis" if self.redis_client is not None else "memory",
+            "relative_accuracy": self.relative_accuracy,
+        }
+
+
+_latency_sketches: Optional[LatencySketchRegistry] = None
+
+
+def get_latency_sketches() -> LatencySketchRegistry:
+    """Process-wide registry; merges in Redis when the event broker does"""
+    global _latency_sketches
+    if _latency_sketches is None:
+        from config import config
+        from utils.event_broker import REDIS_AVAILABLE, aioredis
+
+        redis_client = None
+        if REDIS_AVAILABLE and config.WEBSOCKET.EVENT_BROKER == "redis":
+            redis_client = aioredis.from_url(config.REDIS_URL, decode_responses=True)
+        _latency_sketches = LatencySketchRegistry(redis_client)
+        if PROMETHEUS_AVAILABLE:
+            try:
+                REGISTRY.register(_latency_sketches)
+            except ValueError:
+                pass
+    return _latency_sketches
@@ -0,0 +1,270 @@
+"""
+Event-loop health: lag measurement and blocking-call detection.
+
+A probe coroutine sleeps for ``interval`` and records how late it wakes up;
+that lateness is the event-loop lag every other coroutine experienced. Each
+wake-up also refreshes a heartbeat. A daemon watchdog thread polls the
+heartbeat, and when it goes stale for longer than ``block_threshold`` the
+loop is stuck inside a callback - the watchdog grabs the loop thread's
+current stack with ``sys._current_frames()`` while it is still blocked.
+
+Stacks are aggregated by call site (the innermost frame in project code, so
+a sync SQLAlchemy query is charged to the ``DataManager`` line that issued
+it, not to SQLAlchemy internals). When the loop resumes, the measured lag is
+added to that site's blocked time.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from utils.websocket_fanout import LatencyWindow
+
+try:
+    from prometheus_client import REGISTRY
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    REGISTRY = None
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_LIBRARY_PATHS = tuple(
+    os.path.normcase(path)
+    for path in {sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]}
+)
+_PROJECT_ROOT = os.path.normcase(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _is_project_frame(filename: str) -> bool:
+    filename = os.path.normcase(os.path.abspath(filename))
+    if filename == os.path.normcase(os.path.abspath(__file__)):
+        return False
+    if "site-packages" in filename or filename.startswith(_LIBRARY_PATHS):
+        return False
+    return filename.startswith(_PROJECT_ROOT)
+
+
+def call_site(stack: traceback.StackSummary) -> str:
+    """``file:line in function`` of the innermost project frame"""
+    for frame in reversed(stack):
+        if _is_project_frame(frame.filename):
+            path = os.path.relpath(frame.filename, _PROJECT_ROOT)
+            return f"{path}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class BlockingOffender:
+    """Blocking events charged to one call site"""
+
+    __slots__ = ("site", "count", "total_seconds", "max_seconds", "last_seen", "stack")
+
+    def __init__(self, site: str):
+        self.site = site
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seen = 0.0
+        self.stack: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class LoopHealthMonitor:
+    """Lag probe plus watchdog thread for one event loop"""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        block_threshold: float = 0.1,
+        max_offenders: int = 100,
+        stack_limit: int = 30,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.max_offenders = max_offenders
+        self.stack_limit = stack_limit
+        self.lag = LatencyWindow(max_samples=3000)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.offenders: Dict[str, BlockingOffender] = {}
+        self.stats = {"blocking_events": 0, "blocked_seconds": 0.0, "offenders_evicted": 0}
+        self._lock = threading.Lock()
+        self._heartbeat = time.monotonic()
+        self._stall: Optional[BlockingOffender] = None
+        self._loop_thread: Optional[int] = None
+        self._probe: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._probe is not None and not self._probe.done()
+
+    def start(self) -> None:
+        """Start probing the running loop; call from inside it"""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._probe = asyncio.create_task(self._probe_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._probe is not None:
+            self._probe.cancel()
+            try:
+                await self._probe
+            except asyncio.CancelledError:
+                pass
+            self._probe = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    async def __aenter__(self) -> "LoopHealthMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await self.stop()
+        return False
+
+    async def _probe_loop(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self.lag.record(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            with self._lock:
+                self._heartbeat = now
+                stall, self._stall = self._stall, None
+                if stall is not None:
+                    stall.total_seconds += lag
+                    stall.max_seconds = max(stall.max_seconds, lag)
+                    self.stats["blocked_seconds"] += lag
+
+    def _watch(self) -> None:
+        poll = min(self.block_threshold / 2, 0.05)
+        captured_for = None
+        while not self._stopped.wait(poll):
+            with self._lock:
+                heartbeat = self._heartbeat
+                stalled = time.monotonic() - heartbeat > self.interval + self.block_threshold
+                if not stalled or captured_for == heartbeat:
+                    continue
+                captured_for = heartbeat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=self.stack_limit)
+            del frame
+            self._record_stall(stack)
+
+    def _record_stall(self, stack: traceback.StackSummary) -> None:
+        site = call_site(stack)
+        with self._lock:
+            offender = self.offenders.get(site)
+            if offender is None:
+                if len(self.offenders) >= self.max_offenders:
+                    # Forget the site that has cost the least so far
+                    cheapest = min(self.offenders.values(), key=lambda o: o.total_seconds)
+                    del self.offenders[cheapest.site]
+                    self.stats["offenders_evicted"] += 1
+                offender = self.offenders[site] = BlockingOffender(site)
+            offender.count += 1
+            offender.last_seen = time.time()
+            offender.stack = [line.rstrip() for line in stack.format()]
+            self.stats["blocking_events"] += 1
+            self._stall = offender
+        logger.warning(f"Event loop blocked for over {self.block_threshold * 1000:.0f}ms at {site}")
+
+    def top_offenders(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self.offenders.values(), key=lambda o: o.total_seconds, reverse=True)
+            return [offender.to_dict() for offender in ranked[:limit]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.offenders.clear()
+            self.lag = LatencyWindow(max_samples=3000)
+            self.max_lag = 0.0
+            self.stats = {"blocking_events": 0, "blocked_seconds": 0.0, "offenders_evicted": 0}
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.block_threshold * 1000,
+            "lag": {**self.lag.summary(), "max_ms": self.max_lag * 1000},
+            **self.stats,
+            "offenders": self.top_offenders(limit),
+        }
+
+    def collect(self):
+        """Prometheus collector for lag and per-site blocking"""
+        summary = self.lag.summary()
+        lag = GaugeMetricFamily(
+            "event_loop_lag_seconds", "Recent event-loop lag percentiles", labels=["quantile"]
+        )
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lag.add_metric([quantile], summary[key] / 1000)
+        events = CounterMetricFamily(
+            "event_loop_blocking_events", "Callbacks that blocked the loop past the threshold", labels=["site"]
+        )
+        blocked = CounterMetricFamily(
+            "event_loop_blocked_seconds", "Loop time lost to blocking callbacks", labels=["site"]
+        )
+        with self._lock:
+            for offender in self.offenders.values():
+                events.add_metric([offender.site], offender.count)
+                blocked.add_metric([offender.site], offender.total_seconds)
+        yield lag
+        yield events
+        yield blocked
+
+
+_loop_monitor: Optional[LoopHealthMonitor] = None
+
+
+def get_loop_monitor() -> LoopHealthMonitor:
+    """Process-wide monitor configured from ``config.MONITORING``"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        from config import config
+
+        _loop_monitor = LoopHealthMonitor(
+            interval=config.MONITORING.LOOP_LAG_INTERVAL,
+            block_threshold=config.MONITORING.LOOP_BLOCK_THRESHOLD,
+        )
+        if PROMETHEUS_AVAILABLE:
+            try:
+                REGISTRY.register(_loop_monitor)
+            except ValueError:
+                pass
+    return _loop_monitor
@@ -0,0 +1,244 @@
+"""
+Columnar in-memory time-series store.
+
+Each metric name owns a preallocated ring buffer of three numpy columns:
+``timestamps`` (float64 epoch seconds), ``values`` (float64) and ``components``
+(int32 ids interned from component/site names). A point costs 20 bytes
+instead of a dataclass with two dicts, and timestamps are appended in order,
+so a time window is found with ``searchsorted`` over at most two contiguous
+segments (O(log n + k)) and aggregated with vectorized numpy calls instead of
+scanning every stored metric.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_EMPTY_FLOAT = np.empty(0, dtype=np.float64)
+_EMPTY_INT = np.empty(0, dtype=np.int32)
+
+Window = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class MetricSeries:
+    """Fixed-capacity ring buffer of (timestamp, value, component id)"""
+
+    __slots__ = ("capacity", "timestamps", "values", "components", "head", "size", "last_timestamp")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.components = np.zeros(capacity, dtype=np.int32)
+        self.head = 0  # next write position
+        self.size = 0
+        self.last_timestamp = -np.inf
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes + self.components.nbytes
+
+    def append(self, timestamp: float, value: float, component: int) -> None:
+        # Keep the column sorted; a sample from a skewed clock lands at "now"
+        timestamp = max(timestamp, self.last_timestamp)
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.components[self.head] = component
+        self.last_timestamp = timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _segments(self) -> List[slice]:
+        """Physical slices of the buffer in chronological order"""
+        if self.size < self.capacity:
+            return [slice(0, self.size)]
+        if self.head == 0:
+            return [slice(0, self.capacity)]
+        return [slice(self.head, self.capacity), slice(0, self.head)]
+
+    def window(self, start: float, end: Optional[float] = None) -> Window:
+        """
+        Points with ``start <= timestamp <= end``, oldest first.
+
+        A window inside one segment is a view; copy it to keep it past
+        later appends.
+        """
+        parts = []
+        for segment in self._segments():
+            timestamps = self.timestamps[segment]
+            low = int(np.searchsorted(timestamps, start, side="left"))
+            high = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+            if low < high:
+                offset = segment.start
+                parts.append(slice(offset + low, offset + high))
+        if not parts:
+            return _EMPTY_FLOAT, _EMPTY_FLOAT, _EMPTY_INT
+        if len(parts) == 1:
+            part = parts[0]
+            return self.timestamps[part], self.values[part], self.components[part]
+        return (
+            np.concatenate([self.timestamps[p] for p in parts]),
+            np.concatenate([self.values[p] for p in parts]),
+            np.concatenate([self.components[p] for p in parts]),
+        )
+
+
+class MetricStore:
+    """Per-metric columnar ring buffers with interned component ids"""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._series: Dict[str, MetricSeries] = {}
+        self._component_ids: Dict[str, int] = {}
+        self._component_names: List[str] = []
+        # Labels and source system rarely change per (metric, component)
+        self._meta: Dict[Tuple[str, int], Tuple[Dict[str, str], str]] = {}
+        self.dropped_non_numeric = 0
+
+    def __len__(self) -> int:
+        return sum(len(series) for series in self._series.values())
+
+    def component_id(self, component: str) -> int:
+        component_id = self._component_ids.get(component)
+        if component_id is None:
+            component_id = self._component_ids[component] = len(self._component_names)
+            self._component_names.append(component)
+        return component_id
+
+    def component_name(self, component_id: int) -> str:
+        return self._component_names[component_id]
+
+    def components(self) -> List[str]:
+        return list(self._component_names)
+
+    def names(self) -> List[str]:
+        return list(self._series)
+
+    def record(
+        self,
+        name: str,
+        timestamp: float,
+        value: Any,
+        component: str = "unknown",
+        labels: Optional[Dict[str, str]] = None,
+        source_system: str = "unknown",
+    ) -> bool:
+        """Append a point; non-numeric values are counted and skipped"""
+        try:
+            numeric = float(value)
+        except (TypeError, ValueError):
+            self.dropped_non_numeric += 1
+            return False
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = MetricSeries(self.capacity)
+        component_id = self.component_id(component)
+        series.append(timestamp, numeric, component_id)
+        self._meta[(name, component_id)] = (labels or {}, source_system)
+        return True
+
+    def window(
+        self,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        component: Optional[str] = None,
+    ) -> Window:
+        series = self._series.get(name)
+        if series is None:
+            return _EMPTY_FLOAT, _EMPTY_FLOAT, _EMPTY_INT
+        timestamps, values, components = series.window(start, end)
+        if component is not None:
+            component_id = self._component_ids.get(component)
+            if component_id is None:
+                return _EMPTY_FLOAT, _EMPTY_FLOAT, _EMPTY_INT
+            mask = components == component_id
+            return timestamps[mask], values[mask], components[mask]
+        return timestamps, values, components
+
+    def aggregate(
+        self,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        component: Optional[str] = None,
+    ) -> Dict[str, float]:
+        """Count, mean, min, max and percentiles over a window"""
+        _, values, _ = self.window(name, start, end, component)
+        if not len(values):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+        }
+
+    def counts_by_component(
+        self,
+        start: float,
+        end: Optional[float] = None,
+        names: Optional[List[str]] = None,
+    ) -> Dict[str, int]:
+        """Points per component across ``names`` (all metrics by default)"""
+        totals = np.zeros(len(self._component_names), dtype=np.int64)
+        for name in names if names is not None else self._series:
+            _, _, components = self.window(name, start, end)
+            if len(components):
+                totals += np.bincount(components, minlength=len(totals))
+        return {
+            self._component_names[index]: int(count)
+            for index, count in enumerate(totals)
+            if count
+        }
+
+    def count_since(self, start: float) -> int:
+        return sum(len(series.window(start)[0]) for series in self._series.values())
+
+    def records(
+        self,
+        start: float,
+        end: Optional[float] = None,
+        component: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Window as row dicts across all metrics, oldest first"""
+        rows = []
+        for name in self._series:
+            timestamps, values, components = self.window(name, start, end, component)
+            for timestamp, value, component_id in zip(timestamps.tolist(), values.tolist(), components.tolist()):
+                labels, source_system = self._meta.get((name, component_id), ({}, "unknown"))
+                rows.append(
+                    {
+                        "timestamp": timestamp,
+                        "metric_name": name,
+                        "value": value,
+                        "labels": labels,
+                        "source_system": source_system,
+                        "component": self._component_names[component_id],
+                    }
+                )
+        rows.sort(key=lambda row: row["timestamp"])
+        return rows
+
+    def memory_bytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "metrics": len(self._series),
+            "components": len(self._component_names),
+            "points": len(self),
+            "capacity_per_metric": self.capacity,
+            "memory_bytes": self.memory_bytes(),
+            "dropped_non_numeric": self.dropped_non_numeric,
+        }
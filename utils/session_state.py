@@ -0,0 +1,364 @@
+"""
+Warm per-site session state.
+
+Cookies and storage used to be discarded with the browser context, so every
+new crawler instance went through cookie consent, popups and the landing
+page again. After a successful setup the crawler now snapshots the
+context's storage state (cookies and localStorage), the CSRF tokens the page
+exposes and the user agent the cookies were issued to. New contexts start
+from that snapshot and skip the setup step; ``SessionManager`` builds aiohttp
+sessions from it as well.
+
+A snapshot is only used while it is valid: younger than ``max_age`` and
+holding every cookie in ``required_cookies``. Expired cookies are dropped
+when it is restored. A restored snapshot is deleted when a crawl on it
+raises, or when the session is visibly gone afterwards: the page ended up on
+a login URL or a required cookie disappeared. A search that merely found no
+flights keeps it. Otherwise a snapshot older than ``refresh_after`` is
+replaced.
+
+Snapshots live in JSON files (mode 0600 - they hold session cookies) or, so
+that all workers share them, in Redis.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+XSRF_COOKIES = {"XSRF-TOKEN": "X-XSRF-TOKEN", "CSRF-TOKEN": "X-CSRF-Token"}
+
+# Tokens that forms and XHRs send back, read from the page after setup
+_CSRF_TOKENS_JS = """
+() => Object.fromEntries(
+    [...document.querySelectorAll('meta[name*="csrf" i], meta[name*="xsrf" i]')]
+        .filter((meta) => meta.content)
+        .map((meta) => [meta.name, meta.content])
+)
+"""
+
+
+@dataclass
+class SessionSnapshot:
+    """Storage state of one site's browser context"""
+    site: str
+    cookies: List[Dict[str, Any]] = field(default_factory=list)
+    origins: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: Dict[str, str] = field(default_factory=dict)
+    user_agent: str = ""
+    captured_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionSnapshot":
+        known = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) - self.captured_at
+
+    def live_cookies(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Session cookies plus persistent ones that have not expired"""
+        now = time.time() if now is None else now
+        return [cookie for cookie in self.cookies if cookie.get("expires", -1) <= 0 or cookie["expires"] > now]
+
+    def validate(
+        self, max_age: float, required_cookies: Tuple[str, ...] = (), now: Optional[float] = None
+    ) -> Tuple[bool, str]:
+        if self.age(now) > max_age:
+            return False, "expired"
+        names = {cookie["name"] for cookie in self.live_cookies(now)}
+        missing = [name for name in required_cookies if name not in names]
+        if missing:
+            return False, f"missing cookies: {', '.join(missing)}"
+        return True, "valid"
+
+    def storage_state(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Playwright ``storage_state`` for ``browser.new_context``"""
+        return {"cookies": self.live_cookies(now), "origins": self.origins}
+
+    def headers(self, csrf_header: str = "X-CSRF-Token") -> Dict[str, str]:
+        """User agent and CSRF headers for plain HTTP requests on this session"""
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        if self.tokens:
+            headers[csrf_header] = next(iter(self.tokens.values()))
+        for cookie in self.live_cookies():
+            header = XSRF_COOKIES.get(cookie["name"].upper())
+            if header and header not in headers:
+                headers[header] = cookie["value"]
+        return headers
+
+    def cookie_jar(self, now: Optional[float] = None):
+        """``aiohttp.CookieJar`` holding the live cookies; call inside the event loop"""
+        import aiohttp
+        from yarl import URL
+
+        now = time.time() if now is None else now
+        jar = aiohttp.CookieJar()
+        for cookie in self.live_cookies(now):
+            morsels = SimpleCookie()
+            morsels[cookie["name"]] = cookie["value"]
+            morsel = morsels[cookie["name"]]
+            domain = cookie.get("domain", "")
+            if domain.startswith("."):
+                # Host-only cookies stay host-only: the jar takes the host from the URL
+                morsel["domain"] = domain
+            morsel["path"] = cookie.get("path", "/")
+            if cookie.get("secure"):
+                morsel["secure"] = True
+            if cookie.get("expires", -1) > 0:
+                morsel["max-age"] = str(int(cookie["expires"] - now))
+            jar.update_cookies(morsels, URL(f"https://{domain.lstrip('.')}/"))
+        return jar
+
+
+@dataclass
+class SessionStatePolicy:
+    """Per-site validity rules, from the ``session_state`` site config section"""
+    enabled: bool = True
+    max_age: float = 6 * 3600
+    refresh_after: float = 3600
+    required_cookies: Tuple[str, ...] = ()
+    csrf_header: str = "X-CSRF-Token"
+    # Page URLs that mean the site sent the session back to authentication
+    auth_url_markers: Tuple[str, ...] = ("/login", "/signin", "/auth")
+
+    @classmethod
+    def from_site_config(cls, section: Optional[Dict[str, Any]], max_age: Optional[float] = None) -> "SessionStatePolicy":
+        section = dict(section or {})
+        for key in ("required_cookies", "auth_url_markers"):
+            if key in section:
+                section[key] = tuple(section[key])
+        if max_age is not None:
+            section.setdefault("max_age", max_age)
+        known = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in section.items() if key in known})
+
+
+class SessionStateStore(ABC):
+    """Where snapshots are kept"""
+
+    @abstractmethod
+    async def load(self, site: str) -> Optional[SessionSnapshot]:
+        """The site's snapshot, or None"""
+
+    @abstractmethod
+    async def save(self, snapshot: SessionSnapshot, ttl: Optional[float] = None) -> None:
+        """Store ``snapshot``, replacing the site's previous one"""
+
+    @abstractmethod
+    async def delete(self, site: str) -> None:
+        """Forget the site's snapshot; a no-op when there is none"""
+
+    async def close(self) -> None:
+        pass
+
+
+class FileSessionStateStore(SessionStateStore):
+    """One JSON file per site"""
+
+    def __init__(self, directory: str = "data/session_state"):
+        self.directory = Path(directory)
+
+    def _path(self, site: str) -> Path:
+        return self.directory / f"{site}.json"
+
+    def _read(self, site: str) -> Optional[SessionSnapshot]:
+        try:
+            return SessionSnapshot.from_dict(json.loads(self._path(site).read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, snapshot: SessionSnapshot) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(snapshot.site)
+        tmp = path.with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    async def load(self, site: str) -> Optional[SessionSnapshot]:
+        return await asyncio.to_thread(self._read, site)
+
+    async def save(self, snapshot: SessionSnapshot, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._write, snapshot)
+
+    async def delete(self, site: str) -> None:
+        await asyncio.to_thread(self._path(site).unlink, True)
+
+
+class RedisSessionStateStore(SessionStateStore):
+    """Snapshots shared by every worker, expiring with ``max_age``"""
+
+    KEY_PREFIX = "session_state"
+
+    def __init__(self, redis_url: str, redis_client=None):
+        if redis_client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package is required for the redis session state backend")
+            redis_client = aioredis.from_url(redis_url, decode_responses=True)
+        self.redis = redis_client
+
+    def _key(self, site: str) -> str:
+        return f"{self.KEY_PREFIX}:{site}"
+
+    async def load(self, site: str) -> Optional[SessionSnapshot]:
+        raw = await self.redis.get(self._key(site))
+        return SessionSnapshot.from_dict(json.loads(raw)) if raw else None
+
+    async def save(self, snapshot: SessionSnapshot, ttl: Optional[float] = None) -> None:
+        await self.redis.set(
+            self._key(snapshot.site), json.dumps(snapshot.to_dict(), ensure_ascii=False),
+            ex=int(ttl) if ttl else None,
+        )
+
+    async def delete(self, site: str) -> None:
+        await self.redis.delete(self._key(site))
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+
+class WarmSession:
+    """Restore, capture and invalidate one site's snapshot"""
+
+    def __init__(self, site: str, store: Optional[SessionStateStore], policy: Optional[SessionStatePolicy] = None):
+        self.site = site
+        self.store = store
+        self.policy = policy or SessionStatePolicy()
+        self.stats = {"restored": 0, "rejected": 0, "captured": 0, "invalidated": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None and self.policy.enabled
+
+    async def restore(self) -> Optional[SessionSnapshot]:
+        """A valid snapshot for the site, or None; invalid ones are deleted"""
+        if not self.enabled:
+            return None
+        try:
+            snapshot = await self.store.load(self.site)
+            if snapshot is None:
+                return None
+            valid, reason = snapshot.validate(self.policy.max_age, self.policy.required_cookies)
+            if not valid:
+                self.stats["rejected"] += 1
+                logger.info(f"Discarding {self.site} session state: {reason}")
+                await self.store.delete(self.site)
+                return None
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not load {self.site} session state: {e}")
+            return None
+        self.stats["restored"] += 1
+        return snapshot
+
+    def needs_refresh(self, snapshot: Optional[SessionSnapshot]) -> bool:
+        return snapshot is None or snapshot.age() > self.policy.refresh_after
+
+    async def capture(self, context: Any, page: Any = None, user_agent: str = "") -> Optional[SessionSnapshot]:
+        """Snapshot a browser context after a successful setup or crawl"""
+        if not self.enabled:
+            return None
+        try:
+            state = await context.storage_state()
+            tokens = await page.evaluate(_CSRF_TOKENS_JS) if page is not None else {}
+            snapshot = SessionSnapshot(
+                site=self.site,
+                cookies=state.get("cookies", []),
+                origins=state.get("origins", []),
+                tokens=tokens or {},
+                user_agent=user_agent,
+            )
+            await self.store.save(snapshot, ttl=self.policy.max_age)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not capture {self.site} session state: {e}")
+            return None
+        self.stats["captured"] += 1
+        return snapshot
+
+    async def session_lost(self, context: Any, page: Any = None) -> Optional[str]:
+        """Why the browser session is no longer usable, or None while it looks fine"""
+        url = (getattr(page, "url", "") or "").lower() if page is not None else ""
+        for marker in self.policy.auth_url_markers:
+            if marker in url:
+                return f"redirected to authentication ({url})"
+        if self.policy.required_cookies and context is not None:
+            try:
+                names = {cookie["name"] for cookie in await context.cookies()}
+            except Exception as e:
+                logger.debug(f"Could not read {self.site} cookies: {e}")
+                return None
+            missing = [name for name in self.policy.required_cookies if name not in names]
+            if missing:
+                return f"missing cookies: {', '.join(missing)}"
+        return None
+
+    async def invalidate(self, reason: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.store.delete(self.site)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not delete {self.site} session state: {e}")
+            return
+        self.stats["invalidated"] += 1
+        logger.info(f"Invalidated {self.site} session state: {reason}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "enabled": self.enabled}
+
+
+def create_session_state_store(
+    backend: str = "file", directory: str = "data/session_state", redis_url: Optional[str] = None
+) -> Optional[SessionStateStore]:
+    """Build the store selected by configuration; ``none`` disables warm sessions"""
+    if backend == "none":
+        return None
+    if backend == "file":
+        return FileSessionStateStore(directory)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("redis_url is required for the redis session state backend")
+        return RedisSessionStateStore(redis_url)
+    raise ValueError(f"Unknown session state backend: {backend}")
+
+
+_session_state_store: Optional[SessionStateStore] = None
+_session_state_configured = False
+
+
+def get_session_state_store() -> Optional[SessionStateStore]:
+    """Process-wide store configured from ``config.CRAWLER``"""
+    global _session_state_store, _session_state_configured
+    if not _session_state_configured:
+        from config import config
+
+        _session_state_store = create_session_state_store(
+            config.CRAWLER.SESSION_STATE_BACKEND,
+            config.CRAWLER.SESSION_STATE_DIR,
+            config.REDIS_URL,
+        )
+        _session_state_configured = True
+    return _session_state_store
@@ -0,0 +1,168 @@
+"""
+Background system-load sampler.
+
+Backoff and rate-limit decisions want to know how loaded the host is, but
+measuring CPU with ``psutil.cpu_percent(interval=0.1)`` sleeps the calling
+thread - inside a coroutine that freezes the whole event loop on every
+decision. A daemon thread samples CPU, memory, process RSS, open sockets and
+event-loop lag at a fixed cadence instead, and publishes an immutable
+``SystemSnapshot`` by swapping one reference. Readers just load
+``sampler.snapshot``: no lock, no syscall, no sleep.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Above these the host is treated as overloaded and limits stop growing
+CPU_OVERLOAD_PERCENT = 90.0
+MEMORY_OVERLOAD_PERCENT = 90.0
+LOOP_LAG_OVERLOAD_MS = 250.0
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """One sample of host and process load"""
+
+    timestamp: float
+    cpu_percent: float = 0.0
+    memory_percent: float = 0.0
+    process_rss_mb: float = 0.0
+    open_connections: int = 0
+    loop_lag_ms: float = 0.0
+
+    @property
+    def load(self) -> float:
+        """Combined CPU and memory load (0.0 to 1.0)"""
+        return min((self.cpu_percent + self.memory_percent) / 200.0, 1.0)
+
+    @property
+    def overloaded(self) -> bool:
+        return (
+            self.cpu_percent >= CPU_OVERLOAD_PERCENT
+            or self.memory_percent >= MEMORY_OVERLOAD_PERCENT
+            or self.loop_lag_ms >= LOOP_LAG_OVERLOAD_MS
+        )
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "cpu_percent": self.cpu_percent,
+            "memory_percent": self.memory_percent,
+            "process_rss_mb": round(self.process_rss_mb, 1),
+            "open_connections": self.open_connections,
+            "loop_lag_ms": round(self.loop_lag_ms, 1),
+            "load": round(self.load, 3),
+            "overloaded": self.overloaded,
+        }
+
+
+class SystemLoadSampler:
+    """Daemon thread publishing a fresh ``SystemSnapshot`` every ``interval``"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._process = psutil.Process(os.getpid())
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.errors = 0
+        # Prime cpu_percent so the next non-blocking call has a baseline
+        psutil.cpu_percent(interval=None)
+        self.snapshot = self.sample()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.snapshot = self.sample()
+            except Exception as e:
+                self.errors += 1
+                logger.debug(f"System sample failed: {e}")
+
+    def sample(self) -> SystemSnapshot:
+        """Take one reading; runs on the sampler thread"""
+        self.samples += 1
+        return SystemSnapshot(
+            timestamp=time.time(),
+            # Non-blocking: usage since the previous call
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=psutil.virtual_memory().percent,
+            process_rss_mb=self._process.memory_info().rss / 1024 / 1024,
+            open_connections=self._open_connections(),
+            loop_lag_ms=self._loop_lag_ms(),
+        )
+
+    def _open_connections(self) -> int:
+        try:
+            connections = getattr(self._process, "net_connections", None) or self._process.connections
+            return len(connections(kind="inet"))
+        except (psutil.Error, OSError):
+            return 0
+
+    @staticmethod
+    def _loop_lag_ms() -> float:
+        from utils.loop_monitor import get_loop_monitor
+
+        monitor = get_loop_monitor()
+        return monitor.last_lag * 1000 if monitor.running else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.snapshot.to_dict(),
+            "age_seconds": round(self.snapshot.age, 3),
+            "interval": self.interval,
+            "running": self.running,
+            "samples": self.samples,
+            "errors": self.errors,
+        }
+
+
+_system_sampler: Optional[SystemLoadSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_system_sampler() -> SystemLoadSampler:
+    """Process-wide sampler, started on first use"""
+    global _system_sampler
+    if _system_sampler is None:
+        with _sampler_lock:
+            if _system_sampler is None:
+                from config import config
+
+                sampler = SystemLoadSampler(config.MONITORING.SYSTEM_SAMPLE_INTERVAL)
+                sampler.start()
+                _system_sampler = sampler
+    return _system_sampler
+
+
+def current_snapshot() -> SystemSnapshot:
+    """Latest published snapshot; never blocks"""
+    return get_system_sampler().snapshot
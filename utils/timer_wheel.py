@@ -0,0 +1,362 @@
+"""
+Hierarchical timer wheel and batched periodic scheduler.
+
+``HierarchicalTimerWheel`` files timers into levels of 64 slots, each level
+covering 64x the span of the one below, so scheduling and expiring a timer
+are O(1) regardless of how many routes are being watched.
+
+``PeriodicScheduler`` drives one wheel from a single asyncio task. On every
+tick it collects the keys that are due, groups them per job and hands each
+job one batch (for example all routes whose price check is due), so a
+thousand monitored routes become a handful of grouped queries instead of a
+thousand independent sleepers. Re-arming adds jitter so routes with the same
+interval drift apart instead of waking together.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from utils.websocket_fanout import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+
+BatchHandler = Callable[[List[Hashable]], Awaitable[Any]]
+
+
+@dataclass(eq=False)
+class TimerEntry:
+    """A timer filed in the wheel"""
+    job: str
+    key: Hashable
+    deadline: int
+    interval: Optional[float] = None
+    jitter: float = 0.0
+    cancelled: bool = False
+
+
+class HierarchicalTimerWheel:
+    """Multi-level timer wheel measured in integer ticks"""
+
+    def __init__(self, levels: int = 4):
+        self.levels = levels
+        self.current_tick = 0
+        self._wheels: List[List[List[TimerEntry]]] = [
+            [[] for _ in range(SLOTS)] for _ in range(levels)
+        ]
+        self._overflow: List[TimerEntry] = []
+        self._entries: Dict[Tuple[str, Hashable], TimerEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_span(self) -> int:
+        return 1 << (SLOT_BITS * self.levels)
+
+    def add(self, entry: TimerEntry) -> None:
+        """File a timer, replacing any pending one for the same job and key"""
+        previous = self._entries.get((entry.job, entry.key))
+        if previous is not None:
+            previous.cancelled = True
+        entry.deadline = max(entry.deadline, self.current_tick + 1)
+        self._entries[(entry.job, entry.key)] = entry
+        self._file(entry)
+
+    def _file(self, entry: TimerEntry) -> None:
+        delta = entry.deadline - self.current_tick
+        for level in range(self.levels):
+            if delta < 1 << (SLOT_BITS * (level + 1)):
+                slot = (entry.deadline >> (SLOT_BITS * level)) & SLOT_MASK
+                self._wheels[level][slot].append(entry)
+                return
+        self._overflow.append(entry)
+
+    def cancel(self, job: str, key: Hashable) -> bool:
+        entry = self._entries.pop((job, key), None)
+        if entry is None:
+            return False
+        entry.cancelled = True
+        return True
+
+    def keys(self, job: str) -> List[Hashable]:
+        return [key for entry_job, key in self._entries if entry_job == job]
+
+    def advance(self, target_tick: int) -> List[TimerEntry]:
+        """Move time forward to ``target_tick`` and return expired timers"""
+        expired: List[TimerEntry] = []
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Cascade higher levels whose slot boundary we just crossed
+            for level in range(1, self.levels):
+                if tick & ((1 << (SLOT_BITS * level)) - 1):
+                    break
+                slot = (tick >> (SLOT_BITS * level)) & SLOT_MASK
+                pending, self._wheels[level][slot] = self._wheels[level][slot], []
+                for entry in pending:
+                    if not entry.cancelled:
+                        self._file(entry)
+            if self._overflow and not tick & (self.max_span - 1):
+                pending, self._overflow = self._overflow, []
+                for entry in pending:
+                    if not entry.cancelled:
+                        self._file(entry)
+
+            slot = tick & SLOT_MASK
+            bucket, self._wheels[0][slot] = self._wheels[0][slot], []
+            for entry in bucket:
+                if entry.cancelled:
+                    continue
+                if entry.deadline > tick:
+                    self._file(entry)
+                    continue
+                self._entries.pop((entry.job, entry.key), None)
+                expired.append(entry)
+        return expired
+
+
+@dataclass
+class JobStats:
+    """Per-job batch metrics"""
+    batches: int = 0
+    keys: int = 0
+    errors: int = 0
+    max_batch: int = 0
+    recent_batch_sizes: Deque[int] = field(default_factory=lambda: deque(maxlen=100))
+    duration: LatencyWindow = field(default_factory=lambda: LatencyWindow(1000))
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = list(self.recent_batch_sizes)
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "errors": self.errors,
+            "max_batch": self.max_batch,
+            "mean_batch": sum(recent) / len(recent) if recent else 0.0,
+            "duration": self.duration.summary(),
+        }
+
+
+@dataclass
+class _Job:
+    handler: BatchHandler
+    max_batch: Optional[int]
+    max_in_flight: int
+    in_flight: int = 0
+    stats: JobStats = field(default_factory=JobStats)
+
+
+class PeriodicScheduler:
+    """Single-task scheduler running batched periodic jobs off a timer wheel"""
+
+    def __init__(self, tick_seconds: float = 1.0, levels: int = 4, seed: Optional[int] = None):
+        self.tick_seconds = tick_seconds
+        self.wheel = HierarchicalTimerWheel(levels)
+        self._jobs: Dict[str, _Job] = {}
+        self._random = random.Random(seed)
+        self._task: Optional[asyncio.Task] = None
+        self._handler_tasks: Set[asyncio.Task] = set()
+        self._started_at: Optional[float] = None
+        self.tick_lag = LatencyWindow(1000)
+        self.stats = {"ticks": 0, "due": 0, "skipped_busy": 0}
+
+    def register_job(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_batch: Optional[int] = None,
+        max_in_flight: int = 1,
+    ) -> None:
+        """
+        Register a batch handler.
+
+        ``max_batch`` splits large due sets into several calls;
+        ``max_in_flight`` bounds concurrent batches per job, and due keys that
+        find the job busy are pushed back one tick.
+        """
+        self._jobs[name] = _Job(handler, max_batch, max_in_flight)
+
+    def _ticks(self, seconds: float) -> int:
+        return max(1, int(round(seconds / self.tick_seconds)))
+
+    def _jittered(self, interval: float, jitter: float) -> float:
+        if jitter <= 0:
+            return interval
+        return interval * (1 + self._random.uniform(-jitter, jitter))
+
+    def schedule(
+        self,
+        job: str,
+        key: Hashable,
+        interval: Optional[float] = None,
+        jitter: float = 0.1,
+        first_delay: Optional[float] = None,
+    ) -> None:
+        """
+        Schedule ``key`` for ``job``; periodic when ``interval`` is given.
+
+        Without ``first_delay`` the first run lands at a random point within
+        one interval so keys scheduled together do not all fire together.
+        """
+        if job not in self._jobs:
+            raise KeyError(f"Unknown job: {job}")
+        if first_delay is None:
+            first_delay = self._random.uniform(0, interval) if interval else 0.0
+        self.wheel.add(
+            TimerEntry(
+                job=job,
+                key=key,
+                deadline=self.wheel.current_tick + self._ticks(first_delay),
+                interval=interval,
+                jitter=jitter,
+            )
+        )
+
+    def unschedule(self, job: str, key: Hashable) -> bool:
+        return self.wheel.cancel(job, key)
+
+    def scheduled_keys(self, job: str) -> List[Hashable]:
+        return self.wheel.keys(job)
+
+    def _rearm(self, entry: TimerEntry, delay_ticks: Optional[int] = None) -> None:
+        if delay_ticks is None:
+            if entry.interval is None:
+                return
+            delay_ticks = self._ticks(self._jittered(entry.interval, entry.jitter))
+        entry.deadline = self.wheel.current_tick + delay_ticks
+        entry.cancelled = False
+        self.wheel.add(entry)
+
+    def run_due(self, target_tick: int) -> Dict[str, List[Hashable]]:
+        """
+        Advance the wheel and dispatch due batches.
+
+        Returns the keys dispatched per job. Split out of the loop so tests
+        can drive time deterministically.
+        """
+        due = self.wheel.advance(target_tick)
+        self.stats["due"] += len(due)
+
+        grouped: Dict[str, List[TimerEntry]] = {}
+        for entry in due:
+            grouped.setdefault(entry.job, []).append(entry)
+
+        dispatched: Dict[str, List[Hashable]] = {}
+        for name, entries in grouped.items():
+            job = self._jobs.get(name)
+            if job is None:
+                continue
+            size = job.max_batch or len(entries)
+            for start in range(0, len(entries), size):
+                batch = entries[start:start + size]
+                if job.in_flight >= job.max_in_flight:
+                    # Previous batch still running; retry next tick
+                    self.stats["skipped_busy"] += len(batch)
+                    for entry in batch:
+                        self._rearm(entry, delay_ticks=1)
+                    continue
+                keys = [entry.key for entry in batch]
+                dispatched.setdefault(name, []).extend(keys)
+                for entry in batch:
+                    self._rearm(entry)
+                self._dispatch(name, job, keys)
+        return dispatched
+
+    def _dispatch(self, name: str, job: _Job, keys: List[Hashable]) -> None:
+        job.in_flight += 1
+        job.stats.batches += 1
+        job.stats.keys += len(keys)
+        job.stats.max_batch = max(job.stats.max_batch, len(keys))
+        job.stats.recent_batch_sizes.append(len(keys))
+
+        async def run():
+            started = time.monotonic()
+            try:
+                await job.handler(keys)
+            except Exception as e:
+                job.stats.errors += 1
+                logger.error(f"Scheduled job {name} failed for {len(keys)} keys: {e}")
+            finally:
+                job.in_flight -= 1
+                job.stats.duration.record(time.monotonic() - started)
+
+        task = asyncio.ensure_future(run())
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._started_at = loop.time() - self.wheel.current_tick * self.tick_seconds
+        while True:
+            next_tick_at = self._started_at + (self.wheel.current_tick + 1) * self.tick_seconds
+            await asyncio.sleep(max(0.0, next_tick_at - loop.time()))
+
+            now = loop.time()
+            target = int((now - self._started_at) / self.tick_seconds)
+            if target <= self.wheel.current_tick:
+                continue
+            self.tick_lag.record(max(0.0, now - (self._started_at + target * self.tick_seconds)))
+            self.stats["ticks"] += 1
+            try:
+                self.run_due(target)
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._handler_tasks):
+            task.cancel()
+        if self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tick_seconds": self.tick_seconds,
+            "current_tick": self.wheel.current_tick,
+            "scheduled": len(self.wheel),
+            "tick_lag": self.tick_lag.summary(),
+            "jobs": {name: job.stats.to_dict() for name, job in self._jobs.items()},
+        }
+
+
+_scheduler: Optional[PeriodicScheduler] = None
+
+
+def get_periodic_scheduler() -> PeriodicScheduler:
+    """Process-wide scheduler shared by monitoring and maintenance jobs"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PeriodicScheduler()
+    return _scheduler
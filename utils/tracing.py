@@ -0,0 +1,313 @@
+"""
+Lightweight span tracing for crawl workflows.
+
+A crawl opens a trace with ``tracer.trace("crawl", site=...)`` and every
+workflow step, retry delay, parse and DB write inside it opens a child with
+``tracer.span(name)``. The active span lives in a ``ContextVar``, so spans
+nest correctly across ``await`` and into tasks spawned by the crawl.
+
+Sampling is decided once at the root (head-based): an unsampled trace never
+sets the context variable, so every nested ``span()`` is a lookup returning
+a shared no-op - tracing costs nothing measurable with ``TRACE_SAMPLE_RATE=0``.
+Finished traces are kept in a small in-memory buffer for the waterfall view
+and, when ``TRACE_EXPORT_PATH`` is set, appended to a JSON-lines file whose
+records use OTLP JSON field names (``traceId``, ``startTimeUnixNano``, ...).
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans of one sampled root operation"""
+
+    __slots__ = ("trace_id", "spans", "wall_ns", "perf_ns")
+
+    def __init__(self):
+        self.trace_id = _new_id(128)
+        self.spans: List["Span"] = []
+        # Offsets come from the monotonic clock, anchored to wall time once
+        self.wall_ns = time.time_ns()
+        self.perf_ns = time.perf_counter_ns()
+
+    def now_ns(self) -> int:
+        return self.wall_ns + time.perf_counter_ns() - self.perf_ns
+
+    @property
+    def root(self) -> "Span":
+        return self.spans[0]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms
+
+
+class Span:
+    """One timed operation inside a trace"""
+
+    __slots__ = (
+        "trace", "name", "span_id", "parent_id", "attributes", "events",
+        "start_ns", "end_ns", "status", "error", "_token",
+    )
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = trace.now_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._token = None
+        trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else self.trace.now_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_ns": self.trace.now_ns(), "attributes": attributes})
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+        self.add_event("exception", type=type(error).__name__, message=str(error))
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "events": [
+                {"name": e["name"], "timeUnixNano": e["time_ns"], "attributes": e["attributes"]}
+                for e in self.events
+            ],
+            "status": {"code": "ERROR" if self.status == "error" else "OK", "message": self.error or ""},
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded when the current trace is not sampled"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _SpanScope:
+    """Makes a span current for the duration of a ``with`` block"""
+
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        span = self.span
+        span.end_ns = span.trace.now_ns()
+        if exc is not None and span.status != "error":
+            span.record_exception(exc)
+        _current_span.reset(span._token)
+        span._token = None
+        if span.parent_id is None:
+            self.tracer._finish(span.trace)
+        return False
+
+
+class JsonLinesExporter:
+    """Append finished spans to a file, one OTLP-shaped JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._lock, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+
+class Tracer:
+    """Head-sampled tracer with an in-memory buffer of recent traces"""
+
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[JsonLinesExporter] = None, buffer_size: int = 200):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.buffer_size = buffer_size
+        self._recent: "OrderedDict[str, Trace]" = OrderedDict()
+        self.stats = {"sampled": 0, "unsampled": 0, "exported": 0, "export_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def trace(self, name: str, force: bool = False, **attributes):
+        """Start a root span, or a child when a trace is already active"""
+        parent = _current_span.get()
+        if parent is not None:
+            return _SpanScope(self, Span(parent.trace, name, parent.span_id, attributes))
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            self.stats["unsampled"] += 1
+            return NOOP_SPAN
+        self.stats["sampled"] += 1
+        return _SpanScope(self, Span(Trace(), name, None, attributes))
+
+    def span(self, name: str, **attributes):
+        """Child of the current span; a no-op outside a sampled trace"""
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        return _SpanScope(self, Span(parent.trace, name, parent.span_id, attributes))
+
+    def current_span(self):
+        return _current_span.get() or NOOP_SPAN
+
+    def _finish(self, trace: Trace) -> None:
+        self._recent[trace.trace_id] = trace
+        while len(self._recent) > self.buffer_size:
+            self._recent.popitem(last=False)
+        if self.exporter is None:
+            return
+        spans = [span.to_otlp() for span in trace.spans]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._export(spans)
+        else:
+            loop.run_in_executor(None, self._export, spans)
+
+    def _export(self, spans: List[Dict[str, Any]]) -> None:
+        try:
+            self.exporter.export(spans)
+            self.stats["exported"] += 1
+        except Exception as e:
+            self.stats["export_errors"] += 1
+            logger.warning(f"Trace export failed: {e}")
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Newest finished traces first"""
+        summaries = []
+        for trace in reversed(self._recent.values()):
+            if trace.duration_ms < min_duration_ms:
+                continue
+            root = trace.root
+            summaries.append(
+                {
+                    "trace_id": trace.trace_id,
+                    "name": root.name,
+                    "attributes": root.attributes,
+                    "started_at": root.start_ns / 1e9,
+                    "duration_ms": round(trace.duration_ms, 3),
+                    "spans": len(trace.spans),
+                    "status": "error" if any(s.status == "error" for s in trace.spans) else "ok",
+                }
+            )
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def waterfall(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Spans of one trace in start order with offsets and depth"""
+        trace = self._recent.get(trace_id)
+        if trace is None:
+            return None
+        root = trace.root
+        depths = {root.span_id: 0}
+        rows = []
+        for span in sorted(trace.spans, key=lambda s: s.start_ns):
+            depth = depths.get(span.parent_id, -1) + 1
+            depths[span.span_id] = depth
+            rows.append(
+                {
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "depth": depth,
+                    "offset_ms": round((span.start_ns - root.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "attributes": span.attributes,
+                    "events": span.events,
+                    "status": span.status,
+                    "error": span.error,
+                }
+            )
+        return {
+            "trace_id": trace.trace_id,
+            "name": root.name,
+            "duration_ms": round(trace.duration_ms, 3),
+            "spans": rows,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "sample_rate": self.sample_rate,
+            "buffered": len(self._recent),
+            "exporter": str(self.exporter.path) if self.exporter else None,
+        }
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from ``config.MONITORING``"""
+    global _tracer
+    if _tracer is None:
+        from config import config
+
+        monitoring = config.MONITORING
+        exporter = JsonLinesExporter(monitoring.TRACE_EXPORT_PATH) if monitoring.TRACE_EXPORT_PATH else None
+        _tracer = Tracer(monitoring.TRACE_SAMPLE_RATE, exporter, monitoring.TRACE_BUFFER_SIZE)
+    return _tracer
@@ -0,0 +1,326 @@
+"""
+Encode-once WebSocket fan-out helpers.
+
+A broadcast is serialized a single time into an ``EncodedMessage`` and the
+same frame is then written to every subscriber concurrently, with a bounded
+wait so one stalled socket cannot hold up delivery to the rest.
+
+``ConnectionSendQueue`` gives each connection its own bounded outbound
+buffer and writer task, so broadcasting is a non-blocking enqueue and a slow
+consumer only ever backs up its own queue.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SendCallable = Callable[[str], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class EncodedMessage:
+    """A message serialized once and shared by every recipient"""
+    payload: bytes
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return len(self.payload)
+
+    @property
+    def text(self) -> str:
+        """UTF-8 view of the payload for text-frame transports"""
+        cached = self.__dict__.get("_text")
+        if cached is None:
+            cached = self.payload.decode("utf-8")
+            object.__setattr__(self, "_text", cached)
+        return cached
+
+
+def encode_message(data: Dict[str, Any]) -> EncodedMessage:
+    """Serialize a message dictionary once"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, default=str)
+    else:
+        payload = json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+    return EncodedMessage(payload=payload)
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of a single fan-out"""
+    delivered: List[Hashable] = field(default_factory=list)
+    failed: List[Tuple[Hashable, BaseException]] = field(default_factory=list)
+    timed_out: List[Hashable] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.delivered) + len(self.failed) + len(self.timed_out)
+
+
+async def fan_out(
+    targets: Iterable[Tuple[Hashable, SendCallable]],
+    message: EncodedMessage,
+    timeout: Optional[float] = 5.0,
+) -> FanOutResult:
+    """
+    Send one encoded message to many targets concurrently.
+
+    Args:
+        targets: ``(key, send)`` pairs where ``send`` accepts the frame text
+        message: Pre-encoded message
+        timeout: Maximum wait for the slowest target; stragglers are
+            cancelled and reported in ``timed_out``
+
+    Returns:
+        FanOutResult with per-key delivery outcome
+    """
+    start = time.monotonic()
+    result = FanOutResult()
+    text = message.text
+
+    tasks: Dict[asyncio.Task, Hashable] = {}
+    for key, send in targets:
+        tasks[asyncio.ensure_future(send(text))] = key
+
+    if not tasks:
+        return result
+
+    done, pending = await asyncio.wait(tasks.keys(), timeout=timeout)
+
+    for task in pending:
+        task.cancel()
+        result.timed_out.append(tasks[task])
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in done:
+        error = task.exception()
+        if error is None:
+            result.delivered.append(tasks[task])
+        else:
+            result.failed.append((tasks[task], error))
+
+    result.duration = time.monotonic() - start
+    return result
+
+
+class LatencyWindow:
+    """Bounded window of latency samples with percentile lookup"""
+
+    def __init__(self, max_samples: int = 10000):
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "samples": len(self._samples),
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+        }
+
+
+class OverflowPolicy(Enum):
+    """What a connection queue does when it reaches its high-water mark"""
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+@dataclass
+class SendQueueStats:
+    """Per-connection outbound queue metrics"""
+    enqueued: int = 0
+    sent: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    failed: int = 0
+    bytes_sent: int = 0
+    max_depth: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "bytes_sent": self.bytes_sent,
+            "max_depth": self.max_depth,
+        }
+
+
+class ConnectionSendQueue:
+    """
+    Bounded outbound queue with a dedicated writer task for one connection.
+
+    ``offer`` never awaits the socket. With ``COALESCE`` a message carrying a
+    ``coalesce_key`` (for example ``flight_updates:THR-MHD``) replaces any
+    queued message with the same key, so a lagging client receives only the
+    latest price per route. When the queue is full, ``DROP_OLDEST`` and
+    ``COALESCE`` discard the oldest queued frame; ``DISCONNECT`` evicts the
+    connection through ``on_evict``.
+    """
+
+    def __init__(
+        self,
+        send: SendCallable,
+        max_size: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        send_timeout: Optional[float] = 10.0,
+        max_consecutive_failures: int = 5,
+        on_evict: Optional[Callable[[str], Awaitable[Any]]] = None,
+        latency: Optional[LatencyWindow] = None,
+    ):
+        self._send = send
+        self.max_size = max_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.max_consecutive_failures = max_consecutive_failures
+        self._on_evict = on_evict
+        self._latency = latency
+
+        self._items: "OrderedDict[Hashable, EncodedMessage]" = OrderedDict()
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        self.stats = SendQueueStats()
+        self.evicted: Optional[str] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def start(self) -> None:
+        """Start the writer task on the running loop"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, message: EncodedMessage, coalesce_key: Optional[str] = None) -> bool:
+        """Enqueue without blocking; returns False if the message was not queued"""
+        if self.evicted:
+            return False
+
+        if (
+            self.policy == OverflowPolicy.COALESCE
+            and coalesce_key is not None
+            and coalesce_key in self._items
+        ):
+            self._items[coalesce_key] = message
+            self.stats.coalesced += 1
+            return True
+
+        if len(self._items) >= self.max_size:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                self.stats.dropped += 1
+                self._evict("send queue high-water mark reached")
+                return False
+            self._items.popitem(last=False)
+            self.stats.dropped += 1
+
+        if self.policy == OverflowPolicy.COALESCE and coalesce_key is not None:
+            key: Hashable = coalesce_key
+        else:
+            self._sequence += 1
+            key = self._sequence
+        self._items[key] = message
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, len(self._items))
+        self._wakeup.set()
+        return True
+
+    async def _write_loop(self) -> None:
+        while True:
+            if not self._items:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, message = self._items.popitem(last=False)
+            try:
+                if self.send_timeout:
+                    await asyncio.wait_for(self._send(message.text), self.send_timeout)
+                else:
+                    await self._send(message.text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.failed += 1
+                self._consecutive_failures += 1
+                logger.debug(f"Send failed: {e}")
+                if self._consecutive_failures >= self.max_consecutive_failures:
+                    self._evict(f"{self._consecutive_failures} consecutive send failures")
+                    return
+                continue
+
+            self._consecutive_failures = 0
+            self.stats.sent += 1
+            self.stats.bytes_sent += message.size
+            if self._latency is not None:
+                self._latency.record(time.monotonic() - message.created_at)
+
+    def _evict(self, reason: str) -> None:
+        if self.evicted:
+            return
+        self.evicted = reason
+        self._items.clear()
+        if self._on_evict is not None:
+            asyncio.ensure_future(self._on_evict(reason))
+
+    async def close(self) -> None:
+        """Stop the writer task and discard queued frames"""
+        self._items.clear()
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        self._writer = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current depth and counters"""
+        return {
+            "depth": self.depth,
+            "policy": self.policy.value,
+            "evicted": self.evicted,
+            **self.stats.to_dict(),
+        }